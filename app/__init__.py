@@ -53,6 +53,9 @@ def create_app(config_object=None):
     app.cli.add_command(app_commands.import_clients_cli)
     app.cli.add_command(app_commands.find_client_by_cpf_cli)
     app.cli.add_command(app_commands.find_client_by_email_cli)
+    app.cli.add_command(app_commands.reindex_client_search_cli)
+    app.cli.add_command(app_commands.rebuild_dashboard_counters_cli)
+    app.cli.add_command(app_commands.fill_template_pool_cli)
 
     db.init_app(app)
     csrf.init_app(app)
@@ -94,6 +97,35 @@ def create_app(config_object=None):
 
     app.register_blueprint(main_bp)
 
+    # Métricas Prometheus (/metrics) e sinais do Celery para a espera na fila
+    from metrics import instrumentar_celery, registrar_endpoint_metrics
+
+    registrar_endpoint_metrics(app, limiter)
+    instrumentar_celery()
+
+    # Reposição do pool de templates após cada retirada (ver template_pool)
+    import template_pool
+    from app.celery_app import celery_da_app
+    from app.tasks.document_generation import reabastecer_pool_task
+
+    template_pool.registrar_reabastecedor(
+        # Enfileira pela instância configurada do app, não pela corrente da
+        # thread (nas threads web é a instância "default", sem broker)
+        lambda template_id: celery_da_app(app).send_task(
+            reabastecer_pool_task.name, args=[template_id]
+        )
+    )
+
+    # Profiler sob demanda (header X-Profile assinado ou amostragem)
+    from request_profiler import instrumentar_app
+
+    instrumentar_app(app)
+
+    # Queries SQL por requisição e detector de N+1
+    import query_accounting
+
+    query_accounting.instrumentar_app(app)
+
     if not app.debug and not app.testing:
         if not os.path.exists("logs"):
             os.mkdir("logs")
@@ -165,7 +197,8 @@ def create_app(config_object=None):
                 datetime.datetime.utcnow() - g.start_time
             ).total_seconds() * 1000
             app.logger.info(
-                f"Response: {response.status_code} for {request.method} {request.path} in {response_time_ms:.2f}ms"
+                f"Response: {response.status_code} for {request.method} {request.path} in {response_time_ms:.2f}ms",
+                extra={"extra_fields": query_accounting.resumo_atual()},
             )
 
         return response
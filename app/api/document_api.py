@@ -39,13 +39,14 @@ def _create_error_response(
     return jsonify(response), status_code
 
 
-def _serialize_document_result(result: DocumentResult) -> Dict[str, str]:
+def _serialize_document_result(result: DocumentResult) -> Dict:
     """Serializa resultado do documento para JSON"""
     return {
         "tipo_documento": result.tipo_documento,
         "link": result.link,
         "id": result.id,
         "nome_arquivo": result.nome_arquivo,
+        "timings": result.timings,
     }
 
 
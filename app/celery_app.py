@@ -11,6 +11,9 @@ import os
 from celery import Celery
 from flask import Flask
 
+from query_accounting import contabilizar, instalar_eventos
+from request_profiler import perfilar_task
+
 
 def make_celery(app: Flask) -> Celery:
     """Cria instância Celery acoplada ao contexto Flask.
@@ -37,8 +40,25 @@ def make_celery(app: Flask) -> Celery:
         abstract = True
 
         def __call__(self, *args, **kwargs):
+            chamar = super().__call__
             with app.app_context():
-                return super().__call__(*args, **kwargs)
+                with contabilizar("task", self.name):
+                    # Perfilada só se sorteada por PROFILER_SAMPLE_RATE
+                    return perfilar_task(self, lambda: chamar(*args, **kwargs))
 
     celery.Task = AppContextTask  # type: ignore
+    instalar_eventos()
+    return celery
+
+
+def celery_da_app(app: Flask) -> Celery:
+    """Instância Celery do app, criada uma vez e guardada em ``app.extensions``.
+
+    Também a torna a instância corrente (por thread), usada pelas
+    ``shared_task`` ao enfileirar (``.delay``) e ao consultar resultados.
+    """
+    celery = app.extensions.get("celery")
+    if celery is None:
+        celery = app.extensions["celery"] = make_celery(app)
+    celery.set_current()
     return celery
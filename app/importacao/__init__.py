@@ -0,0 +1 @@
+# Módulo de importação de planilhas
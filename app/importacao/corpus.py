@@ -0,0 +1,115 @@
+"""
+Corpus rotulado de RGs e endereços no formato encontrado nas planilhas.
+
+Cada entrada é ``(texto_original, resultado_esperado)``. O resultado esperado
+é o correto para o cadastro, não necessariamente o que o parser atual produz:
+os erros aparecem na acurácia medida por ``scripts/benchmark_parsers.py``.
+Ao corrigir um caso novo vindo da importação, acrescente-o aqui.
+"""
+
+
+def _rg(numero, orgao=None, uf=None):
+    return {"numero": numero, "orgao": orgao, "uf": uf}
+
+
+def _end(logradouro, numero=None, complemento=None, bairro=None):
+    return {
+        "logradouro": logradouro,
+        "numero": numero,
+        "complemento": complemento,
+        "bairro": bairro,
+    }
+
+
+CORPUS_RG = [
+    ("12.345.678-9 SSP/SP", _rg("123456789", "SSP", "SP")),
+    ("12345678X SSP SP", _rg("12345678X", "SSP", "SP")),
+    ("12.345.678-X", _rg("12345678X")),
+    ("98.765.432-1 SSP/BA", _rg("987654321", "SSP", "BA")),
+    ("  5555555  ssp / ce ", _rg("5555555", "SSP", "CE")),
+    ("4.123.456 SESP PR", _rg("4123456", "SESP", "PR")),
+    ("4123456 SSP-PR", _rg("4123456", "SSP", "PR")),
+    ("1.234.567-8 SDS/PE", _rg("12345678", "SDS", "PE")),
+    ("12345678 IFP RJ", _rg("12345678", "IFP", "RJ")),
+    ("123 DETRAN RJ", _rg("123", "DETRAN", "RJ")),
+    ("00012345 DGPC GO", _rg("00012345", "DGPC", "GO")),
+    ("9876543 PC MG", _rg("9876543", "PC", "MG")),
+    ("2020202 SJS RS", _rg("2020202", "SJS", "RS")),
+    ("12345678 SSP DF 2a via", _rg("12345678", "SSP", "DF")),
+    ("1234567 SSP", _rg("1234567", "SSP")),
+    ("1234567 SSP/XX", _rg("1234567", "SSP")),
+    # Só a UF após o número: por convenção o órgão também recebe a UF
+    ("1234567 SP", _rg("1234567", "SP", "SP")),
+    ("12345 SP", _rg("12345", "SP", "SP")),
+    ("123456789", _rg("123456789")),
+    ("MG-12.345.678", _rg("MG12345678", None, "MG")),
+    ("M 1.234.567", _rg("M1234567")),
+    ("ABC", _rg(None)),
+]
+
+CORPUS_ENDERECOS = [
+    (
+        "Rua das Flores, 123, Apto 12 - Centro",
+        _end("Rua das Flores", "123", "Apto 12", "Centro"),
+    ),
+    ("Av. Brasil 1500", _end("Av. Brasil", "1500")),
+    ("Rua A, S/N, Jardim América", _end("Rua A", "S/N", None, "Jardim América")),
+    (
+        "Rua Quinze de Novembro, 45 - Vila Nova",
+        _end("Rua Quinze de Novembro", "45", None, "Vila Nova"),
+    ),
+    ("Rodovia BR 101 KM 23", _end("Rodovia BR 101", "KM 23")),
+    (
+        "Travessa B, 10, Casa 2, Bela Vista",
+        _end("Travessa B", "10", "Casa 2", "Bela Vista"),
+    ),
+    (
+        "Rua Sete de Setembro nº 200 apto 3",
+        _end("Rua Sete de Setembro", "200", "apto 3"),
+    ),
+    ("Alameda Santos, 1000, Bloco B", _end("Alameda Santos", "1000", "Bloco B")),
+    (
+        "Rua Tiradentes 55 - Jardim Paulista",
+        _end("Rua Tiradentes", "55", None, "Jardim Paulista"),
+    ),
+    ("Rua XV, 77, Fundos", _end("Rua XV", "77", "Fundos")),
+    (
+        "Avenida Paulista, 1578, Bela Vista",
+        _end("Avenida Paulista", "1578", None, "Bela Vista"),
+    ),
+    ("Rua Sem Nome", _end("Rua Sem Nome")),
+    ("Quadra 10 Lote 5", _end("Quadra 10 Lote 5")),
+    ("Rua João Pessoa, 12A, Centro", _end("Rua João Pessoa", "12A", None, "Centro")),
+    ("Rua 7, 350 - Setor Oeste", _end("Rua 7", "350", None, "Setor Oeste")),
+    (
+        "Rua Principal, sem número, Zona Rural",
+        _end("Rua Principal", "SEM NÚMERO", None, "Zona Rural"),
+    ),
+    (
+        "R. Dr. Pedro, 90, Sala 4, Centro Histórico",
+        _end("R. Dr. Pedro", "90", "Sala 4", "Centro Histórico"),
+    ),
+    (
+        "Av Getulio Vargas, 3000 Bairro Centro",
+        _end("Av Getulio Vargas", "3000", None, "Centro"),
+    ),
+    ("Rua do Comércio, 15, Loja 2", _end("Rua do Comércio", "15", "Loja 2")),
+    (
+        "Estrada Velha N° 12, Vila Rica",
+        _end("Estrada Velha", "12", None, "Vila Rica"),
+    ),
+    ("Rua Ipiranga 45, Vl Mariana", _end("Rua Ipiranga", "45", None, "Vl Mariana")),
+    (
+        "Rua Bahia, 800, Ap 101, Funcionários",
+        _end("Rua Bahia", "800", "Ap 101", "Funcionários"),
+    ),
+    (
+        "Rua Marechal Deodoro, 1234, Centro",
+        _end("Rua Marechal Deodoro", "1234", None, "Centro"),
+    ),
+    (
+        "Av. Afonso Pena, 3500 - Sala 1201 - Funcionários",
+        _end("Av. Afonso Pena", "3500", "Sala 1201", "Funcionários"),
+    ),
+    ("Rua Augusta, 2000 apto 51", _end("Rua Augusta", "2000", "apto 51")),
+]
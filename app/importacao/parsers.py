@@ -0,0 +1,237 @@
+"""
+Parsers de campos livres das planilhas (endereço completo e RG combinado).
+
+Os padrões são compilados uma única vez no carregamento do módulo, a checagem
+de UF usa ``frozenset`` e o resultado de cada string é memorizado em um cache
+LRU: nas planilhas o mesmo texto (ex.: "SSP/SP", endereços de um mesmo
+condomínio) se repete muitas vezes. O cache guarda tuplas imutáveis e cada
+chamada devolve um ``dict`` novo, então o chamador pode alterar o resultado.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from app.validators.estados import SIGLAS_UF
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos caches LRU (strings distintas memorizadas por parser)
+PARSER_CACHE_SIZE = 8192
+
+CAMPOS_RG = ("numero", "orgao", "uf")
+CAMPOS_ENDERECO = ("logradouro", "numero", "complemento", "bairro")
+
+_RG_VAZIO: Tuple[Optional[str], ...] = (None, None, None)
+_ENDERECO_VAZIO: Tuple[Optional[str], ...] = (None, None, None, None)
+
+# --- Padrões de RG ---
+# Remove . e - que estão entre dígitos ou entre dígito e X
+_RE_RG_SEPARADORES = re.compile(r"(?<=[\dX])[.-](?=[\dX])")
+_RE_ESPACOS = re.compile(r"\s+")
+# NUMERO ORGAO UF (e.g., "12345678X SSP SP"); ORGAO de 2 a 5 letras
+_RE_RG_NUM_ORGAO_UF = re.compile(r"([\d]+[X]?|[\dX]+)\s+([A-Z]{2,5})\s+([A-Z]{2})")
+# NUMERO ORGAO (e.g., "12345678X SSP", "12345678X SP")
+_RE_RG_NUM_ORGAO = re.compile(r"([\d]+[X]?|[\dX]+)\s+([A-Z]{2,})")
+# Apenas NUMERO (e.g., "12345678X")
+_RE_RG_NUM = re.compile(r"([\d]+[X]?|[\dX]+)")
+
+# --- Padrões de endereço ---
+# Número (pode ter letras como S/N, KM), no final ou seguido de vírgula/hífen
+_RE_END_NUMERO = re.compile(
+    r"(?:,\s*|\s+N[°º]?[.:]?\s*|\s+N(?:Ú|U)MERO|\s+NR\s+|\s+)\b([A-Z]*\d+[A-Z]*\b|S/N\b|SEM\s+N(?:Ú|U)MERO\b|KM\s*\d+)\b(?:\s*,|\s+-|\s+LOTE|\s+QUADRA|\s+APTO|\s+CASA|\s+BLOCO|$)",
+    re.IGNORECASE,
+)
+_RE_END_NUMERO_APOS_VIRGULA = re.compile(
+    r"^([A-Z]*\d+[A-Z]*|S/N|SEM NÚMERO)$", re.IGNORECASE
+)
+_RE_END_BAIRRO = re.compile(
+    r"(?:-\s+|\s*Bairro\s+|\s*Br\s+|\s*Vila\s+|\s*Vl\s+|\s*Jardim\s+|\s*Jd\s+|\s*Setor\s+|\s*St\s+)(.+)$",
+    re.IGNORECASE,
+)
+_RE_END_COMPLEMENTO = re.compile(
+    r"\b(APTO|APARTAMENTO|BLOCO|BL|CASA|CS|SALA|SL|FUNDOS|FDS|TERREO|LOJA|LJ|CONJUNTO|CJ|EDIFICIO|ED)\b",
+    re.IGNORECASE,
+)
+
+
+def parse_rg_completo(rg_str) -> Dict[str, Optional[str]]:
+    """
+    Separa um RG combinado ("12.345.678-9 SSP/SP") em número, órgão e UF.
+
+    Retorna ``{"numero", "orgao", "uf"}`` com ``None`` nos campos ausentes.
+    """
+    if not rg_str or not isinstance(rg_str, str):
+        return dict(zip(CAMPOS_RG, _RG_VAZIO))
+    return dict(zip(CAMPOS_RG, _parse_rg_cached(rg_str)))
+
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
+def _parse_rg_cached(rg_str: str) -> Tuple[Optional[str], ...]:
+    # Normalizar: remover pontos e hífens do número, substituir barras por espaços
+    rg_str_upper = _RE_RG_SEPARADORES.sub("", rg_str.upper())
+    rg_str_upper = _RE_ESPACOS.sub(" ", rg_str_upper.replace("/", " ")).strip()
+
+    # Padrões (do mais específico para o mais geral)
+    match = _RE_RG_NUM_ORGAO_UF.fullmatch(rg_str_upper)
+    if match:
+        num_cand, orgao_cand, uf_cand = match.groups()
+        if uf_cand in SIGLAS_UF:
+            return num_cand, orgao_cand, uf_cand
+
+    # UF pode estar faltando ou ser o próprio órgão se tiver 2 letras e for UF válida
+    match = _RE_RG_NUM_ORGAO.fullmatch(rg_str_upper)
+    if match:
+        num_cand, orgao_cand = match.groups()
+        if len(orgao_cand) == 2 and orgao_cand in SIGLAS_UF:
+            return num_cand, orgao_cand, orgao_cand
+        return num_cand, orgao_cand, None
+
+    match = _RE_RG_NUM.fullmatch(rg_str_upper)
+    if match:
+        return match.group(1), None, None
+
+    # Tentativa de extração mais liberal se os fullmatch falharem
+    parts = rg_str_upper.split()
+    if not parts:
+        logger.warning(
+            "RG string '%s' resultou em partes vazias após normalização.", rg_str
+        )
+        return _RG_VAZIO
+
+    num_cand_match = _RE_RG_NUM.match(parts[0])
+    if num_cand_match:
+        numero = num_cand_match.group(1)
+        remaining_parts = parts[1:]
+
+        if not remaining_parts:
+            return numero, None, None
+
+        if len(remaining_parts[-1]) == 2 and remaining_parts[-1] in SIGLAS_UF:
+            uf = remaining_parts[-1]
+            orgao_parts = remaining_parts[:-1]
+            # Caso como "12345 SP", órgão e UF são SP
+            orgao = " ".join(orgao_parts) if orgao_parts else uf
+            return numero, orgao, uf
+        return numero, " ".join(remaining_parts), None
+
+    logger.warning(
+        "Não foi possível parsear RG: '%s'. String normalizada: '%s'.",
+        rg_str,
+        rg_str_upper,
+    )
+    return _RG_VAZIO
+
+
+def parse_endereco_completo_antigos(endereco_str) -> Dict[str, Optional[str]]:
+    """
+    Separa um endereço em texto livre em logradouro, número, complemento e
+    bairro (heurístico; formato da aba "Antigos").
+    """
+    if not endereco_str or not isinstance(endereco_str, str):
+        return dict(zip(CAMPOS_ENDERECO, _ENDERECO_VAZIO))
+    return dict(zip(CAMPOS_ENDERECO, _parse_endereco_cached(endereco_str)))
+
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
+def _parse_endereco_cached(endereco_str: str) -> Tuple[Optional[str], ...]:
+    endereco_limpo = endereco_str.strip()
+
+    numero, complemento, bairro = None, None, None
+
+    match_numero = _RE_END_NUMERO.search(endereco_limpo)
+
+    parte_logradouro = endereco_limpo
+    parte_restante = ""
+
+    if match_numero:
+        numero = match_numero.group(1).upper()
+        # O que vem antes do número (ou do seu delimitador) é o logradouro
+        parte_logradouro = endereco_limpo[: match_numero.start()].strip()
+        # O que vem depois do número é o restante (complemento, bairro)
+        parte_restante = (
+            endereco_limpo[match_numero.end() :].strip().lstrip(",- ").strip()
+        )
+    else:
+        # Sem número explícito: se o trecho após a primeira vírgula parecer um
+        # número, ele separa logradouro e restante
+        primeira_virgula = parte_logradouro.find(",")
+        if primeira_virgula != -1:
+            teste_num_virgula = (
+                parte_logradouro[primeira_virgula + 1 :]
+                .lstrip()
+                .split(",")[0]
+                .split("-")[0]
+                .strip()
+            )
+            if _RE_END_NUMERO_APOS_VIRGULA.match(teste_num_virgula):
+                numero = teste_num_virgula.upper()
+                parte_restante = (
+                    parte_logradouro[parte_logradouro.find(numero) + len(numero) :]
+                    .lstrip(",- ")
+                    .strip()
+                )
+                parte_logradouro = parte_logradouro[:primeira_virgula].strip()
+
+    # Limpeza do logradouro: remover vírgulas no final se parte_restante ou numero foram encontrados
+    if (numero or parte_restante) and parte_logradouro.endswith(","):
+        parte_logradouro = parte_logradouro[:-1].strip()
+
+    logradouro = parte_logradouro
+
+    # Tentar extrair bairro e complemento do restante
+    if parte_restante:
+        # Formato: COMPLEMENTO - BAIRRO, COMPLEMENTO Bairro X, etc.
+        match_bairro = _RE_END_BAIRRO.search(parte_restante)
+        if match_bairro:
+            bairro = match_bairro.group(1).strip().rstrip(",").strip()
+            # O que sobra antes do bairro é o complemento
+            complemento = (
+                parte_restante[: match_bairro.start()].strip().rstrip(",-").strip()
+            )
+        else:
+            partes_restantes = [
+                p.strip() for p in parte_restante.split(",") if p.strip()
+            ]
+            if len(partes_restantes) > 1:
+                # Mais de um segmento após vírgula: o último é bairro, o resto complemento
+                bairro = partes_restantes[-1]
+                complemento = ", ".join(partes_restantes[:-1])
+            elif _RE_END_COMPLEMENTO.search(parte_restante):
+                complemento = parte_restante
+            elif len(parte_restante.split()) > 1 or len(parte_restante) > 15:
+                # Heurística de tamanho: textos mais longos tendem a ser bairro
+                bairro = parte_restante
+            else:
+                complemento = parte_restante
+
+    # Garantir que campos vazios sejam None
+    resultado = (
+        logradouro or None,
+        numero or None,
+        complemento or None,
+        bairro or None,
+    )
+    logger.debug(
+        "Parse Endereço: '%s' -> L: '%s', N: '%s', C: '%s', B: '%s'",
+        endereco_str,
+        *resultado,
+    )
+    return resultado
+
+
+def limpar_caches() -> None:
+    """Esvazia os caches LRU (ex.: entre importações em testes/benchmarks)."""
+    _parse_rg_cached.cache_clear()
+    _parse_endereco_cached.cache_clear()
+
+
+def estatisticas_cache() -> Dict[str, Tuple[int, int]]:
+    """Acertos e falhas dos caches LRU: ``{"rg": (hits, misses), ...}``."""
+    rg = _parse_rg_cached.cache_info()
+    endereco = _parse_endereco_cached.cache_info()
+    return {
+        "rg": (rg.hits, rg.misses),
+        "endereco": (endereco.hits, endereco.misses),
+    }
@@ -0,0 +1,316 @@
+"""
+Staging colunar para importação de planilhas grandes.
+
+A importação antiga materializava a aba inteira (``values`` da API) e, em
+seguida, um dicionário por linha com todos os cabeçalhos e outro com as
+chaves padronizadas. Para abas com dezenas de milhares de linhas isso faz o
+pico de memória crescer linearmente com o tamanho da planilha.
+
+Aqui as linhas são lidas em blocos (``chunk``) de tamanho fixo e cada bloco é
+guardado em colunas: para cada chave padronizada existe uma única lista de
+valores, endereçada pelo índice da coluna no cabeçalho. O mapeamento
+``MAP_RESPOSTAS``/``MAP_ANTIGOS`` é resolvido uma vez por aba (nome da coluna
+-> índice) e aplicado coluna a coluna, e os cabeçalhos são internados para
+que todas as referências compartilhem a mesma string.
+"""
+
+import logging
+import re
+import sys
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tamanho padrão do bloco lido por chamada à API do Sheets
+DEFAULT_CHUNK_SIZE = 2000
+
+# Chaves de metadados disponíveis em cada linha do staging
+CHAVE_ABA_ORIGEM = sys.intern("_source_sheet")
+CHAVE_LINHA_ORIGEM = sys.intern("_source_row_num")
+
+_AUSENTE = object()
+
+_RANGE_PATTERN = re.compile(
+    r"^(?P<aba>[^!]+)!(?P<col_ini>[A-Za-z]+)\d*:(?P<col_fim>[A-Za-z]+)\d*$"
+)
+
+
+def internar_cabecalhos(cabecalhos: Sequence[Any]) -> List[str]:
+    """Normaliza (strip) e interna os nomes das colunas do cabeçalho."""
+    return [sys.intern(str(cabecalho).strip()) for cabecalho in cabecalhos]
+
+
+class ColunaVazia(Sequence[str]):
+    """Coluna constante de strings vazias (coluna mapeada ausente na aba)."""
+
+    __slots__ = ("_tamanho",)
+
+    def __init__(self, tamanho: int):
+        self._tamanho = tamanho
+
+    @overload
+    def __getitem__(self, indice: int) -> str: ...
+
+    @overload
+    def __getitem__(self, indice: slice) -> "ColunaVazia": ...
+
+    def __getitem__(self, indice: Union[int, slice]) -> Union[str, "ColunaVazia"]:
+        if isinstance(indice, slice):
+            return ColunaVazia(len(range(self._tamanho)[indice]))
+        if not -self._tamanho <= indice < self._tamanho:
+            raise IndexError(indice)
+        return ""
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("",) * self._tamanho) if self._tamanho else iter(())
+
+
+class PlanoColunas:
+    """
+    Mapeamento de uma aba resolvido para índices de coluna.
+
+    Cada entrada é ``(indice_coluna, chave_padronizada)``; ``indice_coluna`` é
+    ``None`` quando a coluna do mapeador não existe no cabeçalho (o valor
+    resultante é string vazia, como no mapeamento por dicionário).
+    """
+
+    __slots__ = ("cabecalhos", "entradas", "num_colunas")
+
+    def __init__(self, cabecalhos: List[str], mapeador: Dict[str, str]):
+        self.cabecalhos = cabecalhos
+        self.num_colunas = len(cabecalhos)
+
+        # Em cabeçalhos duplicados prevalece a última coluna, como no dict por linha
+        indices = {}
+        for indice, nome in enumerate(cabecalhos):
+            indices[nome] = indice
+
+        self.entradas: List[Tuple[Optional[int], str]] = [
+            (indices.get(nome_coluna), sys.intern(chave))
+            for nome_coluna, chave in mapeador.items()
+        ]
+
+    def colunas_ausentes(self, mapeador: Dict[str, str]) -> List[str]:
+        """Colunas esperadas pelo mapeador que não aparecem no cabeçalho."""
+        presentes = set(self.cabecalhos)
+        return [nome for nome in mapeador if nome not in presentes]
+
+
+def compilar_plano(cabecalhos: Sequence[Any], mapeador: Dict[str, str]) -> PlanoColunas:
+    """Resolve o mapeador da aba (nome da coluna -> chave) para índices."""
+    return PlanoColunas(internar_cabecalhos(cabecalhos), mapeador)
+
+
+class LinhaStaging:
+    """
+    Visão leve de uma linha do bloco, com interface de leitura de ``dict``.
+
+    Não copia valores: cada acesso vai à coluna correspondente do bloco.
+    """
+
+    __slots__ = ("_bloco", "_pos")
+
+    def __init__(self, bloco: "BlocoStaging", pos: int):
+        self._bloco = bloco
+        self._pos = pos
+
+    def get(self, chave: str, default: Any = None) -> Any:
+        bloco = self._bloco
+        coluna = bloco.colunas.get(chave)
+        if coluna is not None:
+            return coluna[self._pos]
+        if chave == CHAVE_LINHA_ORIGEM:
+            return bloco.linhas_origem[self._pos]
+        if chave == CHAVE_ABA_ORIGEM:
+            return bloco.aba
+        return default
+
+    def __getitem__(self, chave: str) -> Any:
+        valor = self.get(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            raise KeyError(chave)
+        return valor
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._bloco.colunas or chave in (
+            CHAVE_ABA_ORIGEM,
+            CHAVE_LINHA_ORIGEM,
+        )
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Materializa a linha (usar apenas para logs de depuração/erro)."""
+        dados = {
+            chave: coluna[self._pos] for chave, coluna in self._bloco.colunas.items()
+        }
+        dados[CHAVE_ABA_ORIGEM] = self._bloco.aba
+        dados[CHAVE_LINHA_ORIGEM] = self._bloco.linhas_origem[self._pos]
+        return dados
+
+    def __repr__(self) -> str:
+        return repr(self.como_dict())
+
+
+class BlocoStaging:
+    """Bloco de linhas não vazias de uma aba, armazenado por colunas."""
+
+    __slots__ = ("aba", "colunas", "linhas_origem", "vazias")
+
+    def __init__(self, aba: str, linhas_origem: array, vazias: int):
+        self.aba = aba
+        self.colunas: Dict[str, Sequence[Any]] = {}
+        self.linhas_origem = linhas_origem
+        self.vazias = vazias
+
+    def __len__(self) -> int:
+        return len(self.linhas_origem)
+
+    def coluna(self, chave: str) -> Sequence[Any]:
+        """Retorna a coluna da chave (coluna vazia se não existir)."""
+        coluna = self.colunas.get(chave)
+        return coluna if coluna is not None else ColunaVazia(len(self))
+
+    def definir_coluna(self, chave: str, valores: Sequence[Any]) -> None:
+        if len(valores) != len(self):
+            raise ValueError(
+                f"Coluna '{chave}' com {len(valores)} valores para bloco de {len(self)} linhas"
+            )
+        self.colunas[sys.intern(chave)] = valores
+
+    def remover_coluna(self, chave: str) -> Sequence[Any]:
+        return self.colunas.pop(chave, ColunaVazia(len(self)))
+
+    def linhas(self) -> Iterator[LinhaStaging]:
+        for pos in range(len(self)):
+            yield LinhaStaging(self, pos)
+
+
+def _celula(linha: Sequence[Any], indice: int) -> str:
+    if indice < len(linha):
+        valor = linha[indice]
+        if valor is not None:
+            return str(valor).strip()
+    return ""
+
+
+def montar_bloco(
+    aba: str,
+    primeira_linha: int,
+    linhas: Sequence[Sequence[Any]],
+    plano: PlanoColunas,
+) -> BlocoStaging:
+    """
+    Converte um bloco de linhas brutas da API em um ``BlocoStaging``.
+
+    ``primeira_linha`` é o número (base 1, como na planilha) da primeira linha
+    do bloco. Linhas sem nenhum valor dentro das colunas do cabeçalho são
+    descartadas e contabilizadas em ``bloco.vazias``.
+    """
+    num_colunas = plano.num_colunas
+    mantidas = [
+        pos
+        for pos, linha in enumerate(linhas)
+        if any(
+            valor is not None and str(valor).strip() for valor in linha[:num_colunas]
+        )
+    ]
+
+    bloco = BlocoStaging(
+        aba,
+        array("l", (primeira_linha + pos for pos in mantidas)),
+        len(linhas) - len(mantidas),
+    )
+
+    total = len(mantidas)
+    for indice, chave in plano.entradas:
+        if indice is None:
+            bloco.colunas[chave] = ColunaVazia(total)
+        else:
+            bloco.colunas[chave] = [_celula(linhas[pos], indice) for pos in mantidas]
+
+    return bloco
+
+
+def dividir_coluna_nome(
+    bloco: BlocoStaging, chave_origem: str, chave_primeiro: str, chave_resto: str
+) -> None:
+    """Divide a coluna de nome completo em primeiro nome e restante (sobrenome)."""
+    primeiros: List[str] = []
+    restos: List[str] = []
+    for nome_completo in bloco.remover_coluna(chave_origem):
+        partes = nome_completo.split(" ", 1)
+        primeiros.append(partes[0].strip())
+        restos.append(partes[1].strip() if len(partes) > 1 else "")
+    bloco.definir_coluna(chave_primeiro, primeiros)
+    bloco.definir_coluna(chave_resto, restos)
+
+
+def derivar_colunas(
+    bloco: BlocoStaging,
+    chave_origem: str,
+    parser: Callable[[str], Dict[str, Any]],
+    destinos: Dict[str, str],
+) -> None:
+    """
+    Aplica ``parser`` a cada valor não vazio da coluna ``chave_origem`` e
+    distribui o resultado nas colunas ``destinos`` (chave do resultado ->
+    chave da coluna). Valores vazios resultam em ``None``.
+    """
+    saidas: Dict[str, List[Any]] = {destino: [] for destino in destinos.values()}
+    for valor in bloco.coluna(chave_origem):
+        resultado = parser(valor) if valor else {}
+        for campo, destino in destinos.items():
+            saidas[destino].append(resultado.get(campo))
+    for destino, valores in saidas.items():
+        bloco.definir_coluna(destino, valores)
+
+
+def dividir_range(full_sheet_range: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Separa um range A1 no formato ``"Aba!A:XFD"`` em ``(aba, coluna_inicial,
+    coluna_final)``. Retorna ``None`` para ranges que não podem ser paginados
+    por linha (ex.: só o nome da aba ou named ranges).
+    """
+    match = _RANGE_PATTERN.match(full_sheet_range.strip())
+    if not match:
+        return None
+    return match.group("aba"), match.group("col_ini"), match.group("col_fim")
+
+
+def ranges_paginados(
+    full_sheet_range: str, total_linhas: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[int, str]]:
+    """
+    Gera ``(primeira_linha, range_a1)`` para as linhas de dados (a partir da
+    linha 2) em janelas de ``chunk_size`` linhas.
+    """
+    partes = dividir_range(full_sheet_range)
+    if partes is None:
+        raise ValueError(f"Range não paginável: '{full_sheet_range}'")
+    aba, col_ini, col_fim = partes
+    for inicio in range(2, total_linhas + 1, chunk_size):
+        fim = min(inicio + chunk_size - 1, total_linhas)
+        yield inicio, f"{aba}!{col_ini}{inicio}:{col_fim}{fim}"
+
+
+def range_cabecalho(full_sheet_range: str) -> str:
+    """Range A1 da linha de cabeçalho."""
+    partes = dividir_range(full_sheet_range)
+    if partes is None:
+        raise ValueError(f"Range não paginável: '{full_sheet_range}'")
+    aba, col_ini, col_fim = partes
+    return f"{aba}!{col_ini}1:{col_fim}1"
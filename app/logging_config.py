@@ -1,22 +1,60 @@
 """
 Configuração de logging estruturado para melhor monitoramento e debugging.
+
+Os loggers só enfileiram os registros (``QueueHandler``); um
+``QueueListener`` em thread própria formata cada registro uma única vez e
+grava nos arquivos. Assim a escrita dos logs não soma latência às requisições
+nem às tasks. O JSON usa ``orjson`` quando instalado.
 """
 
+import atexit
+import copy
 import json
 import logging
 import logging.handlers
+import os
+import queue
 import sys
-from datetime import datetime
-from typing import Any, Dict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from query_accounting import resumo_atual
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def _dumps(dados: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(dados, default=str).decode("utf-8")
+    return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def _timestamp(record: logging.LogRecord) -> str:
+    # Momento em que o registro foi criado, não o da formatação na thread
+    return (
+        datetime.fromtimestamp(record.created, timezone.utc)
+        .replace(tzinfo=None)
+        .isoformat()
+    )
 
 
 class StructuredFormatter(logging.Formatter):
     """Formatter que gera logs em formato JSON estruturado"""
 
+    # Atributo do record onde o JSON fica guardado para os demais arquivos
+    ATRIBUTO_CACHE = "_json_estruturado"
+
     def format(self, record: logging.LogRecord) -> str:
         """Formata o log record em JSON estruturado"""
+        formatado = record.__dict__.get(self.ATRIBUTO_CACHE)
+        if formatado is not None:
+            return formatado
+
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _timestamp(record),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -32,8 +70,12 @@ class StructuredFormatter(logging.Formatter):
         # Adicionar exceção se existir
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_entry["exception"] = record.exc_text
 
-        return json.dumps(log_entry, ensure_ascii=False)
+        formatado = _dumps(log_entry)
+        setattr(record, self.ATRIBUTO_CACHE, formatado)
+        return formatado
 
 
 class RequestFormatter(logging.Formatter):
@@ -41,20 +83,142 @@ class RequestFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         """Formata logs de requisições com informações contextuais"""
+        # log_request_info manda os dados em extra_fields
+        campos = getattr(record, "extra_fields", None) or {}
+
+        def obter(chave, padrao="unknown"):
+            return getattr(record, chave, campos.get(chave, padrao))
+
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _timestamp(record),
             "level": record.levelname,
             "type": "request",
-            "ip": getattr(record, "ip", "unknown"),
-            "method": getattr(record, "method", "unknown"),
-            "path": getattr(record, "path", "unknown"),
-            "status_code": getattr(record, "status_code", "unknown"),
-            "duration": getattr(record, "duration", 0),
-            "user_agent": getattr(record, "user_agent", "unknown"),
-            "request_id": getattr(record, "request_id", "unknown"),
+            "ip": obter("ip"),
+            "method": obter("method"),
+            "path": obter("path"),
+            "status_code": obter("status_code"),
+            "duration": obter("duration", 0),
+            "user_agent": obter("user_agent"),
+            "request_id": obter("request_id"),
         }
 
-        return json.dumps(log_entry, ensure_ascii=False)
+        return _dumps(log_entry)
+
+
+class EnfileirarHandler(logging.handlers.QueueHandler):
+    """
+    ``QueueHandler`` que não formata na thread de quem loga.
+
+    Só congela a mensagem (os ``args`` podem mudar depois) e o traceback; a
+    formatação fica para o listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+
+class FiltroLoggers(logging.Filter):
+    """Aceita (ou recusa, com ``excluir``) registros de loggers e seus filhos"""
+
+    def __init__(self, nomes: Iterable[str], excluir: bool = False):
+        super().__init__()
+        self.prefixos = tuple(nomes)
+        self.excluir = excluir
+        self._cache: Dict[str, bool] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        aceito = self._cache.get(record.name)
+        if aceito is None:
+            nome = record.name
+            pertence = any(
+                nome == prefixo or nome.startswith(prefixo + ".")
+                for prefixo in self.prefixos
+            )
+            aceito = self._cache[nome] = pertence != self.excluir
+        return aceito
+
+
+# Listener ativo (um por processo) e os handlers de arquivo que ele alimenta
+_listener: Optional[logging.handlers.QueueListener] = None
+_handlers_listener: List[logging.Handler] = []
+_handlers_enfileirar: List[EnfileirarHandler] = []
+
+
+def _iniciar_listener(handlers: List[logging.Handler]) -> queue.SimpleQueue:
+    global _listener, _handlers_listener
+    fila: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        fila, *handlers, respect_handler_level=True
+    )
+    _handlers_listener = handlers
+    _listener.start()
+    return fila
+
+
+def parar_logging() -> None:
+    """Esvazia a fila e para a thread de escrita dos logs"""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        try:
+            listener.stop()
+        finally:
+            for handler in _handlers_listener:
+                handler.close()
+
+
+# A thread do listener não sobrevive ao fork (gunicorn --preload, Celery
+# prefork). Ela é parada antes do fork, para que nenhum arquivo esteja no meio
+# de uma escrita, e religada no pai; o filho cria a sua própria fila.
+
+
+def _parar_antes_fork() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _religar_no_pai() -> None:
+    if _listener is not None:
+        _listener.start()
+
+
+def _religar_no_filho() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener = None
+    fila = _iniciar_listener(_handlers_listener)
+    for handler in _handlers_enfileirar:
+        handler.queue = fila
+
+
+atexit.register(parar_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_parar_antes_fork,
+        after_in_parent=_religar_no_pai,
+        after_in_child=_religar_no_filho,
+    )
+
+
+def _arquivo(caminho, nivel, formatter, max_bytes, backup_count, filtro=None):
+    handler = logging.handlers.RotatingFileHandler(
+        caminho, maxBytes=max_bytes, backupCount=backup_count
+    )
+    handler.setLevel(nivel)
+    handler.setFormatter(formatter)
+    if filtro is not None:
+        handler.addFilter(filtro)
+    return handler
 
 
 def setup_logging(app, log_level: str = "INFO"):
@@ -64,11 +228,13 @@ def setup_logging(app, log_level: str = "INFO"):
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
 
     # Criar diretório de logs se não existir
-    import os
-
     if not os.path.exists("logs"):
         os.makedirs("logs")
 
+    # Uma nova configuração substitui o listener anterior
+    parar_logging()
+    _handlers_enfileirar.clear()
+
     # Configurar logger principal
     logger = logging.getLogger()
     logger.setLevel(numeric_level)
@@ -77,6 +243,21 @@ def setup_logging(app, log_level: str = "INFO"):
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
 
+    # Configurar loggers específicos: arquivo próprio, sem passar pelos
+    # arquivos do logger raiz
+    loggers_to_configure = [
+        "app.services.document_service",
+        "app.validators.cliente_validator",
+        "app.api.document_api",
+        "document_generator",
+    ]
+
+    # Um único formatter: o JSON de cada registro é gerado uma vez e
+    # reaproveitado por todos os arquivos em que ele é gravado
+    structured_formatter = StructuredFormatter()
+    fora_especificos = FiltroLoggers(loggers_to_configure, excluir=True)
+    handlers: List[logging.Handler] = []
+
     # Handler para console (desenvolvimento)
     if app.debug:
         console_handler = logging.StreamHandler(sys.stdout)
@@ -85,55 +266,71 @@ def setup_logging(app, log_level: str = "INFO"):
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        console_handler.addFilter(fora_especificos)
+        handlers.append(console_handler)
 
     # Handler para arquivo de logs estruturados
-    file_handler = logging.handlers.RotatingFileHandler(
-        "logs/app_structured.log", maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
+    handlers.append(
+        _arquivo(
+            "logs/app_structured.log",
+            numeric_level,
+            structured_formatter,
+            10 * 1024 * 1024,  # 10MB
+            5,
+            fora_especificos,
+        )
     )
-    file_handler.setLevel(numeric_level)
-    file_handler.setFormatter(StructuredFormatter())
-    logger.addHandler(file_handler)
 
     # Handler para logs de erro
-    error_handler = logging.handlers.RotatingFileHandler(
-        "logs/app_error.log", maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
+    handlers.append(
+        _arquivo(
+            "logs/app_error.log",
+            logging.ERROR,
+            structured_formatter,
+            10 * 1024 * 1024,  # 10MB
+            5,
+            fora_especificos,
+        )
     )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(StructuredFormatter())
-    logger.addHandler(error_handler)
 
-    # Handler para logs de requisições
-    request_handler = logging.handlers.RotatingFileHandler(
-        "logs/app_requests.log", maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
+    # Handler para logs de requisições (registros de log_request_info)
+    handlers.append(
+        _arquivo(
+            "logs/app_requests.log",
+            logging.INFO,
+            RequestFormatter(),
+            10 * 1024 * 1024,  # 10MB
+            5,
+            FiltroLoggers(["app.requests"]),
+        )
     )
-    request_handler.setLevel(logging.INFO)
-    request_handler.setFormatter(RequestFormatter())
-    logger.addHandler(request_handler)
 
-    # Configurar loggers específicos
-    loggers_to_configure = [
-        "app.services.document_service",
-        "app.validators.cliente_validator",
-        "app.api.document_api",
-        "document_generator",
-    ]
+    for logger_name in loggers_to_configure:
+        handlers.append(
+            _arquivo(
+                f'logs/{logger_name.replace(".", "_")}.log',
+                numeric_level,
+                structured_formatter,
+                5 * 1024 * 1024,  # 5MB
+                3,
+                FiltroLoggers([logger_name]),
+            )
+        )
+
+    fila = _iniciar_listener(handlers)
+    enfileirar = EnfileirarHandler(fila)
+    _handlers_enfileirar.append(enfileirar)
+    logger.addHandler(enfileirar)
 
     for logger_name in loggers_to_configure:
         specific_logger = logging.getLogger(logger_name)
         specific_logger.setLevel(numeric_level)
         # Não propagar para o logger raiz para evitar duplicação
         specific_logger.propagate = False
-
-        # Adicionar handlers específicos se necessário
-        specific_handler = logging.handlers.RotatingFileHandler(
-            f'logs/{logger_name.replace(".", "_")}.log',
-            maxBytes=5 * 1024 * 1024,  # 5MB
-            backupCount=3,
-        )
-        specific_handler.setLevel(numeric_level)
-        specific_handler.setFormatter(StructuredFormatter())
-        specific_logger.addHandler(specific_handler)
+        for handler in specific_logger.handlers[:]:
+            if isinstance(handler, EnfileirarHandler):
+                specific_logger.removeHandler(handler)
+        specific_logger.addHandler(enfileirar)
 
     # Log de inicialização
     app.logger.info(
@@ -141,8 +338,9 @@ def setup_logging(app, log_level: str = "INFO"):
         extra={
             "extra_fields": {
                 "log_level": log_level,
-                "handlers": len(logger.handlers),
+                "handlers": len(handlers),
                 "debug_mode": app.debug,
+                "json": "orjson" if orjson is not None else "json",
             }
         },
     )
@@ -173,6 +371,9 @@ def log_request_info(request, response, duration: float):
                 header
             ]
 
+    # Queries SQL da requisição (db_queries, db_time_ms, db_n_mais_1)
+    log_data.update(resumo_atual())
+
     logger.info("Requisição processada", extra={"extra_fields": log_data})
 
 
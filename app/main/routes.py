@@ -245,14 +245,14 @@ def gerar_documento_api():
         )
 
 
-from app.celery_app import make_celery
+from app.celery_app import celery_da_app
 
 
 @main_bp.route("/api/task-status/<task_id>", methods=["GET"])
 def task_status(task_id):
     """Consulta o status de uma tarefa Celery pelo seu ID."""
-    # Cria uma instância do Celery no contexto da requisição atual
-    celery_app = make_celery(current_app._get_current_object())
+    # Instância do Celery criada uma vez por app (não a cada consulta)
+    celery_app = celery_da_app(current_app._get_current_object())
     task = celery_app.AsyncResult(task_id)
 
     response_data = {
@@ -0,0 +1,179 @@
+"""Busca de clientes por CPF/CNPJ, email ou nome, com relevância.
+
+O termo é classificado antes de virar SQL:
+
+* só dígitos e pontuação de documento (``123.456``): prefixo de
+  ``cpf_digitos``/``cnpj_digitos``;
+* contém ``@``: prefixo de ``email_normalizado``;
+* o resto é nome: cada palavra precisa iniciar uma palavra do nome sem
+  acentos (``nome_normalizado``) ou, com relevância menor, da chave
+  fonética (``nome_fonetico``).
+
+As colunas normalizadas são mantidas por ``client_search.campos_busca`` e
+indexadas (btree de prefixo; GIN ``pg_trgm`` no PostgreSQL para as palavras
+do meio do nome). A relevância é calculada no banco (``CASE``) e a paginação
+é por número de página: buscas são lidas do topo e raramente passam das
+primeiras páginas.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, or_, select
+
+from client_search import (
+    PARTICULAS,
+    chave_fonetica_palavra,
+    normalizar_email,
+    normalizar_texto,
+    somente_digitos,
+)
+from models import RespostaForm, db
+
+from .listagens import TAMANHO_PAGINA
+
+# Dígitos mínimos para buscar por documento (evita varrer o índice inteiro)
+MINIMO_DIGITOS = 3
+MINIMO_CARACTERES = 2
+
+_RE_DOCUMENTO = re.compile(r"[\d.\-/\s]+")
+
+_tabela = RespostaForm.__table__
+
+
+@dataclass
+class ResultadoBusca:
+    itens: List[Dict[str, Any]]
+    pagina: int
+    tem_mais: bool
+    tipo: str
+
+    def como_json(self) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "tipo": self.tipo,
+            "itens": self.itens,
+            "pagina": self.pagina,
+            "proxima_pagina": self.pagina + 1 if self.tem_mais else None,
+        }
+
+
+def classificar_termo(termo: str) -> str:
+    """``documento``, ``email``, ``nome`` ou ``""`` (termo curto demais)"""
+    termo = (termo or "").strip()
+    if _RE_DOCUMENTO.fullmatch(termo):
+        return "documento" if len(somente_digitos(termo)) >= MINIMO_DIGITOS else ""
+    if "@" in termo:
+        return "email"
+    return "nome" if len(normalizar_texto(termo)) >= MINIMO_CARACTERES else ""
+
+
+def _inicio_de_palavra(coluna, prefixo: str):
+    return or_(coluna.startswith(prefixo), coluna.contains(" " + prefixo))
+
+
+def _filtro_documento(termo: str):
+    digitos = somente_digitos(termo)
+    cpf, cnpj = _tabela.c.cpf_digitos, _tabela.c.cnpj_digitos
+    filtro = or_(cpf.startswith(digitos), cnpj.startswith(digitos))
+    relevancia = case(
+        (or_(cpf == digitos, cnpj == digitos), 100),
+        else_=80,
+    )
+    return filtro, relevancia
+
+
+def _filtro_email(termo: str):
+    email = normalizar_email(termo)
+    coluna = _tabela.c.email_normalizado
+    filtro = coluna.startswith(email, autoescape=True)
+    relevancia = case((coluna == email, 100), else_=80)
+    return filtro, relevancia
+
+
+def _filtro_nome(termo: str):
+    texto = normalizar_texto(termo)
+    palavras = texto.split()
+    nome, fonetico = _tabela.c.nome_normalizado, _tabela.c.nome_fonetico
+    por_nome = and_(*(_inicio_de_palavra(nome, p) for p in palavras))
+    # A chave fonética guardada não tem as partículas ("da", "de"...)
+    chaves = [chave_fonetica_palavra(p) for p in palavras if p not in PARTICULAS]
+    chaves = [chave for chave in chaves if chave]
+    por_som = (
+        and_(*(_inicio_de_palavra(fonetico, chave) for chave in chaves))
+        if chaves
+        else por_nome
+    )
+    relevancia = case(
+        (nome == texto, 100),
+        (nome.startswith(texto), 90),
+        (por_nome, 70),
+        else_=40,
+    )
+    return or_(por_nome, por_som), relevancia
+
+
+_FILTROS = {
+    "documento": _filtro_documento,
+    "email": _filtro_email,
+    "nome": _filtro_nome,
+}
+
+
+def buscar_clientes(
+    termo: Optional[str], pagina: int = 1, limite: int = TAMANHO_PAGINA
+) -> ResultadoBusca:
+    """Clientes que casam com ``termo``, do mais para o menos relevante"""
+    pagina = max(1, pagina)
+    tipo = classificar_termo(termo or "")
+    if not tipo:
+        return ResultadoBusca([], pagina, False, tipo)
+
+    filtro, relevancia = _FILTROS[tipo](termo)
+    relevancia = relevancia.label("relevancia")
+    linhas = db.session.execute(
+        select(
+            _tabela.c.id,
+            _tabela.c.tipo_pessoa,
+            _tabela.c.primeiro_nome,
+            _tabela.c.sobrenome,
+            _tabela.c.razao_social,
+            _tabela.c.cpf,
+            _tabela.c.cnpj,
+            _tabela.c.email,
+            _tabela.c.telefone_celular,
+            _tabela.c.cidade,
+            _tabela.c.uf_endereco,
+            relevancia,
+        )
+        .where(filtro)
+        .order_by(
+            relevancia.desc(),
+            _tabela.c.nome_normalizado,
+            _tabela.c.id,
+        )
+        .limit(limite + 1)
+        .offset((pagina - 1) * limite)
+    ).all()
+
+    tem_mais = len(linhas) > limite
+    itens = []
+    for linha in linhas[:limite]:
+        item = dict(linha._mapping)
+        item["nome_completo"] = (
+            f"{item['primeiro_nome'] or ''} {item['sobrenome'] or ''}".strip()
+            or item["razao_social"]
+        )
+        itens.append(item)
+    return ResultadoBusca(itens, pagina, tem_mais, tipo)
+
+
+def buscar_por_cpf(cpf: str) -> Optional[RespostaForm]:
+    """Cliente com o CPF exato (qualquer formatação), pelo índice de dígitos"""
+    digitos = somente_digitos(cpf)
+    if not digitos:
+        return None
+    return RespostaForm.query.filter(RespostaForm.cpf_digitos == digitos).first()
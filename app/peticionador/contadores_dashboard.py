@@ -0,0 +1,282 @@
+"""Contadores do dashboard mantidos incrementalmente.
+
+O dashboard mostrava ``count(*)`` de clientes, petições e usuários a cada
+carregamento — varreduras completas no PostgreSQL. Os totais agora ficam na
+tabela ``contadores_dashboard`` (uma linha por chave) e são ajustados a
+cada commit: as linhas novas, removidas ou com
+``is_active``/``status_processamento`` alterados viram deltas (calculados no
+``before_flush``), guardados na sessão junto da transação em que foram
+gravados e aplicados com um único upsert depois do commit, numa transação
+própria e curta. Assim a transação do usuário não segura o lock das linhas
+de contador (disputadas por todas as requisições) até o fim. Deltas de uma
+transação ou savepoint desfeitos são descartados; os de um savepoint
+liberado passam para a transação de fora.
+
+Chaves:
+    clientes, peticoes, usuarios_ativos   totais
+    status:<status_processamento>         respostas do formulário por status
+    peticoes_dia:<AAAA-MM-DD>             petições geradas por dia (UTC)
+
+Escritas em lote pelo Core (``update()``/``delete()`` sem o ORM) não passam
+pelo flush, e uma falha ao aplicar os deltas depois do commit só é
+registrada no log; ``recalcular()`` (comando
+``flask rebuild-dashboard-counters``) refaz todos os contadores a partir das
+tabelas.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, SessionTransaction
+
+from models import RespostaForm, db
+
+from .models import Cliente, ContadorDashboard, PeticaoGerada, User
+
+# Dias exibidos no gráfico de petições por dia
+JANELA_DIAS = 14
+
+PREFIXO_STATUS = "status:"
+PREFIXO_DIA = "peticoes_dia:"
+SEM_STATUS = "sem status"
+
+_tabela = ContadorDashboard.__table__
+
+logger = logging.getLogger(__name__)
+
+# session.info: deltas do flush em curso e deltas pendentes por transação
+_CHAVE_DELTAS_FLUSH = "_deltas_contadores_flush"
+_CHAVE_DELTAS_PENDENTES = "_deltas_contadores"
+
+
+@dataclass
+class PainelContadores:
+    clientes: int = 0
+    peticoes: int = 0
+    usuarios_ativos: int = 0
+    status: Dict[str, int] = field(default_factory=dict)
+    # (AAAA-MM-DD, total) do dia mais antigo ao de hoje, com os dias zerados
+    peticoes_por_dia: List[Tuple[str, int]] = field(default_factory=list)
+
+
+def _chave_status(status) -> str:
+    return PREFIXO_STATUS + (status or SEM_STATUS)
+
+
+def _chave_dia(momento) -> str:
+    momento = momento or datetime.datetime.utcnow()
+    return PREFIXO_DIA + momento.strftime("%Y-%m-%d")
+
+
+def _ativo(valor) -> bool:
+    # None: ainda não flushado com o default da coluna (True)
+    return valor is not False
+
+
+def _mudanca(objeto, atributo):
+    """(valor antigo, valor novo) se ``atributo`` mudou neste flush"""
+    historico = inspect(objeto).attrs[atributo].history
+    if not historico.has_changes():
+        return None
+    antigo = historico.deleted[0] if historico.deleted else None
+    novo = historico.added[0] if historico.added else None
+    return antigo, novo
+
+
+@event.listens_for(User.is_active, "set", active_history=True)
+@event.listens_for(RespostaForm.status_processamento, "set", active_history=True)
+def _carregar_valor_antigo(objeto, valor, antigo, iniciador):
+    # active_history: com o objeto expirado (depois de um commit) o valor
+    # antigo é carregado antes da atribuição, senão o histórico não o teria
+    pass
+
+
+def deltas_do_flush(session) -> Counter:
+    """Ajustes dos contadores pelas linhas que o flush vai gravar"""
+    deltas: Counter = Counter()
+    for objeto, sinal in [(o, 1) for o in session.new] + [
+        (o, -1) for o in session.deleted
+    ]:
+        if isinstance(objeto, Cliente):
+            deltas["clientes"] += sinal
+        elif isinstance(objeto, PeticaoGerada):
+            deltas["peticoes"] += sinal
+            deltas[_chave_dia(objeto.criado_em)] += sinal
+        elif isinstance(objeto, User):
+            if _ativo(objeto.is_active):
+                deltas["usuarios_ativos"] += sinal
+        elif isinstance(objeto, RespostaForm):
+            deltas[_chave_status(objeto.status_processamento)] += sinal
+
+    for objeto in session.dirty:
+        if isinstance(objeto, User):
+            mudanca = _mudanca(objeto, "is_active")
+            if mudanca and _ativo(mudanca[0]) != _ativo(mudanca[1]):
+                deltas["usuarios_ativos"] += 1 if _ativo(mudanca[1]) else -1
+        elif isinstance(objeto, RespostaForm):
+            mudanca = _mudanca(objeto, "status_processamento")
+            if mudanca and mudanca[0] != mudanca[1]:
+                deltas[_chave_status(mudanca[0])] -= 1
+                deltas[_chave_status(mudanca[1])] += 1
+    return deltas
+
+
+def somar(conexao, deltas: Dict[str, int]) -> None:
+    """Soma os deltas às chaves (cria as que faltam) num único statement"""
+    linhas = [
+        {"chave": chave, "valor": delta}
+        for chave, delta in sorted(deltas.items())  # ordem fixa: sem deadlock
+        if delta
+    ]
+    if not linhas:
+        return
+    dialetos = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    inserir = dialetos.get(conexao.dialect.name)
+    if inserir is not None:
+        comando = inserir(_tabela)
+        conexao.execute(
+            comando.on_conflict_do_update(
+                index_elements=[_tabela.c.chave],
+                set_={"valor": _tabela.c.valor + comando.excluded.valor},
+            ),
+            linhas,
+        )
+        return
+    for linha in linhas:
+        resultado = conexao.execute(
+            update(_tabela)
+            .where(_tabela.c.chave == linha["chave"])
+            .values(valor=_tabela.c.valor + linha["valor"])
+        )
+        if resultado.rowcount == 0:
+            conexao.execute(insert(_tabela).values(**linha))
+
+
+def _transacao_atual(session) -> SessionTransaction:
+    # O savepoint mais interno, se houver; senão a transação da sessão
+    return session.get_nested_transaction() or session.get_transaction()
+
+
+def _pendentes(session) -> Dict[SessionTransaction, Counter]:
+    return session.info.setdefault(_CHAVE_DELTAS_PENDENTES, {})
+
+
+@event.listens_for(Session, "before_flush")
+def _calcular_deltas(session, contexto_flush, instancias):
+    # Antes do flush as linhas removidas ainda podem ser lidas (atributos
+    # expirados); os deltas só contam depois que o flush der certo
+    session.info[_CHAVE_DELTAS_FLUSH] = deltas_do_flush(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _guardar_deltas(session, contexto_flush):
+    deltas = session.info.pop(_CHAVE_DELTAS_FLUSH, None)
+    if deltas:
+        transacao = _transacao_atual(session)
+        _pendentes(session).setdefault(transacao, Counter()).update(deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_deltas(session):
+    # Disparado também ao liberar um savepoint, que ainda é a transação atual
+    transacao = _transacao_atual(session)
+    deltas = _pendentes(session).pop(transacao, None)
+    if not deltas:
+        return
+    if transacao.nested:
+        _pendentes(session).setdefault(transacao.parent, Counter()).update(deltas)
+        return
+    try:
+        with session.get_bind().begin() as conexao:
+            somar(conexao, deltas)
+    except Exception:
+        logger.exception(
+            "Falha ao aplicar deltas dos contadores do dashboard %s; "
+            "rode 'flask rebuild-dashboard-counters'",
+            dict(deltas),
+        )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _descartar_deltas(session, transacao):
+    # Depois de um commit os deltas já saíram de ``pendentes``; o que sobra
+    # é de transação ou savepoint desfeitos
+    pendentes = session.info.get(_CHAVE_DELTAS_PENDENTES)
+    if pendentes:
+        pendentes.pop(transacao, None)
+    if transacao.parent is None:
+        session.info.pop(_CHAVE_DELTAS_FLUSH, None)
+
+
+def ler(hoje: Optional[datetime.date] = None) -> PainelContadores:
+    """Todos os contadores do dashboard numa única query pequena"""
+    hoje = hoje or datetime.datetime.utcnow().date()
+    dias = [
+        (hoje - datetime.timedelta(days=n)).strftime("%Y-%m-%d")
+        for n in range(JANELA_DIAS - 1, -1, -1)
+    ]
+    linhas = db.session.execute(
+        select(_tabela.c.chave, _tabela.c.valor).where(
+            or_(
+                ~_tabela.c.chave.startswith(PREFIXO_DIA),
+                _tabela.c.chave >= PREFIXO_DIA + dias[0],
+            )
+        )
+    ).all()
+
+    painel = PainelContadores()
+    por_dia: Dict[str, int] = {}
+    for chave, valor in linhas:
+        if chave.startswith(PREFIXO_DIA):
+            por_dia[chave[len(PREFIXO_DIA) :]] = valor
+        elif chave.startswith(PREFIXO_STATUS):
+            if valor:
+                painel.status[chave[len(PREFIXO_STATUS) :]] = valor
+        elif chave in ("clientes", "peticoes", "usuarios_ativos"):
+            setattr(painel, chave, valor)
+    painel.peticoes_por_dia = [(dia, por_dia.get(dia, 0)) for dia in dias]
+    return painel
+
+
+def recalcular(conexao) -> Dict[str, int]:
+    """Refaz os contadores a partir das tabelas (o commit fica com quem chama)"""
+    clientes = Cliente.__table__
+    peticoes = PeticaoGerada.__table__
+    usuarios = User.__table__
+    respostas = RespostaForm.__table__
+
+    valores: Dict[str, int] = {
+        "clientes": conexao.execute(
+            select(func.count()).select_from(clientes)
+        ).scalar(),
+        "peticoes": conexao.execute(
+            select(func.count()).select_from(peticoes)
+        ).scalar(),
+        "usuarios_ativos": conexao.execute(
+            select(func.count())
+            .select_from(usuarios)
+            .where(or_(usuarios.c.is_active.is_(None), usuarios.c.is_active))
+        ).scalar(),
+    }
+    status = respostas.c.status_processamento
+    for valor, total in conexao.execute(select(status, func.count()).group_by(status)):
+        valores[_chave_status(valor)] = total
+    dia = func.date(peticoes.c.criado_em)
+    for valor, total in conexao.execute(
+        select(dia, func.count()).where(peticoes.c.criado_em.isnot(None)).group_by(dia)
+    ):
+        valores[PREFIXO_DIA + str(valor)[:10]] = total
+
+    conexao.execute(delete(_tabela))
+    conexao.execute(
+        insert(_tabela),
+        [{"chave": chave, "valor": valor} for chave, valor in sorted(valores.items())],
+    )
+    return valores
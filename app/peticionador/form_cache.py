@@ -0,0 +1,128 @@
+"""Cache das classes WTForms geradas a partir dos placeholders de um modelo.
+
+A classe do formulário e os metadados dos campos (rótulo, tipo, opções já
+decodificadas) ficam em memória por modelo, junto com a versão do conjunto de
+placeholders (``PeticaoModelo.placeholders_versao``) usada para montá-los.
+Toda escrita em ``peticao_placeholders`` incrementa essa versão (ver
+``placeholder_sync.tocar_versao``), então cada processo do gunicorn percebe a
+mudança ao ler o modelo — que as rotas já carregam — e remonta o formulário
+na próxima requisição; fora isso, as páginas de formulário não consultam os
+placeholders nem criam classes.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from flask_wtf import FlaskForm
+from sqlalchemy import select
+from wtforms import DateField, SelectField, StringField
+from wtforms.validators import DataRequired
+
+from models import db
+
+from .models import PeticaoPlaceholder
+
+# Modelos mantidos em memória por processo
+MAXIMO_MODELOS = 256
+
+
+@dataclass(frozen=True)
+class CampoFormulario:
+    chave: str
+    label: str
+    tipo_campo: str
+    opcoes: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class FormularioModelo:
+    """Classe do formulário e metadados dos campos de uma versão do modelo"""
+
+    modelo_id: int
+    versao: int
+    classe: type
+    campos: Tuple[CampoFormulario, ...]
+
+    @property
+    def chaves(self) -> List[str]:
+        return [campo.chave for campo in self.campos]
+
+
+def _opcoes(opcoes_json) -> Tuple[Tuple[str, str], ...]:
+    if not opcoes_json:
+        return ()
+    try:
+        return tuple((o, o) for o in json.loads(opcoes_json))
+    except Exception:
+        return ()
+
+
+def build_dynamic_form(campos):
+    """Gera dinamicamente uma classe WTForm com campos conforme placeholders."""
+    attrs = {"csrf_enabled": True}
+    for campo in campos:
+        field_kwargs = {"label": campo.label, "validators": [DataRequired()]}
+        if campo.tipo_campo == "date":
+            attrs[campo.chave] = DateField(**field_kwargs, format="%Y-%m-%d")
+        elif campo.tipo_campo == "select":
+            attrs[campo.chave] = SelectField(choices=list(campo.opcoes), **field_kwargs)
+        else:
+            attrs[campo.chave] = StringField(**field_kwargs)
+    return type("DynamicPeticaoForm", (FlaskForm,), attrs)
+
+
+def _carregar_campos(modelo_id: int) -> Tuple[CampoFormulario, ...]:
+    tabela = PeticaoPlaceholder.__table__
+    linhas = db.session.execute(
+        select(
+            tabela.c.chave,
+            tabela.c.label_form,
+            tabela.c.tipo_campo,
+            tabela.c.opcoes_json,
+        )
+        .where(tabela.c.modelo_id == modelo_id)
+        .order_by(tabela.c.ordem, tabela.c.id)
+    ).all()
+    return tuple(
+        CampoFormulario(
+            chave=chave,
+            label=label or chave.replace("_", " ").title(),
+            tipo_campo=tipo_campo,
+            opcoes=_opcoes(opcoes_json) if tipo_campo == "select" else (),
+        )
+        for chave, label, tipo_campo, opcoes_json in linhas
+    )
+
+
+_cache: "OrderedDict[int, FormularioModelo]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def formulario_do_modelo(modelo) -> FormularioModelo:
+    """Formulário da versão atual dos placeholders de ``modelo`` (cacheado)"""
+    versao = modelo.placeholders_versao or 0
+    with _lock:
+        em_cache = _cache.get(modelo.id)
+        if em_cache is not None and em_cache.versao == versao:
+            _cache.move_to_end(modelo.id)
+            return em_cache
+
+    campos = _carregar_campos(modelo.id)
+    formulario = FormularioModelo(modelo.id, versao, build_dynamic_form(campos), campos)
+    with _lock:
+        _cache[modelo.id] = formulario
+        _cache.move_to_end(modelo.id)
+        while len(_cache) > MAXIMO_MODELOS:
+            _cache.popitem(last=False)
+    return formulario
+
+
+def invalidar(modelo_id: int) -> None:
+    """Descarta o formulário do modelo neste processo"""
+    with _lock:
+        _cache.pop(modelo_id, None)
@@ -22,10 +22,8 @@ from wtforms.validators import (
 )
 from wtforms_sqlalchemy.fields import QuerySelectField
 
-from .models import (  # Importa AutoridadeTransito do peticionador.models
-    AutoridadeTransito,
-    Cliente,
-)
+from . import indice_autoridades
+from .models import Cliente
 
 
 class LoginForm(FlaskForm):
@@ -285,7 +283,8 @@ def cliente_query():
 
 
 def autoridade_transito_query():
-    return AutoridadeTransito.query.order_by(AutoridadeTransito.nome).all()
+    # Retrato em memória compartilhado com o autocomplete (sem query por render)
+    return indice_autoridades.autoridades()
 
 
 class PeticaoModeloForm(FlaskForm):
@@ -406,6 +405,7 @@ class GerarDocumentoSuspensaoForm(FlaskForm):
     autoridade_transito = QuerySelectField(
         "Autoridade de Trânsito Notificadora",
         query_factory=autoridade_transito_query,
+        get_pk=lambda autoridade: autoridade.id,
         get_label="nome",
         allow_blank=False,
         validators=[DataRequired(message="Selecione a autoridade de trânsito.")],
@@ -5,11 +5,14 @@ import re
 
 from googleapiclient.errors import HttpError
 
+import document_cache
+import template_pool
 from config import CONFIG
 
 # Importa os serviços do google_client que usa a conta de serviço
 from google_client import get_docs_service as gdocs_service_global
 from google_client import get_drive_service as gdrive_service_global
+from stage_timing import etapa
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +68,7 @@ def get_docs_service():
     return gdocs_service_global()
 
 
+@etapa("pasta")
 def find_or_create_client_folder(drive_service, client_folder_name):
     """
     Procura uma pasta do cliente no Google Drive dentro do PARENT_FOLDER_ID configurado.
@@ -187,6 +191,7 @@ def find_or_create_client_folder(drive_service, client_folder_name):
         return None
 
 
+@etapa("verificacao_existente")
 def check_document_exists(drive_service, file_name_base, target_folder_id):
     """
     Verifica se já existe um documento com o nome base fornecido na pasta de destino.
@@ -281,6 +286,7 @@ def check_document_exists(drive_service, file_name_base, target_folder_id):
         return False, None, None
 
 
+@etapa("copy_template_and_fill")
 def copy_template_and_fill(
     drive_service,
     docs_service,
@@ -288,16 +294,20 @@ def copy_template_and_fill(
     new_file_name,
     target_folder_id,
     replacements,
+    forcar_regeneracao=False,
 ):
     """
     Copia um template do Google Docs, move para a pasta de destino e substitui os placeholders.
-    Verifica primeiro se já existe um documento com o mesmo nome para evitar duplicação.
+    Verifica primeiro se já existe na pasta um documento com o mesmo conteúdo
+    (hash do template, da revisão e das substituições; ver document_cache) ou
+    com o mesmo nome, para evitar duplicação.
 
     template_id: ID do arquivo de template no Google Docs.
     new_file_name: Nome do novo arquivo a ser criado.
     target_folder_id: ID da pasta onde o novo arquivo será salvo.
     replacements: Dicionário com {placeholder_sem_chaves: valor_a_substituir}.
                   Ex: {'cliente.nome': 'João Silva', 'processo.numero': '123'}
+    forcar_regeneracao: Gera um novo documento mesmo que já exista um igual.
     Retorna o ID do novo documento e o link para visualização, ou (None, None) em caso de erro.
     """
     if not drive_service or not docs_service:
@@ -306,31 +316,64 @@ def copy_template_and_fill(
         )
         return None, None
 
+    new_document_id = None
     try:
-        # 0. Verificar se já existe um documento com o mesmo nome ou variação com data
-        document_exists, existing_doc_id, existing_doc_link = check_document_exists(
-            drive_service, new_file_name, target_folder_id
-        )
-
-        if document_exists and existing_doc_id and existing_doc_link:
+        # 0. Documento com o mesmo conteúdo já gerado nesta pasta
+        with etapa("cache"):
+            hash_documento, existente = document_cache.localizar(
+                drive_service,
+                docs_service,
+                template_id,
+                target_folder_id,
+                replacements,
+                forcar_regeneracao=forcar_regeneracao,
+            )
+        if existente:
             logger.info(
-                f"Documento '{new_file_name}' já existe (ID: {existing_doc_id}). Retornando referência ao documento existente."
+                f"Documento com o mesmo conteúdo já existe (ID: {existente['id']}). Retornando referência ao documento existente."
+            )
+            return existente["id"], existente.get("webViewLink")
+
+        # Verificar se já existe um documento com o mesmo nome ou variação com data
+        if not forcar_regeneracao:
+            document_exists, existing_doc_id, existing_doc_link = check_document_exists(
+                drive_service, new_file_name, target_folder_id
             )
-            return existing_doc_id, existing_doc_link
+
+            if document_exists and existing_doc_id and existing_doc_link:
+                logger.info(
+                    f"Documento '{new_file_name}' já existe (ID: {existing_doc_id}). Retornando referência ao documento existente."
+                )
+                return existing_doc_id, existing_doc_link
 
         # 1. Copiar o template se não existir documento
         # O nome do arquivo já deve ser o final, tratado pela rota que chama esta função.
-        copied_file_metadata = {"name": new_file_name, "parents": [target_folder_id]}
-        copied_file = (
-            drive_service.files()
-            .copy(
-                fileId=template_id,
-                body=copied_file_metadata,
-                fields="id, webViewLink",  # Solicitar webViewLink para retorno
-                supportsAllDrives=True,
+        copied_file_metadata = {
+            "name": new_file_name,
+            "parents": [target_folder_id],
+        }
+        with etapa("copia") as span:
+            # Cópia pronta do pool (template_pool), se houver; senão copia
+            copied_file = template_pool.retirar(
+                drive_service,
+                template_id,
+                new_file_name,
+                target_folder_id,
+                fields="id, webViewLink",
             )
-            .execute()
-        )
+            if copied_file:
+                span.atributos["pool"] = True
+            else:
+                copied_file = (
+                    drive_service.files()
+                    .copy(
+                        fileId=template_id,
+                        body=copied_file_metadata,
+                        fields="id, webViewLink",  # Solicitar webViewLink para retorno
+                        supportsAllDrives=True,
+                    )
+                    .execute()
+                )
         new_document_id = copied_file.get("id")
         new_document_link = copied_file.get("webViewLink")
 
@@ -380,10 +423,16 @@ def copy_template_and_fill(
                     }
                 )
 
+        resposta_preenchimento = None
         if requests_list:
-            docs_service.documents().batchUpdate(
-                documentId=new_document_id, body={"requests": requests_list}
-            ).execute()
+            with etapa("preenchimento"):
+                resposta_preenchimento = (
+                    docs_service.documents()
+                    .batchUpdate(
+                        documentId=new_document_id, body={"requests": requests_list}
+                    )
+                    .execute()
+                )
             logger.info(
                 f"Placeholders substituídos no documento {new_document_id} com {len(requests_list)} substituições."
             )
@@ -392,6 +441,15 @@ def copy_template_and_fill(
                 f"Nenhum placeholder para substituir no documento {new_document_id}"
             )
 
+        # O hash só vai para o documento já preenchido: antes disso uma
+        # geração concorrente reaproveitaria uma cópia pela metade
+        document_cache.marcar(
+            drive_service,
+            docs_service,
+            new_document_id,
+            hash_documento,
+            document_cache.revisao_da_resposta(resposta_preenchimento),
+        )
         return new_document_id, new_document_link
 
     except HttpError as error:
@@ -0,0 +1,230 @@
+"""Índice em memória das autoridades de trânsito (autocomplete e selects).
+
+As autoridades são poucas e mudam raramente, mas o autocomplete consulta a
+cada tecla. O processo guarda um retrato imutável da tabela com as palavras
+dos nomes normalizadas (sem acentos, minúsculas) num array ordenado; a busca
+por prefixo é um ``bisect`` por palavra digitada e o ranking sai de um
+``heapq.nsmallest`` — microssegundos, sem ir ao banco.
+
+O retrato é refeito quando a "impressão digital" da tabela muda
+(``count(*)`` e ``max(atualizado_em)``), verificada no máximo a cada
+``INTERVALO_VERIFICACAO`` segundos; os eventos do mapper forçam a verificação,
+após o commit, no processo que alterou a tabela, e os demais percebem no
+intervalo seguinte.
+O select do formulário de suspensão usa o mesmo retrato (``autoridades()``).
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from client_search import normalizar_texto
+from models import db
+
+from .models import AutoridadeTransito
+
+# Segundos entre verificações da impressão digital da tabela
+INTERVALO_VERIFICACAO = 5.0
+LIMITE_SUGESTOES = 10
+
+# Palavras normalizadas só têm [a-z0-9]; "{" vem depois de "z" em ASCII, então
+# tudo que começa com o prefixo fica antes de prefixo + "{"
+_FIM_DE_PREFIXO = "{"
+
+
+@dataclass(frozen=True)
+class AutoridadeResumo:
+    id: int
+    nome: str
+    cnpj: Optional[str]
+    logradouro: Optional[str]
+    cidade: Optional[str]
+    cep: Optional[str]
+    estado: Optional[str]
+
+    def como_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IndiceAutoridades:
+    """Retrato imutável das autoridades com as palavras dos nomes ordenadas"""
+
+    def __init__(self, autoridades: Sequence[AutoridadeResumo], impressao=None):
+        self.impressao = impressao
+        ordenadas = sorted(
+            ((normalizar_texto(a.nome), a) for a in autoridades),
+            key=lambda par: (par[0], par[1].id),
+        )
+        self.nomes = [nome for nome, _ in ordenadas]
+        self.autoridades = tuple(a for _, a in ordenadas)
+        # (palavra, índice da autoridade, posição da palavra no nome)
+        self._entradas = sorted(
+            (palavra, i, posicao)
+            for i, nome in enumerate(self.nomes)
+            for posicao, palavra in enumerate(nome.split())
+        )
+        self._palavras = [entrada[0] for entrada in self._entradas]
+
+    def __len__(self) -> int:
+        return len(self.autoridades)
+
+    def _por_prefixo(self, prefixo: str) -> Dict[int, int]:
+        """Autoridade -> posição da primeira palavra que começa com ``prefixo``"""
+        inicio = bisect_left(self._palavras, prefixo)
+        fim = bisect_left(self._palavras, prefixo + _FIM_DE_PREFIXO, inicio)
+        achados: Dict[int, int] = {}
+        for _, i, posicao in self._entradas[inicio:fim]:
+            if posicao < achados.get(i, posicao + 1):
+                achados[i] = posicao
+        return achados
+
+    def buscar(
+        self, termo: str, limite: int = LIMITE_SUGESTOES
+    ) -> List[AutoridadeResumo]:
+        """Autoridades cujo nome tem palavras começando com as do termo, seguidas
+        das que contêm o termo em qualquer ponto do nome, até ``limite``"""
+        consulta = normalizar_texto(termo)
+        if not consulta:
+            return []
+
+        candidatos: Optional[set] = None
+        posicao_inicial: Dict[int, int] = {}
+        for numero, palavra in enumerate(consulta.split()):
+            achados = self._por_prefixo(palavra)
+            if numero == 0:
+                posicao_inicial = achados
+            candidatos = (
+                set(achados) if candidatos is None else candidatos & achados.keys()
+            )
+            if not candidatos:
+                break
+        por_palavra = candidatos or set()
+        candidatos = set(por_palavra)
+        if len(candidatos) < limite:
+            # Completa com trechos do meio das palavras (como o ILIKE), que
+            # ficam depois dos casamentos por início de palavra: "tran" acha
+            # TRANSCON e também DETRAN-MG e BHTRANS
+            candidatos.update(
+                i for i, nome in enumerate(self.nomes) if consulta in nome
+            )
+
+        def relevancia(i: int) -> Tuple[int, int, int, int]:
+            nome = self.nomes[i]
+            if nome == consulta:
+                nivel = 0
+            elif nome.startswith(consulta):
+                nivel = 1
+            elif i in por_palavra:
+                nivel = 2
+            else:
+                nivel = 3
+            # Empate: palavra casada mais cedo, nome mais curto, ordem alfabética
+            return (nivel, posicao_inicial.get(i, len(nome)), len(nome), i)
+
+        melhores = heapq.nsmallest(limite, candidatos, key=relevancia)
+        return [self.autoridades[i] for i in melhores]
+
+
+def _impressao_digital() -> Tuple[int, Any]:
+    tabela = AutoridadeTransito.__table__
+    quantidade, ultima_alteracao = db.session.execute(
+        select(func.count(), func.max(tabela.c.atualizado_em))
+    ).one()
+    return quantidade, ultima_alteracao
+
+
+def _carregar(impressao) -> IndiceAutoridades:
+    tabela = AutoridadeTransito.__table__
+    linhas = db.session.execute(
+        select(
+            tabela.c.id,
+            tabela.c.nome,
+            tabela.c.cnpj,
+            tabela.c.logradouro,
+            tabela.c.cidade,
+            tabela.c.cep,
+            tabela.c.estado,
+        )
+    ).all()
+    return IndiceAutoridades([AutoridadeResumo(*linha) for linha in linhas], impressao)
+
+
+_indice: Optional[IndiceAutoridades] = None
+_verificado_em = 0.0
+# Incrementada por ``invalidar``: uma verificação que começou antes não conta
+_geracao = 0
+_lock = threading.Lock()
+
+
+def indice() -> IndiceAutoridades:
+    """Retrato atual (verifica a tabela no máximo a cada intervalo)"""
+    global _indice, _verificado_em
+    agora = time.monotonic()
+    atual = _indice
+    if atual is not None and agora - _verificado_em < INTERVALO_VERIFICACAO:
+        return atual
+
+    geracao = _geracao
+    impressao = _impressao_digital()
+    with _lock:
+        if _indice is None or _indice.impressao != impressao:
+            _indice = _carregar(impressao)
+        if geracao == _geracao:
+            _verificado_em = agora
+        return _indice
+
+
+def buscar(termo: str, limite: int = LIMITE_SUGESTOES) -> List[AutoridadeResumo]:
+    return indice().buscar(termo, limite)
+
+
+def autoridades() -> Tuple[AutoridadeResumo, ...]:
+    """Todas as autoridades em ordem alfabética (choices do formulário)"""
+    return indice().autoridades
+
+
+def invalidar() -> None:
+    """Força a verificação da tabela na próxima consulta deste processo"""
+    global _verificado_em, _geracao
+    _geracao += 1
+    _verificado_em = float("-inf")
+
+
+_CHAVE_AUTORIDADES_ALTERADAS = "_autoridades_alteradas"
+
+
+@event.listens_for(AutoridadeTransito, "after_insert")
+@event.listens_for(AutoridadeTransito, "after_update")
+@event.listens_for(AutoridadeTransito, "after_delete")
+def _autoridade_alterada(mapper, conexao, autoridade):
+    # Invalidar já no flush deixaria outra requisição recarregar o retrato
+    # antes do commit, sem a alteração, e guardá-lo por mais um intervalo
+    sessao = object_session(autoridade)
+    if sessao is None:
+        invalidar()
+        return
+    sessao.info[_CHAVE_AUTORIDADES_ALTERADAS] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao):
+    # Também disparado ao liberar um savepoint (e after_rollback ao desfazer
+    # um): só a transação de fora decide
+    if sessao.get_nested_transaction() is None and sessao.info.pop(
+        _CHAVE_AUTORIDADES_ALTERADAS, False
+    ):
+        invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracoes(sessao):
+    if sessao.get_nested_transaction() is None:
+        sessao.info.pop(_CHAVE_AUTORIDADES_ALTERADAS, None)
@@ -0,0 +1,263 @@
+"""Listagens paginadas por keyset (clientes, modelos e autoridades).
+
+Em vez de ``OFFSET``, cada página continua a partir da última linha da
+anterior: ``WHERE (data_criacao, id) < (:data, :id) ORDER BY data_criacao
+DESC, id DESC LIMIT n``, servido pelos índices compostos das colunas de
+ordenação. O custo de uma página não depende de quantas vieram antes.
+
+A posição vai para o cliente como um cursor opaco (base64 de um JSON com os
+valores das colunas de ordenação). Cada listagem seleciona só as colunas que
+a tela mostra e devolve dicionários prontos para o template e para o JSON da
+rolagem infinita.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from flask import url_for
+from sqlalchemy import DateTime, Integer, select, tuple_
+
+from models import FormularioGerado, db
+
+from .models import AutoridadeTransito, Cliente, PeticaoModelo
+
+TAMANHO_PAGINA = 50
+TAMANHO_MAXIMO_PAGINA = 200
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado"""
+
+
+@dataclass
+class Pagina:
+    itens: List[Dict[str, Any]]
+    proximo_cursor: Optional[str]
+
+    def como_json(self) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "itens": self.itens,
+            "proximo_cursor": self.proximo_cursor,
+        }
+
+
+def tamanho_pagina(valor) -> int:
+    """``limite`` da query string, dentro de [1, TAMANHO_MAXIMO_PAGINA]"""
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        return TAMANHO_PAGINA
+    return max(1, min(limite, TAMANHO_MAXIMO_PAGINA))
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    dados = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(dados).encode("utf-8")).decode("ascii")
+
+
+def _valor_do_cursor(coluna, valor):
+    """Valor do cursor convertido ao tipo da coluna (``ValueError`` se não casar)"""
+    if isinstance(coluna.type, DateTime):
+        if not isinstance(valor, str):
+            raise ValueError(valor)
+        return datetime.datetime.fromisoformat(valor)
+    if isinstance(coluna.type, Integer):
+        if not isinstance(valor, int) or isinstance(valor, bool):
+            raise ValueError(valor)
+        return valor
+    if not isinstance(valor, str):
+        raise ValueError(valor)
+    return valor
+
+
+def decodificar_cursor(cursor: str, colunas: Sequence) -> List[Any]:
+    """Valores do cursor, validados contra as colunas antes de irem à query."""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(valores, list) or len(valores) != len(colunas):
+            raise CursorInvalido(cursor)
+        return [
+            _valor_do_cursor(coluna, valor) for coluna, valor in zip(colunas, valores)
+        ]
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise CursorInvalido(cursor) from e
+
+
+def paginar_keyset(
+    colunas: Sequence,
+    ordenacao: Sequence,
+    cursor: Optional[str],
+    limite: int,
+    decrescente: bool = False,
+):
+    """
+    Linhas de uma página e o cursor da próxima (``None`` na última).
+
+    ``ordenacao`` deve terminar numa coluna única (o ``id``) para que a
+    posição seja inequívoca; as colunas de ordenação precisam ser não nulas.
+    """
+    consulta = select(*colunas)
+    if cursor:
+        chave = tuple_(*ordenacao)
+        posicao = tuple_(*decodificar_cursor(cursor, ordenacao))
+        consulta = consulta.where(chave < posicao if decrescente else chave > posicao)
+    consulta = consulta.order_by(
+        *(coluna.desc() if decrescente else coluna for coluna in ordenacao)
+    ).limit(limite + 1)
+    linhas = db.session.execute(consulta).all()
+
+    proximo = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        ultima = linhas[-1]._mapping
+        proximo = codificar_cursor([ultima[coluna] for coluna in ordenacao])
+    return linhas, proximo
+
+
+def _data(valor, formato: str) -> Optional[str]:
+    return valor.strftime(formato) if valor else None
+
+
+# --- Clientes ---
+
+# Colunas da lista de clientes (as que o modelo ainda não mapeia ficam de fora)
+COLUNAS_CLIENTES = (
+    "id",
+    "tipo_pessoa",
+    "primeiro_nome",
+    "sobrenome",
+    "nome_completo",
+    "razao_social",
+    "cpf",
+    "cnpj",
+    "email",
+    "telefone_celular",
+    "telefone_outro",
+    "endereco_cidade",
+    "endereco_estado",
+    "data_criacao",
+)
+
+
+def pagina_clientes(cursor: Optional[str], limite: int = TAMANHO_PAGINA) -> Pagina:
+    tabela = Cliente.__table__
+    colunas = [tabela.c[nome] for nome in COLUNAS_CLIENTES if nome in tabela.c]
+    linhas, proximo = paginar_keyset(
+        colunas,
+        (tabela.c.data_criacao, tabela.c.id),
+        cursor,
+        limite,
+        decrescente=True,
+    )
+    itens = []
+    for linha in linhas:
+        item = dict(linha._mapping)
+        tipo = item.get("tipo_pessoa")
+        item["tipo_pessoa"] = getattr(tipo, "name", tipo)
+        if not item.get("primeiro_nome") and item.get("nome_completo"):
+            item["primeiro_nome"] = item["nome_completo"]
+        item["data_criacao"] = _data(item.get("data_criacao"), "%d/%m/%Y %H:%M")
+        item["urls"] = {
+            "visualizar": url_for(
+                "peticionador.visualizar_cliente", cliente_id=item["id"]
+            ),
+            "editar": url_for("peticionador.editar_cliente", cliente_id=item["id"]),
+            "excluir": url_for("peticionador.excluir_cliente", cliente_id=item["id"]),
+        }
+        itens.append(item)
+    return Pagina(itens, proximo)
+
+
+# --- Modelos de petição ---
+
+
+def pagina_modelos(cursor: Optional[str], limite: int = TAMANHO_PAGINA) -> Pagina:
+    tabela = PeticaoModelo.__table__
+    linhas, proximo = paginar_keyset(
+        (tabela.c.id, tabela.c.nome, tabela.c.ativo, tabela.c.criado_em),
+        (tabela.c.criado_em, tabela.c.id),
+        cursor,
+        limite,
+        decrescente=True,
+    )
+    # Formulários de todos os modelos da página numa única query
+    formularios: Dict[int, List[Dict[str, str]]] = {}
+    if linhas:
+        consulta = (
+            select(
+                FormularioGerado.modelo_id, FormularioGerado.nome, FormularioGerado.slug
+            )
+            .where(FormularioGerado.modelo_id.in_([linha.id for linha in linhas]))
+            .order_by(FormularioGerado.id)
+        )
+        for modelo_id, nome, slug in db.session.execute(consulta):
+            formularios.setdefault(modelo_id, []).append(
+                {
+                    "nome": nome,
+                    "slug": slug,
+                    "url": url_for(
+                        "peticionador.preencher_formulario_dinamico", slug=slug
+                    ),
+                    "url_excluir": url_for(
+                        "peticionador.excluir_formulario_dinamico", slug=slug
+                    ),
+                }
+            )
+    itens = [
+        {
+            "id": linha.id,
+            "nome": linha.nome,
+            "ativo": bool(linha.ativo),
+            "criado_em": _data(linha.criado_em, "%d/%m/%Y"),
+            "formularios_gerados": formularios.get(linha.id, []),
+            "urls": {
+                "editar": url_for("peticionador.editar_modelo", modelo_id=linha.id),
+                "placeholders": url_for(
+                    "peticionador.placeholders_modelo", modelo_id=linha.id
+                ),
+                "gerar": url_for(
+                    "peticionador.criar_formulario_dinamico", modelo_id=linha.id
+                ),
+            },
+        }
+        for linha in linhas
+    ]
+    return Pagina(itens, proximo)
+
+
+# --- Autoridades de trânsito ---
+
+
+def pagina_autoridades(cursor: Optional[str], limite: int = TAMANHO_PAGINA) -> Pagina:
+    tabela = AutoridadeTransito.__table__
+    linhas, proximo = paginar_keyset(
+        (tabela.c.id, tabela.c.nome, tabela.c.cidade, tabela.c.estado),
+        (tabela.c.nome, tabela.c.id),
+        cursor,
+        limite,
+    )
+    itens = [
+        {
+            "id": linha.id,
+            "nome": linha.nome,
+            "cidade": linha.cidade,
+            "estado": linha.estado,
+            "urls": {
+                "editar": url_for(
+                    "peticionador.editar_autoridade", autoridade_id=linha.id
+                ),
+                "excluir": url_for(
+                    "peticionador.excluir_autoridade", autoridade_id=linha.id
+                ),
+            },
+        }
+        for linha in linhas
+    ]
+    return Pagina(itens, proximo)
@@ -39,6 +39,10 @@ class TipoPessoaEnum(enum.Enum):
 
 class Cliente(db.Model):
     __tablename__ = "clientes_peticionador"
+    # Paginação por keyset da listagem (mais recentes primeiro)
+    __table_args__ = (
+        db.Index("ix_clientes_peticionador_data_criacao_id", "data_criacao", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tipo_pessoa = db.Column(db.Enum(TipoPessoaEnum), nullable=False)
@@ -51,6 +55,9 @@ class Cliente(db.Model):
     razao_social = db.Column(db.String(128))
     cnpj = db.Column(db.String(18), unique=True)
     representante_nome = db.Column(db.String(128))
+    data_criacao = db.Column(
+        db.DateTime, nullable=False, default=datetime.datetime.utcnow
+    )
 
     def __repr__(self):
         return f"<Cliente {self.nome_completo or self.razao_social}>"
@@ -58,6 +65,7 @@ class Cliente(db.Model):
 
 class AutoridadeTransito(db.Model):
     __tablename__ = "autoridades_transito"
+    __table_args__ = (db.Index("ix_autoridades_transito_nome_id", "nome", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(255), nullable=False, unique=True)
@@ -68,6 +76,14 @@ class AutoridadeTransito(db.Model):
     cidade = db.Column(db.String(100), nullable=True)
     estado = db.Column(db.String(2), nullable=True)
     cep = db.Column(db.String(9), nullable=True)
+    # Impressão digital da tabela para o índice em memória (indice_autoridades)
+    atualizado_em = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+        index=True,
+    )
 
     def __repr__(self):
         return f"<AutoridadeTransito {self.nome}>"
@@ -76,6 +92,7 @@ class AutoridadeTransito(db.Model):
 # --- Novos Modelos para gerenciamento de templates de petição ---
 class PeticaoModelo(db.Model):
     __tablename__ = "peticao_modelos"
+    __table_args__ = (db.Index("ix_peticao_modelos_criado_em_id", "criado_em", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
@@ -84,6 +101,10 @@ class PeticaoModelo(db.Model):
     descricao = db.Column(db.Text)
     ativo = db.Column(db.Boolean, default=True)
     criado_em = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Incrementada a cada alteração dos placeholders (cache dos formulários)
+    placeholders_versao = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
     def __repr__(self):
         return f"<PeticaoModelo {self.nome}>"
@@ -124,9 +145,25 @@ class PeticaoGerada(db.Model):
     google_id = db.Column(db.String(64), nullable=False)
     link = db.Column(db.String(255))
     criado_em = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Duração de cada etapa da geração (bloco "timings" de stage_timing)
+    timings = db.Column(db.JSON, nullable=True)
 
     # Relationship (opcional, lazy='joined' para facilitar queries)
     cliente = db.relationship("Cliente", backref=db.backref("peticoes", lazy=True))
 
     def __repr__(self):
         return f"<PeticaoGerada {self.modelo} - {self.cliente_id}>"
+
+
+class ContadorDashboard(db.Model):
+    """Contadores do dashboard, mantidos a cada commit (ver contadores_dashboard)"""
+
+    __tablename__ = "contadores_dashboard"
+
+    # "clientes", "peticoes", "usuarios_ativos", "status:<status>",
+    # "peticoes_dia:<AAAA-MM-DD>"
+    chave = db.Column(db.String(96), primary_key=True)
+    valor = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<ContadorDashboard {self.chave}={self.valor}>"
@@ -0,0 +1,273 @@
+"""Sincronização em lote dos placeholders de um modelo de petição.
+
+Os placeholders do modelo são lidos uma única vez e comparados com as chaves
+extraídas do template (``diff_placeholders``); o plano resultante é aplicado
+com um ``INSERT``, um ``UPDATE`` e um ``DELETE`` em lote (executemany), numa
+única transação — independente de quantos placeholders o template tem.
+
+Renomeações preservam a configuração do campo (tipo, rótulo, opções): uma
+chave removida e uma nova só são consideradas a mesma quando diferem apenas
+em caixa/separadores. Qualquer outra troca vira remoção da chave antiga e
+inclusão da nova com tipo e opções padrão — a posição no template não basta
+para dizer que dois campos são o mesmo.
+
+Toda escrita incrementa ``PeticaoModelo.placeholders_versao`` uma vez (nas
+alterações feitas pelo ORM, uma vez por flush e por modelo), o que invalida
+os formulários cacheados em ``form_cache``.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session, object_session
+
+from models import db
+
+from . import form_cache
+from .models import PeticaoModelo, PeticaoPlaceholder
+
+_RE_SEPARADORES = re.compile(r"[\W_]+")
+
+_tabela = PeticaoPlaceholder.__table__
+
+
+def label_padrao(chave: str) -> str:
+    """Rótulo gerado para uma chave nova (``processo_numero`` → ``Processo Numero``)"""
+    return chave.replace("_", " ").title()
+
+
+def _normalizar(chave: str) -> str:
+    return _RE_SEPARADORES.sub("", chave.lower())
+
+
+@dataclass
+class PlaceholderAtual:
+    id: int
+    chave: str
+    label_form: Optional[str]
+    ordem: Optional[int]
+
+
+@dataclass
+class PlanoSincronizacao:
+    """Diferença entre os placeholders salvos e as chaves do template"""
+
+    adicionados: List[Tuple[str, int]] = field(default_factory=list)
+    removidos: List[PlaceholderAtual] = field(default_factory=list)
+    # (placeholder, chave nova)
+    renomeados: List[Tuple[PlaceholderAtual, str]] = field(default_factory=list)
+    # id -> nova ordem (inclui os renomeados que mudaram de posição)
+    reordenados: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def vazio(self) -> bool:
+        return not (
+            self.adicionados or self.removidos or self.renomeados or self.reordenados
+        )
+
+    def resumo(self) -> Dict[str, int]:
+        return {
+            "adicionados": len(self.adicionados),
+            "removidos": len(self.removidos),
+            "renomeados": len(self.renomeados),
+            "reordenados": len(self.reordenados),
+        }
+
+
+def carregar_placeholders(modelo_id: int) -> List[PlaceholderAtual]:
+    """Placeholders do modelo em ordem, numa única query (sem objetos ORM)"""
+    linhas = db.session.execute(
+        select(_tabela.c.id, _tabela.c.chave, _tabela.c.label_form, _tabela.c.ordem)
+        .where(_tabela.c.modelo_id == modelo_id)
+        .order_by(_tabela.c.ordem, _tabela.c.id)
+    ).all()
+    return [PlaceholderAtual(*linha) for linha in linhas]
+
+
+def diff_placeholders(
+    atuais: Sequence[PlaceholderAtual], chaves: Iterable[str]
+) -> PlanoSincronizacao:
+    """Compara os placeholders salvos com as chaves extraídas (em ordem)"""
+    chaves = list(dict.fromkeys(chaves))
+    posicao = {chave: idx for idx, chave in enumerate(chaves, start=1)}
+    plano = PlanoSincronizacao()
+
+    por_chave: Dict[str, PlaceholderAtual] = {}
+    sobrando: List[PlaceholderAtual] = []
+    for ph in atuais:
+        if ph.chave in posicao and ph.chave not in por_chave:
+            por_chave[ph.chave] = ph
+        else:
+            sobrando.append(ph)
+    novas = [chave for chave in chaves if chave not in por_chave]
+
+    # Renomeação só entre chaves que diferem em caixa/separadores
+    sobrando_por_forma: Dict[str, PlaceholderAtual] = {}
+    for ph in sobrando:
+        sobrando_por_forma.setdefault(_normalizar(ph.chave), ph)
+    for chave in novas:
+        ph = sobrando_por_forma.pop(_normalizar(chave), None)
+        if ph is not None:
+            plano.renomeados.append((ph, chave))
+        else:
+            plano.adicionados.append((chave, posicao[chave]))
+    pareados = {ph.id for ph, _ in plano.renomeados}
+    plano.removidos = [ph for ph in sobrando if ph.id not in pareados]
+
+    for ph, chave in plano.renomeados:
+        por_chave[chave] = ph
+    for chave, ph in por_chave.items():
+        if ph.ordem != posicao[chave]:
+            plano.reordenados[ph.id] = posicao[chave]
+    return plano
+
+
+def tocar_versao(modelo_id: int, conexao=None) -> None:
+    """Incrementa a versão dos placeholders do modelo (invalida formulários)"""
+    modelos = PeticaoModelo.__table__
+    comando = (
+        update(modelos)
+        .where(modelos.c.id == modelo_id)
+        .values(placeholders_versao=func.coalesce(modelos.c.placeholders_versao, 0) + 1)
+    )
+    if conexao is not None:
+        conexao.execute(comando)
+    else:
+        db.session.execute(comando)
+    form_cache.invalidar(modelo_id)
+
+
+def aplicar_plano(modelo_id: int, plano: PlanoSincronizacao) -> None:
+    """Aplica o plano com statements em lote; o commit fica com quem chama"""
+    tocar_versao(modelo_id)
+    if plano.adicionados:
+        db.session.execute(
+            insert(_tabela),
+            [
+                {
+                    "modelo_id": modelo_id,
+                    "chave": chave,
+                    "tipo_campo": "string",
+                    "label_form": label_padrao(chave),
+                    "ordem": ordem,
+                }
+                for chave, ordem in plano.adicionados
+            ],
+        )
+
+    if plano.renomeados:
+        db.session.execute(
+            update(_tabela)
+            .where(_tabela.c.id == bindparam("b_id"))
+            .values(chave=bindparam("b_chave"), label_form=bindparam("b_label")),
+            [
+                {
+                    "b_id": ph.id,
+                    "b_chave": chave,
+                    # Só troca o rótulo se ainda for o gerado para a chave antiga
+                    "b_label": (
+                        label_padrao(chave)
+                        if ph.label_form in (None, "", label_padrao(ph.chave))
+                        else ph.label_form
+                    ),
+                }
+                for ph, chave in plano.renomeados
+            ],
+        )
+    _atualizar_ordens(modelo_id, plano.reordenados)
+
+    if plano.removidos:
+        db.session.execute(
+            delete(_tabela).where(
+                _tabela.c.modelo_id == modelo_id,
+                _tabela.c.id.in_([ph.id for ph in plano.removidos]),
+            )
+        )
+
+
+def sincronizar(modelo_id: int, chaves: Iterable[str]) -> PlanoSincronizacao:
+    """Sincroniza os placeholders do modelo com ``chaves`` numa transação"""
+    plano = diff_placeholders(carregar_placeholders(modelo_id), chaves)
+    if plano.vazio:
+        return plano
+    try:
+        aplicar_plano(modelo_id, plano)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return plano
+
+
+def reordenar(modelo_id: int, ordens: Dict[int, int]) -> None:
+    """``UPDATE`` em lote de ``ordem`` (id -> ordem) dos placeholders do modelo"""
+    if not ordens:
+        return
+    tocar_versao(modelo_id)
+    _atualizar_ordens(modelo_id, ordens)
+
+
+def _atualizar_ordens(modelo_id: int, ordens: Dict[int, int]) -> None:
+    if not ordens:
+        return
+    db.session.execute(
+        update(_tabela)
+        .where(
+            _tabela.c.id == bindparam("b_id"),
+            _tabela.c.modelo_id == modelo_id,
+        )
+        .values(ordem=bindparam("b_ordem")),
+        [{"b_id": ph_id, "b_ordem": ordem} for ph_id, ordem in ordens.items()],
+    )
+
+
+def vizinho(
+    modelo_id: int, ph_id: int, ordem_atual: Optional[int], direcao: str
+) -> Optional[PlaceholderAtual]:
+    """Placeholder imediatamente acima (``cima``) ou abaixo (``baixo``)"""
+    atual = ordem_atual or 0
+    ordem, col_id = func.coalesce(_tabela.c.ordem, 0), _tabela.c.id
+    if direcao == "cima":
+        filtro = (ordem < atual) | ((ordem == atual) & (col_id < ph_id))
+        ordenacao = (ordem.desc(), col_id.desc())
+    else:
+        filtro = (ordem > atual) | ((ordem == atual) & (col_id > ph_id))
+        ordenacao = (ordem, col_id)
+    linha = db.session.execute(
+        select(col_id, _tabela.c.chave, _tabela.c.label_form, _tabela.c.ordem)
+        .where(_tabela.c.modelo_id == modelo_id, filtro)
+        .order_by(*ordenacao)
+        .limit(1)
+    ).first()
+    return PlaceholderAtual(*linha) if linha is not None else None
+
+
+_CHAVE_MODELOS_ALTERADOS = "_placeholders_modelos_alterados"
+
+
+@event.listens_for(PeticaoPlaceholder, "after_insert")
+@event.listens_for(PeticaoPlaceholder, "after_update")
+@event.listens_for(PeticaoPlaceholder, "after_delete")
+def _placeholder_alterado_pelo_orm(mapper, conexao, placeholder):
+    # Só anota o modelo: a versão é incrementada uma vez no fim do flush
+    sessao = object_session(placeholder)
+    if sessao is None:
+        tocar_versao(placeholder.modelo_id, conexao)
+        return
+    sessao.info.setdefault(_CHAVE_MODELOS_ALTERADOS, set()).add(placeholder.modelo_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _tocar_versoes_do_flush(sessao, contexto_flush):
+    modelos = sessao.info.pop(_CHAVE_MODELOS_ALTERADOS, None)
+    for modelo_id in sorted(modelos or ()):
+        tocar_versao(modelo_id, sessao.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_modelos_alterados(sessao):
+    sessao.info.pop(_CHAVE_MODELOS_ALTERADOS, None)
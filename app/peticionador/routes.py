@@ -10,23 +10,31 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_file,
 )
 from flask import session as flask_session
 from flask import (
     url_for,
 )
 from flask_login import current_user, login_required, login_user, logout_user
-from flask_wtf import FlaskForm
-from wtforms import DateField, SelectField, StringField
-from wtforms.validators import DataRequired
 
-from app.peticionador import google_services
+from app.celery_app import celery_da_app
+from app.peticionador import (
+    busca_clientes,
+    contadores_dashboard,
+    form_cache,
+    google_services,
+    indice_autoridades,
+    listagens,
+    placeholder_sync,
+)
 from app.peticionador.utils import get_enum_display_name
 
 # Ajuste o import de 'db' conforme a estrutura do seu projeto.
 # from app import db
-from models import RespostaForm  # Importa RespostaForm da raiz
 from models import db  # Utiliza o db do models.py na raiz do projeto
+from request_profiler import CONFIG_PROFILER
+from stage_timing import etapa
 
 from . import peticionador_bp
 from .forms import (
@@ -50,15 +58,16 @@ from .models import (  # Cliente removido daqui
 @login_required
 def index():
     """Dashboard com indicadores rápidos."""
-    total_clientes = Cliente.query.count()
-    total_peticoes = PeticaoGerada.query.count()
-    total_usuarios = User.query.filter_by(is_active=True).count()
+    # Contadores mantidos a cada flush: uma query pequena em vez de count(*)
+    painel = contadores_dashboard.ler()
     return render_template(
         "peticionador/dashboard.html",
         title="Dashboard Peticionador",
-        total_clientes=total_clientes,
-        total_peticoes=total_peticoes,
-        total_usuarios=total_usuarios,
+        total_clientes=painel.clientes,
+        total_peticoes=painel.peticoes,
+        total_usuarios=painel.usuarios_ativos,
+        peticoes_por_dia=painel.peticoes_por_dia,
+        status_respostas=painel.status,
     )
 
 
@@ -93,9 +102,7 @@ def gerar_suspensao_peticao_dados_form():
     if request.method == "GET" and "cpf_buscado" in request.args:
         cpf_para_buscar = request.args.get("cpf_buscado")
         if cpf_para_buscar:
-            cliente_encontrado = RespostaForm.query.filter_by(
-                cpf=cpf_para_buscar
-            ).first()
+            cliente_encontrado = busca_clientes.buscar_por_cpf(cpf_para_buscar)
             if cliente_encontrado:
                 form.cliente_id.data = cliente_encontrado.id
                 form.cliente_primeiro_nome.data = cliente_encontrado.primeiro_nome
@@ -360,11 +367,13 @@ def gerar_suspensao_peticao_dados_form():
 @peticionador_bp.route("/autoridades")
 @login_required
 def listar_autoridades():
-    autoridades = AutoridadeTransito.query.order_by(AutoridadeTransito.nome).all()
+    # Primeira página; as demais vêm de api_listar_autoridades (rolagem infinita)
+    pagina = listagens.pagina_autoridades(None)
     return render_template(
         "peticionador/autoridades_listar.html",
         title="Autoridades de Trânsito",
-        autoridades=autoridades,
+        autoridades=pagina.itens,
+        proximo_cursor=pagina.proximo_cursor,
     )
 
 
@@ -503,11 +512,13 @@ def setup_admin_dev():
 @peticionador_bp.route("/modelos")
 @login_required
 def listar_modelos():
-    from .models import PeticaoModelo
-
-    modelos = PeticaoModelo.query.order_by(PeticaoModelo.criado_em.desc()).all()
+    # Primeira página; as demais vêm de api_listar_modelos (rolagem infinita)
+    pagina = listagens.pagina_modelos(None)
     return render_template(
-        "peticionador/modelos_listar.html", title="Modelos de Petição", modelos=modelos
+        "peticionador/modelos_listar.html",
+        title="Modelos de Petição",
+        modelos=pagina.itens,
+        proximo_cursor=pagina.proximo_cursor,
     )
 
 
@@ -603,32 +614,15 @@ def mover_placeholder(modelo_id, ph_id, direcao):
             return jsonify({"success": False, "error": "Direção inválida."}), 400
         abort(400)
 
-    placeholders = (
-        PeticaoPlaceholder.query.filter_by(modelo_id=modelo_id)
-        .order_by(PeticaoPlaceholder.ordem)
-        .all()
-    )
-    idx = next((i for i, p in enumerate(placeholders) if p.id == ph_id), None)
-    if idx is None:
-        if request.method == "POST":
-            return (
-                jsonify({"success": False, "error": "Placeholder não encontrado."}),
-                404,
-            )
-        abort(404)
-
-    if direcao == "cima" and idx == 0:
-        if request.method == "POST":
-            return jsonify({"success": False, "error": "Já é o primeiro."}), 400
-        flash("Já é o primeiro.", "info")
-    elif direcao == "baixo" and idx == len(placeholders) - 1:
+    # Só o vizinho é carregado; a troca é um UPDATE em lote de duas linhas
+    outro = placeholder_sync.vizinho(modelo_id, ph.id, ph.ordem, direcao)
+    if outro is None:
+        mensagem = "Já é o primeiro." if direcao == "cima" else "Já é o último."
         if request.method == "POST":
-            return jsonify({"success": False, "error": "Já é o último."}), 400
-        flash("Já é o último.", "info")
+            return jsonify({"success": False, "error": mensagem}), 400
+        flash(mensagem, "info")
     else:
-        swap_idx = idx - 1 if direcao == "cima" else idx + 1
-        other = placeholders[swap_idx]
-        ph.ordem, other.ordem = other.ordem, ph.ordem
+        placeholder_sync.reordenar(modelo_id, {ph.id: outro.ordem, outro.id: ph.ordem})
         db.session.commit()
         if request.method == "POST":
             return jsonify({"success": True})
@@ -669,24 +663,13 @@ def sincronizar_placeholders(modelo_id):
         return redirect(
             url_for("peticionador.placeholders_modelo", modelo_id=modelo_id)
         )
-    criados = 0
-    for idx, chave in enumerate(chaves, start=1):
-        existente = PeticaoPlaceholder.query.filter_by(
-            modelo_id=modelo_id, chave=chave
-        ).first()
-        if not existente:
-            ph = PeticaoPlaceholder(
-                modelo_id=modelo_id,
-                chave=chave,
-                tipo_campo="string",
-                label_form=chave.replace("_", " ").title(),
-                ordem=idx,
-            )
-            db.session.add(ph)
-            criados += 1
-    db.session.commit()
+    plano = placeholder_sync.sincronizar(modelo_id, chaves)
+    resumo = plano.resumo()
     flash(
-        f"Sincronização concluída. {criados} novos placeholders adicionados.", "success"
+        "Sincronização concluída. "
+        f"{resumo['adicionados']} adicionados, {resumo['renomeados']} renomeados, "
+        f"{resumo['removidos']} removidos, {resumo['reordenados']} reordenados.",
+        "success",
     )
     return redirect(url_for("peticionador.placeholders_modelo", modelo_id=modelo_id))
 
@@ -701,12 +684,10 @@ def reordenar_placeholders(modelo_id):
     if not ordem or not isinstance(ordem, list):
         return jsonify({"success": False, "error": "Ordem inválida."}), 400
     try:
-        for idx, ph_id in enumerate(ordem, start=1):
-            ph = PeticaoPlaceholder.query.filter_by(
-                id=ph_id, modelo_id=modelo_id
-            ).first()
-            if ph:
-                ph.ordem = idx
+        placeholder_sync.reordenar(
+            modelo_id,
+            {int(ph_id): idx for idx, ph_id in enumerate(ordem, start=1)},
+        )
         db.session.commit()
         return jsonify({"success": True})
     except Exception as e:
@@ -727,7 +708,8 @@ def api_busca_cliente_cpf():
         current_app.logger.info(f"API: Buscando CPF '{cpf_digits}'")
         if not cpf_digits:
             return jsonify({"success": False, "error": "CPF inválido"}), 400
-        cliente = RespostaForm.query.filter_by(cpf=cpf_digits).first()
+        # Compara pelos dígitos normalizados (indexados), qualquer formatação
+        cliente = busca_clientes.buscar_por_cpf(cpf_digits)
         if not cliente:
             current_app.logger.warning(
                 f"API: CPF '{cpf_digits}' não encontrado no modelo RespostaForm."
@@ -782,79 +764,91 @@ def api_busca_cliente_cpf():
         )
 
 
+@peticionador_bp.route("/api/clientes/busca", methods=["GET"])
+@login_required
+def api_buscar_clientes():
+    """Busca por CPF/CNPJ, email ou nome (sem acentos e fonética), paginada."""
+    try:
+        pagina = int(request.args.get("pagina", 1))
+    except ValueError:
+        pagina = 1
+    resultado = busca_clientes.buscar_clientes(
+        request.args.get("q", ""),
+        pagina,
+        listagens.tamanho_pagina(request.args.get("limite")),
+    )
+    return jsonify(resultado.como_json())
+
+
 # --- Rota para Gerar Petição Dinâmica ---
 
 
-def build_dynamic_form(placeholders):
-    """Gera dinamicamente uma classe WTForm com campos conforme placeholders."""
-    attrs = {"csrf_enabled": True}
-    for ph in placeholders:
-        field_kwargs = {
-            "label": ph.label_form or ph.chave.replace("_", " ").title(),
-            "validators": [DataRequired()],
-        }
-        if ph.tipo_campo == "date":
-            attrs[ph.chave] = DateField(**field_kwargs, format="%Y-%m-%d")
-        elif ph.tipo_campo == "select":
-            import json
+def _valor_serializavel(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _requisicao_ajax():
+    return request.headers.get("X-Requested-With") == "XMLHttpRequest"
+
+
+def _forcar_regeneracao():
+    """Checkbox "Gerar novamente": ignora o documento igual já gerado."""
+    return request.form.get("forcar_regeneracao") in ("1", "on", "true")
 
-            opcoes = []
-            if ph.opcoes_json:
-                try:
-                    opcoes = [(o, o) for o in json.loads(ph.opcoes_json)]
-                except Exception:
-                    pass
-            attrs[ph.chave] = SelectField(choices=opcoes, **field_kwargs)
-        else:
-            attrs[ph.chave] = StringField(**field_kwargs)
-    return type("DynamicPeticaoForm", (FlaskForm,), attrs)
+
+def _enfileirar_peticao(modelo, nome_arquivo, replacements):
+    """Enfileira a geração no Celery e responde 202 com o handle da task."""
+    from app.tasks.document_generation import gerar_peticao_task
+
+    celery_da_app(current_app._get_current_object())
+    task = gerar_peticao_task.delay(
+        modelo.id,
+        nome_arquivo,
+        replacements,
+        forcar_regeneracao=_forcar_regeneracao(),
+    )
+    current_app.logger.info(
+        f"Geração da petição '{nome_arquivo}' enfileirada com ID: {task.id}"
+    )
+    return (
+        jsonify(
+            {
+                "success": True,
+                "task_id": task.id,
+                "status_url": url_for("main.task_status", task_id=task.id),
+            }
+        ),
+        202,
+    )
 
 
 @peticionador_bp.route("/modelos/<int:modelo_id>/gerar", methods=["GET", "POST"])
 @login_required
 def gerar_peticao_dinamica(modelo_id):
     modelo = PeticaoModelo.query.get_or_404(modelo_id)
-    placeholders = (
-        PeticaoPlaceholder.query.filter_by(modelo_id=modelo_id)
-        .order_by(PeticaoPlaceholder.ordem)
-        .all()
-    )
-    if not placeholders:
+    # Classe do formulário cacheada pela versão dos placeholders do modelo
+    formulario = form_cache.formulario_do_modelo(modelo)
+    if not formulario.campos:
         flash("Nenhum placeholder configurado para este modelo.", "warning")
         return redirect(
             url_for("peticionador.placeholders_modelo", modelo_id=modelo_id)
         )
 
-    DynamicForm = build_dynamic_form(placeholders)
-    form = DynamicForm()
+    form = formulario.classe()
     if form.validate_on_submit():
-        replacements = {ph.chave: form.data.get(ph.chave) for ph in placeholders}
-        drive_service = google_services.get_drive_service()
-        docs_service = google_services.get_docs_service()
-
+        # Datas viram texto ISO (mesmo resultado do str() no preenchimento)
+        replacements = {
+            chave: _valor_serializavel(form.data.get(chave))
+            for chave in formulario.chaves
+        }
         nome_arquivo = (
             f"{modelo.nome} - {datetime.datetime.now().strftime('%Y-%m-%d %H%M')}"
         )
-        novo_id, link = google_services.copy_template_and_fill(
-            drive_service,
-            docs_service,
-            modelo.doc_template_id,
-            nome_arquivo,
-            modelo.pasta_destino_id,
-            replacements,
-        )
-        if novo_id:
-            current_app.logger.info(f"Documento gerado com sucesso! ID: {novo_id}")
-            # Salvar no banco - cliente_id pode ser None para formulários dinâmicos
-            pet = PeticaoGerada(
-                cliente_id=None, modelo=modelo.nome, google_id=novo_id, link=link
-            )
-            db.session.add(pet)
-            db.session.commit()
-            # Retorna a resposta JSON que o JavaScript espera
-            return jsonify({"success": True, "link": link})
-        else:
-            flash("Falha ao gerar documento.", "danger")
+        return _enfileirar_peticao(modelo, nome_arquivo, replacements)
+    if request.method == "POST" and _requisicao_ajax():
+        return jsonify({"success": False, "errors": form.errors}), 400
     return render_template(
         "peticionador/peticao_form_generico.html",
         title=f"Gerar {modelo.nome}",
@@ -942,23 +936,15 @@ def preencher_formulario_dinamico(slug):
     import datetime
     import re
 
-    from app.peticionador import (  # Garanta que a importação está correta
-        google_services,
-    )
-    from app.peticionador.models import PeticaoGerada, PeticaoModelo, PeticaoPlaceholder
+    from app.peticionador.models import PeticaoModelo
     from models import FormularioGerado
 
     form_gerado = FormularioGerado.query.filter_by(slug=slug).first_or_404()
     modelo = PeticaoModelo.query.get_or_404(form_gerado.modelo_id)
-    placeholders = (
-        PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id)
-        .order_by(PeticaoPlaceholder.ordem)
-        .all()
-    )
 
-    # Gera a classe do formulário dinamicamente
-    DynamicForm = build_dynamic_form(placeholders)
-    form = DynamicForm()  # Instancia o formulário
+    # Classe do formulário cacheada pela versão dos placeholders do modelo
+    formulario = form_cache.formulario_do_modelo(modelo)
+    DynamicForm = formulario.classe
 
     # --- LÓGICA DE SUBMISSÃO (POST) CORRIGIDA ---
     if request.method == "POST":
@@ -972,7 +958,7 @@ def preencher_formulario_dinamico(slug):
 
             # 1. Coleta dos dados do formulário para o dicionário de substituições
             replacements = {
-                ph.chave: request.form.get(ph.chave, "") for ph in placeholders
+                chave: request.form.get(chave, "") for chave in formulario.chaves
             }
             current_app.logger.debug(f"Dados para substituição: {replacements}")
 
@@ -985,33 +971,8 @@ def preencher_formulario_dinamico(slug):
             nome_arquivo = re.sub(r'[\\/*?:"<>|]', "", nome_arquivo)
             current_app.logger.info(f"Nome do arquivo final: '{nome_arquivo}'")
 
-            # 3. Lógica de geração do documento (orquestração)
-            drive_service = google_services.get_drive_service()
-            docs_service = google_services.get_docs_service()
-
-            novo_id, link = google_services.copy_template_and_fill(
-                drive_service,
-                docs_service,
-                modelo.doc_template_id,
-                nome_arquivo,
-                modelo.pasta_destino_id,
-                replacements,
-            )
-
-            if novo_id:
-                current_app.logger.info(f"Documento gerado com sucesso! ID: {novo_id}")
-                # Salvar no banco - cliente_id pode ser None para formulários dinâmicos
-                pet = PeticaoGerada(
-                    cliente_id=None, modelo=modelo.nome, google_id=novo_id, link=link
-                )
-                db.session.add(pet)
-                db.session.commit()
-                # Retorna a resposta JSON que o JavaScript espera
-                return jsonify({"success": True, "link": link})
-            else:
-                raise Exception(
-                    "A função copy_template_and_fill não retornou um ID de documento."
-                )
+            # 3. Geração enfileirada; o navegador acompanha pelo task-status
+            return _enfileirar_peticao(modelo, nome_arquivo, replacements)
 
         except Exception as e:
             current_app.logger.error(
@@ -1055,13 +1016,14 @@ def excluir_formulario_dinamico(slug):
 @peticionador_bp.route("/clientes")
 @login_required
 def listar_clientes():
-    """Lista todos os clientes cadastrados."""
-    # Ordena por data de criação, mais recentes primeiro
-    clientes = Cliente.query.order_by(Cliente.data_criacao.desc()).all()
+    """Lista os clientes cadastrados, mais recentes primeiro."""
+    # Primeira página; as demais vêm de api_listar_clientes (rolagem infinita)
+    pagina = listagens.pagina_clientes(None)
     return render_template(
         "peticionador/clientes_listar.html",
         title="Clientes Cadastrados",
-        clientes=clientes,
+        clientes=pagina.itens,
+        proximo_cursor=pagina.proximo_cursor,
     )
 
 
@@ -1294,16 +1256,21 @@ def gerar_documento_suspensao(cliente_id):
                 "data.atual_extenso": google_services.get_current_date_extenso(),
             }
 
-            new_document_id, new_document_url = google_services.copy_template_and_fill(
-                drive_service,
-                docs_service,
-                template_id,
-                file_name,
-                target_folder_id,
-                replacements,
-            )
+            with etapa("gerar_peticao", modelo="Suspensao_Direito_Dirigir") as span:
+                new_document_id, new_document_url = (
+                    google_services.copy_template_and_fill(
+                        drive_service,
+                        docs_service,
+                        template_id,
+                        file_name,
+                        target_folder_id,
+                        replacements,
+                        forcar_regeneracao=_forcar_regeneracao(),
+                    )
+                )
 
             if new_document_id:
+                timings = span.resumo()
                 # Registra histórico da petição
                 try:
                     nova_peticao = PeticaoGerada(
@@ -1311,6 +1278,7 @@ def gerar_documento_suspensao(cliente_id):
                         modelo="Suspensao_Direito_Dirigir",
                         google_id=new_document_id,
                         link=new_document_url,
+                        timings=timings,
                     )
                     db.session.add(nova_peticao)
                     db.session.commit()
@@ -1321,7 +1289,9 @@ def gerar_documento_suspensao(cliente_id):
                     f'Documento "{file_name}" gerado com sucesso! <a href="{new_document_url}" target="_blank">Abrir documento</a>',
                     "success",
                 )
-                return jsonify({"success": True, "link": new_document_url})
+                return jsonify(
+                    {"success": True, "link": new_document_url, "timings": timings}
+                )
             else:
                 flash(
                     "Erro ao gerar o documento no Google Docs. Verifique os logs para mais detalhes.",
@@ -1481,51 +1451,27 @@ def api_busca_autoridade():
     autocomplete = request.args.get("autocomplete", "0") == "1"
     if not nome:
         return jsonify({"success": False, "error": "Nome não informado."}), 400
+    # Índice em memória: prefixo das palavras do nome, sem acentos, ranqueado
     if autocomplete:
-        autoridades = (
-            AutoridadeTransito.query.filter(AutoridadeTransito.nome.ilike(f"%{nome}%"))
-            .limit(10)
-            .all()
-        )
+        limite = min(max(request.args.get("limite", 10, type=int), 1), 50)
         return jsonify(
             {
                 "success": True,
                 "sugestoes": [
-                    {
-                        "id": a.id,
-                        "nome": a.nome,
-                        "cnpj": a.cnpj,
-                        "logradouro": a.logradouro,
-                        "cidade": a.cidade,
-                        "cep": a.cep,
-                        "estado": a.estado,
-                    }
-                    for a in autoridades
+                    a.como_dict() for a in indice_autoridades.buscar(nome, limite)
                 ],
             }
         )
     else:
-        autoridade = AutoridadeTransito.query.filter(
-            AutoridadeTransito.nome.ilike(f"%{nome}%")
-        ).first()
-        if not autoridade:
+        encontradas = indice_autoridades.buscar(nome, 1)
+        if not encontradas:
             return (
                 jsonify({"success": False, "error": "Autoridade não encontrada."}),
                 404,
             )
-        return jsonify(
-            {
-                "success": True,
-                "autoridade": {
-                    "nome": autoridade.nome,
-                    "cnpj": autoridade.cnpj,
-                    "logradouro": autoridade.logradouro,
-                    "cidade": autoridade.cidade,
-                    "cep": autoridade.cep,
-                    "estado": autoridade.estado,
-                },
-            }
-        )
+        autoridade = encontradas[0].como_dict()
+        autoridade.pop("id")
+        return jsonify({"success": True, "autoridade": autoridade})
 
 
 @peticionador_bp.route("/api/autoridades", methods=["POST"])
@@ -1577,3 +1523,73 @@ def api_cadastrar_autoridade():
         ),
         201,
     )
+
+
+# --- Perfis gravados pelo profiler sob demanda (request_profiler) ---
+
+
+def _exigir_admin_perfis():
+    # Não há papéis no app: só os emails de PROFILER_ADMINS veem os perfis
+    if not CONFIG_PROFILER.pode_ver_perfis(getattr(current_user, "email", None)):
+        abort(404)
+
+
+@peticionador_bp.route("/admin/perfis", methods=["GET"])
+@login_required
+def listar_perfis():
+    _exigir_admin_perfis()
+    return jsonify(
+        {
+            "success": True,
+            "ligado": CONFIG_PROFILER.ligado,
+            "perfis": CONFIG_PROFILER.anel.listar(),
+        }
+    )
+
+
+@peticionador_bp.route("/admin/perfis/<arquivo>", methods=["GET"])
+@login_required
+def baixar_perfil(arquivo):
+    _exigir_admin_perfis()
+    # ?formato=texto: funções ordenadas por tempo acumulado em vez do .prof
+    if request.args.get("formato") == "texto":
+        resumo = CONFIG_PROFILER.anel.resumo_texto(arquivo)
+        if resumo is None:
+            abort(404)
+        return resumo, 200, {"Content-Type": "text/plain; charset=utf-8"}
+    caminho = CONFIG_PROFILER.anel.caminho(arquivo)
+    if caminho is None:
+        abort(404)
+    return send_file(caminho, mimetype="application/octet-stream", as_attachment=True)
+
+
+# --- Listagens paginadas (rolagem infinita) ---
+
+
+def _responder_pagina(listar):
+    try:
+        pagina = listar(
+            request.args.get("cursor"),
+            listagens.tamanho_pagina(request.args.get("limite")),
+        )
+    except listagens.CursorInvalido:
+        return jsonify({"success": False, "error": "Cursor inválido."}), 400
+    return jsonify(pagina.como_json())
+
+
+@peticionador_bp.route("/api/clientes", methods=["GET"])
+@login_required
+def api_listar_clientes():
+    return _responder_pagina(listagens.pagina_clientes)
+
+
+@peticionador_bp.route("/api/modelos", methods=["GET"])
+@login_required
+def api_listar_modelos():
+    return _responder_pagina(listagens.pagina_modelos)
+
+
+@peticionador_bp.route("/api/autoridades", methods=["GET"])
+@login_required
+def api_listar_autoridades():
+    return _responder_pagina(listagens.pagina_autoridades)
@@ -7,21 +7,29 @@ Google e tratamento de exceções de quota.
 from __future__ import annotations
 
 import json
+import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, List
 
 from flask import current_app
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+import document_cache
+import document_update
 from document_generator import (
     _initialize_google_services,
     buscar_ou_criar_pasta_cliente,
     gerar_documento_cliente,
+    textos_para_preenchimento,
 )
+from extensions import db
+from field_mapping import mapear_para_template
+from generation_trace import Redigido, rastrear
+from metrics import registrar_documentos_submissao
 
 
 class DocumentGenerationService:
@@ -96,28 +104,55 @@ class DocumentGenerationService:
         dados_cliente: dict,
         tipo_pessoa: str,
         documentos_requeridos: Iterable[str] | None = None,
+        forcar_regeneracao: bool = False,
+        resposta_id: int | None = None,
     ) -> List[str]:
-        """Gera documentos e retorna links."""
-        from config import CONFIG
-
-        with open(
-            "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log", "a"
-        ) as f:
-            f.write(f"[DEBUG] Tipo de dados_cliente: {type(dados_cliente)}\n")
-            f.write(f"[DEBUG] Conteúdo de dados_cliente: {dados_cliente}\n")
+        """Gera documentos e retorna links.
 
-        current_app.logger.info(
-            f"generate_documents iniciado com dados_cliente: {dados_cliente}"
-        )
-        current_app.logger.info(f"tipo_pessoa: {tipo_pessoa}")
-        current_app.logger.info(f"documentos_requeridos: {documentos_requeridos}")
+        Documentos já gerados com os mesmos dados são reutilizados, a menos
+        que ``forcar_regeneracao`` seja verdadeiro (ver document_cache). Com
+        ``resposta_id``, cada documento é registrado em ``DocumentoGerado``
+        (o commit fica com quem chama) para ``update_documents``.
+        """
+        from config import CONFIG
 
         templates_disponiveis = CONFIG["TEMPLATES"].get(tipo_pessoa, {})
-        current_app.logger.info(f"templates_disponiveis: {templates_disponiveis}")
-
         docs_a_gerar = documentos_requeridos or templates_disponiveis.keys()
-        current_app.logger.info(f"docs_a_gerar: {docs_a_gerar}")
 
+        with rastrear("generate_documents", uuid.uuid4().hex) as trace:
+            trace.evento(
+                "entrada",
+                tipo_pessoa=tipo_pessoa,
+                dados_cliente=dados_cliente,
+                documentos_requeridos=documentos_requeridos,
+                forcar_regeneracao=forcar_regeneracao,
+            )
+            current_app.logger.debug(
+                "generate_documents iniciado (tipo_pessoa=%s, documentos=%s): %s",
+                tipo_pessoa,
+                documentos_requeridos,
+                Redigido(dados_cliente),
+            )
+            return self._gerar_kit(
+                dados_cliente,
+                tipo_pessoa,
+                templates_disponiveis,
+                docs_a_gerar,
+                trace,
+                forcar_regeneracao,
+                resposta_id,
+            )
+
+    def _gerar_kit(
+        self,
+        dados_cliente,
+        tipo_pessoa,
+        templates_disponiveis,
+        docs_a_gerar,
+        trace,
+        forcar_regeneracao=False,
+        resposta_id=None,
+    ) -> List[str]:
         # Pasta do cliente - garantir que nome e sobrenome estejam presentes
         primeiro_nome = (
             dados_cliente.get("primeiroNome")
@@ -135,28 +170,19 @@ class DocumentGenerationService:
 
         # Se ainda não tiver nome ou sobrenome, lançar exceção e logar
         if not primeiro_nome or not sobrenome:
-            msg = (
-                f"[ERRO] Nome ou sobrenome ausente para dados_cliente: {dados_cliente}"
+            current_app.logger.error(
+                "[ERRO] Nome ou sobrenome ausente para dados_cliente: %s",
+                Redigido(dados_cliente),
             )
-            current_app.logger.error(msg)
-            with open(
-                "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                "a",
-            ) as f:
-                f.write(msg + "\n")
             raise ValueError(
                 "Nome e sobrenome do cliente são obrigatórios para criação da pasta!"
             )
 
         current_app.logger.info(
-            f"Gerando pasta para: primeiro_nome='{primeiro_nome}', sobrenome='{sobrenome}'"
+            "Gerando pasta para: primeiro_nome='%s', sobrenome='%s'",
+            primeiro_nome,
+            sobrenome,
         )
-        with open(
-            "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log", "a"
-        ) as f:
-            f.write(
-                f"[DEBUG] Gerando pasta para: primeiro_nome='{primeiro_nome}', sobrenome='{sobrenome}'\n"
-            )
 
         try:
             pasta_id = buscar_ou_criar_pasta_cliente(
@@ -165,23 +191,11 @@ class DocumentGenerationService:
                 sobrenome=sobrenome,
                 ano=datetime.now().year,
             )
-            current_app.logger.info(f"Pasta criada/encontrada com ID: {pasta_id}")
-
-            with open(
-                "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                "a",
-            ) as f:
-                f.write(f"[DEBUG] Pasta criada/encontrada com ID: {pasta_id}\n")
+            current_app.logger.info("Pasta criada/encontrada com ID: %s", pasta_id)
+            trace.evento("pasta", pasta_id=pasta_id)
 
         except Exception as e:
             current_app.logger.error(f"Erro ao criar pasta: {e}", exc_info=True)
-
-            with open(
-                "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                "a",
-            ) as f:
-                f.write(f"[DEBUG] Erro ao criar pasta: {e}\n")
-
             raise RuntimeError(
                 f"Falha ao criar/encontrar pasta do cliente no Drive: {e}"
             )
@@ -189,28 +203,24 @@ class DocumentGenerationService:
         if not pasta_id:
             raise RuntimeError("Falha ao criar/encontrar pasta do cliente no Drive")
 
+        # Mapeamento (e formatação das datas) uma única vez para todo o kit
+        dados_template = mapear_para_template(dados_cliente, tipo_pessoa)
+
         links = []
         for tipo_doc in docs_a_gerar:
-            current_app.logger.info(f"Processando documento: {tipo_doc}")
             id_template = templates_disponiveis.get(tipo_doc)
             if not id_template:
                 current_app.logger.warning(
-                    f"Template ID para '{tipo_doc}' não encontrado em CONFIG. Pulando."
+                    "Template ID para '%s' não encontrado em CONFIG. Pulando.",
+                    tipo_doc,
                 )
                 continue
 
             try:
                 current_app.logger.info(
-                    f"Gerando documento {tipo_doc} com template {id_template}"
+                    "Gerando documento %s com template %s", tipo_doc, id_template
                 )
-
-                with open(
-                    "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                    "a",
-                ) as f:
-                    f.write(
-                        f"[DEBUG] Gerando documento {tipo_doc} com template {id_template}\n"
-                    )
+                trace.evento("documento", tipo_doc=tipo_doc, id_template=id_template)
 
                 resultado = gerar_documento_cliente(
                     drive_service=self.drive_service,
@@ -220,41 +230,234 @@ class DocumentGenerationService:
                     dados_cliente=dados_cliente,
                     id_pasta_cliente=pasta_id,
                     tipo_pessoa=tipo_pessoa,
+                    dados_template=dados_template,
+                    forcar_regeneracao=forcar_regeneracao,
                 )
-                current_app.logger.info(
-                    f"Resultado da geração do documento {tipo_doc}: {resultado}"
-                )
-
-                with open(
-                    "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                    "a",
-                ) as f:
-                    f.write(
-                        f"[DEBUG] Resultado da geração do documento {tipo_doc}: {resultado}\n"
-                    )
+                trace.evento("resultado", tipo_doc=tipo_doc, resultado=resultado)
+                if resposta_id is not None and resultado:
+                    self._registrar_documento(resposta_id, tipo_doc, resultado)
 
                 if resultado and resultado.get("status") == "sucesso":
                     links.append(resultado["link_documento"])
                     current_app.logger.info(
-                        f"Documento {tipo_doc} gerado com sucesso: {resultado['link_documento']}"
+                        "Documento %s gerado com sucesso: %s",
+                        tipo_doc,
+                        resultado["link_documento"],
                     )
                 else:
                     current_app.logger.error(
-                        f"Falha na geração do documento {tipo_doc}: {resultado}"
+                        "Falha na geração do documento %s: %s", tipo_doc, resultado
                     )
 
             except Exception as e:
                 current_app.logger.error(
                     f"Erro ao gerar documento {tipo_doc}: {e}", exc_info=True
                 )
-
-                with open(
-                    "/var/www/estevaoalmeida.com.br/form-google/debug_dados_cliente.log",
-                    "a",
-                ) as f:
-                    f.write(f"[DEBUG] Erro ao gerar documento {tipo_doc}: {e}\n")
+                trace.evento("erro", tipo_doc=tipo_doc, erro=str(e))
 
         current_app.logger.info(
             "Documentos gerados para %s %s: %s", primeiro_nome, sobrenome, links
         )
+        registrar_documentos_submissao(tipo_pessoa, len(links))
         return links
+
+    @staticmethod
+    def _registrar_documento(resposta_id, tipo_doc, resultado):
+        """Grava (ou vincula à resposta) o documento e os valores inseridos"""
+        from models import DocumentoGerado
+
+        documento = DocumentoGerado.query.filter_by(
+            google_id=resultado["id_documento"]
+        ).first()
+        if documento is None:
+            if "valores" not in resultado:
+                # Reutilizado de antes do registro: valores desconhecidos
+                return None
+            documento = DocumentoGerado(google_id=resultado["id_documento"])
+            db.session.add(documento)
+        documento.resposta_id = resposta_id
+        documento.tipo_doc = tipo_doc
+        documento.pasta_id = resultado.get("pasta_id")
+        documento.template_id = resultado["id_template"]
+        if "valores" in resultado:
+            documento.valores = resultado["valores"]
+            documento.revisao_template = resultado.get("revisao_template")
+        return documento
+
+    def update_documents(
+        self, resposta_id: int, dados_cliente: dict, tipo_pessoa: str
+    ) -> Dict[str, Any]:
+        """Atualiza no lugar o kit já gerado para a resposta com dados novos.
+
+        Só os campos alterados são trocados em cada documento (um
+        ``batchUpdate`` por documento, em lotes HTTP; ver document_update).
+        Documentos em que a troca não seria exata, apagados do Drive ou de
+        template alterado são gerados de novo na mesma pasta. O commit fica
+        com quem chama.
+        """
+        from models import DocumentoGerado
+
+        documentos = (
+            DocumentoGerado.query.filter_by(resposta_id=resposta_id)
+            .order_by(DocumentoGerado.id)
+            .all()
+        )
+        dados_template = mapear_para_template(dados_cliente, tipo_pessoa)
+        textos_novos = textos_para_preenchimento(dados_template)
+        resumo: Dict[str, Any] = {
+            "atualizados": [],
+            "sem_alteracao": [],
+            "regenerados": [],
+            "erros": {},
+        }
+
+        def valores_para(documento):
+            # A data de preenchimento continua a da geração
+            valores = {
+                chave: texto
+                for chave, texto in textos_novos.items()
+                if chave not in document_cache.CHAVES_VOLATEIS
+            }
+            valores.update(
+                (chave, texto)
+                for chave, texto in documento.valores.items()
+                if chave in document_cache.CHAVES_VOLATEIS
+            )
+            return valores
+
+        candidatos, regenerar = [], []
+        for documento in documentos:
+            if valores_para(documento) == documento.valores:
+                resumo["sem_alteracao"].append(documento.tipo_doc)
+                continue
+            revisao = document_cache.revisao_template(
+                self.drive_service, documento.template_id
+            )
+            if revisao and revisao == documento.revisao_template:
+                candidatos.append(documento)
+            else:
+                regenerar.append((documento, "template alterado"))
+
+        textos, textos_templates, erros_leitura, revisoes = document_update.ler_textos(
+            self.docs_service,
+            [documento.google_id for documento in candidatos],
+            {(d.template_id, d.revisao_template) for d in candidatos},
+        )
+
+        planos: Dict[str, document_update.PlanoAtualizacao] = {}
+        valores_novos: Dict[str, Dict[str, str]] = {}
+        for documento in candidatos:
+            texto_template = textos_templates.get(
+                (documento.template_id, documento.revisao_template)
+            )
+            if documento.google_id not in textos or texto_template is None:
+                erro = erros_leitura.get(documento.google_id) or erros_leitura.get(
+                    documento.template_id
+                )
+                if getattr(getattr(erro, "resp", None), "status", None) == 404:
+                    regenerar.append((documento, "documento não encontrado"))
+                else:
+                    resumo["erros"][documento.tipo_doc] = str(erro)
+                continue
+            valores = valores_para(documento)
+            plano = document_update.planejar(
+                documento.valores,
+                valores,
+                textos[documento.google_id],
+                texto_template,
+            )
+            if plano.motivo:
+                regenerar.append((documento, plano.motivo))
+            elif not plano.requisicoes:
+                resumo["sem_alteracao"].append(documento.tipo_doc)
+            else:
+                planos[documento.google_id] = plano
+                valores_novos[documento.google_id] = valores
+
+        revisoes_novas, erros = document_update.aplicar(self.docs_service, planos)
+        marcas = {}
+        for documento in candidatos:
+            plano = planos.get(documento.google_id)
+            if plano is None:
+                continue
+            if documento.google_id in erros:
+                resumo["erros"][documento.tipo_doc] = str(erros[documento.google_id])
+                continue
+            documento.valores = valores_novos[documento.google_id]
+            # Mesmas substituições que uma geração hoje usaria para o hash,
+            # mas com a data de preenchimento que ficou no documento
+            substituicoes = {
+                **dados_template,
+                **{
+                    chave: texto
+                    for chave, texto in documento.valores.items()
+                    if chave in document_cache.CHAVES_VOLATEIS
+                },
+            }
+            marcas[documento.google_id] = (
+                document_cache.hash_conteudo(
+                    documento.template_id, documento.revisao_template, substituicoes
+                ),
+                revisoes.get(documento.google_id),
+                revisoes_novas.get(documento.google_id),
+            )
+            resumo["atualizados"].append(
+                {"tipo_doc": documento.tipo_doc, "campos": plano.campos}
+            )
+        for id_documento, erro in document_update.atualizar_hashes(
+            self.drive_service, marcas
+        ).items():
+            current_app.logger.warning(
+                "Hash de conteúdo não regravado no documento %s: %s",
+                id_documento,
+                erro,
+            )
+
+        for documento, motivo in regenerar:
+            current_app.logger.info(
+                "Documento %s (%s) será gerado de novo: %s",
+                documento.tipo_doc,
+                documento.google_id,
+                motivo,
+            )
+            try:
+                resultado = gerar_documento_cliente(
+                    drive_service=self.drive_service,
+                    docs_service=self.docs_service,
+                    id_template=documento.template_id,
+                    tipo_doc=documento.tipo_doc,
+                    dados_cliente=dados_cliente,
+                    id_pasta_cliente=documento.pasta_id,
+                    tipo_pessoa=tipo_pessoa,
+                    dados_template=dados_template,
+                )
+            except Exception as e:
+                current_app.logger.error(
+                    f"Erro ao gerar de novo o documento {documento.tipo_doc}: {e}",
+                    exc_info=True,
+                )
+                resumo["erros"][documento.tipo_doc] = str(e)
+                continue
+            if resultado["id_documento"] != documento.google_id:
+                # O arquivo antigo fica no Drive como histórico
+                db.session.delete(documento)
+                db.session.flush()
+            self._registrar_documento(resposta_id, documento.tipo_doc, resultado)
+            resumo["regenerados"].append(
+                {
+                    "tipo_doc": documento.tipo_doc,
+                    "motivo": motivo,
+                    "link": resultado["link_documento"],
+                }
+            )
+
+        current_app.logger.info(
+            "Kit da resposta %s atualizado: %d no lugar, %d sem alteração, "
+            "%d gerados de novo, %d com erro",
+            resposta_id,
+            len(resumo["atualizados"]),
+            len(resumo["sem_alteracao"]),
+            len(resumo["regenerados"]),
+            len(resumo["erros"]),
+        )
+        return resumo
@@ -1,13 +1,93 @@
 document.addEventListener('DOMContentLoaded', function () {
-  const deleteButtons = document.querySelectorAll('.confirm-delete');
-  deleteButtons.forEach(button => {
-    button.addEventListener('click', function (event) {
-      const confirmation = confirm(
-        'Tem certeza que deseja excluir esta autoridade? Esta ação não pode ser desfeita.'
-      );
-      if (!confirmation) {
-        event.preventDefault();
-      }
-    });
+  // Delegado no document: vale também para linhas da rolagem infinita
+  document.addEventListener('click', function (event) {
+    const button = event.target.closest('.confirm-delete');
+    if (!button) return;
+    const confirmation = confirm(
+      'Tem certeza que deseja excluir esta autoridade? Esta ação não pode ser desfeita.'
+    );
+    if (!confirmation) {
+      event.preventDefault();
+    }
   });
 });
+
+/**
+ * Acompanha uma task do Celery pelo /api/task-status/<task_id> até ela
+ * terminar. Resolve com o `result` da task (ex.: { success, link, timings })
+ * ou rejeita com a mensagem de erro.
+ */
+function acompanharTarefa(statusUrl, intervaloMs = 1000, limiteMs = 180000) {
+  const inicio = Date.now();
+  return new Promise((resolve, reject) => {
+    const consultar = () => {
+      fetch(statusUrl, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+          if (data.status === 'SUCCESS') {
+            resolve(data.result || {});
+          } else if (data.status === 'FAILURE') {
+            reject(new Error(data.error_message || 'Falha ao gerar documento.'));
+          } else if (Date.now() - inicio > limiteMs) {
+            reject(new Error('Tempo esgotado aguardando a geração do documento.'));
+          } else {
+            setTimeout(consultar, intervaloMs);
+          }
+        })
+        .catch(reject);
+    };
+    consultar();
+  });
+}
+
+function escaparHtml(valor) {
+  return String(valor ?? '')
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;')
+    .replace(/'/g, '&#39;');
+}
+
+/**
+ * Rolagem infinita das listagens paginadas por keyset. O <tbody> traz
+ * `data-url` (endpoint JSON) e `data-cursor` (cursor da próxima página);
+ * `renderizarLinha(item)` devolve o HTML de uma <tr>.
+ */
+function rolagemInfinita(tbody, renderizarLinha) {
+  let cursor = tbody.dataset.cursor;
+  if (!cursor) return;
+  const sentinela = document.createElement('div');
+  sentinela.className = 'text-center text-muted small py-2';
+  sentinela.textContent = 'Carregando...';
+  tbody.closest('table').after(sentinela);
+
+  let carregando = false;
+  const observador = new IntersectionObserver(entradas => {
+    if (!entradas[0].isIntersecting || carregando || !cursor) return;
+    carregando = true;
+    const url = `${tbody.dataset.url}?cursor=${encodeURIComponent(cursor)}`;
+    fetch(url, { credentials: 'same-origin' })
+      .then(response => response.json())
+      .then(data => {
+        if (!data.success) throw new Error(data.error || 'Erro ao carregar.');
+        tbody.insertAdjacentHTML(
+          'beforeend',
+          data.itens.map(renderizarLinha).join('')
+        );
+        cursor = data.proximo_cursor;
+        if (!cursor) {
+          observador.disconnect();
+          sentinela.remove();
+        }
+      })
+      .catch(erro => {
+        observador.disconnect();
+        sentinela.textContent = erro.message;
+      })
+      .finally(() => {
+        carregando = false;
+      });
+  });
+  observador.observe(sentinela);
+}
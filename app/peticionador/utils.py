@@ -17,21 +17,85 @@ import re
 # Funções reutilizáveis de normalização de chaves e busca flexível em payloads
 # ---------------------------------------------------------------------------
 import unicodedata
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
 
+_RE_SEPARADORES_CHAVE = re.compile(r"[ _-]")
 
+
+@lru_cache(maxsize=4096)
 def normalizar_para_camel_case(chave: str) -> str:
     """Remove acentos/espacos e converte para camelCase."""
     chave = (
         unicodedata.normalize("NFKD", chave).encode("ASCII", "ignore").decode("ASCII")
     )
-    palavras = re.split(r"[ _-]", chave)
+    palavras = _RE_SEPARADORES_CHAVE.split(chave)
     if not palavras:
         return ""
     return palavras[0].lower() + "".join(p.title() for p in palavras[1:] if p)
 
 
+class PayloadView(Mapping):
+    """
+    Visão somente leitura de um payload com índice de chaves normalizadas.
+
+    O índice (camelCase -> posição e valor da primeira chave equivalente) é
+    montado uma única vez, na primeira busca flexível; cada busca seguinte
+    custa uma consulta por variante. Deve envolver um payload que não será
+    mais alterado.
+    """
+
+    __slots__ = ("payload", "_indice")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self._indice: Optional[Dict[str, Tuple[int, Any]]] = None
+
+    def __getitem__(self, chave: str) -> Any:
+        return self.payload[chave]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.payload)
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+    def __repr__(self) -> str:
+        return f"PayloadView({self.payload!r})"
+
+    def _montar_indice(self) -> Dict[str, Tuple[int, Any]]:
+        indice: Dict[str, Tuple[int, Any]] = {}
+        for posicao, (chave, valor) in enumerate(self.payload.items()):
+            if isinstance(chave, str):
+                indice.setdefault(normalizar_para_camel_case(chave), (posicao, valor))
+        self._indice = indice
+        return indice
+
+    def buscar(self, *variantes: str) -> Any:
+        """Mesma semântica de ``buscar_valor_flexivel``."""
+        payload = self.payload
+        for k in variantes:
+            if k in payload:
+                return payload[k]
+        indice = self._indice if self._indice is not None else self._montar_indice()
+        encontrado = None
+        for variante in variantes:
+            item = indice.get(normalizar_para_camel_case(variante))
+            # Entre várias variantes vale a chave que aparece primeiro no payload
+            if item is not None and (encontrado is None or item[0] < encontrado[0]):
+                encontrado = item
+        return encontrado[1] if encontrado is not None else None
+
+
 def buscar_valor_flexivel(payload: dict, *variantes):
-    """Retorna o primeiro valor correspondente entre variantes (exata ou camelCase)."""
+    """Retorna o primeiro valor correspondente entre variantes (exata ou camelCase).
+
+    Para várias buscas no mesmo payload, passe um ``PayloadView``: o índice de
+    chaves normalizadas é montado uma vez e reaproveitado.
+    """
+    if isinstance(payload, PayloadView):
+        return payload.buscar(*variantes)
     if not isinstance(payload, dict):
         return None
     for k in variantes:
@@ -11,6 +11,8 @@ from datetime import datetime
 from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
+from metrics import registrar_documentos_submissao
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +26,8 @@ class DocumentResult:
     nome_arquivo: str
     sucesso: bool = True
     erro: Optional[str] = None
+    # Duração de cada etapa (bloco "timings" de stage_timing)
+    timings: Optional[Dict] = None
 
 
 @dataclass
@@ -113,6 +117,7 @@ class DocumentService:
             logger.info(
                 f"Geração concluída: {len(sucessos)} sucessos, {len(erros)} erros"
             )
+            registrar_documentos_submissao(cliente_data.tipo_pessoa, len(sucessos))
             return sucessos, erros
 
         except Exception as e:
@@ -145,6 +150,9 @@ class DocumentService:
     ) -> List[DocumentResult]:
         """Gera documentos em paralelo com controle de concorrência"""
 
+        # Mapeamento feito uma vez e compartilhado por todos os documentos
+        dados_template = self._mapear_dados_cliente(cliente_data)
+
         # Usar ThreadPoolExecutor para processamento paralelo
         futures = []
         for tipo_doc, template_id in templates.items():
@@ -160,6 +168,7 @@ class DocumentService:
                 template_id,
                 cliente_data,
                 id_pasta_cliente,
+                dados_template,
             )
             futures.append(future)
 
@@ -190,12 +199,12 @@ class DocumentService:
         template_id: str,
         cliente_data: ClienteData,
         id_pasta_cliente: str,
+        dados_template: Dict[str, str],
     ) -> DocumentResult:
         """Gera um documento individual com tratamento de erro"""
         try:
             logger.info(f"Gerando documento: {tipo_doc}")
             drive_service, docs_service = self.google_services
-            dados_mapeados = self._mapear_dados_cliente(cliente_data)
 
             from document_generator import gerar_documento_cliente
 
@@ -204,9 +213,10 @@ class DocumentService:
                 docs_service=docs_service,
                 id_template=template_id,
                 tipo_doc=tipo_doc,
-                dados_cliente=dados_mapeados,
+                dados_cliente=cliente_data,
                 id_pasta_cliente=id_pasta_cliente,
                 tipo_pessoa=cliente_data.tipo_pessoa,
+                dados_template=dados_template,
             )
 
             logger.info(f"Documento gerado com sucesso: {tipo_doc}")
@@ -215,6 +225,7 @@ class DocumentService:
                 link=resultado["link_documento"],
                 id=resultado["id_documento"],
                 nome_arquivo=resultado["nome_arquivo"],
+                timings=resultado.get("timings"),
             )
 
         except Exception as e:
@@ -230,53 +241,13 @@ class DocumentService:
 
     def _mapear_dados_cliente(self, cliente_data: ClienteData) -> Dict[str, str]:
         """Mapeia dados do cliente para formato esperado pelos templates"""
-        return {
-            "Primeiro Nome": cliente_data.primeiro_nome or "",
-            "Sobrenome": cliente_data.sobrenome or "",
-            "E-mail": cliente_data.email or "",
-            "CPF": cliente_data.cpf or "",
-            "CNPJ": cliente_data.cnpj or "",
-            "RG": cliente_data.rg or "",
-            "CNH": cliente_data.cnh or "",
-            "Nascimento": cliente_data.data_nascimento or "",
-            "Telefone Celular": cliente_data.telefone_celular or "",
-            "Nacionalidade": cliente_data.nacionalidade or "Brasileiro(a)",
-            "Estado Civil": cliente_data.estado_civil or "",
-            "Profissão": cliente_data.profissao or "",
-            "Estado emissor do RG": cliente_data.estado_emissor_rg or "",
-            # Endereço estruturado
-            "Logradouro": cliente_data.endereco_logradouro or "",
-            "Número": cliente_data.endereco_numero or "",
-            "Complemento": cliente_data.endereco_complemento or "",
-            "Bairro": cliente_data.endereco_bairro or "",
-            "Cidade": cliente_data.endereco_cidade or "",
-            "Estado": cliente_data.endereco_estado or "",
-            "CEP": cliente_data.endereco_cep or "",
-            # Endereço completo para compatibilidade
-            "Endereço": self._montar_endereco_completo(cliente_data),
-        }
-
-    def _montar_endereco_completo(self, cliente_data: ClienteData) -> str:
-        """Monta endereço completo para compatibilidade com templates antigos"""
-        partes = []
-        if cliente_data.endereco_logradouro:
-            partes.append(cliente_data.endereco_logradouro)
-        if cliente_data.endereco_numero:
-            partes.append(cliente_data.endereco_numero)
-        if cliente_data.endereco_complemento:
-            partes.append(cliente_data.endereco_complemento)
-        if cliente_data.endereco_bairro:
-            partes.append(cliente_data.endereco_bairro)
-
-        endereco = ", ".join(partes)
-        if cliente_data.endereco_cidade and cliente_data.endereco_estado:
-            endereco += (
-                f", {cliente_data.endereco_cidade}/{cliente_data.endereco_estado}"
-            )
-        if cliente_data.endereco_cep:
-            endereco += f" - CEP: {cliente_data.endereco_cep}"
+        from field_mapping import mapear_para_template
 
-        return endereco
+        return mapear_para_template(
+            cliente_data,
+            cliente_data.tipo_pessoa,
+            padroes={"Nacionalidade": "Brasileiro(a)"},
+        )
 
     def __del__(self):
         """Cleanup do executor"""
@@ -11,9 +11,13 @@ from celery.utils.log import get_task_logger
 from flask import current_app
 from googleapiclient.errors import HttpError
 
+import template_pool
 from app.peticionador.services import DocumentGenerationService
+from client_search import somente_digitos
 from extensions import db
+from generation_trace import rastrear
 from models import RespostaForm
+from stage_timing import etapa
 
 logger = get_task_logger(__name__)
 
@@ -25,6 +29,10 @@ def process_document_request_task(self, payload_json_str: str):
     """
     Tarefa orquestradora principal.
     Recebe o payload da API, valida, salva no DB e dispara a geração.
+
+    Com ``"modo": "atualizar"`` no payload, o kit já gerado para o cliente
+    (``respostaId`` ou o mais recente com o mesmo CPF/CNPJ) é atualizado no
+    lugar por ``atualizar_documentos_task``; sem kit anterior, gera um novo.
     """
     from document_generator import (
         _initialize_google_services,
@@ -38,6 +46,23 @@ def process_document_request_task(self, payload_json_str: str):
     cnpj = dados_cliente_payload.get("cnpj")
     email = dados_cliente_payload.get("email")
 
+    if payload.get("modo") == "atualizar":
+        resposta = _resposta_para_atualizar(payload.get("respostaId"), cpf, cnpj)
+        if resposta is not None:
+            resposta.email = email or resposta.email
+            resposta.primeiro_nome = (
+                dados_cliente_payload.get("nome") or resposta.primeiro_nome
+            )
+            resposta.status_processamento = "Atualizacao_Enfileirada"
+            db.session.commit()
+            atualizar_documentos_task.delay(
+                resposta_id=resposta.id,
+                dados_cliente_json=json.dumps(dados_cliente_payload),
+                tipo_pessoa=tipo_pessoa,
+            )
+            return {"status": "Atualizacao_enfileirada", "resposta_id": resposta.id}
+        logger.info("Modo atualizar sem kit anterior do cliente: gerando kit novo.")
+
     nova_resposta = RespostaForm(
         submission_id=f"task-{self.request.id}",
         tipo_pessoa=tipo_pessoa,
@@ -84,6 +109,7 @@ def process_document_request_task(self, payload_json_str: str):
             dados_cliente_json=json.dumps(dados_cliente_payload),
             tipo_pessoa=tipo_pessoa,
             documentos_requeridos=documentos_requeridos,
+            forcar_regeneracao=bool(payload.get("forcarRegeneracao")),
         )
 
         return {"status": "Enfileirado", "resposta_id": nova_resposta.id}
@@ -112,28 +138,52 @@ def gerar_documentos_task(
     dados_cliente_json: str,
     tipo_pessoa: str,
     documentos_requeridos: dict | None = None,
+    forcar_regeneracao: bool = False,
 ):
     """Gera documentos para o RespostaForm indicado.
 
+    Documentos já gerados com os mesmos dados são reutilizados (o que também
+    torna as retentativas idempotentes), a menos que ``forcar_regeneracao``.
+
     A task atualiza o status_processamento em RespostaForm:
     - Processando
     - Concluido
     - Falha
     """
-    logger.info(f"Iniciando gerar_documentos_task para resposta_id: {resposta_id}")
+    logger.info("Iniciando gerar_documentos_task para resposta_id: %s", resposta_id)
 
-    # Debug: Log dos dados recebidos
-    with open(
-        "/var/www/estevaoalmeida.com.br/form-google/debug_celery_task.log", "a"
-    ) as f:
-        f.write(f"[CELERY_DEBUG] resposta_id: {resposta_id}\n")
-        f.write(f"[CELERY_DEBUG] tipo_pessoa: {tipo_pessoa}\n")
-        f.write(
-            f"[CELERY_DEBUG] dados_cliente_json (tipo): {type(dados_cliente_json)}\n"
+    with rastrear("gerar_documentos_task", resposta_id) as trace:
+        trace.evento(
+            "entrada",
+            resposta_id=resposta_id,
+            tipo_pessoa=tipo_pessoa,
+            documentos_requeridos=documentos_requeridos,
+            forcar_regeneracao=forcar_regeneracao,
+            tentativa=self.request.retries,
         )
-        f.write(f"[CELERY_DEBUG] dados_cliente_json (conteúdo): {dados_cliente_json}\n")
-        f.write(f"[CELERY_DEBUG] documentos_requeridos: {documentos_requeridos}\n")
+        with etapa("gerar_documentos_task", resposta_id=resposta_id) as span:
+            _gerar_documentos(
+                self,
+                resposta_id,
+                dados_cliente_json,
+                tipo_pessoa,
+                documentos_requeridos,
+                trace,
+                span,
+                forcar_regeneracao,
+            )
+
 
+def _gerar_documentos(
+    task,
+    resposta_id,
+    dados_cliente_json,
+    tipo_pessoa,
+    documentos_requeridos,
+    trace,
+    span,
+    forcar_regeneracao=False,
+):
     resposta = RespostaForm.query.get(resposta_id)
     if not resposta:
         logger.error(f"TASK ABORTADA: RespostaForm {resposta_id} não encontrada.")
@@ -141,36 +191,20 @@ def gerar_documentos_task(
 
     try:
         logger.info(
-            f"Atualizando status para 'Processando' para resposta_id: {resposta_id}"
+            "Atualizando status para 'Processando' para resposta_id: %s", resposta_id
         )
         resposta.status_processamento = "Processando"
         db.session.commit()
 
-        google_credentials_json_str = current_app.config.get(
-            "GOOGLE_CREDENTIALS_AS_JSON_STR"
-        )
         logger.info("Criando instância do DocumentGenerationService.")
         service = DocumentGenerationService()
 
-        # Debug: Verificar se dados_cliente_json é string ou dict
+        # Na fila o payload chega como JSON; chamadas diretas podem passar dict
         if isinstance(dados_cliente_json, str):
             dados_cliente = json.loads(dados_cliente_json)
-            with open(
-                "/var/www/estevaoalmeida.com.br/form-google/debug_celery_task.log", "a"
-            ) as f:
-                f.write(
-                    f"[CELERY_DEBUG] dados_cliente_json era string, convertido para dict\n"
-                )
-                f.write(
-                    f"[CELERY_DEBUG] dados_cliente (após conversão): {dados_cliente}\n"
-                )
         else:
             dados_cliente = dados_cliente_json
-            with open(
-                "/var/www/estevaoalmeida.com.br/form-google/debug_celery_task.log", "a"
-            ) as f:
-                f.write(f"[CELERY_DEBUG] dados_cliente_json já era dict\n")
-                f.write(f"[CELERY_DEBUG] dados_cliente: {dados_cliente}\n")
+        trace.evento("dados_cliente", dados_cliente=dados_cliente)
 
         current_app.logger.info(
             "Chamando service.generate_documents para tipo_pessoa='%s' com documentos: %s",
@@ -178,9 +212,13 @@ def gerar_documentos_task(
             documentos_requeridos,
         )
         links = service.generate_documents(
-            dados_cliente, tipo_pessoa, documentos_requeridos
+            dados_cliente,
+            tipo_pessoa,
+            documentos_requeridos,
+            forcar_regeneracao,
+            resposta_id=resposta_id,
         )
-        logger.info(f"service.generate_documents retornou: {links}")
+        logger.info("service.generate_documents retornou: %s", links)
 
         if links:
             pasta_id = links[0].split("/")[5]
@@ -190,20 +228,21 @@ def gerar_documentos_task(
         db.session.commit()
 
         resposta.status_processamento = "Concluido"
+        # timings: duração de cada etapa (pasta, nome único, cópia, preenchimento)
         resposta.observacoes_processamento = json.dumps(
-            {"links": links}, ensure_ascii=False
+            {"links": links, "timings": span.resumo()}, ensure_ascii=False
         )
         db.session.commit()
 
     except HttpError as e:
         if e.resp.status in (429, 500, 503):
-            delay = (2**self.request.retries) * 60 + random.uniform(1, 10)
+            delay = (2**task.request.retries) * 60 + random.uniform(1, 10)
             logger.warning(
                 "Rate limit/erro 5xx ao gerar docs (tentativa %s). Retentativa em %.1fs",
-                self.request.retries + 1,
+                task.request.retries + 1,
                 delay,
             )
-            raise self.retry(exc=e, countdown=delay)
+            raise task.retry(exc=e, countdown=delay)
         resposta.status_processamento = "Falha"
         resposta.observacoes_processamento = str(e)
         db.session.commit()
@@ -217,3 +256,145 @@ def gerar_documentos_task(
         resposta.observacoes_processamento = str(e)
         db.session.commit()
         raise
+
+
+def _resposta_para_atualizar(resposta_id, cpf, cnpj):
+    """
+    Resposta cujo kit será atualizado: a indicada ou a última do documento.
+
+    ``respostaId`` vem do cliente da API: só vale se a resposta for do mesmo
+    CPF/CNPJ do payload; senão, cai na última do documento (ou em nenhuma).
+    """
+    from models import DocumentoGerado
+
+    if somente_digitos(cpf):
+        filtro = RespostaForm.cpf_digitos == somente_digitos(cpf)
+    elif somente_digitos(cnpj):
+        filtro = RespostaForm.cnpj_digitos == somente_digitos(cnpj)
+    else:
+        return None
+    consulta = RespostaForm.query.filter(filtro)
+    if resposta_id:
+        resposta = consulta.filter(RespostaForm.id == resposta_id).first()
+        if resposta is not None:
+            return resposta
+        logger.warning(
+            f"Modo atualizar: resposta {resposta_id} não é do documento informado; ignorada."
+        )
+    return (
+        consulta.filter(
+            RespostaForm.id.in_(db.session.query(DocumentoGerado.resposta_id))
+        )
+        .order_by(RespostaForm.id.desc())
+        .first()
+    )
+
+
+@shared_task(bind=True, rate_limit=RATE_LIMIT, name="tasks.update_documents")
+def atualizar_documentos_task(
+    self, resposta_id: int, dados_cliente_json: str, tipo_pessoa: str
+):
+    """Atualiza no lugar os documentos já gerados da resposta (só os campos
+    alterados; ver ``DocumentGenerationService.update_documents``)."""
+    resposta = RespostaForm.query.get(resposta_id)
+    if not resposta:
+        logger.error(f"TASK ABORTADA: RespostaForm {resposta_id} não encontrada.")
+        return None
+
+    with etapa("atualizar_documentos_task", resposta_id=resposta_id) as span:
+        try:
+            resposta.status_processamento = "Atualizando"
+            db.session.commit()
+            resumo = DocumentGenerationService().update_documents(
+                resposta_id, json.loads(dados_cliente_json), tipo_pessoa
+            )
+            resposta.status_processamento = (
+                "Falha_atualizacao" if resumo["erros"] else "Concluido"
+            )
+            resposta.observacoes_processamento = json.dumps(
+                {"atualizacao": resumo, "timings": span.resumo()}, ensure_ascii=False
+            )
+            db.session.commit()
+            return resumo
+        except Exception as e:
+            logger.error(
+                f"ERRO FATAL na atualizar_documentos_task para resposta_id {resposta_id}",
+                exc_info=True,
+            )
+            db.session.rollback()
+            resposta.status_processamento = "Falha_atualizacao"
+            resposta.observacoes_processamento = str(e)
+            db.session.commit()
+            raise
+
+
+@shared_task(bind=True, rate_limit=RATE_LIMIT, name="tasks.generate_peticao")
+def gerar_peticao_task(
+    self,
+    modelo_id: int,
+    nome_arquivo: str,
+    replacements: dict,
+    forcar_regeneracao: bool = False,
+):
+    """Gera uma petição do Peticionador a partir do modelo e registra em PeticaoGerada.
+
+    Enfileirada pelas rotas de formulário dinâmico; o navegador acompanha pelo
+    ``/api/task-status/<task_id>`` e recebe ``link`` e ``timings`` no ``result``.
+    Uma petição igual já gerada na pasta do modelo é reutilizada, a menos que
+    ``forcar_regeneracao`` (ver document_cache).
+    """
+    from app.peticionador import google_services
+    from app.peticionador.models import PeticaoGerada, PeticaoModelo
+
+    modelo = PeticaoModelo.query.get(modelo_id)
+    if modelo is None:
+        raise ValueError(f"Modelo de petição {modelo_id} não encontrado.")
+
+    self.update_state(state="PROGRESS", meta={"etapa": "gerando_documento"})
+    drive_service = google_services.get_drive_service()
+    docs_service = google_services.get_docs_service()
+    with etapa("gerar_peticao", modelo_id=modelo.id) as span:
+        novo_id, link = google_services.copy_template_and_fill(
+            drive_service,
+            docs_service,
+            modelo.doc_template_id,
+            nome_arquivo,
+            modelo.pasta_destino_id,
+            replacements,
+            forcar_regeneracao=forcar_regeneracao,
+        )
+    if not novo_id:
+        raise RuntimeError(
+            "A função copy_template_and_fill não retornou um ID de documento."
+        )
+
+    logger.info("Petição gerada com sucesso! ID: %s", novo_id)
+    timings = span.resumo()
+    # cliente_id pode ser None para formulários dinâmicos
+    pet = PeticaoGerada(
+        cliente_id=None,
+        modelo=modelo.nome,
+        google_id=novo_id,
+        link=link,
+        timings=timings,
+    )
+    db.session.add(pet)
+    db.session.commit()
+    return {"success": True, "link": link, "peticao_id": pet.id, "timings": timings}
+
+
+@shared_task(bind=True, name="tasks.refill_template_pool")
+def reabastecer_pool_task(self, template_id: str | None = None):
+    """Repõe as cópias livres do pool de templates (ver template_pool).
+
+    Pedida a cada retirada com o template usado; sem ``template_id`` enche o
+    pool de todos os templates quentes.
+    """
+    from app.peticionador import google_services
+
+    criadas = template_pool.reabastecer(
+        google_services.get_drive_service(),
+        [template_id] if template_id else None,
+    )
+    logger.info("Pool de templates reabastecido: %s", criadas)
+    return criadas
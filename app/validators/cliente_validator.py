@@ -1,14 +1,48 @@
 """
 Validador para dados do cliente com sanitização e validação robusta.
+
+As regras formam um esquema compilado uma única vez (``ESQUEMA_CLIENTE``):
+padrões pré-compilados e uma tupla de regras por campo, sem estado por
+registro. ``ClienteValidator.validar_dados`` valida um registro e levanta
+``ValueError`` como antes; ``ClienteValidator.validar_lote`` valida uma
+sequência de registros em blocos e devolve os ``ClienteData`` válidos e os
+erros estruturados por campo (``ErroCampo``), na mesma ordem do registro
+avulso. Os CPFs/CNPJs de cada bloco são verificados de uma vez
+(``document_validation``).
 """
 
 import logging
 import re
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field, fields
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.validators.estados import obter_sigla_estado
+from document_validation import (
+    is_cnpj_valid,
+    is_cpf_valid,
+    validate_cnpj_batch,
+    validate_cpf_batch,
+)
 
 logger = logging.getLogger(__name__)
 
+# Tamanho máximo de cada texto após a sanitização
+TAMANHO_MAXIMO_TEXTO = 200
+
+# Caracteres de controle e caracteres perigosos para nomes de arquivo
+_RE_REMOVER = re.compile(r'[\x00-\x1f\x7f-\x9f<>:"/\\|?*]')
+_RE_NAO_DIGITO = re.compile(r"\D")
+_RE_EMAIL = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+# Aceita formatos: DD/MM/AAAA, AAAA-MM-DD, DD-MM-AAAA
+_RE_DATA = re.compile(r"\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2}|\d{2}-\d{2}-\d{4}")
+
+# Registros por bloco em validar_lote
+TAMANHO_BLOCO_LOTE = 1000
+
+# Chaves aceitas na entrada além dos nomes dos campos de ClienteData
+ALIASES_CAMPOS = {"tipoPessoa": "tipo_pessoa", "primeiroNome": "primeiro_nome"}
+
 
 @dataclass
 class ClienteData:
@@ -37,11 +71,182 @@ class ClienteData:
     estado_emissor_rg: Optional[str] = None
 
 
+CAMPOS_CLIENTE = frozenset(f.name for f in fields(ClienteData))
+
+
+@dataclass(frozen=True)
+class ErroCampo:
+    """Erro de validação de um campo"""
+
+    campo: str
+    mensagem: str
+
+
+@dataclass
+class ResultadoLote:
+    """Resultado de ``validar_lote``; índices referem-se à ordem de entrada"""
+
+    validos: List[Tuple[int, ClienteData]] = field(default_factory=list)
+    erros: Dict[int, List[ErroCampo]] = field(default_factory=dict)
+
+    @property
+    def clientes(self) -> List[ClienteData]:
+        return [cliente for _, cliente in self.validos]
+
+
+# Documento com os dígitos verificadores ainda por conferir:
+# (erros do registro, posição do erro nessa lista, campo, dígitos)
+DocumentoPendente = Tuple[List[ErroCampo], int, str, str]
+
+
+# --- Regras ---
+# Cada regra recebe o valor (já sanitizado e não vazio) e retorna a mensagem de
+# erro ou None.
+
+
+def _regra_tipo_pessoa(valor: Any) -> Optional[str]:
+    if valor not in ("pf", "pj"):
+        return "Tipo de pessoa deve ser 'pf' ou 'pj'"
+    return None
+
+
+def _regra_email(valor: Any) -> Optional[str]:
+    return None if _RE_EMAIL.fullmatch(str(valor)) else "Email inválido"
+
+
+def _regra_cep(valor: Any) -> Optional[str]:
+    if len(_RE_NAO_DIGITO.sub("", str(valor))) != 8:
+        return "CEP deve ter 8 dígitos"
+    return None
+
+
+def _regra_telefone(valor: Any) -> Optional[str]:
+    if not 10 <= len(_RE_NAO_DIGITO.sub("", str(valor))) <= 11:
+        return "Telefone deve ter 10 ou 11 dígitos"
+    return None
+
+
+def _regra_data_nascimento(valor: Any) -> Optional[str]:
+    if not _RE_DATA.fullmatch(str(valor)):
+        return (
+            "Data de nascimento deve estar no formato DD/MM/AAAA, AAAA-MM-DD "
+            "ou DD-MM-AAAA"
+        )
+    return None
+
+
+class EsquemaCliente:
+    """Regras de validação do cliente, montadas uma única vez"""
+
+    campos_obrigatorios: Tuple[Tuple[str, str], ...] = (
+        ("tipo_pessoa", "Tipo de pessoa"),
+        ("primeiro_nome", "Primeiro nome"),
+        ("sobrenome", "Sobrenome"),
+        ("email", "Email"),
+    )
+    # (campo, tamanho, rótulo, tipo de pessoa em que o documento é exigido)
+    documentos: Tuple[Tuple[str, int, str, str], ...] = (
+        ("cpf", 11, "CPF", "pf"),
+        ("cnpj", 14, "CNPJ", "pj"),
+    )
+    # Na ordem em que as mensagens aparecem para o usuário
+    regras: Tuple[Tuple[str, Callable[[Any], Optional[str]]], ...] = (
+        ("email", _regra_email),
+        ("endereco_cep", _regra_cep),
+        ("telefone_celular", _regra_telefone),
+        ("data_nascimento", _regra_data_nascimento),
+    )
+    campos_estado: Tuple[str, ...] = ("endereco_estado", "estado_emissor_rg")
+
+    def sanitizar(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Sanitiza dados removendo caracteres perigosos e espaços extras"""
+        sanitizados = {}
+        for chave, valor in data.items():
+            if isinstance(valor, str):
+                valor = _RE_REMOVER.sub("", " ".join(valor.split()))
+                if len(valor) > TAMANHO_MAXIMO_TEXTO:
+                    valor = valor[:TAMANHO_MAXIMO_TEXTO]
+            sanitizados[ALIASES_CAMPOS.get(chave, chave)] = valor
+        return sanitizados
+
+    def verificar(
+        self,
+        dados: Dict[str, Any],
+        pendentes: Optional[List[DocumentoPendente]] = None,
+    ) -> List[ErroCampo]:
+        """
+        Aplica as regras a um registro sanitizado e retorna os erros.
+
+        Com ``pendentes``, os dígitos verificadores do CPF/CNPJ não são
+        conferidos aqui: o documento entra em ``pendentes`` com a posição que
+        o erro ocuparia, para ``conferir_documentos`` inseri-lo no lugar.
+        """
+        erros: List[ErroCampo] = []
+        for campo, nome in self.campos_obrigatorios:
+            valor = dados.get(campo)
+            if not valor or not str(valor).strip():
+                erros.append(ErroCampo(campo, f"{nome} é obrigatório"))
+
+        tipo_pessoa = dados.get("tipo_pessoa")
+        if tipo_pessoa:
+            mensagem = _regra_tipo_pessoa(tipo_pessoa)
+            if mensagem:
+                erros.append(ErroCampo("tipo_pessoa", mensagem))
+
+        for campo, tamanho, rotulo, tipo in self.documentos:
+            valor = dados.get(campo)
+            if tipo_pessoa != tipo or not valor:
+                continue
+            digitos = _RE_NAO_DIGITO.sub("", str(valor))
+            if len(digitos) != tamanho:
+                erros.append(ErroCampo(campo, f"{rotulo} deve ter {tamanho} dígitos"))
+            elif pendentes is not None:
+                pendentes.append((erros, len(erros), campo, digitos))
+            elif not (is_cpf_valid if campo == "cpf" else is_cnpj_valid)(digitos):
+                erros.append(ErroCampo(campo, f"{rotulo} inválido"))
+
+        for campo, regra in self.regras:
+            valor = dados.get(campo)
+            if valor:
+                mensagem = regra(valor)
+                if mensagem:
+                    erros.append(ErroCampo(campo, mensagem))
+        return erros
+
+    def conferir_documentos(self, pendentes: List[DocumentoPendente]) -> None:
+        """Confere os dígitos dos documentos pendentes, uma chamada por tipo"""
+        for campo, validar, rotulo in (
+            ("cpf", validate_cpf_batch, "CPF"),
+            ("cnpj", validate_cnpj_batch, "CNPJ"),
+        ):
+            do_campo = [pendente for pendente in pendentes if pendente[2] == campo]
+            if not do_campo:
+                continue
+            validos = validar([digitos for _, _, _, digitos in do_campo])
+            for (erros, posicao, _, _), valido in zip(do_campo, validos):
+                if not valido:
+                    erros.insert(posicao, ErroCampo(campo, f"{rotulo} inválido"))
+
+    def construir(self, dados: Dict[str, Any]) -> ClienteData:
+        """Normaliza estados e cria o ``ClienteData`` (chaves extras ignoradas)"""
+        for campo in self.campos_estado:
+            valor = dados.get(campo)
+            if valor:
+                dados[campo] = obter_sigla_estado(valor) or valor
+        return ClienteData(
+            **{chave: v for chave, v in dados.items() if chave in CAMPOS_CLIENTE}
+        )
+
+
+ESQUEMA_CLIENTE = EsquemaCliente()
+
+
 class ClienteValidator:
     """Validador para dados do cliente"""
 
-    def __init__(self):
-        self.erros = []
+    def __init__(self, esquema: EsquemaCliente = ESQUEMA_CLIENTE):
+        self.esquema = esquema
+        self.erros: List[str] = []
 
     def validar_dados(self, data: Dict[str, Any]) -> ClienteData:
         """
@@ -56,175 +261,53 @@ class ClienteValidator:
         Raises:
             ValueError: Se os dados forem inválidos
         """
-        self.erros = []
-
-        # Sanitizar dados
-        dados_sanitizados = self._sanitizar_dados(data)
-
-        # Validar campos obrigatórios
-        self._validar_campos_obrigatorios(dados_sanitizados)
-
-        # Validar campos específicos
-        self._validar_cpf_cnpj(dados_sanitizados)
-        self._validar_email(dados_sanitizados)
-        self._validar_cep(dados_sanitizados)
-        self._validar_telefone(dados_sanitizados)
-        self._validar_data_nascimento(dados_sanitizados)
+        dados = self.esquema.sanitizar(data)
+        erros = self.esquema.verificar(dados)
+        self.erros = [erro.mensagem for erro in erros]
 
         # Se há erros, levantar exceção
         if self.erros:
             raise ValueError(f"Dados inválidos: {'; '.join(self.erros)}")
 
-        # Converter para ClienteData
-        return ClienteData(**dados_sanitizados)
+        return self.esquema.construir(dados)
 
-    def _sanitizar_dados(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Sanitiza dados removendo caracteres perigosos e espaços extras"""
-        sanitized = {}
-
-        for key, value in data.items():
-            if isinstance(value, str):
-                # Remove espaços extras
-                value = " ".join(value.split())
-                # Remove caracteres de controle
-                value = re.sub(r"[\x00-\x1f\x7f-\x9f]", "", value)
-                # Remove caracteres perigosos para nomes de arquivo
-                value = re.sub(r'[<>:"/\\|?*]', "", value)
-                # Limita tamanho
-                if len(value) > 200:
-                    value = value[:200]
-
-            sanitized[key] = value
-
-        return sanitized
-
-    def _validar_campos_obrigatorios(self, data: Dict[str, Any]):
-        """Valida campos obrigatórios"""
-        campos_obrigatorios = [
-            ("tipoPessoa", "Tipo de pessoa"),
-            ("primeiroNome", "Primeiro nome"),
-            ("sobrenome", "Sobrenome"),
-            ("email", "Email"),
-        ]
-
-        for campo, nome in campos_obrigatorios:
-            valor = data.get(campo)
-            if not valor or not str(valor).strip():
-                self.erros.append(f"{nome} é obrigatório")
-
-        # Validar tipo de pessoa
-        tipo_pessoa = data.get("tipoPessoa")
-        if tipo_pessoa and tipo_pessoa not in ["pf", "pj"]:
-            self.erros.append("Tipo de pessoa deve ser 'pf' ou 'pj'")
-
-    def _validar_cpf_cnpj(self, data: Dict[str, Any]):
-        """Valida CPF ou CNPJ conforme tipo de pessoa"""
-        tipo_pessoa = data.get("tipoPessoa")
-        cpf = data.get("cpf")
-        cnpj = data.get("cnpj")
-
-        if tipo_pessoa == "pf":
-            if cpf:
-                # Remove caracteres não numéricos
-                cpf_limpo = re.sub(r"\D", "", cpf)
-                if len(cpf_limpo) != 11:
-                    self.erros.append("CPF deve ter 11 dígitos")
-                elif not self._validar_cpf_algoritmo(cpf_limpo):
-                    self.erros.append("CPF inválido")
-
-        elif tipo_pessoa == "pj":
-            if cnpj:
-                # Remove caracteres não numéricos
-                cnpj_limpo = re.sub(r"\D", "", cnpj)
-                if len(cnpj_limpo) != 14:
-                    self.erros.append("CNPJ deve ter 14 dígitos")
-                elif not self._validar_cnpj_algoritmo(cnpj_limpo):
-                    self.erros.append("CNPJ inválido")
-
-    def _validar_cpf_algoritmo(self, cpf: str) -> bool:
-        """Valida CPF usando algoritmo oficial"""
-        if len(cpf) != 11 or cpf == cpf[0] * 11:
-            return False
-
-        # Validação do primeiro dígito verificador
-        soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-
-        if int(cpf[9]) != digito1:
-            return False
-
-        # Validação do segundo dígito verificador
-        soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-
-        return int(cpf[10]) == digito2
-
-    def _validar_cnpj_algoritmo(self, cnpj: str) -> bool:
-        """Valida CNPJ usando algoritmo oficial"""
-        if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
-            return False
-
-        # Validação do primeiro dígito verificador
-        multiplicadores1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma = sum(int(cnpj[i]) * multiplicadores1[i] for i in range(12))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-
-        if int(cnpj[12]) != digito1:
-            return False
-
-        # Validação do segundo dígito verificador
-        multiplicadores2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma = sum(int(cnpj[i]) * multiplicadores2[i] for i in range(13))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-
-        return int(cnpj[13]) == digito2
-
-    def _validar_email(self, data: Dict[str, Any]):
-        """Valida formato do email"""
-        email = data.get("email")
-        if email:
-            # Regex básica para email
-            email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-            if not re.match(email_pattern, email):
-                self.erros.append("Email inválido")
-
-    def _validar_cep(self, data: Dict[str, Any]):
-        """Valida formato do CEP"""
-        cep = data.get("endereco_cep")
-        if cep:
-            # Remove caracteres não numéricos
-            cep_limpo = re.sub(r"\D", "", cep)
-            if len(cep_limpo) != 8:
-                self.erros.append("CEP deve ter 8 dígitos")
-
-    def _validar_telefone(self, data: Dict[str, Any]):
-        """Valida formato do telefone"""
-        telefone = data.get("telefone_celular")
-        if telefone:
-            # Remove caracteres não numéricos
-            telefone_limpo = re.sub(r"\D", "", telefone)
-            if len(telefone_limpo) < 10 or len(telefone_limpo) > 11:
-                self.erros.append("Telefone deve ter 10 ou 11 dígitos")
-
-    def _validar_data_nascimento(self, data: Dict[str, Any]):
-        """Valida formato da data de nascimento"""
-        data_nasc = data.get("data_nascimento")
-        if data_nasc:
-            # Aceita formatos: DD/MM/AAAA, AAAA-MM-DD, DD-MM-AAAA
-            data_patterns = [
-                r"^\d{2}/\d{2}/\d{4}$",
-                r"^\d{4}-\d{2}-\d{2}$",
-                r"^\d{2}-\d{2}-\d{4}$",
-            ]
-
-            if not any(re.match(pattern, data_nasc) for pattern in data_patterns):
-                self.erros.append(
-                    "Data de nascimento deve estar no formato DD/MM/AAAA, AAAA-MM-DD ou DD-MM-AAAA"
-                )
+    def validar_lote(
+        self,
+        registros: Iterable[Dict[str, Any]],
+        tamanho_bloco: int = TAMANHO_BLOCO_LOTE,
+    ) -> ResultadoLote:
+        """
+        Valida vários registros sem levantar exceção.
+
+        Os registros são lidos em blocos de ``tamanho_bloco``; os dígitos
+        verificadores de CPF/CNPJ de cada bloco são conferidos em uma chamada
+        vetorizada por tipo de documento. Os erros de cada registro saem na
+        mesma ordem de ``validar_dados``.
+
+        Returns:
+            ResultadoLote com ``(índice, ClienteData)`` dos registros válidos e
+            ``{índice: [ErroCampo, ...]}`` dos inválidos
+        """
+        resultado = ResultadoLote()
+        iterador = iter(registros)
+        inicio = 0
+        while True:
+            bloco = list(islice(iterador, tamanho_bloco))
+            if not bloco:
+                return resultado
+            pendentes: List[DocumentoPendente] = []
+            verificados = []
+            for registro in bloco:
+                dados = self.esquema.sanitizar(registro)
+                verificados.append((dados, self.esquema.verificar(dados, pendentes)))
+            self.esquema.conferir_documentos(pendentes)
+
+            for indice, (dados, erros) in enumerate(verificados, start=inicio):
+                if erros:
+                    resultado.erros[indice] = erros
+                else:
+                    resultado.validos.append((indice, self.esquema.construir(dados)))
+            inicio += len(bloco)
 
 
 def validar_dados_cliente(data: Dict[str, Any]) -> ClienteData:
@@ -242,3 +325,8 @@ def validar_dados_cliente(data: Dict[str, Any]) -> ClienteData:
     """
     validator = ClienteValidator()
     return validator.validar_dados(data)
+
+
+def validar_lote_clientes(registros: Iterable[Dict[str, Any]]) -> ResultadoLote:
+    """Função conveniente para ``ClienteValidator().validar_lote``"""
+    return ClienteValidator().validar_lote(registros)
@@ -0,0 +1,198 @@
+"""
+Resolução de estados brasileiros (nome, sigla ou variações) para a sigla UF.
+
+A tabela de formas normalizadas é montada uma única vez no carregamento do
+módulo: nomes sem acento (NFKD), a própria sigla, "UF - Nome", "Nome/UF" e
+grafias erradas frequentes nas planilhas. Resolver um valor é normalizar o
+texto e fazer uma consulta ao dicionário.
+
+Valores não reconhecidos não geram log por linha; ficam contabilizados no
+resolvedor e podem ser reportados ao final de uma importação com
+``RESOLVEDOR_UF.relatorio_falhas()``.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Mapeamento de nomes de estado para siglas
+ESTADOS_SIGLAS = {
+    "ACRE": "AC",
+    "ALAGOAS": "AL",
+    "AMAPA": "AP",
+    "AMAZONAS": "AM",
+    "BAHIA": "BA",
+    "CEARA": "CE",
+    "DISTRITO FEDERAL": "DF",
+    "ESPIRITO SANTO": "ES",
+    "GOIAS": "GO",
+    "MARANHAO": "MA",
+    "MATO GROSSO": "MT",
+    "MATO GROSSO DO SUL": "MS",
+    "MINAS GERAIS": "MG",
+    "PARA": "PA",
+    "PARAIBA": "PB",
+    "PARANA": "PR",
+    "PERNAMBUCO": "PE",
+    "PIAUI": "PI",
+    "RIO DE JANEIRO": "RJ",
+    "RIO GRANDE DO NORTE": "RN",
+    "RIO GRANDE DO SUL": "RS",
+    "RONDONIA": "RO",
+    "RORAIMA": "RR",
+    "SANTA CATARINA": "SC",
+    "SAO PAULO": "SP",
+    "SERGIPE": "SE",
+    "TOCANTINS": "TO",
+}
+
+SIGLAS_UF = frozenset(ESTADOS_SIGLAS.values())
+
+# Grafias alternativas/erradas observadas nas planilhas (já sem acento)
+VARIACOES_ESTADOS = {
+    "AMAZONA": "AM",
+    "BAIA": "BA",
+    "BRASILIA": "DF",
+    "DISTRITO FEDERAL BRASILIA": "DF",
+    "ESPIRITO SANTOS": "ES",
+    "GOIAZ": "GO",
+    "MATOGROSSO": "MT",
+    "MATO GROSO": "MT",
+    "MATO GROSSO SUL": "MS",
+    "MATOGROSSO DO SUL": "MS",
+    "MATO GROSO DO SUL": "MS",
+    "MINAS": "MG",
+    "MINAS GERAES": "MG",
+    "M GERAIS": "MG",
+    "PERNANBUCO": "PE",
+    "PERAMBUCO": "PE",
+    "PARAHYBA": "PB",
+    "RIO GRANDE NORTE": "RN",
+    "RIO GRANDE SUL": "RS",
+    "R G DO SUL": "RS",
+    "RGS": "RS",
+    "RONDONHA": "RO",
+    "SAO PAOLO": "SP",
+    "SAOPAULO": "SP",
+    "S PAULO": "SP",
+    "STA CATARINA": "SC",
+    "SERGIPI": "SE",
+    "TOCANTIS": "TO",
+}
+
+# Máximo de textos originais memorizados pelo resolvedor
+LIMITE_CACHE_VALORES = 4096
+# Máximo de valores não reconhecidos distintos contabilizados (o resolvedor
+# vive no processo web; depois do limite, só o total continua sendo contado)
+LIMITE_FALHAS_DISTINTAS = 1024
+
+# Separadores tratados como espaço: hífens/travessões, barra, parênteses,
+# vírgula e ponto ("SP - São Paulo", "São Paulo/SP", "S. Paulo (SP)")
+_SEPARADORES = str.maketrans({c: " " for c in "-–—/\\(),.;:|"})
+_ESPACOS = re.compile(r"\s+")
+_RE_UF_TRAVESSAO = re.compile(
+    r"^\s*(?:%s)\s+[-–]\s" % "|".join(sorted(SIGLAS_UF)), re.IGNORECASE
+)
+
+
+def normalizar_estado(valor: str) -> str:
+    """Forma canônica usada como chave: sem acento, maiúscula, separadores
+    convertidos em espaço simples."""
+    decomposto = unicodedata.normalize("NFKD", valor)
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _ESPACOS.sub(" ", sem_acento.upper().translate(_SEPARADORES)).strip()
+
+
+def _construir_tabela() -> Dict[str, str]:
+    tabela: Dict[str, str] = {}
+    nomes: List[Tuple[str, str]] = list(ESTADOS_SIGLAS.items()) + list(
+        VARIACOES_ESTADOS.items()
+    )
+    for nome, sigla in nomes:
+        nome = normalizar_estado(nome)
+        tabela[nome] = sigla
+        tabela[f"{sigla} {nome}"] = sigla  # "SP - São Paulo"
+        tabela[f"{nome} {sigla}"] = sigla  # "São Paulo/SP", "São Paulo (SP)"
+    for sigla in SIGLAS_UF:
+        tabela[sigla] = sigla
+    return tabela
+
+
+class ResolvedorUF:
+    """Resolve textos de estado para sigla UF e contabiliza as falhas."""
+
+    def __init__(self, tabela: Dict[str, str]):
+        self._tabela = tabela
+        # Textos originais já resolvidos -> sigla (inclui as próprias siglas)
+        self._por_valor: Dict[str, str] = {sigla: sigla for sigla in SIGLAS_UF}
+        self._falhas: Counter = Counter()
+        self._total_falhas = 0
+        self._lock = threading.Lock()
+
+    def resolver(self, valor) -> Optional[str]:
+        """Retorna a sigla UF de ``valor`` ou ``None`` se não reconhecido."""
+        if not valor or not isinstance(valor, str):
+            return None
+        # Texto já visto (ou sigla correta): uma única consulta
+        sigla = self._por_valor.get(valor)
+        if sigla is not None:
+            return sigla
+
+        normalizado = normalizar_estado(valor)
+        sigla = self._tabela.get(normalizado)
+        if sigla is None and _RE_UF_TRAVESSAO.match(valor):
+            # "UF - Texto qualquer": vale a sigla antes do travessão
+            sigla = normalizado[:2]
+        if sigla is not None:
+            if len(self._por_valor) < LIMITE_CACHE_VALORES:
+                self._por_valor[valor] = sigla
+        elif valor.strip():
+            self._registrar_falha(valor.strip())
+        return sigla
+
+    __call__ = resolver
+
+    def _registrar_falha(self, valor: str) -> None:
+        with self._lock:
+            self._total_falhas += 1
+            if valor in self._falhas or len(self._falhas) < LIMITE_FALHAS_DISTINTAS:
+                self._falhas[valor] += 1
+
+    @property
+    def total_falhas(self) -> int:
+        return self._total_falhas
+
+    def falhas(self, limite: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Valores não reconhecidos, do mais para o menos frequente."""
+        with self._lock:
+            return self._falhas.most_common(limite)
+
+    def relatorio_falhas(self, limite: int = 20) -> Optional[str]:
+        """Resumo das falhas em uma linha (``None`` se não houve falhas)."""
+        falhas = self.falhas(limite)
+        if not falhas:
+            return None
+        distintos = len(self._falhas)
+        itens = ", ".join(f"'{valor}' ({qtd}x)" for valor, qtd in falhas)
+        sufixo = f" (+{distintos - len(falhas)} outros)" if distintos > limite else ""
+        if distintos >= LIMITE_FALHAS_DISTINTAS:
+            distintos = f"{distintos}+"
+        return (
+            f"{self.total_falhas} valores de estado não reconhecidos "
+            f"({distintos} distintos): {itens}{sufixo}"
+        )
+
+    def limpar_falhas(self) -> None:
+        with self._lock:
+            self._falhas.clear()
+            self._total_falhas = 0
+
+
+RESOLVEDOR_UF = ResolvedorUF(_construir_tabela())
+
+
+def obter_sigla_estado(nome_estado_str) -> Optional[str]:
+    """Converte nome/sigla/variação de estado para a sigla UF (ou ``None``)."""
+    return RESOLVEDOR_UF.resolver(nome_estado_str)
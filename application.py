@@ -31,6 +31,7 @@ from werkzeug.security import check_password_hash, generate_password_hash
 
 from config import CONFIG
 from document_generator import buscar_ou_criar_pasta_cliente, gerar_documento_cliente
+from field_mapping import mapear_para_template
 from security_middleware import SecurityMiddleware, require_api_key
 
 # Inicializar extensões
@@ -121,6 +122,35 @@ from app.api.document_api import register_document_api_routes
 
 register_document_api_routes(app, limiter, require_api_key)
 
+# Métricas Prometheus (/metrics) e sinais do Celery para a espera na fila
+from metrics import instrumentar_celery, registrar_endpoint_metrics
+
+registrar_endpoint_metrics(app, limiter)
+instrumentar_celery()
+
+# Reposição do pool de templates após cada retirada (ver template_pool)
+import template_pool
+from app.celery_app import celery_da_app
+from app.tasks.document_generation import reabastecer_pool_task
+
+template_pool.registrar_reabastecedor(
+    # Enfileira pela instância configurada do app, não pela corrente da
+    # thread (nas threads web é a instância "default", sem broker)
+    lambda template_id: celery_da_app(app).send_task(
+        reabastecer_pool_task.name, args=[template_id]
+    )
+)
+
+# Profiler sob demanda (header X-Profile assinado ou amostragem)
+from request_profiler import instrumentar_app
+
+instrumentar_app(app)
+
+# Queries SQL por requisição e detector de N+1 (totais no log de cada resposta)
+import query_accounting
+
+query_accounting.instrumentar_app(app)
+
 
 # Rota para favicon
 @app.route("/favicon.ico")
@@ -372,46 +402,10 @@ def gerar_documento_api():
         # ... (código existente)
         # Mapeia campos do frontend para os nomes esperados pelo backend/document_generator
         tipo_pessoa = data.get("tipoPessoa", "pf")
-        # Mapeamento dos dados do cliente (como estava antes)
-        dados_cliente = {
-            "Primeiro Nome": data.get("primeiroNome", ""),
-            "Sobrenome": data.get("sobrenome", ""),
-            "Nacionalidade": data.get("nacionalidade", "Brasileiro(a)"),
-            "RG": data.get("rg", ""),
-            "Estado emissor do RG": data.get("estadoEmissorRG", ""),
-            "Estado Civil": data.get("estadoCivil", ""),
-            "CPF": data.get("cpf", ""),
-            "Profissão": data.get("profissao", ""),
-            "CNH": data.get("cnh", ""),
-            # Novo formato estruturado
-            "Logradouro": data.get("logradouro", ""),
-            "Número": data.get("numero", ""),
-            "Complemento": data.get("complemento", ""),
-            # Para compatibilidade com templates antigos, monta o campo completo
-            "Endereço": (
-                (data.get("logradouro", "") + ", " if data.get("logradouro") else "")
-                + (
-                    data.get("numero", "") + (", " if data.get("complemento") else "")
-                    if data.get("numero")
-                    else ""
-                )
-                + (
-                    data.get("complemento", "") + ", "
-                    if data.get("complemento")
-                    else ""
-                )
-                + (data.get("bairro", "") if data.get("bairro") else "")
-            )
-            or data.get("endereco", ""),
-            "Bairro": data.get("bairro", ""),
-            "Cidade": data.get("cidade", ""),
-            "Estado": data.get("estado", ""),
-            "CEP": data.get("cep", ""),
-            "E-mail": data.get("email", ""),
-            "Nascimento": data.get("dataNascimento", ""),
-            "Telefone Celular": data.get("telefoneCelular", ""),
-            "Outro telefone": data.get("outroTelefone", ""),
-        }
+        # Mapeamento para os placeholders, feito uma vez para todo o kit
+        dados_cliente = mapear_para_template(
+            data, tipo_pessoa, padroes={"Nacionalidade": "Brasileiro(a)"}
+        )
 
         # 1. Buscar ou criar a pasta do cliente UMA VEZ
         primeiro_nome_pasta = dados_cliente.get("Primeiro Nome")
@@ -487,9 +481,11 @@ def gerar_documento_api():
                     docs_service=docs_service,
                     id_template=id_template,
                     tipo_doc=tipo_doc_atual,
-                    dados_cliente=dados_cliente,
+                    dados_cliente=data,
                     id_pasta_cliente=id_pasta_cliente,
                     tipo_pessoa=tipo_pessoa,
+                    dados_template=dados_cliente,
+                    forcar_regeneracao=bool(data.get("forcarRegeneracao")),
                 )
 
                 links_gerados.append(
@@ -498,6 +494,7 @@ def gerar_documento_api():
                         "link": resultado_doc["link_documento"],
                         "id": resultado_doc["id_documento"],
                         "nome_arquivo": resultado_doc["nome_arquivo"],
+                        "reutilizado": resultado_doc.get("reutilizado", False),
                     }
                 )
             except Exception as sub_e:
@@ -0,0 +1,206 @@
+"""
+Normalização dos dados de busca de clientes (CPF/CNPJ, email e nome).
+
+As formas normalizadas ficam em colunas próprias de ``respostas_form``
+(preenchidas pelos eventos do mapper em ``models.py``), para que a busca use
+índices comuns em qualquer banco — inclusive no SQLite dos testes, onde não
+há ``unaccent`` nem ``pg_trgm``:
+
+    cpf_digitos / cnpj_digitos  só os dígitos do documento
+    email_normalizado           email sem espaços, em minúsculas
+    nome_normalizado            nome sem acentos, minúsculo, só letras/dígitos
+    nome_fonetico               chave fonética de cada palavra do nome
+
+A chave fonética é uma simplificação das regras do português (na linha do
+BuscaBR): grafias que soam igual viram a mesma chave — ``Thiago``/``Tiago``,
+``Souza``/``Sousa``, ``Felipe``/``Filipe``, ``Luiz``/``Luis``,
+``Jéssica``/``Gessika``. Ela não tenta distinguir todos os sons; só serve
+para achar nomes digitados "de ouvido", com relevância menor na busca.
+
+``reindexar`` recalcula as colunas de todas as linhas (comando
+``flask reindex-client-search``, após mudar as regras de normalização).
+"""
+
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, column, select, table
+
+# Lotes de ``reindexar`` (linhas lidas e atualizadas por vez)
+TAMANHO_LOTE = 1000
+
+# Tamanho das colunas de nome; o nome composto (primeiro nome, sobrenome e
+# razão social) pode passar disso e é cortado, o que só afeta o fim do nome
+TAMANHO_NOME_BUSCA = 256
+
+_RE_NAO_DIGITO = re.compile(r"\D")
+_RE_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+# Partículas ignoradas na chave fonética ("Maria da Silva" ~ "Maria Silva")
+PARTICULAS = frozenset({"d", "da", "das", "de", "do", "dos", "e"})
+
+# Aplicadas em ordem sobre uma palavra já sem acentos
+_REGRAS_FONETICAS = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"lh"), "li"),
+    (re.compile(r"nh"), "ni"),
+    (re.compile(r"[cs]h"), "x"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"ku(?=[aeio])"), "k"),
+    (re.compile(r"s?c(?=[ei])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"n(?=[^aeiou]|$)"), "m"),
+    # Vogais átonas se confundem na escrita: e/i e o/u viram uma só
+    (re.compile(r"e"), "i"),
+    (re.compile(r"o"), "u"),
+    (re.compile(r"(\w)\1+"), r"\1"),
+]
+
+
+def somente_digitos(valor: Optional[str]) -> str:
+    return _RE_NAO_DIGITO.sub("", valor or "")
+
+
+def normalizar_email(valor: Optional[str]) -> str:
+    return (valor or "").strip().lower()
+
+
+def normalizar_texto(valor: Optional[str]) -> str:
+    """Minúsculas sem acentos, palavras separadas por um espaço"""
+    decomposto = unicodedata.normalize("NFKD", (valor or "").lower())
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _RE_NAO_ALFANUMERICO.sub(" ", sem_acentos).strip()
+
+
+def chave_fonetica_palavra(palavra: str) -> str:
+    """Chave de uma palavra já normalizada (``normalizar_texto``)"""
+    for regra, substituto in _REGRAS_FONETICAS:
+        palavra = regra.sub(substituto, palavra)
+    return palavra
+
+
+def chave_fonetica(valor: Optional[str]) -> str:
+    """Chaves das palavras do texto, na ordem, sem as partículas"""
+    # "ç" soa como "s": trocado antes que a remoção de acentos o vire "c"
+    texto = normalizar_texto((valor or "").lower().replace("ç", "s"))
+    return " ".join(
+        chave_fonetica_palavra(palavra)
+        for palavra in texto.split()
+        if palavra not in PARTICULAS
+    )
+
+
+def nome_de_busca(
+    primeiro_nome: Optional[str],
+    sobrenome: Optional[str],
+    razao_social: Optional[str] = None,
+) -> str:
+    """Nome usado na busca: pessoa física e/ou razão social"""
+    partes = (primeiro_nome, sobrenome, razao_social)
+    return " ".join(p.strip() for p in partes if p and p.strip())
+
+
+def campos_busca(
+    primeiro_nome: Optional[str] = None,
+    sobrenome: Optional[str] = None,
+    razao_social: Optional[str] = None,
+    cpf: Optional[str] = None,
+    cnpj: Optional[str] = None,
+    email: Optional[str] = None,
+) -> Dict[str, Optional[str]]:
+    """Valores das colunas de busca (``None`` em vez de texto vazio)"""
+    nome = nome_de_busca(primeiro_nome, sobrenome, razao_social)
+    return {
+        "cpf_digitos": somente_digitos(cpf) or None,
+        "cnpj_digitos": somente_digitos(cnpj) or None,
+        "email_normalizado": normalizar_email(email) or None,
+        "nome_normalizado": _cortar(normalizar_texto(nome)) or None,
+        "nome_fonetico": _cortar(chave_fonetica(nome)) or None,
+    }
+
+
+def _cortar(texto: str) -> str:
+    return texto[:TAMANHO_NOME_BUSCA].rstrip()
+
+
+# Só as colunas usadas aqui (o comando de reindexação não importa models)
+_respostas = table(
+    "respostas_form",
+    column("id"),
+    column("primeiro_nome"),
+    column("sobrenome"),
+    column("razao_social"),
+    column("cpf"),
+    column("cnpj"),
+    column("email"),
+    column("cpf_digitos"),
+    column("cnpj_digitos"),
+    column("email_normalizado"),
+    column("nome_normalizado"),
+    column("nome_fonetico"),
+)
+
+
+def reindexar(conexao, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """Recalcula as colunas de busca de todas as respostas; devolve o total"""
+    c = _respostas.c
+    colunas_busca = (
+        "cpf_digitos",
+        "cnpj_digitos",
+        "email_normalizado",
+        "nome_normalizado",
+        "nome_fonetico",
+    )
+    atualizar = (
+        _respostas.update()
+        .where(c.id == bindparam("b_id"))
+        .values({nome: bindparam(f"b_{nome}") for nome in colunas_busca})
+    )
+    total, ultimo_id = 0, 0
+    while True:
+        linhas = conexao.execute(
+            select(
+                c.id,
+                c.primeiro_nome,
+                c.sobrenome,
+                c.razao_social,
+                c.cpf,
+                c.cnpj,
+                c.email,
+            )
+            .where(c.id > ultimo_id)
+            .order_by(c.id)
+            .limit(tamanho_lote)
+        ).all()
+        if not linhas:
+            return total
+        conexao.execute(
+            atualizar,
+            [
+                {
+                    "b_id": linha.id,
+                    **{
+                        f"b_{nome}": valor
+                        for nome, valor in campos_busca(
+                            linha.primeiro_nome,
+                            linha.sobrenome,
+                            linha.razao_social,
+                            linha.cpf,
+                            linha.cnpj,
+                            linha.email,
+                        ).items()
+                    },
+                }
+                for linha in linhas
+            ],
+        )
+        total += len(linhas)
+        ultimo_id = linhas[-1].id
@@ -0,0 +1,89 @@
+"""
+Configuração comum dos testes (pytest).
+
+``google_client`` exige um arquivo de Service Account já na importação; sem
+``GOOGLE_SERVICE_ACCOUNT_JSON`` configurado, os testes usam um arquivo
+descartável com uma chave gerada na hora (nenhuma chamada real ao Google é
+feita: os testes usam serviços falsos).
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_DIRETORIO_TESTES = tempfile.mkdtemp(prefix="form_google_testes_")
+
+
+def _service_account_descartavel() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = chave.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    caminho = os.path.join(_DIRETORIO_TESTES, "service_account.json")
+    with open(caminho, "w") as arquivo:
+        json.dump(
+            {
+                "type": "service_account",
+                "project_id": "testes",
+                "private_key_id": "1",
+                "private_key": pem,
+                "client_email": "testes@testes.iam.gserviceaccount.com",
+                "client_id": "1",
+                "token_uri": "https://oauth2.googleapis.com/token",
+            },
+            arquivo,
+        )
+    return caminho
+
+
+if not os.path.exists(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON") or ""):
+    os.environ["GOOGLE_SERVICE_ACCOUNT_JSON"] = _service_account_descartavel()
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App de teste com um banco SQLite novo (arquivo) por teste"""
+    from app import create_app
+    from config import TestingConfig
+    from extensions import db
+
+    class ConfigTestes(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'testes.db'}"
+        WTF_CSRF_ENABLED = False
+        # Resultados das tasks em memória (o broker é memory://)
+        CELERY_RESULT_BACKEND = "cache+memory://"
+
+    aplicacao = create_app(ConfigTestes)
+    with aplicacao.app_context():
+        db.create_all()
+        yield aplicacao
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def cliente_logado(app):
+    """Cliente HTTP com um usuário do peticionador já logado"""
+    from app.peticionador.models import User
+    from extensions import db
+
+    usuario = User(email="usuario@exemplo.com")
+    db.session.add(usuario)
+    db.session.commit()
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["_user_id"] = str(usuario.id)
+        sessao["_fresh"] = True
+    return cliente
@@ -0,0 +1,137 @@
+"""
+Normalização de datas vindas de formulários e planilhas.
+
+Os formatos que realmente chegam ao sistema são poucos: ``AAAA-MM-DD`` (input
+``date`` do HTML), ``DD/MM/AAAA`` (digitação/planilhas) e o carimbo de data/hora
+do Google Sheets (``DD/MM/AAAA HH:MM:SS``). Esses casos são resolvidos por
+expressões compiladas e construção direta de ``date``/``datetime``; o
+``dateutil`` só é usado como fallback, com dia antes do mês (exceto quando o
+texto começa pelo ano).
+
+Os resultados de ``format_date_br`` são memorizados.
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+from dateutil import parser as dateutil_parser
+
+# AAAA-MM-DD, opcionalmente com hora (ISO 8601 / "AAAA-MM-DD HH:MM[:SS]")
+_RE_ISO = re.compile(
+    r"(\d{4})-(\d{1,2})-(\d{1,2})"
+    r"(?:[ T](\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+)
+# DD/MM/AAAA ou DD/MM/AA, opcionalmente com hora (carimbo do Google Sheets)
+_RE_BR = re.compile(
+    r"(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})(?:,?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?)?"
+)
+# O fallback só é tentado se houver ao menos dia, mês e ano no texto
+_RE_TOKENS = re.compile(r"\d+|[^\W\d_]+")
+_RE_ANO_INICIAL = re.compile(r"\d{4}\D")
+
+
+def _ano(texto: str) -> int:
+    ano = int(texto)
+    if len(texto) == 2:
+        # Mesma janela do strptime("%y"): 69-99 -> 1900, 00-68 -> 2000
+        ano += 1900 if ano >= 69 else 2000
+    return ano
+
+
+def _fast_path(texto: str) -> Optional[datetime]:
+    # Formas exatas mais comuns, resolvidas por fatiamento sem regex
+    if len(texto) == 10:
+        if texto[4] == "-" and texto[7] == "-":
+            ano, mes, dia = texto[:4], texto[5:7], texto[8:]
+        elif texto[2] == "/" and texto[5] == "/":
+            dia, mes, ano = texto[:2], texto[3:5], texto[6:]
+        else:
+            ano = None
+        if ano is not None and (ano + mes + dia).isdigit():
+            return datetime(int(ano), int(mes), int(dia))
+
+    match = _RE_BR.fullmatch(texto)
+    if match:
+        dia, mes, ano, hora, minuto, segundo = match.groups()
+        return datetime(
+            _ano(ano),
+            int(mes),
+            int(dia),
+            int(hora or 0),
+            int(minuto or 0),
+            int(segundo or 0),
+        )
+    match = _RE_ISO.fullmatch(texto)
+    if match:
+        ano, mes, dia, hora, minuto, segundo = match.groups()
+        return datetime(
+            int(ano),
+            int(mes),
+            int(dia),
+            int(hora or 0),
+            int(minuto or 0),
+            int(segundo or 0),
+        )
+    return None
+
+
+def parse_datetime(valor: Any, fallback: bool = True) -> Optional[datetime]:
+    """
+    Converte ``valor`` em ``datetime`` (``None`` se vazio ou inválido).
+
+    Aceita ``date``/``datetime`` já convertidos. Com ``fallback=False`` só os
+    formatos rápidos são aceitos.
+    """
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day)
+    if not valor:
+        return None
+
+    texto = str(valor).strip()
+    if not texto:
+        return None
+
+    try:
+        resultado = _fast_path(texto)
+    except ValueError:  # Ex.: 31/02/2020 casa o padrão mas não é data válida
+        return None
+    if resultado is not None or not fallback:
+        return resultado
+
+    if len(_RE_TOKENS.findall(texto)) < 3:
+        return None
+    try:
+        # dayfirst com texto iniciado pelo ano inverteria mês e dia ("1985-12-01")
+        return dateutil_parser.parse(texto, dayfirst=not _RE_ANO_INICIAL.match(texto))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def parse_date(valor: Any, fallback: bool = True) -> Optional[date]:
+    """Converte ``valor`` em ``date`` (``None`` se vazio ou inválido)."""
+    resultado = parse_datetime(valor, fallback=fallback)
+    return resultado.date() if resultado is not None else None
+
+
+def _br(valor: date) -> str:
+    # Equivalente a strftime("%d/%m/%Y"), várias vezes mais rápido
+    return f"{valor.day:02d}/{valor.month:02d}/{valor.year:04d}"
+
+
+@lru_cache(maxsize=4096)
+def _format_date_br_cached(texto: str) -> Optional[str]:
+    resultado = parse_datetime(texto)
+    return _br(resultado) if resultado is not None else None
+
+
+def format_date_br(valor: Any) -> Optional[str]:
+    """Formata ``valor`` como ``DD/MM/AAAA`` (``None`` se não for uma data)."""
+    if isinstance(valor, (date, datetime)):
+        return _br(valor)
+    if valor is None:
+        return None
+    return _format_date_br_cached(str(valor).strip())
@@ -0,0 +1,256 @@
+"""
+Reaproveitamento de documentos gerados pelo conteúdo (cache endereçado por hash).
+
+Gerar de novo o mesmo documento — mesmo template, mesma revisão do template,
+mesmos valores — só produzia cópias idênticas no Drive, ao custo de uma
+cópia e de um ``batchUpdate`` cada. O hash SHA-256 de
+
+    (id do template, revisão do template, substituições normalizadas)
+
+é gravado no próprio arquivo gerado, nas ``appProperties`` do Drive (chave
+``HASH_CHAVE``), e antes de copiar o template a geração procura na pasta de
+destino um documento com o mesmo hash. Achando, devolve o existente; o
+pedido com ``forcar_regeneracao`` ignora o cache e gera outro documento.
+
+O hash só é gravado (``marcar``) depois que o preenchimento deu certo — uma
+geração concorrente não acha uma cópia pela metade — junto com a revisão do
+conteúdo no Docs (``revisionId``) deixada pelo preenchimento. Um documento
+editado à mão depois disso tem outra revisão e não é reaproveitado.
+
+Normalização das substituições:
+    - valores ``None`` ficam de fora (o preenchimento não os substitui);
+    - os demais viram texto sem espaços nas pontas.
+
+As chaves de ``CHAVES_VOLATEIS`` (data de preenchimento) entram no hash
+como as demais: um documento só é reaproveitado no mesmo dia em que foi
+gerado, com a mesma data no texto.
+
+A revisão é a ``version`` do arquivo do template no Drive (muda a cada
+edição), guardada em memória por ``VALIDADE_REVISAO`` segundos para não
+custar uma chamada por documento; uma edição do template passa a valer no
+cache depois desse intervalo.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from metrics import executar_google, registrar_cache_documento
+
+logger = logging.getLogger(__name__)
+
+HASH_CHAVE = "hash_conteudo"
+# revisionId do Docs logo depois do preenchimento (detecta edição manual)
+REVISAO_CHAVE = "revisao_conteudo"
+# Placeholders com a data da geração (a atualização no lugar os preserva)
+CHAVES_VOLATEIS = frozenset({"Data_Preenchimento", "data.atual_extenso"})
+# Documentos com o mesmo hash examinados até achar um não editado
+MAX_CANDIDATOS = 5
+# Segundos em que a revisão de um template é reaproveitada sem ir ao Drive
+VALIDADE_REVISAO = 60.0
+
+_revisoes: Dict[str, Tuple[float, str]] = {}
+_lock = threading.Lock()
+
+
+def normalizar_substituicoes(substituicoes: Mapping[str, Any]) -> Dict[str, str]:
+    return {
+        str(chave): str(valor).strip()
+        for chave, valor in substituicoes.items()
+        if valor is not None
+    }
+
+
+def hash_conteudo(
+    template_id: str, revisao: Optional[str], substituicoes: Mapping[str, Any]
+) -> str:
+    """Hash estável (hex) do conteúdo que o documento gerado terá"""
+    conteudo = json.dumps(
+        [template_id, revisao or "", normalizar_substituicoes(substituicoes)],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def revisao_template(drive_service, template_id: str) -> Optional[str]:
+    """``version`` atual do template (memorizada por ``VALIDADE_REVISAO``)"""
+    agora = time.monotonic()
+    memorizada = _revisoes.get(template_id)
+    if memorizada is not None and agora - memorizada[0] < VALIDADE_REVISAO:
+        return memorizada[1]
+    try:
+        arquivo = executar_google(
+            "drive",
+            "files.get",
+            drive_service.files().get(
+                fileId=template_id, fields="version", supportsAllDrives=True
+            ),
+        )
+    except HttpError as error:
+        logger.warning(
+            f"revisao_template: não foi possível ler a revisão do template '{template_id}': {error}"
+        )
+        return None
+    revisao = str(arquivo.get("version") or "")
+    with _lock:
+        _revisoes[template_id] = (agora, revisao)
+    return revisao
+
+
+def esquecer_revisoes() -> None:
+    """Descarta as revisões memorizadas (a próxima geração consulta o Drive)"""
+    with _lock:
+        _revisoes.clear()
+
+
+def propriedades(
+    hash_documento: Optional[str], revisao_conteudo: Optional[str]
+) -> Dict[str, Dict[str, str]]:
+    """``body`` de ``files.update`` que grava o hash e a revisão no arquivo"""
+    if not hash_documento or not revisao_conteudo:
+        return {}
+    return {
+        "appProperties": {
+            HASH_CHAVE: hash_documento,
+            REVISAO_CHAVE: revisao_conteudo,
+        }
+    }
+
+
+def revisao_da_resposta(resposta: Optional[Mapping[str, Any]]) -> Optional[str]:
+    """``revisionId`` do documento depois de um ``documents.batchUpdate``"""
+    return ((resposta or {}).get("writeControl") or {}).get("requiredRevisionId")
+
+
+def revisao_conteudo(docs_service, id_documento: str) -> Optional[str]:
+    """``revisionId`` atual do documento no Docs (``None`` se não der para ler)"""
+    try:
+        documento = executar_google(
+            "docs",
+            "documents.get",
+            docs_service.documents().get(documentId=id_documento, fields="revisionId"),
+        )
+    except HttpError as error:
+        logger.warning(
+            f"revisao_conteudo: não foi possível ler a revisão do documento '{id_documento}': {error}"
+        )
+        return None
+    return documento.get("revisionId")
+
+
+def marcar(
+    drive_service,
+    docs_service,
+    id_documento: str,
+    hash_documento: Optional[str],
+    revisao: Optional[str] = None,
+) -> bool:
+    """
+    Grava o hash no documento já preenchido, para ser reaproveitado depois.
+
+    ``revisao`` é o ``revisionId`` deixado pelo preenchimento
+    (``revisao_da_resposta``); sem ela, é lido do Docs. Falhas só impedem o
+    reaproveitamento e não são propagadas.
+    """
+    if not hash_documento:
+        return False
+    revisao = revisao or revisao_conteudo(docs_service, id_documento)
+    if not revisao:
+        return False
+    try:
+        executar_google(
+            "drive",
+            "files.update",
+            drive_service.files().update(
+                fileId=id_documento,
+                body=propriedades(hash_documento, revisao),
+                supportsAllDrives=True,
+            ),
+        )
+    except HttpError as error:
+        logger.warning(
+            f"marcar: hash não gravado no documento '{id_documento}': {error}"
+        )
+        return False
+    return True
+
+
+def buscar_documento(
+    drive_service, docs_service, pasta_id: str, hash_documento: str
+) -> Optional[Dict[str, str]]:
+    """
+    Documento da pasta com o hash e sem edição desde o preenchimento
+    (``id``, ``name``, ``webViewLink``), se houver.
+    """
+    consulta = (
+        f"appProperties has {{ key='{HASH_CHAVE}' and value='{hash_documento}' }}"
+        f" and '{pasta_id}' in parents and trashed=false"
+    )
+    try:
+        resposta = executar_google(
+            "drive",
+            "files.list",
+            drive_service.files().list(
+                q=consulta,
+                fields="files(id, name, webViewLink, appProperties)",
+                pageSize=MAX_CANDIDATOS,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+            ),
+        )
+    except HttpError as error:
+        # Falha na consulta não impede a geração: segue como se não houvesse
+        logger.warning(f"buscar_documento: consulta por hash falhou: {error}")
+        registrar_cache_documento("erro")
+        return None
+    arquivos = resposta.get("files", [])
+    for arquivo in arquivos:
+        gravada = (arquivo.get("appProperties") or {}).get(REVISAO_CHAVE)
+        if gravada and gravada == revisao_conteudo(docs_service, arquivo["id"]):
+            registrar_cache_documento("acerto")
+            return {
+                chave: arquivo.get(chave) for chave in ("id", "name", "webViewLink")
+            }
+        logger.info(
+            f"buscar_documento: documento '{arquivo['id']}' editado desde a geração; não reaproveitado"
+        )
+    registrar_cache_documento("editado" if arquivos else "falta")
+    return None
+
+
+def localizar(
+    drive_service,
+    docs_service,
+    template_id: str,
+    pasta_id: str,
+    substituicoes: Mapping[str, Any],
+    forcar_regeneracao: bool = False,
+    revisao: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+    """
+    ``(hash, documento existente ou None)`` para as substituições no template.
+
+    ``revisao`` é a do template já lida pelo chamador (senão, lida aqui).
+    Com ``forcar_regeneracao`` só calcula o hash (o documento novo também o
+    recebe, em ``marcar``). Sem a revisão do template não há como saber se um documento
+    antigo ainda vale: devolve ``(None, None)`` e o novo sai sem hash.
+    """
+    if revisao is None:
+        revisao = revisao_template(drive_service, template_id)
+    if not revisao:
+        registrar_cache_documento("erro")
+        return None, None
+    hash_documento = hash_conteudo(template_id, revisao, substituicoes)
+    if forcar_regeneracao:
+        registrar_cache_documento("ignorado")
+        return hash_documento, None
+    return hash_documento, buscar_documento(
+        drive_service, docs_service, pasta_id, hash_documento
+    )
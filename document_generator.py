@@ -4,66 +4,30 @@ import logging
 import os
 import re
 
-from dateutil import parser as dateutil_parser  # Para formatação de datas
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+import document_cache
+import template_pool
 from config import CONFIG
+from field_mapping import mapear_para_template
+from generation_trace import Redigido, evento
+from metrics import executar_google
+from stage_timing import etapa, span_atual
 
 logger = logging.getLogger(__name__)
 
-MAPEAMENTO_CHAVES_TEMPLATE_PF = {
-    "primeiroNome": "Primeiro Nome",
-    "sobrenome": "Sobrenome",
-    "nacionalidade": "Nacionalidade",
-    "estadoCivil": "Estado Civil",
-    "profissao": "Profissão",
-    "dataNascimento": "Nascimento",
-    "cpf": "CPF",
-    "rg": "RG",
-    "estadoEmissorRG": "Estado emissor do RG",
-    "cnh": "CNH",
-    "cep": "Endereço_CEP",
-    "logradouro": "Endereço_Logradouro",
-    "numero": "Endereço_Numero",
-    "complemento": "Endereço_Complemento",
-    "bairro": "Endereço_Bairro",
-    "cidade": "Endereço_Cidade",
-    "estado": "Endereço_Estado",
-    "email": "E-mail",
-    "telefoneCelular": "Telefone Celular",
-    "outroTelefone": "Outro telefone",
-}
-
-MAPEAMENTO_CHAVES_TEMPLATE_PJ = {
-    "razaoSocial": "Razão Social",
-    "nomeFantasia": "Nome Fantasia",
-    "cnpj": "CNPJ",
-    "inscricaoEstadual": "Inscrição Estadual",
-    "dataFundacao": "Data de Fundação",
-    "cep": "Endereço_CEP",
-    "logradouro": "Endereço_Logradouro",
-    "numero": "Endereço_Numero",
-    "complemento": "Endereço_Complemento",
-    "bairro": "Endereço_Bairro",
-    "cidade": "Endereço_Cidade",
-    "estado": "Endereço_Estado",
-    "email": "E-mail",  # Email principal da PJ
-    "telefoneCelular": "Telefone Celular",  # Telefone principal da PJ (pode ser fixo ou móvel)
-    "outroTelefone": "Outro telefone",
-    # Campos de contato para PJ (ajuste os placeholders conforme seu template)
-    "nomeCompletoContato": "Nome Contato PJ",  # Ex: se o payload enviar 'nomeCompletoContato'
-    "emailContato": "E-mail Contato PJ",
-    "telefoneContato": "Telefone Contato PJ",
-    "cargoContato": "Cargo Contato PJ",
-}
+
 # Configurar o logger se ainda não estiver configurado no app principal
 if not logger.hasHandlers():
     logging.basicConfig(
         level=logging.INFO
     )  # Ajustado para INFO, DEBUG pode ser muito verboso
 
+# Datas DD/MM/AAAA (recebem um Zero-Width Space em preencher_variaveis_doc)
+_RE_DATA_BR = re.compile(r"\d{2}/\d{2}/\d{4}")
+
 SCOPES = [
     "https://www.googleapis.com/auth/drive",
     "https://www.googleapis.com/auth/documents",
@@ -98,6 +62,7 @@ def _initialize_google_services(credentials_json_str):
     return drive_service, docs_service
 
 
+@etapa("nome_unico")
 def _gerar_nome_arquivo_unico(drive_service, nome_base_com_ano, id_pasta_cliente):
     """
     Verifica se um arquivo com nome_base_com_ano já existe na id_pasta_cliente.
@@ -112,15 +77,15 @@ def _gerar_nome_arquivo_unico(drive_service, nome_base_com_ano, id_pasta_cliente
         # Escapar apóstrofos no nome_base_com_ano para a query
         nome_base_escapado = nome_base_com_ano.replace("'", "\\'")
         query = f"name='{nome_base_escapado}' and '{id_pasta_cliente}' in parents and trashed=false and mimeType != 'application/vnd.google-apps.folder'"
-        response = (
-            drive_service.files()
-            .list(
+        response = executar_google(
+            "drive",
+            "files.list",
+            drive_service.files().list(
                 q=query,
                 fields="files(id)",
                 supportsAllDrives=True,
                 includeItemsFromAllDrives=True,  # Importante para Shared Drives
-            )
-            .execute()
+            ),
         )
         logger.debug(f"_gerar_nome_arquivo_unico: Resposta da busca: {response}")
         if response.get("files"):
@@ -134,6 +99,7 @@ def _gerar_nome_arquivo_unico(drive_service, nome_base_com_ano, id_pasta_cliente
     return nome_final
 
 
+@etapa("pasta")
 def buscar_ou_criar_pasta_cliente(drive_service, primeiro_nome, sobrenome, ano=None):
     """
     Busca ou cria a pasta do cliente no Google Drive seguindo o padrão [[ano]]-[[Nome]] [[Sobrenome]].
@@ -149,15 +115,15 @@ def buscar_ou_criar_pasta_cliente(drive_service, primeiro_nome, sobrenome, ano=N
 
     # Busca pasta existente
     query = f"name='{nome_pasta}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
-    response = (
-        drive_service.files()
-        .list(
+    response = executar_google(
+        "drive",
+        "files.list",
+        drive_service.files().list(
             q=query,
             fields="files(id, name)",
             supportsAllDrives=True,  # Adicionado/Confirmado
             includeItemsFromAllDrives=True,  # Adicionado
-        )
-        .execute()
+        ),
     )
     logger.debug(
         f"buscar_ou_criar_pasta_cliente: Resposta da busca de pasta: {response}"
@@ -175,30 +141,42 @@ def buscar_ou_criar_pasta_cliente(drive_service, primeiro_nome, sobrenome, ano=N
     logger.debug(
         f"buscar_ou_criar_pasta_cliente: Criando pasta com metadata: {file_metadata}"
     )
-    pasta = (
-        drive_service.files()
-        .create(body=file_metadata, fields="id", supportsAllDrives=True)
-        .execute()
+    pasta = executar_google(
+        "drive",
+        "files.create",
+        drive_service.files().create(
+            body=file_metadata, fields="id", supportsAllDrives=True
+        ),
     )
     logger.debug(f"buscar_ou_criar_pasta_cliente: Pasta criada: {pasta}")
     return pasta["id"]
 
 
+@etapa("copia")
 def duplicar_template_para_pasta(drive_service, id_template, nome_arquivo, id_pasta):
     """
     Duplica o template no Drive e move para a pasta do cliente.
+    Usa uma cópia do pool de templates quando houver (template_pool).
     Retorna o ID do novo arquivo.
     """
     logger.debug(
         f"duplicar_template_para_pasta: Duplicando template ID '{id_template}' para '{nome_arquivo}' na pasta '{id_pasta}'"
     )
+    # Cópia pronta do pool (template_pool): um files.update em vez do files.copy
+    do_pool = template_pool.retirar(drive_service, id_template, nome_arquivo, id_pasta)
+    if do_pool:
+        span_atual().atributos["pool"] = True
+        return do_pool["id"]
+
     # Copia o arquivo
     body = {"name": nome_arquivo, "parents": [id_pasta]}
     try:
-        copia = (
-            drive_service.files()
-            .copy(fileId=id_template, body=body, fields="id", supportsAllDrives=True)
-            .execute()
+        copia = executar_google(
+            "drive",
+            "files.copy",
+            drive_service.files().copy(
+                fileId=id_template, body=body, fields="id", supportsAllDrives=True
+            ),
         )
         logger.debug(
             f"duplicar_template_para_pasta: Template duplicado. Novo ID: {copia.get('id')}"
@@ -211,50 +189,95 @@ def duplicar_template_para_pasta(drive_service, id_template, nome_arquivo, id_pa
     return copia["id"]
 
 
+def _remover_documento(drive_service, id_documento):
+    """Exclui um documento gerado pela metade (falhas são só registradas)"""
+    try:
+        executar_google(
+            "drive",
+            "files.delete",
+            drive_service.files().delete(fileId=id_documento, supportsAllDrives=True),
+        )
+        logger.info("Documento %s excluído após falha no preenchimento.", id_documento)
+    except HttpError as error:
+        logger.error(
+            "Erro ao excluir documento %s após falha no preenchimento: %s",
+            id_documento,
+            error,
+        )
+
+
+def placeholder(chave):
+    return f"{{{{{chave}}}}}"
+
+
+def textos_para_preenchimento(dados):
+    """
+    Texto que cada placeholder recebe no documento (valores None ficam de fora).
+
+    É também o que ``DocumentoGerado.valores`` guarda: a atualização no lugar
+    (document_update) procura no documento exatamente estes textos.
+    """
+    textos = {}
+    for chave, valor in dados.items():
+        if valor is None:
+            continue
+        texto = str(valor)
+        # Se a chave for um campo de data conhecido e o valor estiver no formato DD/MM/AAAA,
+        # adiciona um Zero-Width Space para tentar evitar auto-formatação pelo Google Docs.
+        if chave in ["Data de Nascimento", "Data de Fundação"]:
+            if _RE_DATA_BR.fullmatch(texto):
+                texto = "\u200b" + texto
+        textos[chave] = texto
+    return textos
+
+
+@etapa("preenchimento")
 def preencher_variaveis_doc(docs_service, id_documento, dados_cliente):
     """
     Preenche as variáveis do template no Google Docs.
+    Retorna a resposta do ``batchUpdate`` (com a revisão resultante).
     """
     logger.debug(
-        f"preencher_variaveis_doc: Preenchendo documento ID '{id_documento}' com dados: {dados_cliente}"
+        "preencher_variaveis_doc: Preenchendo documento ID '%s' com dados: %s",
+        id_documento,
+        Redigido(dados_cliente),
     )
-    requests = []
-    variaveis = dados_cliente
-    for chave, valor in variaveis.items():
-        if valor is not None:
-            texto_a_substituir = str(valor)
-
-            # Se a chave for um campo de data conhecido e o valor estiver no formato DD/MM/AAAA,
-            # adiciona um Zero-Width Space para tentar evitar auto-formatação pelo Google Docs.
-            if chave in ["Data de Nascimento", "Data de Fundação"]:
-                if isinstance(texto_a_substituir, str) and texto_a_substituir:
-                    # Verifica se o formato é DD/MM/YYYY antes de adicionar ZWSP
-                    if re.fullmatch(r"\d{2}/\d{2}/\d{4}", texto_a_substituir):
-                        texto_a_substituir = "\u200b" + texto_a_substituir
-
-            placeholder = f"{{{{{chave}}}}}"
-            requests.append(
-                {
-                    "replaceAllText": {
-                        "containsText": {"text": placeholder, "matchCase": True},
-                        "replaceText": texto_a_substituir,
-                    }
-                }
-            )
+    requests = [
+        {
+            "replaceAllText": {
+                "containsText": {"text": placeholder(chave), "matchCase": True},
+                "replaceText": texto,
+            }
+        }
+        for chave, texto in textos_para_preenchimento(dados_cliente).items()
+    ]
     try:
-        docs_service.documents().batchUpdate(
-            documentId=id_documento, body={"requests": requests}
-        ).execute()
+        resposta = executar_google(
+            "docs",
+            "documents.batchUpdate",
+            docs_service.documents().batchUpdate(
+                documentId=id_documento, body={"requests": requests}
+            ),
+        )
         logger.debug(
-            f"preencher_variaveis_doc: Variáveis preenchidas com sucesso no documento ID '{id_documento}'. Requests: {requests}"
+            "preencher_variaveis_doc: %d variáveis preenchidas com sucesso no documento ID '%s'",
+            len(requests),
+            id_documento,
         )
+        evento("preencher_variaveis", id_documento=id_documento, total=len(requests))
+        return resposta
     except HttpError as e:
         logger.error(
-            f"preencher_variaveis_doc: HttpError ao preencher variáveis do documento ID '{id_documento}': {e}. Requests: {requests}"
+            "preencher_variaveis_doc: HttpError ao preencher variáveis do documento ID '%s': %s. Requests: %s",
+            id_documento,
+            e,
+            Redigido(requests),
         )
+        evento("erro_preencher_variaveis", id_documento=id_documento, erro=str(e))
         raise
 
 
+@etapa("gerar_documento_cliente")
 def gerar_documento_cliente(
     drive_service,
     docs_service,
@@ -263,20 +286,29 @@ def gerar_documento_cliente(
     dados_cliente,
     id_pasta_cliente,
     tipo_pessoa,
+    dados_template=None,
+    forcar_regeneracao=False,
 ):
+    """
+    Copia o template para a pasta do cliente e preenche os placeholders.
+
+    ``dados_template`` é o resultado de ``mapear_para_template`` para a
+    submissão; quando omitido, o mapeamento é feito aqui a partir de
+    ``dados_cliente``. Para gerar um kit, mapeie uma vez e passe o mesmo
+    dicionário para todos os documentos.
+
+    Se a pasta já tem o documento gerado com o mesmo template, revisão e
+    dados (document_cache), ele é devolvido com ``reutilizado=True`` em vez
+    de gerar outro, a menos que ``forcar_regeneracao`` seja verdadeiro.
+    """
     logger.info(
-        f"[gerar_documento_cliente] Iniciando geração para tipo_doc: {tipo_doc}, tipo_pessoa: {tipo_pessoa}"
-    )
-    logger.info(
-        f"[gerar_documento_cliente] Dados do cliente recebidos: {dados_cliente}"
-    )
-    logger.debug(
-        f"gerar_documento_cliente: Iniciando geração para tipo_doc='{tipo_doc}', tipo_pessoa='{tipo_pessoa}', id_pasta_cliente='{id_pasta_cliente}'. Dados cliente: {dados_cliente}"
+        "[gerar_documento_cliente] Iniciando geração para tipo_doc: %s, tipo_pessoa: %s",
+        tipo_doc,
+        tipo_pessoa,
     )
-    primeiro_nome = dados_cliente.get("Primeiro Nome") or dados_cliente.get(
-        "primeiro_nome"
-    )
-    sobrenome = dados_cliente.get("Sobrenome") or dados_cliente.get("sobrenome")
+    span_atual().atributos["tipo_doc"] = tipo_doc
+    if dados_template is None:
+        dados_template = mapear_para_template(dados_cliente, tipo_pessoa)
     # ano e id_pasta não são mais tratados aqui, id_pasta_cliente é recebido como argumento
 
     # Acessar CONFIG diretamente pode ser problemático em threads se não inicializado corretamente no contexto da app.
@@ -284,19 +316,58 @@ def gerar_documento_cliente(
     # Por agora, mantemos, mas é um ponto de atenção para robustez em threads complexas.
     id_template = CONFIG["TEMPLATES"][tipo_pessoa][tipo_doc]
 
+    # Data de preenchimento: entra no hash, então só o documento gerado hoje
+    # é reaproveitado (cópia: dados_template é compartilhado pelo kit)
+    dados_para_template = {
+        **dados_template,
+        "Data_Preenchimento": datetime.datetime.now().strftime("%d/%m/%Y"),
+    }
+    with etapa("cache"):
+        # Lida antes da cópia: é a revisão que o documento novo reproduz
+        revisao = document_cache.revisao_template(drive_service, id_template)
+        hash_documento, existente = document_cache.localizar(
+            drive_service,
+            docs_service,
+            id_template,
+            id_pasta_cliente,
+            dados_para_template,
+            forcar_regeneracao=forcar_regeneracao,
+            revisao=revisao,
+        )
+    if existente:
+        logger.info(
+            "[gerar_documento_cliente] Documento '%s' já gerado com os mesmos dados (ID: %s). Reutilizando.",
+            tipo_doc,
+            existente["id"],
+        )
+        evento("documento_reutilizado", tipo_doc=tipo_doc, id_documento=existente["id"])
+        return {
+            "id_documento": existente["id"],
+            "id_template": id_template,
+            "link_documento": f"https://docs.google.com/document/d/{existente['id']}/edit",
+            "pasta_id": id_pasta_cliente,
+            "nome_arquivo": existente.get("name"),
+            "tipo_doc": tipo_doc,
+            "reutilizado": True,
+            "timings": span_atual().resumo(),
+        }
+
     ano_documento = datetime.datetime.now().year  # Ano de criação do documento
 
     nome_identificador_cliente = ""
     ano_atual = datetime.datetime.now().year
-    logger.info(
-        f"[gerar_documento_cliente] Gerando nome de arquivo para tipo_pessoa: {tipo_pessoa}"
+    logger.debug(
+        "[gerar_documento_cliente] Gerando nome de arquivo para tipo_pessoa: %s",
+        tipo_pessoa,
     )
 
     if tipo_pessoa == "pf":
-        primeiro_nome_val = dados_cliente.get("primeiroNome")
-        sobrenome_val = dados_cliente.get("sobrenome")
-        logger.info(
-            f"[gerar_documento_cliente] PF - primeiroNome: '{primeiro_nome_val}', sobrenome: '{sobrenome_val}'"
+        primeiro_nome_val = dados_template.get("Primeiro Nome")
+        sobrenome_val = dados_template.get("Sobrenome")
+        logger.debug(
+            "[gerar_documento_cliente] PF - primeiroNome: '%s', sobrenome: '%s'",
+            primeiro_nome_val,
+            sobrenome_val,
         )
 
         nome_parts = []
@@ -321,10 +392,12 @@ def gerar_documento_cliente(
             )
 
     elif tipo_pessoa == "pj":
-        razao_social_val = dados_cliente.get("razaoSocial")
-        nome_fantasia_val = dados_cliente.get("nomeFantasia")
-        logger.info(
-            f"[gerar_documento_cliente] PJ - razaoSocial: '{razao_social_val}', nomeFantasia: '{nome_fantasia_val}'"
+        razao_social_val = dados_template.get("Razão Social")
+        nome_fantasia_val = dados_template.get("Nome Fantasia")
+        logger.debug(
+            "[gerar_documento_cliente] PJ - razaoSocial: '%s', nomeFantasia: '%s'",
+            razao_social_val,
+            nome_fantasia_val,
         )
 
         if (
@@ -352,8 +425,9 @@ def gerar_documento_cliente(
             "[gerar_documento_cliente] Usando 'Cliente' como identificador padrão."
         )
 
-    logger.info(
-        f"[gerar_documento_cliente] Nome identificador bruto: '{nome_identificador_cliente}'"
+    logger.debug(
+        "[gerar_documento_cliente] Nome identificador bruto: '%s'",
+        nome_identificador_cliente,
     )
     nome_identificador_cliente_sanitizado = (
         nome_identificador_cliente.replace("/", "_")
@@ -374,8 +448,9 @@ def gerar_documento_cliente(
         logger.info(
             "[gerar_documento_cliente] Nome sanitizado resultou em vazio, usando 'Cliente'."
         )
-    logger.info(
-        f"[gerar_documento_cliente] Nome identificador sanitizado: '{nome_identificador_cliente_sanitizado}'"
+    logger.debug(
+        "[gerar_documento_cliente] Nome identificador sanitizado: '%s'",
+        nome_identificador_cliente_sanitizado,
     )
 
     # --- AJUSTE DO PADRÃO DO NOME DO ARQUIVO ---
@@ -384,7 +459,8 @@ def gerar_documento_cliente(
         f"{data_atual}-{nome_identificador_cliente_sanitizado}-{tipo_doc}"
     )
     logger.info(
-        f"[gerar_documento_cliente] Nome base do arquivo formatado: '{nome_arquivo_base_formatado}'"
+        "[gerar_documento_cliente] Nome base do arquivo formatado: '%s'",
+        nome_arquivo_base_formatado,
     )
 
     # Gerar nome único para o arquivo, verificando duplicidade do nome formatado
@@ -395,80 +471,48 @@ def gerar_documento_cliente(
     id_novo_doc = duplicar_template_para_pasta(
         drive_service, id_template, nome_arquivo_final, id_pasta_cliente
     )
-    # Selecionar o mapa de chaves apropriado
-    if tipo_pessoa == "pf":
-        mapa_chaves = MAPEAMENTO_CHAVES_TEMPLATE_PF
-    elif tipo_pessoa == "pj":
-        mapa_chaves = MAPEAMENTO_CHAVES_TEMPLATE_PJ
-    else:
-        logger.error(
-            f"Tipo de pessoa '{tipo_pessoa}' desconhecido para mapeamento de chaves."
-        )
-        # Fallback para um mapa vazio ou levantar um erro, dependendo da política desejada
-        mapa_chaves = {}
-
-    dados_para_template = {}
-    logger.info(
-        f"[gerar_documento_cliente] Iniciando mapeamento de dados para template. Mapa usado: {mapa_chaves}"
+    logger.debug(
+        "[gerar_documento_cliente] %d placeholders para o documento '%s'",
+        len(dados_para_template),
+        tipo_doc,
     )
-    for chave_payload, valor_payload in dados_cliente.items():
-        logger.debug(
-            f"[gerar_documento_cliente] Processando payload: chave='{chave_payload}', valor='{valor_payload}'"
-        )
-        chave_template = mapa_chaves.get(chave_payload)
-        if chave_template:
-            if valor_payload is not None:
-                # Formatação especial para datas conhecidas
-                if chave_template in ["Nascimento", "Data de Fundação"]:
-                    try:
-                        logger.debug(
-                            f"[gerar_documento_cliente] Tentando formatar data para chave_template '{chave_template}' com valor_payload '{valor_payload}'"
-                        )
-                        data_obj = dateutil_parser.parse(str(valor_payload))
-                        valor_formatado = data_obj.strftime("%d/%m/%Y")
-                        dados_para_template[chave_template] = valor_formatado
-                        logger.debug(
-                            f"[gerar_documento_cliente] Data formatada para '{chave_template}': '{valor_formatado}'"
-                        )
-                    except (ValueError, TypeError, OverflowError) as e_date:
-                        logger.warning(
-                            f"Não foi possível formatar a data para a chave_template '{chave_template}' com valor_payload '{valor_payload}'. Erro: {e_date}. Usando valor original."
-                        )
-                        dados_para_template[chave_template] = str(
-                            valor_payload
-                        )  # Fallback para string original
-                else:
-                    dados_para_template[chave_template] = str(valor_payload)
-                logger.debug(
-                    f"[gerar_documento_cliente] Mapeado: dados_para_template['{chave_template}'] = '{dados_para_template[chave_template]}' (original: '{valor_payload}')"
-                )
-            else:
-                dados_para_template[chave_template] = ""
-        else:
-            # Opcional: Logar chaves não mapeadas. Pode ser útil durante o desenvolvimento.
-            # logger.debug(f"Chave do payload '{chave_payload}' não mapeada para template para tipo_pessoa '{tipo_pessoa}'.")
-            # Se quiser passar chaves não mapeadas diretamente (caso haja placeholders que coincidam):
-            # dados_para_template[chave_payload] = str(valor_payload) if valor_payload is not None else ''
-            pass  # Ignorar chaves não mapeadas por padrão para evitar poluir o template com dados inesperados
-
-    # Adicionar data de preenchimento formatada
-    data_preenchimento_valor = datetime.datetime.now().strftime("%d/%m/%Y")
-    dados_para_template["Data_Preenchimento"] = data_preenchimento_valor
-    logger.info(
-        f"[gerar_documento_cliente] Adicionada 'Data_Preenchimento': '{data_preenchimento_valor}'"
+    evento(
+        "gerar_documento_cliente",
+        tipo_doc=tipo_doc,
+        id_documento=id_novo_doc,
+        placeholders=len(dados_para_template),
     )
-
-    logger.info(
-        f"[gerar_documento_cliente] Dados finais para template antes de preencher_variaveis_doc: {dados_para_template}"
+    try:
+        resposta = preencher_variaveis_doc(
+            docs_service, id_novo_doc, dados_para_template
+        )
+    except HttpError:
+        # Cópia com os placeholders ainda no texto: não serve para nada
+        _remover_documento(drive_service, id_novo_doc)
+        raise
+    # Só o documento preenchido recebe o hash (document_cache)
+    document_cache.marcar(
+        drive_service,
+        docs_service,
+        id_novo_doc,
+        hash_documento,
+        document_cache.revisao_da_resposta(resposta),
     )
-    preencher_variaveis_doc(docs_service, id_novo_doc, dados_para_template)
     link = f"https://docs.google.com/document/d/{id_novo_doc}/edit"
     return {
         "id_documento": id_novo_doc,
+        "id_template": id_template,
+        # Revisão copiada (lida antes da cópia) e textos inseridos, para
+        # atualizar o documento no lugar depois (DocumentoGerado)
+        "revisao_template": revisao,
+        "valores": textos_para_preenchimento(dados_para_template),
         "link_documento": link,
         "pasta_id": id_pasta_cliente,
         "nome_arquivo": nome_arquivo_final,
         "tipo_doc": tipo_doc,
+        "reutilizado": False,
+        # Duração de cada etapa deste documento (stage_timing)
+        "timings": span_atual().resumo(),
     }  # Retorna id_pasta_cliente, nome_arquivo_final e tipo_doc
 
 
@@ -480,11 +524,17 @@ def gerar_documento_cliente(
 
 
 def gerar_todos_os_documentos_para_cliente(
-    form_data, tipo_pessoa, credentials_json_str, documentos_solicitados=None
+    form_data,
+    tipo_pessoa,
+    credentials_json_str,
+    documentos_solicitados=None,
+    forcar_regeneracao=False,
 ):
     """
     Função orquestradora principal para gerar todos os documentos para um cliente.
     Esta função será chamada em uma thread.
+    Com ``forcar_regeneracao``, documentos já gerados com os mesmos dados são
+    gerados de novo em vez de reutilizados (ver gerar_documento_cliente).
     """
     logger.info(
         f"gerar_todos_os_documentos_para_cliente: Iniciando para tipo_pessoa='{tipo_pessoa}'."
@@ -578,6 +628,9 @@ def gerar_todos_os_documentos_para_cliente(
             "id_pasta_cliente": id_pasta_cliente,
         }
 
+    # Mapeamento (e formatação das datas) uma única vez para todo o kit
+    dados_template = mapear_para_template(form_data, tipo_pessoa)
+
     for tipo_doc, id_template in templates_para_gerar.items():
         if documentos_solicitados and tipo_doc not in documentos_solicitados:
             logger.info(
@@ -601,6 +654,8 @@ def gerar_todos_os_documentos_para_cliente(
                 dados_cliente=form_data,
                 id_pasta_cliente=id_pasta_cliente,
                 tipo_pessoa=tipo_pessoa,
+                dados_template=dados_template,
+                forcar_regeneracao=forcar_regeneracao,
             )
             documentos_gerados.append(resultado_doc)
             logger.info(
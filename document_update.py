@@ -0,0 +1,270 @@
+"""
+Atualização no lugar de documentos já gerados quando os dados do cliente mudam.
+
+Em vez de copiar o template e preencher o kit inteiro de novo, cada documento
+recebe só ``replaceAllText`` do texto antigo para o novo dos campos que
+mudaram — um ``batchUpdate`` por documento, todos enviados em lotes HTTP
+(``new_batch_http_request``). O documento continua o mesmo arquivo, com o
+histórico de revisões do Drive. O hash de conteúdo (document_cache) gravado
+no arquivo é regravado com os dados novos e a revisão nova — só se o
+documento não tinha sido editado à mão desde que o hash foi gravado.
+
+O texto antigo de cada campo vem de ``DocumentoGerado.valores`` (o que o
+preenchimento inseriu; ver ``document_generator.textos_para_preenchimento``).
+Como ``replaceAllText`` troca todas as ocorrências do texto, a troca só é
+feita quando é exata: o texto antigo aparece no documento tantas vezes
+quantas o placeholder aparece no template — nem no texto fixo do template,
+nem dentro do valor de outro campo, nem apagado por edição manual. Caso
+contrário (ou se o template mudou de revisão desde a geração) o plano traz
+um ``motivo`` e o documento precisa ser gerado de novo.
+
+Campos sem valor na geração deixaram o placeholder (``{{Campo}}``) no
+documento; esse é o "texto antigo" deles, e vice-versa.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import document_cache
+from document_generator import placeholder
+from metrics import executar_google
+
+# Chamadas por requisição HTTP em lote (a API aceita até 100)
+TAMANHO_LOTE_HTTP = 50
+
+# (template_id, revisão) -> texto do template; templates mudam pouco
+_textos_templates: Dict[Tuple[str, str], str] = {}
+
+
+@dataclass
+class PlanoAtualizacao:
+    """Trocas de um documento; ``motivo`` preenchido se não dá para atualizar"""
+
+    requisicoes: List[Dict[str, Any]] = field(default_factory=list)
+    campos: List[str] = field(default_factory=list)
+    motivo: Optional[str] = None
+
+
+def texto_documento(documento: Mapping[str, Any]) -> str:
+    """Texto do corpo, cabeçalhos, rodapés e notas (um parágrafo por linha)"""
+    paragrafos: List[str] = []
+
+    def percorrer(conteudo):
+        for elemento in conteudo or []:
+            if "paragraph" in elemento:
+                paragrafos.append(
+                    "".join(
+                        parte.get("textRun", {}).get("content", "")
+                        for parte in elemento["paragraph"].get("elements", [])
+                    )
+                )
+            elif "table" in elemento:
+                for linha in elemento["table"].get("tableRows", []):
+                    for celula in linha.get("tableCells", []):
+                        percorrer(celula.get("content"))
+            elif "tableOfContents" in elemento:
+                percorrer(elemento["tableOfContents"].get("content"))
+
+    percorrer(documento.get("body", {}).get("content"))
+    for secao in ("headers", "footers", "footnotes"):
+        for parte in documento.get(secao, {}).values():
+            percorrer(parte.get("content"))
+    return "\n".join(paragrafos)
+
+
+def _texto_no_documento(valores: Mapping[str, str], chave: str) -> str:
+    return valores[chave] if chave in valores else placeholder(chave)
+
+
+def planejar(
+    valores_antigos: Mapping[str, str],
+    valores_novos: Mapping[str, str],
+    texto_atual: str,
+    texto_template: str,
+) -> PlanoAtualizacao:
+    """Trocas ``replaceAllText`` que levam o documento aos valores novos"""
+    trocas: Dict[str, Tuple[str, str]] = {}
+    for chave in sorted(set(valores_antigos) | set(valores_novos)):
+        ocorrencias = texto_template.count(placeholder(chave))
+        if not ocorrencias:
+            continue  # o campo não aparece neste documento
+        antigo = _texto_no_documento(valores_antigos, chave)
+        novo = _texto_no_documento(valores_novos, chave)
+        if antigo == novo:
+            continue
+        if not antigo:
+            return PlanoAtualizacao(motivo=f"'{chave}' foi preenchido vazio")
+        if "\n" in antigo or "\n" in novo:
+            return PlanoAtualizacao(motivo=f"'{chave}' tem quebra de linha")
+        if texto_atual.count(antigo) != ocorrencias:
+            return PlanoAtualizacao(
+                motivo=f"texto de '{chave}' não é exclusivo do campo no documento"
+            )
+        trocas[chave] = (antigo, novo)
+
+    # As trocas são aplicadas em sequência: um valor novo não pode conter o
+    # texto antigo de outro campo, senão seria trocado de novo
+    for chave, (_, novo) in trocas.items():
+        for outra, (antigo, _) in trocas.items():
+            if outra != chave and antigo in novo:
+                return PlanoAtualizacao(
+                    motivo=f"novo valor de '{chave}' contém o antigo de '{outra}'"
+                )
+
+    return PlanoAtualizacao(
+        requisicoes=[
+            {
+                "replaceAllText": {
+                    "containsText": {"text": antigo, "matchCase": True},
+                    "replaceText": novo,
+                }
+            }
+            for antigo, novo in trocas.values()
+        ],
+        campos=list(trocas),
+    )
+
+
+def executar_em_lote(
+    servico, api: str, metodo: str, requisicoes: Mapping[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """
+    Executa ``{id: requisição}`` em lotes HTTP.
+
+    Devolve ``(respostas, erros)`` por id; o erro de uma chamada não
+    interrompe as demais.
+    """
+    respostas: Dict[str, Any] = {}
+    erros: Dict[str, Exception] = {}
+
+    def ao_responder(id_requisicao, resposta, erro):
+        if erro is not None:
+            erros[id_requisicao] = erro
+        else:
+            respostas[id_requisicao] = resposta
+
+    itens = list(requisicoes.items())
+    for inicio in range(0, len(itens), TAMANHO_LOTE_HTTP):
+        lote = servico.new_batch_http_request(callback=ao_responder)
+        for id_requisicao, requisicao in itens[inicio : inicio + TAMANHO_LOTE_HTTP]:
+            lote.add(requisicao, request_id=id_requisicao)
+        executar_google(api, f"batch.{metodo}", lote)
+    return respostas, erros
+
+
+def ler_textos(
+    docs_service,
+    ids_documentos: Iterable[str],
+    templates: Iterable[Tuple[str, str]] = (),
+) -> Tuple[
+    Dict[str, str], Dict[Tuple[str, str], str], Dict[str, Exception], Dict[str, str]
+]:
+    """
+    Texto atual dos documentos e dos templates ``(id, revisão)``, num só lote.
+
+    Os templates ficam memorizados pela revisão. Devolve
+    ``(textos dos documentos, textos dos templates, erros por id,
+    revisionId atual dos documentos)``.
+    """
+    ids_documentos, templates = list(ids_documentos), list(templates)
+    faltando = {
+        template_id: revisao
+        for template_id, revisao in templates
+        if (template_id, revisao) not in _textos_templates
+    }
+    ids = set(ids_documentos) | set(faltando)
+    respostas, erros = executar_em_lote(
+        docs_service,
+        "docs",
+        "documents.get",
+        {id_: docs_service.documents().get(documentId=id_) for id_ in ids},
+    )
+    for template_id, revisao in faltando.items():
+        if template_id in respostas:
+            _textos_templates[(template_id, revisao)] = texto_documento(
+                respostas[template_id]
+            )
+    textos_templates = {
+        chave: _textos_templates[chave]
+        for chave in templates
+        if chave in _textos_templates
+    }
+    textos = {
+        id_: texto_documento(respostas[id_])
+        for id_ in ids_documentos
+        if id_ in respostas
+    }
+    revisoes = {
+        id_: respostas[id_].get("revisionId")
+        for id_ in ids_documentos
+        if id_ in respostas
+    }
+    return textos, textos_templates, erros, revisoes
+
+
+def aplicar(
+    docs_service, planos: Mapping[str, PlanoAtualizacao]
+) -> Tuple[Dict[str, Optional[str]], Dict[str, Exception]]:
+    """
+    Um ``batchUpdate`` por documento com trocas, em lotes.
+
+    Devolve ``(revisionId depois da troca, erros)`` por documento.
+    """
+    respostas, erros = executar_em_lote(
+        docs_service,
+        "docs",
+        "documents.batchUpdate",
+        {
+            id_documento: docs_service.documents().batchUpdate(
+                documentId=id_documento, body={"requests": plano.requisicoes}
+            )
+            for id_documento, plano in planos.items()
+            if plano.requisicoes
+        },
+    )
+    revisoes = {
+        id_documento: document_cache.revisao_da_resposta(resposta)
+        for id_documento, resposta in respostas.items()
+    }
+    return revisoes, erros
+
+
+def atualizar_hashes(
+    drive_service, marcas: Mapping[str, Tuple[str, Optional[str], Optional[str]]]
+) -> Dict[str, Exception]:
+    """
+    Regrava o hash de conteúdo (document_cache) dos documentos alterados.
+
+    ``marcas`` é ``{id: (hash novo, revisionId antes da troca, revisionId
+    depois)}``. Só é regravado o documento cuja revisão gravada com o hash
+    era a de antes da troca: um documento editado à mão continua sem ser
+    reaproveitado.
+    """
+    gravadas, erros = executar_em_lote(
+        drive_service,
+        "drive",
+        "files.get",
+        {
+            id_documento: drive_service.files().get(
+                fileId=id_documento, fields="appProperties", supportsAllDrives=True
+            )
+            for id_documento in marcas
+        },
+    )
+    atualizacoes = {}
+    for id_documento, arquivo in gravadas.items():
+        hash_documento, anterior, nova = marcas[id_documento]
+        revisao_gravada = (arquivo.get("appProperties") or {}).get(
+            document_cache.REVISAO_CHAVE
+        )
+        if anterior and nova and revisao_gravada == anterior:
+            atualizacoes[id_documento] = drive_service.files().update(
+                fileId=id_documento,
+                body=document_cache.propriedades(hash_documento, nova),
+                supportsAllDrives=True,
+            )
+    _, erros_atualizacao = executar_em_lote(
+        drive_service, "drive", "files.update", atualizacoes
+    )
+    erros.update(erros_atualizacao)
+    return erros
@@ -0,0 +1,143 @@
+"""
+Validação de CPF e CNPJ (dígitos verificadores).
+
+API escalar (``is_cpf_valid``, ``is_cnpj_valid``, ``is_document_valid``) para
+formulários e API em lote (``validate_cpf_batch``, ``validate_cnpj_batch``)
+para importações: os documentos viram uma matriz ``uint8`` (um dígito por
+coluna) e os dois dígitos verificadores de todas as linhas saem de um único
+produto matricial. O lote devolve uma máscara booleana na mesma ordem da
+entrada.
+
+O NumPy é opcional: sem ele o lote usa a validação escalar e devolve
+``list[bool]``.
+"""
+
+import re
+from operator import mul
+from typing import Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+_RE_NAO_DIGITO = re.compile(r"\D")
+
+# Pesos dos dígitos verificadores (1º e 2º)
+PESOS_CPF = ((10, 9, 8, 7, 6, 5, 4, 3, 2), (11, 10, 9, 8, 7, 6, 5, 4, 3, 2))
+PESOS_CNPJ = (
+    (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2),
+    (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2),
+)
+
+# Linhas convertidas por vez no lote (limita a memória das matrizes)
+TAMANHO_BLOCO_LOTE = 1 << 18
+
+
+def clean_document(doc) -> str:
+    return _RE_NAO_DIGITO.sub("", str(doc or ""))
+
+
+def _digito(digitos: Sequence[int], pesos: Sequence[int]) -> int:
+    resto = sum(map(mul, digitos, pesos)) % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def _valido(doc: str, tamanho: int, pesos) -> bool:
+    # isascii: isdigit sozinho aceitaria "²", "٣"...
+    if len(doc) != tamanho or not (doc.isascii() and doc.isdigit()):
+        return False
+    if doc == doc[0] * tamanho:
+        return False
+    digitos = [ord(c) - 48 for c in doc]
+    return (
+        _digito(digitos, pesos[0]) == digitos[-2]
+        and _digito(digitos, pesos[1]) == digitos[-1]
+    )
+
+
+def is_cpf_valid(cpf) -> bool:
+    """Valida o CPF (com ou sem máscara)."""
+    return _valido(clean_document(cpf), 11, PESOS_CPF)
+
+
+def is_cnpj_valid(cnpj) -> bool:
+    """Valida o CNPJ (com ou sem máscara)."""
+    return _valido(clean_document(cnpj), 14, PESOS_CNPJ)
+
+
+def is_document_valid(doc) -> bool:
+    """Valida CPF ou CNPJ conforme o número de dígitos."""
+    doc = clean_document(doc)
+    if len(doc) == 11:
+        return _valido(doc, 11, PESOS_CPF)
+    if len(doc) == 14:
+        return _valido(doc, 14, PESOS_CNPJ)
+    return False
+
+
+def _matriz_pesos(tamanho: int, pesos):
+    # Coluna 0: 1º dígito (posições 0..tamanho-3); coluna 1: 2º dígito
+    matriz = np.zeros((tamanho - 1, 2), dtype=np.int32)
+    matriz[: tamanho - 2, 0] = pesos[0]
+    matriz[:, 1] = pesos[1]
+    return matriz
+
+
+def _validar_bloco(docs: Sequence, tamanho: int, matriz_pesos):
+    """Retorna ``(validos, formato_ok)`` para documentos só com dígitos."""
+    # "U{tamanho + 1}" trunca textos maiores, mas preserva um caractere a mais
+    # para detectar o excesso; cada caractere vira um uint32 (code point)
+    codigos = (
+        np.asarray(docs, dtype=f"U{tamanho + 1}")
+        .view(np.uint32)
+        .reshape(len(docs), tamanho + 1)
+    )
+    # Fora de "0".."9" (inclusive o preenchimento 0) estoura para > 9
+    valores = codigos[:, :tamanho] - np.uint32(48)
+    formato_ok = (valores <= 9).all(axis=1) & (codigos[:, tamanho] == 0)
+
+    digitos = valores.astype(np.uint8)
+    somas = digitos[:, : tamanho - 1] @ matriz_pesos
+    restos = somas % 11
+    verificadores = np.where(restos < 2, 0, 11 - restos)
+    confere = (verificadores == digitos[:, tamanho - 2 :]).all(axis=1)
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    return formato_ok & confere & ~repetidos, formato_ok
+
+
+def _validar_lote(docs: Iterable, tamanho: int, pesos, escalar):
+    docs = [d if isinstance(d, str) else str(d or "") for d in docs]
+    if np is None:
+        return [escalar(d) for d in docs]
+    if not docs:
+        return np.zeros(0, dtype=bool)
+
+    matriz_pesos = _matriz_pesos(tamanho, pesos)
+    validos = np.empty(len(docs), dtype=bool)
+    for inicio in range(0, len(docs), TAMANHO_BLOCO_LOTE):
+        bloco = docs[inicio : inicio + TAMANHO_BLOCO_LOTE]
+        resultado, formato_ok = _validar_bloco(bloco, tamanho, matriz_pesos)
+        # Só os que não são "apenas dígitos" (máscara, espaços) passam pela
+        # limpeza e por uma segunda rodada
+        refazer = np.flatnonzero(~formato_ok)
+        if len(refazer):
+            limpos = [clean_document(bloco[i]) for i in refazer]
+            resultado[refazer] = _validar_bloco(limpos, tamanho, matriz_pesos)[0]
+        validos[inicio : inicio + len(bloco)] = resultado
+    return validos
+
+
+def validate_cpf_batch(cpfs: Iterable):
+    """
+    Valida uma sequência de CPFs (com ou sem máscara; ``None`` é inválido).
+
+    Retorna ``numpy.ndarray`` de ``bool`` (ou ``list[bool]`` sem NumPy), na
+    ordem da entrada.
+    """
+    return _validar_lote(cpfs, 11, PESOS_CPF, is_cpf_valid)
+
+
+def validate_cnpj_batch(cnpjs: Iterable):
+    """Como ``validate_cpf_batch``, para CNPJs."""
+    return _validar_lote(cnpjs, 14, PESOS_CNPJ, is_cnpj_valid)
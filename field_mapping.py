@@ -0,0 +1,212 @@
+"""
+Mapeamento único dos dados do cliente para os placeholders dos templates.
+
+Cada regra diz de quais chaves de origem o valor pode vir (payload camelCase
+do formulário, atributos snake_case de ``ClienteData``/modelos ou o próprio
+nome do placeholder), qual transformação aplicar e quais placeholders recebem
+o resultado. As regras de cada tipo de pessoa são compiladas uma única vez em
+um plano; ``mapear_para_template`` executa o plano uma vez por submissão e o
+dicionário resultante é compartilhado por todos os templates do kit.
+"""
+
+import logging
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from date_utils import format_date_br
+
+logger = logging.getLogger(__name__)
+
+
+class RegraCampo(NamedTuple):
+    """Origens (em ordem de preferência) -> transformação -> placeholders"""
+
+    origens: Tuple[str, ...]
+    destinos: Tuple[str, ...]
+    transformacao: Optional[Callable[[Any], str]] = None
+
+
+class RegraComposta(NamedTuple):
+    """Placeholder calculado a partir de vários campos já mapeados"""
+
+    destinos: Tuple[str, ...]
+    funcao: Callable[[Dict[str, str]], str]
+
+
+def _data_br(valor: Any) -> str:
+    formatado = format_date_br(valor)
+    if formatado is None:
+        logger.warning(
+            "Não foi possível formatar a data '%s'. Usando valor original.", valor
+        )
+        return str(valor)
+    return formatado
+
+
+def _endereco_completo(campos: Dict[str, str]) -> str:
+    """Endereço em uma linha, para templates antigos com {{Endereço}}"""
+    partes = [
+        campos[chave]
+        for chave in ("Logradouro", "Número", "Complemento", "Bairro")
+        if campos.get(chave)
+    ]
+    return ", ".join(partes) or campos.get("Endereço", "")
+
+
+# Campos comuns a PF e PJ (nome do responsável, contato e endereço)
+_REGRAS_COMUNS = (
+    RegraCampo(("primeiroNome", "primeiro_nome", "Primeiro Nome"), ("Primeiro Nome",)),
+    RegraCampo(("sobrenome", "Sobrenome"), ("Sobrenome",)),
+    RegraCampo(("cep", "endereco_cep", "CEP"), ("CEP", "Endereço_CEP")),
+    RegraCampo(
+        ("logradouro", "endereco_logradouro", "Logradouro"),
+        ("Logradouro", "Endereço_Logradouro"),
+    ),
+    RegraCampo(("numero", "endereco_numero", "Número"), ("Número", "Endereço_Numero")),
+    RegraCampo(
+        ("complemento", "endereco_complemento", "Complemento"),
+        ("Complemento", "Endereço_Complemento"),
+    ),
+    RegraCampo(("bairro", "endereco_bairro", "Bairro"), ("Bairro", "Endereço_Bairro")),
+    RegraCampo(("cidade", "endereco_cidade", "Cidade"), ("Cidade", "Endereço_Cidade")),
+    RegraCampo(
+        ("estado", "endereco_estado", "uf_endereco", "Estado"),
+        ("Estado", "Endereço_Estado"),
+    ),
+    # Endereço em texto livre (planilhas antigas); usado se não houver logradouro
+    RegraCampo(("endereco", "Endereço"), ("Endereço",)),
+    RegraCampo(("email", "E-mail"), ("E-mail",)),
+    RegraCampo(
+        ("telefoneCelular", "telefone_celular", "Telefone Celular"),
+        ("Telefone Celular",),
+    ),
+    RegraCampo(
+        ("outroTelefone", "outro_telefone", "Outro telefone"), ("Outro telefone",)
+    ),
+)
+
+REGRAS_PF = _REGRAS_COMUNS + (
+    RegraCampo(("nacionalidade", "Nacionalidade"), ("Nacionalidade",)),
+    RegraCampo(("estadoCivil", "estado_civil", "Estado Civil"), ("Estado Civil",)),
+    RegraCampo(("profissao", "Profissão"), ("Profissão",)),
+    RegraCampo(
+        ("dataNascimento", "data_nascimento", "Nascimento"),
+        ("Nascimento",),
+        _data_br,
+    ),
+    RegraCampo(("cpf", "CPF"), ("CPF",)),
+    RegraCampo(("rg", "RG"), ("RG",)),
+    RegraCampo(
+        ("estadoEmissorRG", "estado_emissor_rg", "Estado emissor do RG"),
+        ("Estado emissor do RG",),
+    ),
+    RegraCampo(("cnh", "CNH"), ("CNH",)),
+)
+
+REGRAS_PJ = _REGRAS_COMUNS + (
+    RegraCampo(("razaoSocial", "razao_social", "Razão Social"), ("Razão Social",)),
+    RegraCampo(("nomeFantasia", "nome_fantasia", "Nome Fantasia"), ("Nome Fantasia",)),
+    RegraCampo(("cnpj", "CNPJ"), ("CNPJ",)),
+    RegraCampo(
+        ("inscricaoEstadual", "inscricao_estadual", "Inscrição Estadual"),
+        ("Inscrição Estadual",),
+    ),
+    RegraCampo(
+        ("dataFundacao", "data_fundacao", "Data de Fundação"),
+        ("Data de Fundação",),
+        _data_br,
+    ),
+    RegraCampo(("nomeCompletoContato", "Nome Contato PJ"), ("Nome Contato PJ",)),
+    RegraCampo(("emailContato", "E-mail Contato PJ"), ("E-mail Contato PJ",)),
+    RegraCampo(("telefoneContato", "Telefone Contato PJ"), ("Telefone Contato PJ",)),
+    RegraCampo(("cargoContato", "Cargo Contato PJ"), ("Cargo Contato PJ",)),
+)
+
+REGRAS_COMPOSTAS = (RegraComposta(("Endereço",), _endereco_completo),)
+
+
+class PlanoMapeamento:
+    """Regras de um tipo de pessoa compiladas para execução direta"""
+
+    __slots__ = ("tipo_pessoa", "simples", "compostas", "placeholders")
+
+    def __init__(self, tipo_pessoa: str, regras, compostas=REGRAS_COMPOSTAS):
+        self.tipo_pessoa = tipo_pessoa
+        self.simples = tuple(
+            (regra.origens, regra.destinos, regra.transformacao) for regra in regras
+        )
+        self.compostas = tuple(compostas)
+        self.placeholders = tuple(
+            dict.fromkeys(
+                destino
+                for regra in tuple(regras) + self.compostas
+                for destino in regra.destinos
+            )
+        )
+
+    def executar(
+        self, dados: Any, padroes: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        """
+        Executa o plano sobre ``dados`` (dict ou objeto com atributos).
+
+        Todo placeholder do plano é preenchido; campos ausentes viram ``""``
+        (ou o valor de ``padroes``).
+        """
+        if isinstance(dados, Mapping):
+            obter = dados.get
+        else:
+
+            def obter(chave, _dados=dados):
+                return getattr(_dados, chave, None)
+
+        resultado: Dict[str, str] = {}
+        for origens, destinos, transformacao in self.simples:
+            valor = None
+            for origem in origens:
+                valor = obter(origem)
+                if valor is not None and valor != "":
+                    break
+            if valor is None or valor == "":
+                texto = ""
+            elif transformacao is not None:
+                texto = transformacao(valor)
+            else:
+                texto = str(valor)
+            for destino in destinos:
+                resultado[destino] = texto
+
+        for regra in self.compostas:
+            texto = regra.funcao(resultado)
+            for destino in regra.destinos:
+                resultado[destino] = texto
+
+        if padroes:
+            for destino, padrao in padroes.items():
+                if not resultado.get(destino):
+                    resultado[destino] = padrao
+        return resultado
+
+
+PLANOS = {
+    "pf": PlanoMapeamento("pf", REGRAS_PF),
+    "pj": PlanoMapeamento("pj", REGRAS_PJ),
+}
+
+
+def mapear_para_template(
+    dados: Any, tipo_pessoa: str, padroes: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """
+    Converte os dados do cliente em ``{placeholder: texto}``.
+
+    Deve ser chamado uma vez por submissão; o resultado serve para todos os
+    documentos do kit.
+    """
+    plano = PLANOS.get(tipo_pessoa)
+    if plano is None:
+        logger.error(
+            "Tipo de pessoa '%s' desconhecido para mapeamento de chaves.", tipo_pessoa
+        )
+        return {}
+    return plano.executar(dados, padroes)
@@ -0,0 +1,317 @@
+"""
+Rastreamento (trace) do caminho de geração de documentos.
+
+Substitui os ``open(..., "a")`` espalhados em ``debug_*.log``: cada chamada
+monitorada abre um trace com ``rastrear(nome, chave)`` e registra eventos com
+``evento(...)``. Nada é formatado nem gravado quando o trace está desligado
+ou quando a chave não foi sorteada; quando está ligado, os campos sensíveis
+são mascarados e o trace inteiro vira uma única linha JSON em um sink
+bufferizado, gravado em lote.
+
+Configuração (variáveis de ambiente):
+    GENERATION_TRACE_FILE         caminho do arquivo; sem ele o trace fica desligado
+    GENERATION_TRACE_SAMPLE_RATE  fração das chaves rastreadas (padrão 1.0)
+
+A amostragem é por chave (``resposta_id``, nome do cliente...): todos os
+eventos da mesma submissão entram ou ficam de fora juntos, em todos os
+processos.
+
+Para mensagens de log com payloads, use ``Redigido(valor)`` como argumento
+``%s``: a máscara só é aplicada se o registro for de fato emitido.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Linhas acumuladas antes de gravar no arquivo
+TRACE_LINHAS_BUFFER = 64
+# Intervalo máximo (s) entre gravações, mesmo com o buffer incompleto
+TRACE_INTERVALO_FLUSH = 5.0
+# Tamanho máximo de cada texto registrado em um evento
+TRACE_TAMANHO_MAXIMO_TEXTO = 500
+
+MASCARA = "***"
+
+# Chaves (normalizadas: minúsculas, só letras e dígitos) com dados pessoais
+CAMPOS_SENSIVEIS = frozenset(
+    {
+        "cpf",
+        "cnpj",
+        "rg",
+        "cnh",
+        "email",
+        "emailcontato",
+        "emailcontatopj",
+        "telefone",
+        "telefonecelular",
+        "telefonecontato",
+        "telefonecontatopj",
+        "outrotelefone",
+        "datanascimento",
+        "nascimento",
+        "senha",
+        "password",
+        "token",
+    }
+)
+
+_RE_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]")
+_cache_chaves_sensiveis: Dict[str, bool] = {}
+
+
+def _sensivel(chave: Any) -> bool:
+    chave = str(chave)
+    sensivel = _cache_chaves_sensiveis.get(chave)
+    if sensivel is None:
+        normalizada = _RE_NAO_ALFANUMERICO.sub("", chave.lower())
+        sensivel = _cache_chaves_sensiveis[chave] = normalizada in CAMPOS_SENSIVEIS
+    return sensivel
+
+
+def redigir(valor: Any, _profundidade: int = 0) -> Any:
+    """Cópia de ``valor`` com os campos sensíveis mascarados"""
+    if _profundidade > 5:
+        return "..."
+    if isinstance(valor, Mapping):
+        return {
+            str(chave): (
+                MASCARA
+                if _sensivel(chave) and v not in (None, "")
+                else redigir(v, _profundidade + 1)
+            )
+            for chave, v in valor.items()
+        }
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return [redigir(v, _profundidade + 1) for v in valor]
+    if valor is None or isinstance(valor, (bool, int, float)):
+        return valor
+    texto = str(valor)
+    if len(texto) > TRACE_TAMANHO_MAXIMO_TEXTO:
+        texto = texto[:TRACE_TAMANHO_MAXIMO_TEXTO] + "..."
+    return texto
+
+
+class Redigido:
+    """Argumento de log que só é mascarado/formatado se o registro sair"""
+
+    __slots__ = ("valor",)
+
+    def __init__(self, valor: Any):
+        self.valor = valor
+
+    def __str__(self) -> str:
+        return json.dumps(redigir(self.valor), ensure_ascii=False, default=str)
+
+    __repr__ = __str__
+
+
+class SinkArquivo:
+    """Acumula linhas JSON e grava no arquivo em lote (thread-safe)"""
+
+    # Sinks vivos, esvaziados na saída do processo
+    instancias: "weakref.WeakSet[SinkArquivo]" = weakref.WeakSet()
+
+    def __init__(
+        self,
+        caminho: str,
+        linhas_buffer: int = TRACE_LINHAS_BUFFER,
+        intervalo_flush: float = TRACE_INTERVALO_FLUSH,
+    ):
+        self.caminho = caminho
+        self.linhas_buffer = linhas_buffer
+        self.intervalo_flush = intervalo_flush
+        self._linhas: List[str] = []
+        self._ultimo_flush = time.monotonic()
+        self._lock = threading.Lock()
+        SinkArquivo.instancias.add(self)
+
+    def gravar(self, registro: Dict[str, Any]) -> None:
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._lock:
+            self._linhas.append(linha)
+            if (
+                len(self._linhas) < self.linhas_buffer
+                and time.monotonic() - self._ultimo_flush < self.intervalo_flush
+            ):
+                return
+            linhas, self._linhas = self._linhas, []
+            self._ultimo_flush = time.monotonic()
+        self._escrever(linhas)
+
+    def flush(self) -> None:
+        with self._lock:
+            linhas, self._linhas = self._linhas, []
+            self._ultimo_flush = time.monotonic()
+        self._escrever(linhas)
+
+    def _escrever(self, linhas: List[str]) -> None:
+        if not linhas:
+            return
+        try:
+            with open(self.caminho, "a", encoding="utf-8") as arquivo:
+                arquivo.write("\n".join(linhas) + "\n")
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o trace em {self.caminho}: {e}")
+
+
+class Trace:
+    """Eventos de uma chamada monitorada; vira uma linha no sink ao final"""
+
+    __slots__ = ("nome", "chave", "inicio", "_t0", "eventos")
+
+    ativo = True
+
+    def __init__(self, nome: str, chave: Any):
+        self.nome = nome
+        self.chave = chave
+        self.inicio = datetime.utcnow().isoformat()
+        self._t0 = time.perf_counter()
+        self.eventos: List[Dict[str, Any]] = []
+
+    def evento(self, nome: str, **campos: Any) -> None:
+        """Registra um evento; os campos são mascarados na hora"""
+        registro = {
+            "t_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+            "evento": nome,
+        }
+        registro.update(redigir(campos))
+        self.eventos.append(registro)
+
+    def como_registro(self, erro: Optional[BaseException] = None) -> Dict[str, Any]:
+        registro = {
+            "trace": self.nome,
+            "chave": str(self.chave),
+            "inicio": self.inicio,
+            "duracao_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+            "pid": os.getpid(),
+            "eventos": self.eventos,
+        }
+        if erro is not None:
+            registro["erro"] = f"{type(erro).__name__}: {erro}"
+        return registro
+
+
+class _TraceDesligado:
+    """Trace nulo: ``evento`` não faz nada"""
+
+    __slots__ = ()
+
+    ativo = False
+
+    def evento(self, nome: str, **campos: Any) -> None:
+        pass
+
+
+TRACE_DESLIGADO = _TraceDesligado()
+
+_trace_atual: contextvars.ContextVar = contextvars.ContextVar(
+    "trace_geracao", default=TRACE_DESLIGADO
+)
+
+
+class Rastreador:
+    """Decide quais chaves são rastreadas e envia os traces ao sink"""
+
+    def __init__(self, sink: Optional[SinkArquivo], taxa_amostragem: float = 1.0):
+        self.sink = sink
+        self.taxa_amostragem = max(0.0, min(1.0, taxa_amostragem))
+        # Limite sobre o crc32 da chave (estável entre processos, ao contrário
+        # de hash())
+        self._limite = int(self.taxa_amostragem * 0xFFFFFFFF)
+
+    @property
+    def ligado(self) -> bool:
+        return self.sink is not None and self.taxa_amostragem > 0
+
+    def amostrar(self, chave: Any) -> bool:
+        if not self.ligado:
+            return False
+        if self.taxa_amostragem >= 1.0:
+            return True
+        return zlib.crc32(str(chave).encode("utf-8")) <= self._limite
+
+    @contextmanager
+    def rastrear(self, nome: str, chave: Any):
+        externo = _trace_atual.get()
+        if externo.ativo:
+            # Chamada aninhada (ex.: task -> serviço): eventos no mesmo trace
+            externo.evento(nome)
+            yield externo
+            return
+        if not self.amostrar(chave):
+            yield TRACE_DESLIGADO
+            return
+        trace = Trace(nome, chave)
+        token = _trace_atual.set(trace)
+        erro = None
+        try:
+            yield trace
+        except BaseException as e:
+            erro = e
+            raise
+        finally:
+            _trace_atual.reset(token)
+            self.sink.gravar(trace.como_registro(erro))
+
+
+def _rastreador_do_ambiente() -> Rastreador:
+    caminho = os.getenv("GENERATION_TRACE_FILE")
+    try:
+        taxa = float(os.getenv("GENERATION_TRACE_SAMPLE_RATE", "1.0"))
+    except ValueError:
+        taxa = 1.0
+    return Rastreador(SinkArquivo(caminho) if caminho else None, taxa)
+
+
+RASTREADOR = _rastreador_do_ambiente()
+
+
+@atexit.register
+def _flush_ao_sair() -> None:
+    for sink in list(SinkArquivo.instancias):
+        sink.flush()
+
+
+def _descartar_buffers_no_filho() -> None:
+    # As linhas pendentes são do processo pai, que as grava
+    for sink in list(SinkArquivo.instancias):
+        sink._linhas = []
+        sink._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_descartar_buffers_no_filho)
+
+
+def rastrear(nome: str, chave: Any):
+    """
+    Context manager que abre um trace para ``chave`` (ou o nulo, se a chave
+    não for amostrada). Dentro dele, ``trace_atual()`` devolve o trace.
+    """
+    return RASTREADOR.rastrear(nome, chave)
+
+
+def trace_atual():
+    """Trace aberto no contexto atual (ou o nulo)"""
+    return _trace_atual.get()
+
+
+def evento(nome: str, **campos: Any) -> None:
+    """Registra um evento no trace atual, se houver"""
+    trace = _trace_atual.get()
+    if trace.ativo:
+        trace.evento(nome, **campos)
@@ -162,30 +162,13 @@ def import_from_google_sheet():
                 inseridos += 1
                 # Geração automática de documento após inserção
                 from document_generator import gerar_documento_cliente
+                from field_mapping import mapear_para_template
 
                 try:
                     tipo_doc = "Ficha Cadastral"  # Pode ser dinâmico
                     tipo_pessoa = resposta.tipo_pessoa or "pf"
                     # Mapeia campos para os placeholders do template
-                    dados_cliente = {
-                        "Primeiro Nome": resposta.primeiro_nome or "",
-                        "Sobrenome": resposta.sobrenome or "",
-                        "Nacionalidade": resposta.nacionalidade or "",
-                        "RG": resposta.rg or "",
-                        "Estado emissor do RG": resposta.estado_emissor_rg or "",
-                        "Estado Civil": resposta.estado_civil or "",
-                        "CPF": resposta.cpf or "",
-                        "Profissão": resposta.profissao or "",
-                        "CNH": resposta.cnh or "",
-                        "Endereço": resposta.endereco or "",
-                        "Cidade": resposta.cidade or "",
-                        "Estado": resposta.uf_endereco or "",
-                        "CEP": resposta.cep or "",
-                        "E-mail": resposta.email or "",
-                        "Nascimento": resposta.data_nascimento or "",
-                        "Telefone Celular": resposta.telefone_celular or "",
-                        "Outro telefone": resposta.outro_telefone or "",
-                    }
+                    dados_cliente = mapear_para_template(resposta, tipo_pessoa)
                     resultado_doc = gerar_documento_cliente(
                         tipo_doc, dados_cliente, tipo_pessoa
                     )
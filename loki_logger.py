@@ -1,19 +1,47 @@
 """
 Logger personalizado para enviar logs para Grafana Loki
+
+Os registros são enviados em lotes por uma thread em segundo plano; a thread
+que loga apenas enfileira a linha formatada.
 """
 
+import copy
+import gzip
 import json
 import logging
+import os
+import tempfile
+import threading
 import time
-from datetime import datetime
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 import requests
 
+# Limites padrão do envio em lote
+LOKI_TAMANHO_FILA = 10_000  # registros aguardando a thread de envio
+LOKI_LOTE_REGISTROS = 500  # envia ao atingir este número de linhas...
+LOKI_LOTE_BYTES = 1024 * 1024  # ...ou este volume de texto...
+LOKI_INTERVALO_ENVIO = 1.0  # ...ou após este intervalo (segundos)
+LOKI_SPOOL_MAX_BYTES = 50 * 1024 * 1024
+LOKI_BACKOFF_MAXIMO = 60.0
+# Arquivo do spool em reenvio por um processo: ".<nome>.<pid>.enviando"
+SUFIXO_REIVINDICADO = ".enviando"
+
 
 class LokiHandler(logging.Handler):
     """
     Handler personalizado para enviar logs para Loki
+
+    ``emit`` apenas congela a mensagem e coloca o registro em um buffer
+    limitado (buffer cheio: o registro é descartado e contado em
+    ``descartados_fila``). Uma thread em segundo plano formata os registros,
+    agrupa as linhas por conjunto de labels e envia lotes gzip ao atingir
+    ``lote_registros``/``lote_bytes`` ou a cada ``intervalo_envio`` segundos.
+
+    Se o Loki estiver fora, os lotes vão para ``spool_dir`` (limitado a
+    ``spool_max_bytes``) e são reenviados, do mais antigo para o mais novo,
+    assim que um envio voltar a funcionar.
     """
 
     def __init__(
@@ -21,62 +49,334 @@ class LokiHandler(logging.Handler):
         loki_url: str = "http://localhost:3100",
         application: str = "form-google",
         environment: str = "development",
+        tamanho_fila: int = LOKI_TAMANHO_FILA,
+        lote_registros: int = LOKI_LOTE_REGISTROS,
+        lote_bytes: int = LOKI_LOTE_BYTES,
+        intervalo_envio: float = LOKI_INTERVALO_ENVIO,
+        spool_dir: Optional[str] = None,
+        spool_max_bytes: int = LOKI_SPOOL_MAX_BYTES,
+        timeout: float = 5,
     ):
         super().__init__()
         self.loki_url = loki_url.rstrip("/")
         self.application = application
         self.environment = environment
+        self.tamanho_fila = tamanho_fila
+        self.lote_registros = lote_registros
+        self.lote_bytes = lote_bytes
+        self.intervalo_envio = intervalo_envio
+        self.spool_dir = spool_dir or os.getenv(
+            "LOKI_SPOOL_DIR",
+            os.path.join(tempfile.gettempdir(), f"{application}-loki-spool"),
+        )
+        self.spool_max_bytes = spool_max_bytes
+        self.timeout = timeout
+
+        # Contadores (lidos por estatisticas())
+        self.enviados = 0
+        self.lotes_enviados = 0
+        self.falhas_envio = 0
+        self.descartados_fila = 0
+        self.descartados_spool = 0
+        self.descartados_rejeitados = 0
+
+        self._buffer: Deque[Tuple[Tuple[Tuple[str, str], ...], logging.LogRecord]]
+        self._buffer = deque()
+        self._acordar = threading.Event()
+        self._pedidos_flush: Deque[threading.Event] = deque()
+        self._parar = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._inicio_lock = threading.Lock()
+        self._backoff = 0.0
+        self._proxima_tentativa = 0.0
+        self._loki_fora = False
+
+    # --- Lado de quem loga (precisa ser barato) ---
+
+    def _garantir_thread(self):
+        # Após fork (gunicorn/Celery) a thread do processo pai não existe
+        if self._pid != os.getpid():
+            with self._inicio_lock:
+                if self._pid != os.getpid():
+                    self._buffer = deque()
+                    self._pedidos_flush = deque()
+                    self._parar = False
+                    self._thread = threading.Thread(
+                        target=self._executar, name="loki-shipper", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _labels(self, record) -> Tuple[Tuple[str, str], ...]:
+        labels = [
+            ("application", self.application),
+            ("environment", self.environment),
+            ("level", record.levelname.lower()),
+            ("logger", record.name),
+        ]
+        # Adicionar labels extras se disponíveis
+        if hasattr(record, "user_id"):
+            labels.append(("user_id", str(record.user_id)))
+        if hasattr(record, "form_id"):
+            labels.append(("form_id", str(record.form_id)))
+        if hasattr(record, "operation"):
+            labels.append(("operation", str(record.operation)))
+        return tuple(labels)
 
     def emit(self, record):
         try:
-            # Preparar os labels
-            labels = {
-                "application": self.application,
-                "environment": self.environment,
-                "level": record.levelname.lower(),
-                "logger": record.name,
-            }
-
-            # Adicionar labels extras se disponíveis
-            if hasattr(record, "user_id"):
-                labels["user_id"] = str(record.user_id)
-            if hasattr(record, "form_id"):
-                labels["form_id"] = str(record.form_id)
-            if hasattr(record, "operation"):
-                labels["operation"] = record.operation
-
-            # Preparar a mensagem
-            log_entry = {
-                "timestamp": int(time.time() * 1e9),  # Nanoseconds
-                "line": self.format(record),
-            }
-
-            # Enviar para Loki
-            payload = {
-                "streams": [
-                    {
-                        "stream": labels,
-                        "values": [[str(log_entry["timestamp"]), log_entry["line"]]],
-                    }
-                ]
-            }
-
-            response = requests.post(
+            self._garantir_thread()
+            buffer = self._buffer
+            if len(buffer) >= self.tamanho_fila:
+                self.descartados_fila += 1
+                return
+            # Congela a mensagem (args podem mudar depois) numa cópia: os
+            # outros handlers continuam vendo o template e os args. A
+            # formatação completa fica para a thread de envio
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+            buffer.append((self._labels(record), record))
+            if len(buffer) >= self.lote_registros:
+                self._acordar.set()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self, timeout: float = 5.0):
+        """Envia (ou grava em spool) tudo o que já está no buffer."""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        concluido = threading.Event()
+        self._pedidos_flush.append(concluido)
+        self._acordar.set()
+        concluido.wait(timeout)
+
+    def close(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            self._parar = True
+            self._acordar.set()
+            self._thread.join(self.timeout * 2)
+            self._thread = None
+            self._pid = None
+        super().close()
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Contadores de envio, descarte e spool."""
+        return {
+            "enviados": self.enviados,
+            "lotes_enviados": self.lotes_enviados,
+            "falhas_envio": self.falhas_envio,
+            "descartados_fila": self.descartados_fila,
+            "descartados_spool": self.descartados_spool,
+            "descartados_rejeitados": self.descartados_rejeitados,
+            "na_fila": len(self._buffer),
+            "spool_arquivos": len(self._arquivos_spool()),
+        }
+
+    # --- Thread de envio ---
+
+    def _executar(self):
+        sessao = requests.Session()
+        while True:
+            self._acordar.wait(self.intervalo_envio)
+            self._acordar.clear()
+            parar = self._parar
+            pedidos = []
+            while self._pedidos_flush:
+                pedidos.append(self._pedidos_flush.popleft())
+
+            if self._buffer:
+                self._drenar(sessao)
+            elif self._proxima_tentativa <= time.monotonic():
+                self._reenviar_spool(sessao)
+
+            for pedido in pedidos:
+                pedido.set()
+            if parar:
+                break
+        sessao.close()
+
+    def _drenar(self, sessao):
+        """Esvazia o buffer em lotes de até lote_registros/lote_bytes."""
+        buffer = self._buffer
+        while buffer:
+            streams: Dict[Tuple[Tuple[str, str], ...], List[List[str]]] = {}
+            registros = bytes_lote = 0
+            while (
+                buffer
+                and registros < self.lote_registros
+                and bytes_lote < self.lote_bytes
+            ):
+                labels, record = buffer.popleft()
+                try:
+                    linha = self.format(record)
+                except Exception:
+                    continue
+                # Nanoseconds
+                streams.setdefault(labels, []).append(
+                    [str(int(record.created * 1e9)), linha]
+                )
+                registros += 1
+                bytes_lote += len(linha)
+            if streams:
+                self._enviar_lote(sessao, streams, registros)
+
+    def _enviar_lote(self, sessao, streams, registros: int):
+        payload = {
+            "streams": [
+                {"stream": dict(labels), "values": valores}
+                for labels, valores in streams.items()
+            ]
+        }
+        corpo = gzip.compress(
+            json.dumps(payload, ensure_ascii=False).encode("utf-8"), compresslevel=5
+        )
+        if time.monotonic() < self._proxima_tentativa:
+            # Loki fora e ainda em backoff: direto para o spool
+            self._gravar_spool(corpo, registros)
+            return
+        if self._post(sessao, corpo, registros):
+            self._reenviar_spool(sessao)
+        else:
+            self._gravar_spool(corpo, registros)
+
+    def _post(self, sessao, corpo: bytes, registros: int) -> bool:
+        """Envia um lote; False só quando vale a pena tentar de novo depois."""
+        try:
+            response = sessao.post(
                 f"{self.loki_url}/loki/api/v1/push",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=5,
+                data=corpo,
+                headers={
+                    "Content-Type": "application/json",
+                    "Content-Encoding": "gzip",
+                },
+                timeout=self.timeout,
             )
+        except requests.RequestException as e:
+            self._registrar_falha(f"Erro ao enviar log para Loki: {e}")
+            return False
 
-            if response.status_code != 204:
-                print(
-                    f"Erro ao enviar log para Loki: {response.status_code} - {response.text}"
-                )
+        if response.status_code < 300:
+            self.enviados += registros
+            self.lotes_enviados += 1
+            self._backoff = 0.0
+            self._proxima_tentativa = 0.0
+            if self._loki_fora:
+                self._loki_fora = False
+                print("Loki disponível novamente; reenviando logs do spool")
+            return True
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            # Lote rejeitado (ex.: timestamps fora da janela); reenviar não adianta
+            self.descartados_rejeitados += registros
+            print(
+                f"Erro ao enviar log para Loki: {response.status_code} - {response.text[:200]}"
+            )
+            return True
+        self._registrar_falha(
+            f"Erro ao enviar log para Loki: {response.status_code} - {response.text[:200]}"
+        )
+        return False
+
+    def _registrar_falha(self, mensagem: str):
+        self.falhas_envio += 1
+        self._backoff = min(
+            max(self._backoff * 2, self.intervalo_envio), LOKI_BACKOFF_MAXIMO
+        )
+        self._proxima_tentativa = time.monotonic() + self._backoff
+        if not self._loki_fora:
+            # Uma mensagem por indisponibilidade, não uma por lote
+            self._loki_fora = True
+            print(f"{mensagem}. Gravando logs em spool: {self.spool_dir}")
+
+    # --- Spool em disco ---
+
+    def _arquivos_spool(self) -> List[str]:
+        try:
+            nomes = sorted(
+                n for n in os.listdir(self.spool_dir) if n.endswith(".json.gz")
+            )
+        except OSError:
+            return []
+        return [os.path.join(self.spool_dir, n) for n in nomes]
+
+    def _gravar_spool(self, corpo: bytes, registros: int):
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            ocupado = sum(os.path.getsize(c) for c in self._arquivos_spool())
+            if ocupado + len(corpo) > self.spool_max_bytes:
+                self.descartados_spool += registros
+                return
+            # Nome ordenável por tempo; o número de registros vai no nome
+            nome = f"{time.time_ns()}-{os.getpid()}-{registros}.json.gz"
+            temporario = os.path.join(self.spool_dir, f".{nome}.tmp")
+            with open(temporario, "wb") as f:
+                f.write(corpo)
+            os.replace(temporario, os.path.join(self.spool_dir, nome))
+        except OSError as e:
+            self.descartados_spool += registros
+            print(f"Erro ao gravar spool de logs do Loki: {e}")
+
+    def _reenviar_spool(self, sessao):
+        """
+        Reenvia os arquivos do spool, do mais antigo para o mais novo.
+
+        O spool é compartilhado pelos processos (workers) da aplicação: cada
+        arquivo é reivindicado com um ``os.replace`` atômico para um nome com
+        o PID antes do envio, e só quem conseguiu renomear o envia. Se o envio
+        falhar, o arquivo volta ao nome original.
+        """
+        self._recuperar_reivindicados()
+        for caminho in self._arquivos_spool():
+            nome = os.path.basename(caminho)
+            reivindicado = os.path.join(
+                self.spool_dir, f".{nome}.{os.getpid()}{SUFIXO_REIVINDICADO}"
+            )
+            try:
+                os.replace(caminho, reivindicado)
+            except OSError:
+                continue  # outro processo já pegou este arquivo
+            try:
+                registros = int(nome.split("-")[2].split(".")[0])
+                with open(reivindicado, "rb") as f:
+                    corpo = f.read()
+            except (OSError, ValueError, IndexError):
+                continue
+            if not self._post(sessao, corpo, registros):
+                self._devolver_ao_spool(reivindicado, caminho)
+                return
+            try:
+                os.remove(reivindicado)
+            except OSError:
+                pass
+
+    def _devolver_ao_spool(self, reivindicado: str, caminho: str):
+        try:
+            os.replace(reivindicado, caminho)
+        except OSError:
+            pass
 
-        except Exception as e:
-            # Fallback para console se Loki não estiver disponível
-            print(f"Erro ao enviar log para Loki: {e}")
-            print(f"Log original: {self.format(record)}")
+    def _recuperar_reivindicados(self):
+        """Devolve ao spool os arquivos reivindicados por processos que morreram."""
+        try:
+            nomes = os.listdir(self.spool_dir)
+        except OSError:
+            return
+        for nome in nomes:
+            if not (nome.startswith(".") and nome.endswith(SUFIXO_REIVINDICADO)):
+                continue
+            original, _, pid = nome[1 : -len(SUFIXO_REIVINDICADO)].rpartition(".")
+            try:
+                os.kill(int(pid), 0)
+                continue  # processo vivo: o envio está em andamento
+            except ProcessLookupError:
+                pass
+            except (OSError, ValueError):
+                continue
+            self._devolver_ao_spool(
+                os.path.join(self.spool_dir, nome),
+                os.path.join(self.spool_dir, original),
+            )
 
 
 def setup_loki_logging(
@@ -0,0 +1,298 @@
+"""
+Métricas do pipeline de geração de documentos (formato Prometheus).
+
+Contadores e histogramas de:
+    - chamadas às APIs Google por API/método/status e sua latência;
+    - latência de cada etapa da geração (pasta, nome único, cópia,
+      preenchimento), alimentada pelos spans de ``stage_timing``;
+    - espera das tasks na fila do Celery, retentativas e estado final;
+    - documentos gerados por submissão;
+    - acertos e faltas do cache de documentos gerados (``document_cache``)
+      e do pool de cópias de templates (``template_pool``);
+    - queries SQL por requisição/task e suspeitas de N+1 (``query_accounting``).
+
+A exposição é feita em ``/metrics`` (``registrar_endpoint_metrics``). Com
+``PROMETHEUS_MULTIPROC_DIR`` definido (o mesmo diretório para o gunicorn e o
+Celery, criado e vazio antes de subir os serviços), cada processo grava seus
+valores em arquivos mmap e o endpoint agrega todos os processos — inclusive
+os workers do Celery. Sem a variável, vale o registro do próprio processo
+(desenvolvimento).
+
+O endpoint não é público: responde a quem apresentar o token de
+``METRICS_TOKEN`` (``Authorization: Bearer <token>``, o ``authorization`` do
+scrape config do Prometheus) ou vier direto, sem passar pelo proxy, de um IP
+de ``METRICS_ALLOWED_IPS`` (separados por vírgula; padrão só ``127.0.0.1`` e
+``::1``).
+
+O ``prometheus_client`` é opcional: sem ele as funções de registro não fazem
+nada e ``/metrics`` responde 501.
+"""
+
+import hmac
+import os
+import time
+from datetime import datetime
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+except ImportError:  # pragma: no cover - depende do ambiente
+    prometheus_client = None
+
+PREFIXO = "form_google"
+
+# Latências das chamadas Google e das etapas: de dezenas de ms a ~1 min
+BUCKETS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+# Espera na fila: de imediato a vários minutos (rate limit de 20/min)
+BUCKETS_FILA = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+BUCKETS_DOCUMENTOS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15)
+BUCKETS_QUERIES = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+if prometheus_client is not None:
+    CHAMADAS_GOOGLE = Counter(
+        f"{PREFIXO}_google_api_requests_total",
+        "Chamadas às APIs Google",
+        ["api", "metodo", "status"],
+    )
+    LATENCIA_GOOGLE = Histogram(
+        f"{PREFIXO}_google_api_duration_seconds",
+        "Latência das chamadas às APIs Google",
+        ["api", "metodo"],
+        buckets=BUCKETS_LATENCIA,
+    )
+    LATENCIA_ETAPA = Histogram(
+        f"{PREFIXO}_geracao_etapa_duration_seconds",
+        "Latência de cada etapa da geração de um documento",
+        ["etapa"],
+        buckets=BUCKETS_LATENCIA,
+    )
+    ESPERA_FILA = Histogram(
+        f"{PREFIXO}_celery_fila_espera_seconds",
+        "Tempo entre a publicação da task e o início da execução",
+        ["task"],
+        buckets=BUCKETS_FILA,
+    )
+    RETENTATIVAS = Counter(
+        f"{PREFIXO}_celery_retentativas_total",
+        "Retentativas de tasks do Celery",
+        ["task"],
+    )
+    TASKS = Counter(
+        f"{PREFIXO}_celery_tasks_total",
+        "Tasks do Celery concluídas, por estado final",
+        ["task", "estado"],
+    )
+    DOCUMENTOS_POR_SUBMISSAO = Histogram(
+        f"{PREFIXO}_documentos_por_submissao",
+        "Documentos gerados com sucesso por submissão",
+        ["tipo_pessoa"],
+        buckets=BUCKETS_DOCUMENTOS,
+    )
+    QUERIES = Histogram(
+        f"{PREFIXO}_db_queries",
+        "Queries SQL por requisição/task",
+        ["tipo"],
+        buckets=BUCKETS_QUERIES,
+    )
+    TEMPO_QUERIES = Histogram(
+        f"{PREFIXO}_db_queries_duration_seconds",
+        "Tempo total no banco por requisição/task",
+        ["tipo"],
+        buckets=BUCKETS_LATENCIA,
+    )
+    CACHE_DOCUMENTOS = Counter(
+        f"{PREFIXO}_cache_documentos_total",
+        "Consultas ao cache de documentos gerados (ver document_cache)",
+        ["resultado"],
+    )
+    POOL_TEMPLATES = Counter(
+        f"{PREFIXO}_pool_templates_total",
+        "Retiradas do pool de cópias de templates (ver template_pool)",
+        ["resultado"],
+    )
+    SUSPEITAS_N_MAIS_1 = Counter(
+        f"{PREFIXO}_db_n_mais_1_total",
+        "Requisições/tasks com queries repetidas (suspeitas de N+1)",
+        ["tipo", "nome"],
+    )
+
+
+def _status_http(erro: BaseException) -> str:
+    resp = getattr(erro, "resp", None)
+    status = getattr(resp, "status", None)
+    return str(status) if status else type(erro).__name__
+
+
+def executar_google(api: str, metodo: str, requisicao):
+    """
+    Executa ``requisicao.execute()`` registrando status e latência.
+
+    Ex.: ``executar_google("drive", "files.copy", drive.files().copy(...))``.
+    """
+    if prometheus_client is None:
+        return requisicao.execute()
+    inicio = time.perf_counter()
+    status = "200"
+    try:
+        return requisicao.execute()
+    except Exception as e:
+        status = _status_http(e)
+        raise
+    finally:
+        LATENCIA_GOOGLE.labels(api, metodo).observe(time.perf_counter() - inicio)
+        CHAMADAS_GOOGLE.labels(api, metodo, status).inc()
+
+
+def observar_etapa(etapa: str, segundos: float) -> None:
+    """Registra a duração de uma etapa da geração (ver ``stage_timing.etapa``)"""
+    if prometheus_client is not None:
+        LATENCIA_ETAPA.labels(etapa).observe(segundos)
+
+
+def registrar_documentos_submissao(tipo_pessoa: str, quantidade: int) -> None:
+    if prometheus_client is not None:
+        DOCUMENTOS_POR_SUBMISSAO.labels(tipo_pessoa or "desconhecido").observe(
+            quantidade
+        )
+
+
+def registrar_cache_documento(resultado: str) -> None:
+    """``acerto``, ``falta``, ``editado`` (só achou documentos editados depois da
+    geração), ``erro`` ou ``ignorado`` (regeneração forçada)"""
+    if prometheus_client is not None:
+        CACHE_DOCUMENTOS.labels(resultado).inc()
+
+
+def registrar_pool_template(resultado: str) -> None:
+    """``acerto``, ``falta`` (pool vazio) ou ``erro`` de uma retirada do pool"""
+    if prometheus_client is not None:
+        POOL_TEMPLATES.labels(resultado).inc()
+
+
+def registrar_queries(
+    tipo: str, nome: str, quantidade: int, segundos: float, suspeitas: int
+) -> None:
+    """Totais de uma requisição/task (ver ``query_accounting``)"""
+    if prometheus_client is None:
+        return
+    QUERIES.labels(tipo).observe(quantidade)
+    TEMPO_QUERIES.labels(tipo).observe(segundos)
+    if suspeitas:
+        # ``nome`` é o endpoint/nome da task: cardinalidade limitada
+        SUSPEITAS_N_MAIS_1.labels(tipo, nome).inc()
+
+
+# --- Celery ---
+# O horário de publicação vai em um header da mensagem; no worker, o Celery
+# expõe os headers em ``task.request``.
+HEADER_PUBLICACAO = "form_google_publicado_em"
+
+
+def _ao_publicar(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(HEADER_PUBLICACAO, time.time())
+
+
+def _antes_da_execucao(task=None, **kwargs):
+    publicado_em = getattr(task.request, HEADER_PUBLICACAO, None)
+    eta = getattr(task.request, "eta", None)
+    if eta:
+        # countdown/retentativa: a espera conta a partir do horário agendado
+        try:
+            publicado_em = datetime.fromisoformat(str(eta)).timestamp()
+        except ValueError:
+            publicado_em = None
+    if publicado_em:
+        ESPERA_FILA.labels(task.name).observe(max(0.0, time.time() - publicado_em))
+
+
+def _ao_retentar(sender=None, **kwargs):
+    RETENTATIVAS.labels(getattr(sender, "name", "desconhecida")).inc()
+
+
+def _depois_da_execucao(task=None, state=None, **kwargs):
+    TASKS.labels(task.name, state or "desconhecido").inc()
+
+
+def instrumentar_celery() -> None:
+    """Conecta os sinais do Celery (idempotente)"""
+    if prometheus_client is None:
+        return
+    try:
+        from celery import signals
+    except ImportError:  # pragma: no cover - depende do ambiente
+        return
+    signals.before_task_publish.connect(
+        _ao_publicar, weak=False, dispatch_uid=f"{PREFIXO}_publicacao"
+    )
+    signals.task_prerun.connect(
+        _antes_da_execucao, weak=False, dispatch_uid=f"{PREFIXO}_prerun"
+    )
+    signals.task_retry.connect(
+        _ao_retentar, weak=False, dispatch_uid=f"{PREFIXO}_retentativa"
+    )
+    signals.task_postrun.connect(
+        _depois_da_execucao, weak=False, dispatch_uid=f"{PREFIXO}_postrun"
+    )
+
+
+# --- Exposição ---
+
+
+def gerar_metricas():
+    """Retorna ``(corpo, content_type)`` no formato de texto do Prometheus"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = prometheus_client.REGISTRY
+    return (
+        prometheus_client.generate_latest(registro),
+        prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+def registrar_endpoint_metrics(app, limiter=None, rota: str = "/metrics") -> None:
+    """
+    Registra ``GET /metrics`` na aplicação Flask.
+
+    Passe o ``limiter`` da aplicação para isentar a rota dos limites padrão
+    (o Prometheus coleta a cada poucos segundos). O acesso é restrito por
+    ``METRICS_TOKEN``/``METRICS_ALLOWED_IPS`` (ver o início do módulo).
+    """
+
+    from flask import request
+
+    token = os.getenv("METRICS_TOKEN") or None
+    ips_permitidos = {
+        ip.strip()
+        for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+        if ip.strip()
+    }
+
+    def autorizado() -> bool:
+        if token:
+            enviado = request.headers.get("Authorization", "")
+            if hmac.compare_digest(enviado.encode(), f"Bearer {token}".encode()):
+                return True
+        # Requisições que passaram pelo nginx chegam com o IP do proxy
+        # (127.0.0.1): só valem pelo IP as que vieram direto
+        if request.headers.get("X-Forwarded-For") or request.headers.get("X-Real-IP"):
+            return False
+        return request.remote_addr in ips_permitidos
+
+    def metrics():
+        if not autorizado():
+            return "Acesso negado\n", 403, {"Content-Type": "text/plain"}
+        if prometheus_client is None:
+            return (
+                "prometheus_client não instalado\n",
+                501,
+                {"Content-Type": "text/plain"},
+            )
+        corpo, content_type = gerar_metricas()
+        return corpo, 200, {"Content-Type": content_type}
+
+    if limiter is not None:
+        metrics = limiter.exempt(metrics)
+    app.add_url_rule(rota, "metrics", metrics, methods=["GET"])
@@ -0,0 +1,199 @@
+"""Colunas normalizadas e índices da busca de clientes
+
+Adiciona a respostas_form as formas normalizadas de CPF/CNPJ, email e nome
+(ver client_search.py), preenche as linhas existentes e cria os índices de
+prefixo. No PostgreSQL também cria índices GIN com pg_trgm para o nome e a
+chave fonética, quando a extensão está disponível.
+
+O preenchimento usa uma cópia das regras de normalização desta revisão, para
+a migração não mudar junto com o código da aplicação; mudanças posteriores
+nas regras se aplicam com ``flask reindex-client-search``.
+
+Revision ID: 3f8c2a7d91e4
+Revises: 9d41f6b2c8e3
+Create Date: 2026-10-18 23:12:40.118302
+
+"""
+
+import re
+import unicodedata
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f8c2a7d91e4"
+down_revision = "9d41f6b2c8e3"
+branch_labels = None
+depends_on = None
+
+COLUNAS = (
+    ("cpf_digitos", 32),
+    ("cnpj_digitos", 32),
+    ("email_normalizado", 128),
+    ("nome_normalizado", 256),
+    ("nome_fonetico", 256),
+)
+COLUNAS_PREFIXO = (
+    "cpf_digitos",
+    "cnpj_digitos",
+    "email_normalizado",
+    "nome_normalizado",
+)
+COLUNAS_TRIGRAMA = ("nome_normalizado", "nome_fonetico")
+TAMANHO_LOTE = 1000
+
+PARTICULAS = frozenset({"d", "da", "das", "de", "do", "dos", "e"})
+REGRAS_FONETICAS = [
+    (re.compile(padrao), substituto)
+    for padrao, substituto in (
+        (r"ph", "f"),
+        (r"th", "t"),
+        (r"lh", "li"),
+        (r"nh", "ni"),
+        (r"[cs]h", "x"),
+        (r"h", ""),
+        (r"w", "v"),
+        (r"y", "i"),
+        (r"q", "k"),
+        (r"ku(?=[aeio])", "k"),
+        (r"s?c(?=[ei])", "s"),
+        (r"c", "k"),
+        (r"g(?=[ei])", "j"),
+        (r"gu(?=[ei])", "g"),
+        (r"z", "s"),
+        (r"n(?=[^aeiou]|$)", "m"),
+        (r"e", "i"),
+        (r"o", "u"),
+        (r"(\w)\1+", r"\1"),
+    )
+]
+
+respostas = sa.table(
+    "respostas_form",
+    *(
+        sa.column(nome)
+        for nome in (
+            "id",
+            "primeiro_nome",
+            "sobrenome",
+            "razao_social",
+            "cpf",
+            "cnpj",
+            "email",
+        )
+    ),
+    *(sa.column(nome) for nome, _ in COLUNAS),
+)
+
+
+def _texto(valor):
+    decomposto = unicodedata.normalize("NFKD", (valor or "").lower())
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", sem_acentos).strip()
+
+
+def _fonetico(valor):
+    palavras = []
+    for palavra in _texto((valor or "").lower().replace("ç", "s")).split():
+        if palavra in PARTICULAS:
+            continue
+        for regra, substituto in REGRAS_FONETICAS:
+            palavra = regra.sub(substituto, palavra)
+        palavras.append(palavra)
+    return " ".join(palavras)
+
+
+def _campos(linha):
+    partes = (linha.primeiro_nome, linha.sobrenome, linha.razao_social)
+    nome = " ".join(p.strip() for p in partes if p and p.strip())
+    return {
+        "b_cpf_digitos": re.sub(r"\D", "", linha.cpf or "") or None,
+        "b_cnpj_digitos": re.sub(r"\D", "", linha.cnpj or "") or None,
+        "b_email_normalizado": (linha.email or "").strip().lower() or None,
+        "b_nome_normalizado": _texto(nome)[:256].rstrip() or None,
+        "b_nome_fonetico": _fonetico(nome)[:256].rstrip() or None,
+    }
+
+
+def _preencher(conexao):
+    c = respostas.c
+    atualizar = (
+        respostas.update()
+        .where(c.id == sa.bindparam("b_id"))
+        .values({nome: sa.bindparam(f"b_{nome}") for nome, _ in COLUNAS})
+    )
+    ultimo_id = 0
+    while True:
+        linhas = conexao.execute(
+            sa.select(
+                c.id,
+                c.primeiro_nome,
+                c.sobrenome,
+                c.razao_social,
+                c.cpf,
+                c.cnpj,
+                c.email,
+            )
+            .where(c.id > ultimo_id)
+            .order_by(c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not linhas:
+            return
+        conexao.execute(
+            atualizar, [{"b_id": linha.id, **_campos(linha)} for linha in linhas]
+        )
+        ultimo_id = linhas[-1].id
+
+
+def _pg_trgm_disponivel(conexao):
+    """Cria a extensão se possível (pode exigir superusuário)"""
+    transacao = conexao.begin_nested()
+    try:
+        conexao.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sa.exc.DBAPIError:
+        transacao.rollback()
+        return False
+    transacao.commit()
+    return True
+
+
+def upgrade():
+    with op.batch_alter_table("respostas_form", schema=None) as batch_op:
+        for nome, tamanho in COLUNAS:
+            batch_op.add_column(sa.Column(nome, sa.String(tamanho), nullable=True))
+
+    conexao = op.get_bind()
+    _preencher(conexao)
+
+    with op.batch_alter_table("respostas_form", schema=None) as batch_op:
+        for nome in COLUNAS_PREFIXO:
+            batch_op.create_index(
+                f"ix_respostas_form_{nome}",
+                [nome],
+                unique=False,
+                postgresql_ops={nome: "varchar_pattern_ops"},
+            )
+
+    if conexao.dialect.name == "postgresql" and _pg_trgm_disponivel(conexao):
+        for nome in COLUNAS_TRIGRAMA:
+            op.create_index(
+                f"ix_respostas_form_{nome}_trgm",
+                "respostas_form",
+                [nome],
+                postgresql_using="gin",
+                postgresql_ops={nome: "gin_trgm_ops"},
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for nome in COLUNAS_TRIGRAMA:
+            op.execute(f"DROP INDEX IF EXISTS ix_respostas_form_{nome}_trgm")
+    with op.batch_alter_table("respostas_form", schema=None) as batch_op:
+        for nome in COLUNAS_PREFIXO:
+            batch_op.drop_index(f"ix_respostas_form_{nome}")
+        for nome, _ in reversed(COLUNAS):
+            batch_op.drop_column(nome)
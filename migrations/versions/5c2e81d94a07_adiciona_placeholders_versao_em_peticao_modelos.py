@@ -0,0 +1,34 @@
+"""Adiciona coluna placeholders_versao em peticao_modelos
+
+Revision ID: 5c2e81d94a07
+Revises: ea7fbbea7f08
+Create Date: 2026-10-18 22:05:41.902117
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2e81d94a07"
+down_revision = "ea7fbbea7f08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("peticao_modelos", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "placeholders_versao",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("peticao_modelos", schema=None) as batch_op:
+        batch_op.drop_column("placeholders_versao")
@@ -0,0 +1,68 @@
+"""Índices compostos para a paginação por keyset das listagens
+
+Adiciona clientes_peticionador.data_criacao (se ainda não existir) e preenche
+as datas nulas de clientes e modelos, já que o keyset não aceita nulos nas
+colunas de ordenação.
+
+Revision ID: 9d41f6b2c8e3
+Revises: 5c2e81d94a07
+Create Date: 2026-10-18 22:31:07.554912
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d41f6b2c8e3"
+down_revision = "5c2e81d94a07"
+branch_labels = None
+depends_on = None
+
+
+def _colunas(tabela):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(tabela)}
+
+
+def upgrade():
+    if "data_criacao" not in _colunas("clientes_peticionador"):
+        with op.batch_alter_table("clientes_peticionador", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("data_criacao", sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE clientes_peticionador SET data_criacao = CURRENT_TIMESTAMP "
+        "WHERE data_criacao IS NULL"
+    )
+    op.execute(
+        "UPDATE peticao_modelos SET criado_em = CURRENT_TIMESTAMP "
+        "WHERE criado_em IS NULL"
+    )
+    with op.batch_alter_table("clientes_peticionador", schema=None) as batch_op:
+        batch_op.alter_column(
+            "data_criacao", existing_type=sa.DateTime(), nullable=False
+        )
+        batch_op.create_index(
+            "ix_clientes_peticionador_data_criacao_id",
+            ["data_criacao", "id"],
+            unique=False,
+        )
+    with op.batch_alter_table("peticao_modelos", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_peticao_modelos_criado_em_id", ["criado_em", "id"], unique=False
+        )
+    with op.batch_alter_table("autoridades_transito", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_autoridades_transito_nome_id", ["nome", "id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("autoridades_transito", schema=None) as batch_op:
+        batch_op.drop_index("ix_autoridades_transito_nome_id")
+    with op.batch_alter_table("peticao_modelos", schema=None) as batch_op:
+        batch_op.drop_index("ix_peticao_modelos_criado_em_id")
+    with op.batch_alter_table("clientes_peticionador", schema=None) as batch_op:
+        batch_op.drop_index("ix_clientes_peticionador_data_criacao_id")
+        batch_op.alter_column(
+            "data_criacao", existing_type=sa.DateTime(), nullable=True
+        )
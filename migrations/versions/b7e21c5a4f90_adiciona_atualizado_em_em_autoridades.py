@@ -0,0 +1,41 @@
+"""Adiciona atualizado_em em autoridades_transito
+
+Usada, junto com count(*), como impressão digital da tabela pelo índice de
+autoridades em memória (app/peticionador/indice_autoridades.py).
+
+Revision ID: b7e21c5a4f90
+Revises: 3f8c2a7d91e4
+Create Date: 2026-10-18 23:48:15.402117
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e21c5a4f90"
+down_revision = "3f8c2a7d91e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("autoridades_transito", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("atualizado_em", sa.DateTime(), nullable=True))
+    op.execute("UPDATE autoridades_transito SET atualizado_em = CURRENT_TIMESTAMP")
+    with op.batch_alter_table("autoridades_transito", schema=None) as batch_op:
+        batch_op.alter_column(
+            "atualizado_em", existing_type=sa.DateTime(), nullable=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_autoridades_transito_atualizado_em"),
+            ["atualizado_em"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("autoridades_transito", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_autoridades_transito_atualizado_em"))
+        batch_op.drop_column("atualizado_em")
@@ -0,0 +1,48 @@
+"""Cria documentos_gerados (valores substituídos em cada documento do kit)
+
+Revision ID: c5d17e2b8f63
+Revises: e4a9d0c3b512
+Create Date: 2026-10-19 01:42:17.204518
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5d17e2b8f63"
+down_revision = "e4a9d0c3b512"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "documentos_gerados",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("resposta_id", sa.Integer(), nullable=False),
+        sa.Column("tipo_doc", sa.String(length=64), nullable=False),
+        sa.Column("google_id", sa.String(length=64), nullable=False),
+        sa.Column("pasta_id", sa.String(length=64), nullable=True),
+        sa.Column("template_id", sa.String(length=128), nullable=False),
+        sa.Column("revisao_template", sa.String(length=32), nullable=True),
+        sa.Column("valores", sa.JSON(), nullable=False),
+        sa.Column("criado_em", sa.DateTime(), nullable=True),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["resposta_id"], ["respostas_form.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("google_id"),
+    )
+    with op.batch_alter_table("documentos_gerados", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_documentos_gerados_resposta_id"),
+            ["resposta_id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("documentos_gerados", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_documentos_gerados_resposta_id"))
+    op.drop_table("documentos_gerados")
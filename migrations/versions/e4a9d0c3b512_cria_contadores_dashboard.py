@@ -0,0 +1,70 @@
+"""Cria contadores_dashboard e preenche com os totais atuais
+
+Revision ID: e4a9d0c3b512
+Revises: b7e21c5a4f90
+Create Date: 2026-10-19 00:20:33.671045
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e4a9d0c3b512"
+down_revision = "b7e21c5a4f90"
+branch_labels = None
+depends_on = None
+
+
+clientes = sa.table("clientes_peticionador", sa.column("id"))
+peticoes = sa.table("peticoes_geradas", sa.column("criado_em"))
+usuarios = sa.table("users_peticionador", sa.column("is_active"))
+respostas = sa.table("respostas_form", sa.column("status_processamento"))
+
+
+def _totais(conexao):
+    """Totais atuais, nas chaves de app/peticionador/contadores_dashboard.py"""
+    contar = sa.select(sa.func.count())
+    valores = {
+        "clientes": conexao.execute(contar.select_from(clientes)).scalar(),
+        "peticoes": conexao.execute(contar.select_from(peticoes)).scalar(),
+        "usuarios_ativos": conexao.execute(
+            contar.select_from(usuarios).where(
+                sa.or_(usuarios.c.is_active.is_(None), usuarios.c.is_active)
+            )
+        ).scalar(),
+    }
+    status = respostas.c.status_processamento
+    for valor, total in conexao.execute(
+        sa.select(status, sa.func.count()).group_by(status)
+    ):
+        valores["status:" + (valor or "sem status")] = total
+    dia = sa.func.date(peticoes.c.criado_em)
+    for valor, total in conexao.execute(
+        sa.select(dia, sa.func.count())
+        .where(peticoes.c.criado_em.isnot(None))
+        .group_by(dia)
+    ):
+        valores["peticoes_dia:" + str(valor)[:10]] = total
+    return valores
+
+
+def upgrade():
+    contadores = op.create_table(
+        "contadores_dashboard",
+        sa.Column("chave", sa.String(length=96), nullable=False),
+        sa.Column("valor", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("chave"),
+    )
+    op.bulk_insert(
+        contadores,
+        [
+            {"chave": chave, "valor": valor}
+            for chave, valor in sorted(_totais(op.get_bind()).items())
+        ],
+    )
+
+
+def downgrade():
+    op.drop_table("contadores_dashboard")
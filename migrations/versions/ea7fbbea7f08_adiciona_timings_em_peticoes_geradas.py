@@ -0,0 +1,27 @@
+"""Adiciona coluna timings em peticoes_geradas
+
+Revision ID: ea7fbbea7f08
+Revises: 0b673a3309d3
+Create Date: 2026-10-18 21:55:12.418230
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ea7fbbea7f08"
+down_revision = "0b673a3309d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("peticoes_geradas", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("timings", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("peticoes_geradas", schema=None) as batch_op:
+        batch_op.drop_column("timings")
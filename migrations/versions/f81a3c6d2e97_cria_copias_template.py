@@ -0,0 +1,42 @@
+"""Cria copias_template (pool de cópias pré-feitas dos templates)
+
+Revision ID: f81a3c6d2e97
+Revises: c5d17e2b8f63
+Create Date: 2026-10-19 02:55:09.481226
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f81a3c6d2e97"
+down_revision = "c5d17e2b8f63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "copias_template",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("template_id", sa.String(length=128), nullable=False),
+        sa.Column("revisao", sa.String(length=32), nullable=False),
+        sa.Column("google_id", sa.String(length=64), nullable=False),
+        sa.Column("criada_em", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("google_id"),
+    )
+    with op.batch_alter_table("copias_template", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_copias_template_template_revisao",
+            ["template_id", "revisao", "id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("copias_template", schema=None) as batch_op:
+        batch_op.drop_index("ix_copias_template_template_revisao")
+    op.drop_table("copias_template")
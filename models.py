@@ -1,14 +1,42 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.orm import relationship
 
+from client_search import TAMANHO_NOME_BUSCA, campos_busca
+
 # Importa a instância única definida em extensions.py
 from extensions import db
 
 
 class RespostaForm(db.Model):
     __tablename__ = "respostas_form"
+    # Busca de clientes: prefixo nas colunas normalizadas. No PostgreSQL a
+    # migração também cria índices GIN (pg_trgm) para nome_normalizado e
+    # nome_fonetico, que atendem o LIKE por palavra do meio do nome.
+    __table_args__ = tuple(
+        Index(
+            f"ix_respostas_form_{coluna}",
+            coluna,
+            postgresql_ops={coluna: "varchar_pattern_ops"},
+        )
+        for coluna in (
+            "cpf_digitos",
+            "cnpj_digitos",
+            "email_normalizado",
+            "nome_normalizado",
+        )
+    )
     id = Column(Integer, primary_key=True)
     timestamp_processamento = Column(DateTime, default=datetime.utcnow)
     submission_id = Column(String(64), unique=True, nullable=False)
@@ -46,6 +74,74 @@ class RespostaForm(db.Model):
     link_pasta_cliente = Column(String(256))
     status_processamento = Column(String(64))
     observacoes_processamento = Column(Text)
+    # Formas normalizadas para a busca (ver client_search.py)
+    cpf_digitos = Column(String(32))
+    cnpj_digitos = Column(String(32))
+    email_normalizado = Column(String(128))
+    nome_normalizado = Column(String(TAMANHO_NOME_BUSCA))
+    nome_fonetico = Column(String(TAMANHO_NOME_BUSCA))
+
+
+@event.listens_for(RespostaForm, "before_insert")
+@event.listens_for(RespostaForm, "before_update")
+def _atualizar_campos_busca(mapper, conexao, resposta):
+    campos = campos_busca(
+        primeiro_nome=resposta.primeiro_nome,
+        sobrenome=resposta.sobrenome,
+        razao_social=resposta.razao_social,
+        cpf=resposta.cpf,
+        cnpj=resposta.cnpj,
+        email=resposta.email,
+    )
+    for coluna, valor in campos.items():
+        setattr(resposta, coluna, valor)
+
+
+class DocumentoGerado(db.Model):
+    """Documento do kit de uma resposta e o texto posto em cada placeholder.
+
+    Os valores permitem atualizar o documento no lugar quando os dados do
+    cliente mudam (ver document_update.py), em vez de gerar o kit de novo.
+    """
+
+    __tablename__ = "documentos_gerados"
+    id = Column(Integer, primary_key=True)
+    resposta_id = Column(
+        Integer, ForeignKey("respostas_form.id"), nullable=False, index=True
+    )
+    tipo_doc = Column(String(64), nullable=False)
+    google_id = Column(String(64), unique=True, nullable=False)
+    pasta_id = Column(String(64))
+    template_id = Column(String(128), nullable=False)
+    # ``version`` do template no Drive quando o documento foi preenchido
+    revisao_template = Column(String(32))
+    # {placeholder: texto inserido} (None não entra: o placeholder ficou)
+    valores = Column(JSON, nullable=False)
+    criado_em = Column(DateTime, default=datetime.utcnow)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    resposta = relationship("RespostaForm", backref=db.backref("documentos", lazy=True))
+
+    def __repr__(self):
+        return f"<DocumentoGerado {self.tipo_doc} ({self.google_id})>"
+
+
+class CopiaTemplate(db.Model):
+    """Cópia livre de um template na pasta de staging (ver template_pool.py)"""
+
+    __tablename__ = "copias_template"
+    # Retirada: a cópia mais antiga da revisão atual do template
+    __table_args__ = (
+        Index("ix_copias_template_template_revisao", "template_id", "revisao", "id"),
+    )
+    id = Column(Integer, primary_key=True)
+    template_id = Column(String(128), nullable=False)
+    # ``version`` do template no Drive quando a cópia foi feita
+    revisao = Column(String(32), nullable=False)
+    google_id = Column(String(64), unique=True, nullable=False)
+    criada_em = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CopiaTemplate {self.template_id} ({self.google_id})>"
 
 
 class FormularioGerado(db.Model):
@@ -0,0 +1,202 @@
+"""
+Contabilidade de queries SQL por requisição e por task, com detector de N+1.
+
+Os eventos ``before_cursor_execute``/``after_cursor_execute`` do SQLAlchemy
+contam as queries e o tempo gasto no banco enquanto há uma contabilidade
+aberta no contexto atual (``contabilizar``). Cada statement é reduzido a uma
+"forma" (espaços colapsados, literais e listas ``IN`` trocados por ``?``);
+a mesma forma repetida ``QUERY_ALERTA_REPETICOES`` vezes numa unidade é
+suspeita de N+1 — um loop que faz uma query por item.
+
+Ao final de cada requisição/task os totais vão para as métricas
+(``metrics.registrar_queries``) e, acima dos limites, um aviso é registrado
+com as formas suspeitas. O log estruturado da requisição recebe os totais
+via ``resumo_atual()``.
+
+Configuração (variáveis de ambiente):
+    QUERY_ALERTA_TOTAL       queries por unidade que geram aviso (padrão 50)
+    QUERY_ALERTA_REPETICOES  repetições da mesma forma que geram aviso (padrão 10)
+"""
+
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import registrar_queries
+
+logger = logging.getLogger(__name__)
+
+QUERY_ALERTA_TOTAL = int(os.getenv("QUERY_ALERTA_TOTAL", "50"))
+QUERY_ALERTA_REPETICOES = int(os.getenv("QUERY_ALERTA_REPETICOES", "10"))
+
+_RE_IN = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_RE_BIND = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def forma_statement(statement: str) -> str:
+    """Statement normalizado: mesmo texto para queries que só mudam valores"""
+    forma = _RE_TEXTO.sub("?", statement)
+    forma = _RE_BIND.sub("?", forma)
+    forma = _RE_NUMERO.sub("?", forma)
+    forma = _RE_IN.sub("IN (?)", forma)
+    return _RE_ESPACOS.sub(" ", forma).strip()
+
+
+class Contabilidade:
+    """Queries executadas numa requisição ou task"""
+
+    __slots__ = ("tipo", "nome", "queries", "segundos", "formas")
+
+    def __init__(self, tipo: str, nome: str):
+        self.tipo = tipo
+        self.nome = nome
+        self.queries = 0
+        self.segundos = 0.0
+        self.formas: Counter = Counter()
+
+    def registrar(self, statement: str, segundos: float) -> None:
+        self.queries += 1
+        self.segundos += segundos
+        self.formas[statement] += 1
+
+    def suspeitas_n_mais_1(
+        self, limite: int = QUERY_ALERTA_REPETICOES
+    ) -> List[Tuple[str, int]]:
+        """Formas repetidas pelo menos ``limite`` vezes, da mais repetida"""
+        # Agrupa por forma só aqui: no caminho quente vale o texto bruto
+        formas: Counter = Counter()
+        for statement, vezes in self.formas.items():
+            formas[forma_statement(statement)] += vezes
+        return [(f, n) for f, n in formas.most_common() if n >= limite]
+
+    def resumo(self) -> Dict[str, Any]:
+        """Campos para o log estruturado"""
+        return {
+            "db_queries": self.queries,
+            "db_time_ms": round(self.segundos * 1000, 1),
+            "db_n_mais_1": len(self.suspeitas_n_mais_1()),
+        }
+
+
+_contabilidade_atual: contextvars.ContextVar = contextvars.ContextVar(
+    "contabilidade_queries", default=None
+)
+
+
+def contabilidade_atual() -> Optional[Contabilidade]:
+    return _contabilidade_atual.get()
+
+
+def resumo_atual() -> Dict[str, Any]:
+    """Totais da contabilidade aberta (vazio fora de uma)"""
+    conta = _contabilidade_atual.get()
+    return conta.resumo() if conta is not None else {}
+
+
+# --- Eventos do SQLAlchemy ---
+
+
+def _antes_do_cursor(conn, cursor, statement, parameters, context, executemany):
+    if _contabilidade_atual.get() is not None:
+        conn.info.setdefault("_inicio_query", []).append(time.perf_counter())
+
+
+def _depois_do_cursor(conn, cursor, statement, parameters, context, executemany):
+    conta = _contabilidade_atual.get()
+    inicios = conn.info.get("_inicio_query")
+    if conta is None or not inicios:
+        return
+    conta.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+def instalar_eventos() -> None:
+    """Escuta todas as engines do SQLAlchemy (idempotente)"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _antes_do_cursor):
+        event.listen(Engine, "before_cursor_execute", _antes_do_cursor)
+        event.listen(Engine, "after_cursor_execute", _depois_do_cursor)
+
+
+# --- API ---
+
+
+def iniciar(tipo: str, nome: str) -> Contabilidade:
+    conta = Contabilidade(tipo, nome)
+    _contabilidade_atual.set(conta)
+    return conta
+
+
+def finalizar(conta: Contabilidade) -> None:
+    """Fecha a contabilidade: métricas e aviso acima dos limites"""
+    if _contabilidade_atual.get() is conta:
+        _contabilidade_atual.set(None)
+    suspeitas = conta.suspeitas_n_mais_1()
+    registrar_queries(
+        conta.tipo, conta.nome, conta.queries, conta.segundos, len(suspeitas)
+    )
+    if conta.queries < QUERY_ALERTA_TOTAL and not suspeitas:
+        return
+    logger.warning(
+        "Muitas queries em %s %s: %d em %.1fms",
+        conta.tipo,
+        conta.nome,
+        conta.queries,
+        conta.segundos * 1000,
+        extra={
+            "extra_fields": {
+                "tipo": conta.tipo,
+                "nome": conta.nome,
+                **conta.resumo(),
+                "suspeitas_n_mais_1": [
+                    {"forma": forma[:300], "vezes": vezes}
+                    for forma, vezes in suspeitas[:5]
+                ],
+            }
+        },
+    )
+
+
+@contextmanager
+def contabilizar(tipo: str, nome: str):
+    """Conta as queries executadas dentro do bloco"""
+    externa = _contabilidade_atual.get()
+    if externa is not None:
+        # Aninhada (ex.: task executada de forma síncrona numa requisição)
+        yield externa
+        return
+    conta = iniciar(tipo, nome)
+    try:
+        yield conta
+    finally:
+        finalizar(conta)
+
+
+def instrumentar_app(app) -> None:
+    """Abre uma contabilidade por requisição do app Flask"""
+    from flask import g, request
+
+    instalar_eventos()
+
+    @app.before_request
+    def _iniciar_contabilidade():
+        g._contabilidade_queries = iniciar(
+            "request", request.endpoint or "desconhecido"
+        )
+
+    @app.teardown_request
+    def _finalizar_contabilidade(exc):
+        conta = g.pop("_contabilidade_queries", None)
+        if conta is not None:
+            finalizar(conta)
@@ -0,0 +1,248 @@
+"""
+Profiler sob demanda para requisições Flask e tasks Celery.
+
+Uma requisição é perfilada (``cProfile``, determinístico) quando traz um
+header ``X-Profile`` assinado ou quando é sorteada pela taxa de amostragem;
+as tasks do Celery só por amostragem. O resultado (formato ``pstats``, abre
+no ``snakeviz``/``pstats``) vai para um anel em disco com no máximo
+``PROFILER_MAX_ARQUIVOS`` arquivos: os mais antigos são apagados.
+
+Configuração (variáveis de ambiente):
+    PROFILER_SECRET        chave do header assinado (sem ela o header é ignorado)
+    PROFILER_SAMPLE_RATE   fração de requisições/tasks perfiladas (padrão 0)
+    PROFILER_DIR           diretório do anel (padrão <tmp>/form-google-profiles)
+    PROFILER_MAX_ARQUIVOS  tamanho do anel (padrão 50)
+    PROFILER_ADMINS        emails (separados por vírgula) que podem listar e
+                           baixar os perfis em /peticionador/admin/perfis;
+                           sem ela as rotas respondem 404
+
+Sem segredo e com taxa 0 nada é instalado: ``instrumentar_app`` não registra
+hooks e ``perfilar_task`` só chama a task.
+
+O header vale ``<timestamp>.<hmac-sha256(segredo, timestamp)>`` por
+``VALIDADE_TOKEN`` segundos; ``gerar_token()`` monta o valor.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HEADER_PROFILE = "X-Profile"
+HEADER_RESPOSTA = "X-Profile-Id"
+# Validade (s) de um token do header X-Profile
+VALIDADE_TOKEN = 300
+
+# "<time_ns>-<tipo>-<duracao_ms>-<nome>.prof"
+_RE_ARQUIVO = re.compile(r"(\d+)-(request|task)-(\d+)-([\w.-]+)\.prof")
+_RE_NOME_INSEGURO = re.compile(r"[^\w.-]+")
+
+
+def _assinar(segredo: str, carimbo: str) -> str:
+    return hmac.new(
+        segredo.encode("utf-8"), carimbo.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def gerar_token(segredo: Optional[str] = None, agora: Optional[float] = None) -> str:
+    """Valor do header ``X-Profile`` válido a partir de ``agora``"""
+    segredo = segredo or CONFIG_PROFILER.segredo
+    if not segredo:
+        raise ValueError("PROFILER_SECRET não configurado")
+    carimbo = str(int(agora if agora is not None else time.time()))
+    return f"{carimbo}.{_assinar(segredo, carimbo)}"
+
+
+class AnelPerfis:
+    """Diretório com os últimos ``maximo`` perfis gravados"""
+
+    def __init__(self, diretorio: str, maximo: int = 50):
+        self.diretorio = diretorio
+        self.maximo = maximo
+
+    def salvar(self, perfil: cProfile.Profile, tipo: str, nome: str, duracao: float):
+        os.makedirs(self.diretorio, exist_ok=True)
+        nome = _RE_NOME_INSEGURO.sub("_", nome).strip("_")[:80] or "anonimo"
+        arquivo = f"{time.time_ns()}-{tipo}-{int(duracao * 1000)}-{nome}.prof"
+        destino = os.path.join(self.diretorio, arquivo)
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        perfil.dump_stats(temporario)
+        os.replace(temporario, destino)
+        self._podar()
+        return arquivo
+
+    def _podar(self) -> None:
+        arquivos = sorted(
+            a for a in os.listdir(self.diretorio) if _RE_ARQUIVO.fullmatch(a)
+        )
+        for antigo in arquivos[: max(0, len(arquivos) - self.maximo)]:
+            try:
+                os.remove(os.path.join(self.diretorio, antigo))
+            except FileNotFoundError:
+                pass  # outro processo já removeu
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """Perfis do mais recente para o mais antigo"""
+        if not os.path.isdir(self.diretorio):
+            return []
+        perfis = []
+        for arquivo in os.listdir(self.diretorio):
+            casamento = _RE_ARQUIVO.fullmatch(arquivo)
+            if not casamento:
+                continue
+            carimbo, tipo, duracao_ms, nome = casamento.groups()
+            perfis.append(
+                {
+                    "arquivo": arquivo,
+                    "tipo": tipo,
+                    "nome": nome,
+                    "duracao_ms": int(duracao_ms),
+                    "criado_em": datetime.utcfromtimestamp(
+                        int(carimbo) / 1e9
+                    ).isoformat(),
+                    "tamanho": os.path.getsize(os.path.join(self.diretorio, arquivo)),
+                }
+            )
+        perfis.sort(key=lambda p: p["arquivo"], reverse=True)
+        return perfis
+
+    def caminho(self, arquivo: str) -> Optional[str]:
+        """Caminho de um perfil do anel (``None`` para nomes inválidos/ausentes)"""
+        if not _RE_ARQUIVO.fullmatch(arquivo):
+            return None
+        caminho = os.path.join(self.diretorio, arquivo)
+        return caminho if os.path.isfile(caminho) else None
+
+    def resumo_texto(self, arquivo: str, linhas: int = 60) -> Optional[str]:
+        """Funções ordenadas por tempo acumulado, em texto"""
+        caminho = self.caminho(arquivo)
+        if caminho is None:
+            return None
+        saida = io.StringIO()
+        pstats.Stats(caminho, stream=saida).sort_stats("cumulative").print_stats(linhas)
+        return saida.getvalue()
+
+
+class ConfigProfiler:
+    """Configuração lida do ambiente uma única vez"""
+
+    def __init__(self):
+        self.segredo = os.getenv("PROFILER_SECRET") or None
+        try:
+            self.taxa = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+        except ValueError:
+            self.taxa = 0.0
+        self.anel = AnelPerfis(
+            os.getenv("PROFILER_DIR")
+            or os.path.join(tempfile.gettempdir(), "form-google-profiles"),
+            int(os.getenv("PROFILER_MAX_ARQUIVOS", "50")),
+        )
+        self.admins = frozenset(
+            email.strip().lower()
+            for email in os.getenv("PROFILER_ADMINS", "").split(",")
+            if email.strip()
+        )
+
+    @property
+    def ligado(self) -> bool:
+        return bool(self.segredo) or self.taxa > 0
+
+    def token_valido(self, token: Optional[str]) -> bool:
+        if not token or not self.segredo:
+            return False
+        carimbo, _, assinatura = token.partition(".")
+        if not carimbo.isdigit() or abs(time.time() - int(carimbo)) > VALIDADE_TOKEN:
+            return False
+        return hmac.compare_digest(assinatura, _assinar(self.segredo, carimbo))
+
+    def pode_ver_perfis(self, email: Optional[str]) -> bool:
+        """Perfis expõem detalhes internos: só os emails de ``PROFILER_ADMINS``"""
+        return bool(email) and email.strip().lower() in self.admins
+
+    def sortear(self) -> bool:
+        return self.taxa > 0 and random.random() < self.taxa
+
+
+CONFIG_PROFILER = ConfigProfiler()
+
+
+@contextmanager
+def perfilar(tipo: str, nome: str, anel: Optional[AnelPerfis] = None):
+    """Perfila o bloco e grava o resultado no anel"""
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        try:
+            (anel or CONFIG_PROFILER.anel).salvar(
+                perfil, tipo, nome, time.perf_counter() - inicio
+            )
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil de {nome}: {e}")
+
+
+def perfilar_task(task, chamar):
+    """Executa ``chamar()`` perfilando a task se ela for sorteada"""
+    if not CONFIG_PROFILER.ligado or not CONFIG_PROFILER.sortear():
+        return chamar()
+    with perfilar("task", task.name):
+        return chamar()
+
+
+def instrumentar_app(app) -> None:
+    """Registra os hooks de profiling no app Flask (nada se desligado)"""
+    if not CONFIG_PROFILER.ligado:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_profiler():
+        if not (
+            CONFIG_PROFILER.token_valido(request.headers.get(HEADER_PROFILE))
+            or CONFIG_PROFILER.sortear()
+        ):
+            return
+        g._profiler = (cProfile.Profile(), time.perf_counter())
+        g._profiler[0].enable()
+
+    @app.after_request
+    def _finalizar_profiler(response):
+        estado = g.pop("_profiler", None)
+        if estado is None:
+            return response
+        perfil, inicio = estado
+        perfil.disable()
+        try:
+            arquivo = CONFIG_PROFILER.anel.salvar(
+                perfil,
+                "request",
+                f"{request.method}_{request.path}",
+                time.perf_counter() - inicio,
+            )
+            response.headers[HEADER_RESPOSTA] = arquivo
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o perfil de {request.path}: {e}")
+        return response
+
+    @app.teardown_request
+    def _descartar_profiler(exc):
+        # Requisição abortada por exceção: after_request não rodou
+        estado = g.pop("_profiler", None)
+        if estado is not None:
+            estado[0].disable()
@@ -0,0 +1,85 @@
+"""
+Benchmark da normalização de datas (date_utils) contra o dateutil.
+
+Usa os formatos que chegam de fato ao sistema: input ``date`` do formulário
+(AAAA-MM-DD), datas digitadas (DD/MM/AAAA) e o carimbo de data/hora do Google
+Sheets. Mede ``format_date_br`` sem cache (fast path puro) e memorizado, que é
+o caminho usado na geração dos documentos, contra ``dateutil.parse`` +
+``strftime`` usado antes.
+
+Uso:
+    python scripts/benchmark_datas.py [--repeticoes 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dateutil import parser as dateutil_parser  # noqa: E402
+
+import date_utils  # noqa: E402
+
+ENTRADAS = [
+    "1990-05-17",
+    "1985-12-01",
+    "2001-01-31",
+    "17/05/1990",
+    "01/12/1985",
+    "5/3/1979",
+    "31/01/2001",
+    "17/05/2023 14:32:10",
+    "02/01/2024 09:05:00",
+    "30/11/2022 23:59:59",
+]
+
+
+def medir(funcao, entradas, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            funcao(entrada)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeticoes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Conferência: o fast path concorda com o dateutil (dia antes do mês nas
+    # datas com barra)
+    for entrada in ENTRADAS:
+        esperado = dateutil_parser.parse(entrada, dayfirst="/" in entrada)
+        obtido = date_utils.parse_datetime(entrada, fallback=False)
+        assert obtido == esperado, (entrada, obtido, esperado)
+
+    total = args.repeticoes * len(ENTRADAS)
+    # Linha de base: chamada usada antes em gerar_documento_cliente
+    t_dateutil = medir(
+        lambda s: dateutil_parser.parse(s).strftime("%d/%m/%Y"),
+        ENTRADAS,
+        args.repeticoes,
+    )
+    t_fast = medir(
+        date_utils._format_date_br_cached.__wrapped__, ENTRADAS, args.repeticoes
+    )
+    date_utils._format_date_br_cached.cache_clear()
+    t_memo = medir(date_utils.format_date_br, ENTRADAS, args.repeticoes)
+
+    print(f"{total:,} datas formatadas para DD/MM/AAAA")
+    print(f"  {'dateutil.parse':<26}{total / t_dateutil:>12,.0f}/s")
+    print(
+        f"  {'format_date_br (sem memo)':<26}{total / t_fast:>12,.0f}/s  "
+        f"({t_dateutil / t_fast:.1f}x)"
+    )
+    print(
+        f"  {'format_date_br (memo)':<26}{total / t_memo:>12,.0f}/s  "
+        f"({t_dateutil / t_memo:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark da validação de CPF/CNPJ em lote (document_validation).
+
+Gera documentos aleatórios (metade com dígitos verificadores corretos), confere
+que o lote concorda com a validação escalar e mede as duas.
+
+Uso:
+    python scripts/benchmark_documentos.py [--quantidade 1000000] [--mascara]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import document_validation as dv  # noqa: E402
+
+
+def gerar(rng, quantidade, tamanho, pesos, mascara):
+    docs = []
+    for i in range(quantidade):
+        digitos = [rng.randrange(10) for _ in range(tamanho - 2)]
+        if i % 2 == 0:
+            digitos += [dv._digito(digitos, pesos[0])]
+            digitos += [dv._digito(digitos, pesos[1])]
+        else:
+            digitos += [rng.randrange(10), rng.randrange(10)]
+        doc = "".join(map(str, digitos))
+        if mascara and tamanho == 11:
+            doc = f"{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}"
+        elif mascara:
+            doc = f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}"
+        docs.append(doc)
+    return docs
+
+
+def medir(nome, docs, escalar, lote):
+    inicio = time.perf_counter()
+    esperado = [escalar(d) for d in docs]
+    t_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    mascara = lote(docs)
+    t_lote = time.perf_counter() - inicio
+
+    assert list(mascara) == esperado, nome
+    print(
+        f"{nome:>5}: escalar {t_escalar:6.2f}s | lote {t_lote:6.2f}s "
+        f"({t_escalar / t_lote:.1f}x) | válidos {sum(esperado):,}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quantidade", type=int, default=1_000_000)
+    parser.add_argument(
+        "--mascara", action="store_true", help="Documentos formatados (com pontuação)."
+    )
+    args = parser.parse_args()
+
+    if dv.np is None:
+        print("NumPy não instalado: o lote usa a validação escalar.")
+
+    rng = random.Random(42)
+    print(f"{args.quantidade:,} documentos por tipo")
+    medir(
+        "CPF",
+        gerar(rng, args.quantidade, 11, dv.PESOS_CPF, args.mascara),
+        dv.is_cpf_valid,
+        dv.validate_cpf_batch,
+    )
+    medir(
+        "CNPJ",
+        gerar(rng, args.quantidade, 14, dv.PESOS_CNPJ, args.mascara),
+        dv.is_cnpj_valid,
+        dv.validate_cnpj_batch,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark de memória da importação de planilhas.
+
+Compara o pico de memória (tracemalloc) do fluxo antigo -- aba inteira em
+memória, um dict por linha com os cabeçalhos originais e a lista completa de
+dicts padronizados -- com o staging colunar em blocos usado por
+``flask import-clients``.
+
+Uso:
+    python scripts/benchmark_import_staging.py [--linhas 10000 50000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.commands import MAP_RESPOSTAS  # noqa: E402
+from app.importacao.staging import (  # noqa: E402
+    DEFAULT_CHUNK_SIZE,
+    compilar_plano,
+    montar_bloco,
+)
+
+# Cabeçalhos da aba "Respostas", na ordem usada por gerar_linha()
+CABECALHOS = [
+    "Carimbo de data/hora",
+    "Primeiro Nome",
+    "Sobrenome",
+    "Nacionalidade",
+    "Estado Civil",
+    "Profissão",
+    "Endereço",
+    "Cidade",
+    "Estado",
+    "CEP",
+    "Telefone celular",
+    "Outro telefone",
+    "E-mail",
+    "Data de nascimento",
+    "RG",
+    "Estado emissor do RG",
+    "CPF",
+    "Digite sua CNH (opcional):",
+    "Foto da CNH ou RG",
+    "Pontuação",
+    "Nome completo",
+]
+MAPEADOR = MAP_RESPOSTAS
+
+
+def gerar_linha(n):
+    """Linha sintética determinística (valores distintos, como na planilha real)."""
+    return [
+        f"{(n % 28) + 1:02d}/05/2023 10:{n % 60:02d}:00",
+        f"Nome{n}",
+        f"Sobrenome Composto {n}",
+        "Brasileira",
+        "Casado(a)",
+        f"Profissão {n % 300}",
+        f"Rua Exemplo {n}, {n % 999}",
+        "São Paulo",
+        "São Paulo",
+        f"{n:08d}",
+        f"(11) 9{n:08d}",
+        "",
+        f"cliente{n}@exemplo.com",
+        "01/01/1990",
+        f"{n:09d}",
+        "SP",
+        f"{n:011d}",
+        "" if n % 3 else f"{n:011d}",
+        f"https://drive.google.com/open?id={n:020d}",
+        "",
+        f"Nome{n} Sobrenome Composto {n}",
+    ]
+
+
+def fluxo_antigo(total):
+    sheet_values = [CABECALHOS] + [gerar_linha(n) for n in range(total)]
+    cabecalhos = [str(h).strip() for h in sheet_values[0]]
+    padronizados = []
+    for linha in sheet_values[1:]:
+        original = {
+            nome: (str(linha[i]).strip() if i < len(linha) else "")
+            for i, nome in enumerate(cabecalhos)
+        }
+        if all(not v for v in original.values()):
+            continue
+        dados = {
+            chave: original.get(col, "").strip() for col, chave in MAPEADOR.items()
+        }
+        padronizados.append(dados)
+    return len(padronizados)
+
+
+def fluxo_colunar(total, chunk_size):
+    plano = compilar_plano(CABECALHOS, MAPEADOR)
+    processadas = 0
+    for inicio in range(0, total, chunk_size):
+        # Simula a leitura paginada: só o bloco atual existe em memória
+        linhas = [
+            gerar_linha(n) for n in range(inicio, min(inicio + chunk_size, total))
+        ]
+        bloco = montar_bloco("Respostas", inicio + 2, linhas, plano)
+        del linhas
+        for linha in bloco.linhas():
+            linha.get("cpf_raw")
+            processadas += 1
+    return processadas
+
+
+def medir(funcao, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, pico / (1024 * 1024), duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--linhas", type=int, nargs="+", default=[10_000, 50_000, 100_000]
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print(
+        f"{'linhas':>8} | {'antigo (MiB)':>12} | {'colunar (MiB)':>13} | tempo antigo/colunar"
+    )
+    for total in args.linhas:
+        n_antigo, pico_antigo, t_antigo = medir(fluxo_antigo, total)
+        n_colunar, pico_colunar, t_colunar = medir(
+            fluxo_colunar, total, args.chunk_size
+        )
+        assert n_antigo == n_colunar, (n_antigo, n_colunar)
+        print(
+            f"{total:>8} | {pico_antigo:>12.1f} | {pico_colunar:>13.1f} | "
+            f"{t_antigo:.2f}s / {t_colunar:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Microbenchmark e acurácia dos parsers de RG e endereço da importação.
+
+Mede a vazão (chamadas/s) sem cache e com o cache LRU aquecido, usando um
+fluxo sintético em que as strings do corpus se repetem como numa planilha
+real, e a acurácia por campo contra o corpus rotulado em
+``app/importacao/corpus.py``.
+
+Uso:
+    python scripts/benchmark_parsers.py [--chamadas 200000] [--erros]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.importacao import parsers  # noqa: E402
+from app.importacao.corpus import CORPUS_ENDERECOS, CORPUS_RG  # noqa: E402
+
+
+def acuracia(nome, corpus, funcao, campos, mostrar_erros):
+    acertos_linha = 0
+    acertos_campo = {campo: 0 for campo in campos}
+    for entrada, esperado in corpus:
+        obtido = funcao(entrada)
+        if obtido == esperado:
+            acertos_linha += 1
+        elif mostrar_erros:
+            print(
+                f"  [{nome}] {entrada!r}\n      esperado={esperado}\n      obtido  ={obtido}"
+            )
+        for campo in campos:
+            if obtido.get(campo) == esperado.get(campo):
+                acertos_campo[campo] += 1
+
+    total = len(corpus)
+    por_campo = ", ".join(
+        f"{campo}={acertos / total:.0%}" for campo, acertos in acertos_campo.items()
+    )
+    print(
+        f"{nome:>9}: {acertos_linha}/{total} exatos ({acertos_linha / total:.0%}) | {por_campo}"
+    )
+
+
+def vazao(nome, entradas, funcao_sem_cache, funcao):
+    inicio = time.perf_counter()
+    for entrada in entradas:
+        funcao_sem_cache(entrada)
+    t_sem_cache = time.perf_counter() - inicio
+
+    parsers.limpar_caches()
+    inicio = time.perf_counter()
+    for entrada in entradas:
+        funcao(entrada)
+    t_cache = time.perf_counter() - inicio
+
+    n = len(entradas)
+    print(
+        f"{nome:>9}: sem cache {n / t_sem_cache:>10,.0f}/s | "
+        f"com cache {n / t_cache:>10,.0f}/s | ganho {t_sem_cache / t_cache:.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chamadas", type=int, default=200_000)
+    parser.add_argument(
+        "--erros", action="store_true", help="Lista os casos que divergem do corpus."
+    )
+    args = parser.parse_args()
+
+    print("Acurácia (corpus rotulado)")
+    acuracia("RG", CORPUS_RG, parsers.parse_rg_completo, parsers.CAMPOS_RG, args.erros)
+    acuracia(
+        "Endereço",
+        CORPUS_ENDERECOS,
+        parsers.parse_endereco_completo_antigos,
+        parsers.CAMPOS_ENDERECO,
+        args.erros,
+    )
+
+    rng = random.Random(42)
+    rgs = [rng.choice(CORPUS_RG)[0] for _ in range(args.chamadas)]
+    enderecos = [rng.choice(CORPUS_ENDERECOS)[0] for _ in range(args.chamadas)]
+
+    # Avisos de RG não reconhecido distorceriam a medição
+    logging.disable(logging.WARNING)
+    print(f"\nVazão ({args.chamadas:,} chamadas)")
+    vazao(
+        "RG",
+        rgs,
+        parsers._parse_rg_cached.__wrapped__,
+        parsers.parse_rg_completo,
+    )
+    vazao(
+        "Endereço",
+        enderecos,
+        parsers._parse_endereco_cached.__wrapped__,
+        parsers.parse_endereco_completo_antigos,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,14 @@ setup(
         "sqlalchemy",
         # Adicione outras dependências do requirements.txt se necessário
     ],
+    extras_require={
+        # Validação de CPF/CNPJ em lote vetorizada (document_validation)
+        "lote": ["numpy"],
+        # Serialização JSON mais rápida dos logs estruturados (logging_config)
+        "logs": ["orjson"],
+        # Endpoint /metrics no formato Prometheus (metrics)
+        "metricas": ["prometheus_client"],
+    },
     python_requires=">=3.8",
     entry_points={"console_scripts": ["form-google=app:main"]},
 )
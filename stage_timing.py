@@ -0,0 +1,187 @@
+"""
+Spans leves com a duração de cada etapa da geração de documentos.
+
+``etapa(nome, **atributos)`` funciona como context manager ou decorator e
+abre um span filho do span atual (``contextvars``, por thread/contexto). Cada
+span também alimenta o histograma de etapas de ``metrics``. O resumo de um
+span (``Span.resumo()``) vai no bloco ``timings`` dos resultados da API e das
+tasks e é gravado junto de cada documento gerado:
+
+    {"total_ms": 812.4,
+     "etapas": {"pasta": 120.3, "nome_unico": 95.0, "copia": 410.2, ...},
+     "spans": [{"nome": "copia", "inicio_ms": 96.1, "duracao_ms": 410.2}, ...]}
+
+Com ``STAGE_TIMING_EXPORT_FILE`` definido, cada span raiz concluído é gravado
+nesse arquivo como uma linha no formato JSON do OTLP (``resourceSpans``), que
+pode ser reenviada a um coletor OpenTelemetry (``otlpjsonfile`` receiver).
+"""
+
+import contextvars
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from generation_trace import SinkArquivo
+from metrics import observar_etapa
+
+NOME_SERVICO = "form-google"
+ESCOPO = "form_google.geracao"
+
+
+class Span:
+    """Duração de uma etapa e das etapas executadas dentro dela"""
+
+    __slots__ = (
+        "nome",
+        "atributos",
+        "pai",
+        "filhos",
+        "inicio_ns",
+        "fim_ns",
+        "trace_id",
+        "span_id",
+    )
+
+    def __init__(self, nome: str, pai: Optional["Span"], atributos: Dict[str, Any]):
+        self.nome = nome
+        self.atributos = atributos
+        self.pai = pai
+        self.filhos: List["Span"] = []
+        self.inicio_ns = time.time_ns()
+        self.fim_ns: Optional[int] = None
+        self.trace_id = pai.trace_id if pai is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+
+    @property
+    def duracao_ms(self) -> float:
+        fim = self.fim_ns if self.fim_ns is not None else time.time_ns()
+        return (fim - self.inicio_ns) / 1e6
+
+    def descendentes(self):
+        for filho in self.filhos:
+            yield filho
+            yield from filho.descendentes()
+
+    def resumo(self) -> Dict[str, Any]:
+        """Bloco ``timings``: total, soma por etapa e spans em ordem de início"""
+        etapas: Dict[str, float] = {}
+        spans = []
+        for span in self.descendentes():
+            duracao = span.duracao_ms
+            etapas[span.nome] = round(etapas.get(span.nome, 0.0) + duracao, 1)
+            spans.append(
+                {
+                    "nome": span.nome,
+                    "inicio_ms": round((span.inicio_ns - self.inicio_ns) / 1e6, 1),
+                    "duracao_ms": round(duracao, 1),
+                    **span.atributos,
+                }
+            )
+        return {
+            "total_ms": round(self.duracao_ms, 1),
+            "etapas": etapas,
+            "spans": spans,
+        }
+
+    def resumo_json(self) -> str:
+        return json.dumps(self.resumo(), ensure_ascii=False, default=str)
+
+
+_span_atual: contextvars.ContextVar = contextvars.ContextVar("span_etapa", default=None)
+
+
+def span_atual() -> Optional[Span]:
+    """Span aberto no contexto atual (``None`` fora de uma etapa)"""
+    return _span_atual.get()
+
+
+# --- Exportação ---
+
+
+def _valor_otlp(valor: Any) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    return {"stringValue": str(valor)}
+
+
+def _span_otlp(span: Span) -> Dict[str, Any]:
+    registro = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.nome,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.inicio_ns),
+        "endTimeUnixNano": str(span.fim_ns or time.time_ns()),
+        "attributes": [
+            {"key": chave, "value": _valor_otlp(valor)}
+            for chave, valor in span.atributos.items()
+        ],
+    }
+    if span.pai is not None:
+        registro["parentSpanId"] = span.pai.span_id
+    if "erro" in span.atributos:
+        registro["status"] = {"code": 2, "message": str(span.atributos["erro"])}
+    return registro
+
+
+def como_otlp(raiz: Span) -> Dict[str, Any]:
+    """Span raiz e descendentes no formato JSON do OTLP"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": NOME_SERVICO}},
+                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": ESCOPO},
+                        "spans": [_span_otlp(raiz)]
+                        + [_span_otlp(s) for s in raiz.descendentes()],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+_caminho_exportacao = os.getenv("STAGE_TIMING_EXPORT_FILE")
+EXPORTADOR: Optional[SinkArquivo] = (
+    SinkArquivo(_caminho_exportacao) if _caminho_exportacao else None
+)
+
+
+# --- API ---
+
+
+@contextmanager
+def etapa(nome: str, **atributos: Any):
+    """
+    Mede ``nome`` como filho do span atual.
+
+    Exceções são registradas no atributo ``erro`` e propagadas.
+    """
+    pai = _span_atual.get()
+    span = Span(nome, pai, atributos)
+    if pai is not None:
+        pai.filhos.append(span)
+    token = _span_atual.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.atributos["erro"] = type(e).__name__
+        raise
+    finally:
+        span.fim_ns = time.time_ns()
+        _span_atual.reset(token)
+        observar_etapa(nome, (span.fim_ns - span.inicio_ns) / 1e9)
+        if pai is None and EXPORTADOR is not None:
+            EXPORTADOR.gravar(como_otlp(span))
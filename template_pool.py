@@ -0,0 +1,337 @@
+"""
+Pool de cópias pré-feitas dos templates (warm pool).
+
+O ``files.copy`` é a etapa mais lenta da geração e o usuário espera por ela.
+Com o pool ligado, cada template "quente" tem ``TEMPLATE_POOL_SIZE`` cópias
+livres numa pasta de staging; na geração, uma cópia é retirada e levada para
+a pasta do cliente com um único ``files.update`` (pasta, nome e
+``appProperties`` de uma vez), e o preenchimento segue como antes.
+
+As cópias livres ficam na tabela ``copias_template`` com a revisão
+(``version`` do Drive, ver document_cache) do template de origem. A retirada
+apaga a linha numa transação própria — confirmada mesmo que a geração falhe
+depois, já que o arquivo saiu do staging — e só aceita cópias da revisão
+atual: editar o template invalida as cópias antigas, que ``reabastecer``
+remove do Drive. Sem cópia disponível, a geração copia o template
+normalmente.
+
+Cada retirada pede a reposição assíncrona do template (a task registrada com
+``registrar_reabastecedor`` em ``create_app``); ``flask fill-template-pool``
+enche o pool de todos os templates quentes (ao subir o serviço ou por cron).
+Reposições do mesmo template não rodam ao mesmo tempo: cada uma conta as
+livres e cria as que faltam, e duas juntas criariam o dobro.
+
+Configuração (variáveis de ambiente):
+    TEMPLATE_POOL_FOLDER_ID   pasta de staging (sem ela o pool fica desligado)
+    TEMPLATE_POOL_SIZE        cópias livres por template (padrão 3)
+    TEMPLATE_POOL_TEMPLATES   IDs dos templates quentes, separados por vírgula
+                              (padrão: todos os de CONFIG["TEMPLATES"])
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from flask import has_app_context
+from googleapiclient.errors import HttpError
+from sqlalchemy import delete, func, insert, select, text
+
+import document_cache
+from config import CONFIG
+from metrics import executar_google, registrar_pool_template
+from models import CopiaTemplate, db
+
+logger = logging.getLogger(__name__)
+
+PASTA_STAGING = os.getenv("TEMPLATE_POOL_FOLDER_ID") or None
+TAMANHO = int(os.getenv("TEMPLATE_POOL_SIZE", "3"))
+
+# appProperties das cópias livres (removidas na retirada)
+CHAVE_TEMPLATE = "pool_template"
+CHAVE_REVISAO = "pool_revisao"
+# Cópias apagadas à mão no Drive: tenta a próxima antes de desistir
+MAX_TENTATIVAS = 3
+# Segundos entre pedidos de reposição do mesmo template (por processo)
+INTERVALO_REPOSICAO = 10.0
+
+_tabela = CopiaTemplate.__table__
+_reabastecedor: Optional[Callable[[str], Any]] = None
+_pedidos: Dict[str, float] = {}
+_travas: Dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def ativo() -> bool:
+    return bool(PASTA_STAGING) and TAMANHO > 0 and has_app_context()
+
+
+def templates_quentes() -> List[str]:
+    configurados = os.getenv("TEMPLATE_POOL_TEMPLATES")
+    if configurados:
+        return [t.strip() for t in configurados.split(",") if t.strip()]
+    ids = {
+        template_id
+        for templates in CONFIG.get("TEMPLATES", {}).values()
+        for template_id in templates.values()
+        if template_id
+    }
+    return sorted(ids)
+
+
+def registrar_reabastecedor(funcao: Callable[[str], Any]) -> None:
+    """Função chamada com o ID do template após cada retirada (ex.: ``task.delay``)"""
+    global _reabastecedor
+    _reabastecedor = funcao
+
+
+def _pedir_reposicao(template_id: str) -> None:
+    if _reabastecedor is None:
+        return
+    agora = time.monotonic()
+    with _lock:
+        if agora - _pedidos.get(template_id, float("-inf")) < INTERVALO_REPOSICAO:
+            return
+        _pedidos[template_id] = agora
+    try:
+        _reabastecedor(template_id)
+    except Exception as e:  # broker fora do ar não impede a geração
+        logger.warning(f"template_pool: reposição de '{template_id}' não pedida: {e}")
+
+
+def _retirar_linha(template_id: str, revisao: str) -> Optional[str]:
+    """Remove do pool a cópia livre mais antiga; devolve o ID no Drive"""
+    with db.engine.begin() as conexao:
+        linha = conexao.execute(
+            select(_tabela.c.id, _tabela.c.google_id)
+            .where(
+                _tabela.c.template_id == template_id,
+                _tabela.c.revisao == revisao,
+            )
+            .order_by(_tabela.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if linha is None:
+            return None
+        removidas = conexao.execute(delete(_tabela).where(_tabela.c.id == linha.id))
+        return linha.google_id if removidas.rowcount == 1 else None
+
+
+def _devolver(template_id: str, revisao: str, google_id: str) -> None:
+    """Põe de volta no pool uma cópia retirada que não chegou a ser movida"""
+    with db.engine.begin() as conexao:
+        conexao.execute(
+            insert(_tabela).values(
+                template_id=template_id, revisao=revisao, google_id=google_id
+            )
+        )
+
+
+def retirar(
+    drive_service,
+    template_id: str,
+    nome_arquivo: str,
+    pasta_id: str,
+    app_properties: Optional[Dict[str, str]] = None,
+    fields: str = "id",
+) -> Optional[Dict[str, Any]]:
+    """
+    Leva uma cópia livre do template para ``pasta_id`` com o nome final.
+
+    Devolve o recurso atualizado (``fields``) ou ``None`` se o pool está
+    desligado ou vazio — aí quem chama copia o template.
+    """
+    if not ativo():
+        return None
+    revisao = document_cache.revisao_template(drive_service, template_id)
+    if not revisao:
+        return None
+
+    try:
+        for _ in range(MAX_TENTATIVAS):
+            google_id = _retirar_linha(template_id, revisao)
+            if google_id is None:
+                break
+            propriedades: Dict[str, Optional[str]] = {
+                CHAVE_TEMPLATE: None,
+                CHAVE_REVISAO: None,
+            }
+            propriedades.update(app_properties or {})
+            try:
+                arquivo = executar_google(
+                    "drive",
+                    "files.update",
+                    drive_service.files().update(
+                        fileId=google_id,
+                        addParents=pasta_id,
+                        removeParents=PASTA_STAGING,
+                        body={"name": nome_arquivo, "appProperties": propriedades},
+                        fields=fields,
+                        supportsAllDrives=True,
+                    ),
+                )
+            except HttpError as error:
+                if getattr(error.resp, "status", None) == 404:
+                    logger.warning(
+                        f"template_pool: cópia {google_id} não existe mais no Drive"
+                    )
+                    continue
+                _devolver(template_id, revisao, google_id)
+                raise
+            registrar_pool_template("acerto")
+            logger.info(
+                f"template_pool: cópia {google_id} do template '{template_id}' usada para '{nome_arquivo}'"
+            )
+            return arquivo
+    except Exception as e:
+        # Problema no pool não impede a geração: segue com files.copy
+        logger.error(f"template_pool: falha ao retirar cópia de '{template_id}': {e}")
+        registrar_pool_template("erro")
+        return None
+    finally:
+        _pedir_reposicao(template_id)
+
+    registrar_pool_template("falta")
+    return None
+
+
+@contextmanager
+def _reabastecimento_exclusivo(template_id: str) -> Iterator[None]:
+    """
+    Um reabastecimento do template de cada vez.
+
+    No PostgreSQL vale entre processos: ``pg_advisory_xact_lock`` numa
+    transação aberta até o fim. Nos outros bancos, só dentro do processo.
+    """
+    if db.engine.dialect.name == "postgresql":
+        chave = int.from_bytes(
+            hashlib.sha256(f"template_pool:{template_id}".encode()).digest()[:8],
+            "big",
+            signed=True,
+        )
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": chave}
+            )
+            yield
+        return
+    with _lock:
+        trava = _travas.setdefault(template_id, threading.Lock())
+    with trava:
+        yield
+
+
+def _reabastecer_template(
+    drive_service, template_id: str, revisao: str, tamanho: int
+) -> int:
+    """Tira as cópias de revisões antigas e cria as que faltam; devolve quantas"""
+    from document_update import executar_em_lote
+
+    with db.engine.begin() as conexao:
+        da_revisao_antiga = (
+            _tabela.c.template_id == template_id,
+            _tabela.c.revisao != revisao,
+        )
+        antigas = (
+            conexao.execute(select(_tabela.c.google_id).where(*da_revisao_antiga))
+            .scalars()
+            .all()
+        )
+        conexao.execute(
+            delete(_tabela).where(*da_revisao_antiga, _tabela.c.google_id.in_(antigas))
+        )
+        livres = conexao.execute(
+            select(func.count()).where(
+                _tabela.c.template_id == template_id,
+                _tabela.c.revisao == revisao,
+            )
+        ).scalar_one()
+    if antigas:
+        logger.info(
+            f"template_pool: {len(antigas)} cópia(s) de revisão antiga de '{template_id}' removidas"
+        )
+        _, erros = executar_em_lote(
+            drive_service,
+            "drive",
+            "files.delete",
+            {
+                google_id: drive_service.files().delete(
+                    fileId=google_id, supportsAllDrives=True
+                )
+                for google_id in antigas
+            },
+        )
+        for google_id, erro in erros.items():
+            logger.warning(f"template_pool: cópia {google_id} não removida: {erro}")
+
+    faltando = max(0, tamanho - livres)
+    if not faltando:
+        return 0
+    corpo = {
+        "name": f"[pool] {template_id}",
+        "parents": [PASTA_STAGING],
+        "appProperties": {CHAVE_TEMPLATE: template_id, CHAVE_REVISAO: revisao},
+    }
+    copias, erros = executar_em_lote(
+        drive_service,
+        "drive",
+        "files.copy",
+        {
+            str(n): drive_service.files().copy(
+                fileId=template_id,
+                body=corpo,
+                fields="id",
+                supportsAllDrives=True,
+            )
+            for n in range(faltando)
+        },
+    )
+    for erro in erros.values():
+        logger.warning(f"template_pool: cópia de '{template_id}' falhou: {erro}")
+    if copias:
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                insert(_tabela),
+                [
+                    {
+                        "template_id": template_id,
+                        "revisao": revisao,
+                        "google_id": copia["id"],
+                    }
+                    for copia in copias.values()
+                ],
+            )
+    logger.info(
+        f"template_pool: {len(copias)} cópia(s) de '{template_id}' criadas ({livres} livres antes)"
+    )
+    return len(copias)
+
+
+def reabastecer(
+    drive_service,
+    template_ids: Optional[Iterable[str]] = None,
+    tamanho: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Completa ``tamanho`` cópias livres da revisão atual de cada template.
+
+    Cópias de revisões antigas saem da tabela e do Drive. Devolve
+    ``{template_id: cópias criadas}``.
+    """
+    if not PASTA_STAGING:
+        return {}
+    tamanho = TAMANHO if tamanho is None else tamanho
+    criadas: Dict[str, int] = {}
+    for template_id in template_ids or templates_quentes():
+        revisao = document_cache.revisao_template(drive_service, template_id)
+        if not revisao:
+            continue
+        with _reabastecimento_exclusivo(template_id):
+            criadas[template_id] = _reabastecer_template(
+                drive_service, template_id, revisao, tamanho
+            )
+    return criadas
@@ -0,0 +1,100 @@
+"""Testes da busca de clientes (classificação do termo e relevância)."""
+
+import pytest
+
+from app.peticionador.busca_clientes import classificar_termo
+from client_search import TAMANHO_NOME_BUSCA, campos_busca, chave_fonetica
+
+
+@pytest.mark.parametrize(
+    "termo, tipo",
+    [
+        ("123", "documento"),
+        ("123.456.789-09", "documento"),
+        ("11.222.333/0001-81", "documento"),
+        (" 123 456 ", "documento"),
+        ("12", ""),
+        ("..-", ""),
+        ("ana@", "email"),
+        ("ana@exemplo.com", "email"),
+        ("Ana", "nome"),
+        ("José da Silva", "nome"),
+        ("Rua 12", "nome"),
+        ("a", ""),
+        ("   ", ""),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_classificar_termo(termo, tipo):
+    assert classificar_termo(termo) == tipo
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("Thiago", "Tiago"),
+        ("Souza", "Sousa"),
+        ("Felipe", "Filipe"),
+        ("Luiz", "Luis"),
+        ("Jéssica", "Gessika"),
+        ("Maria da Silva", "Maria Silva"),
+    ],
+)
+def test_grafias_que_soam_igual(a, b):
+    assert chave_fonetica(a) == chave_fonetica(b)
+
+
+def test_campos_cabem_nas_colunas():
+    campos = campos_busca(
+        primeiro_nome="N" * 64,
+        sobrenome="S" * 64,
+        razao_social="R" * 128,
+        cpf="1" * 32,
+        cnpj="2" * 32,
+    )
+
+    assert len(campos["nome_normalizado"]) == TAMANHO_NOME_BUSCA
+    assert len(campos["nome_fonetico"]) <= TAMANHO_NOME_BUSCA
+    assert len(campos["cpf_digitos"]) == 32 and len(campos["cnpj_digitos"]) == 32
+
+
+def test_busca_por_tipo_e_relevancia(app):
+    from app.peticionador.busca_clientes import buscar_clientes
+    from models import RespostaForm, db
+
+    dados = [
+        ("Tiago", "Souza", "123.456.789-09", "tiago@exemplo.com"),
+        ("Thiago", "Sousa Lima", "123.999.000-11", "thiago.lima@exemplo.com"),
+        ("Ana", "Tiago", "987.654.321-00", "ana@exemplo.com"),
+    ]
+    db.session.add_all(
+        RespostaForm(
+            submission_id=str(n),
+            primeiro_nome=nome,
+            sobrenome=sobrenome,
+            cpf=cpf,
+            email=email,
+        )
+        for n, (nome, sobrenome, cpf, email) in enumerate(dados)
+    )
+    db.session.commit()
+
+    por_documento = buscar_clientes("123.456.789-09")
+    assert por_documento.tipo == "documento"
+    assert [i["primeiro_nome"] for i in por_documento.itens] == ["Tiago"]
+    assert len(buscar_clientes("123").itens) == 2
+
+    # Grafia exata primeiro; as outras só pela chave fonética
+    thiago = buscar_clientes("THIAGO.").itens
+    assert [i["primeiro_nome"] for i in thiago] == ["Thiago", "Ana", "Tiago"]
+    assert [i["relevancia"] for i in thiago] == [90, 40, 40]
+    assert buscar_clientes("ana@exemplo.com").tipo == "email"
+
+    # Início do nome, depois início de palavra e a grafia "de ouvido" por último
+    nomes = [i["nome_completo"] for i in buscar_clientes("tiago").itens]
+    assert nomes == ["Tiago Souza", "Ana Tiago", "Thiago Sousa Lima"]
+
+    pagina = buscar_clientes("tiago", pagina=1, limite=2)
+    assert pagina.tem_mais and len(pagina.itens) == 2
+    assert buscar_clientes("x").itens == []
@@ -0,0 +1,89 @@
+"""Testes do validador de clientes (registro avulso e em lote)."""
+
+import pytest
+
+from app.validators.cliente_validator import (
+    ClienteValidator,
+    ErroCampo,
+    validar_lote_clientes,
+)
+
+PF = {
+    "tipoPessoa": "pf",
+    "primeiroNome": "  Ana  ",
+    "sobrenome": "Silva",
+    "email": "ana@exemplo.com",
+    "cpf": "529.982.247-25",
+    "endereco_estado": "Minas Gerais",
+}
+PJ = {
+    "tipo_pessoa": "pj",
+    "primeiro_nome": "Empresa",
+    "sobrenome": "Ltda",
+    "email": "contato@empresa.com",
+    "cnpj": "11.222.333/0001-81",
+}
+
+REGISTROS = [
+    PF,
+    PJ,
+    # CPF com dígito errado entre o erro de obrigatório e os das regras
+    {**PF, "sobrenome": "", "cpf": "529.982.247-24", "endereco_cep": "123"},
+    {**PJ, "cnpj": "11.222.333/0001-80", "email": "sem-arroba"},
+    {**PF, "cpf": "123", "telefone_celular": "99"},
+    {**PF, "tipoPessoa": "px"},
+    {},
+    {**PF, "cpf": "111.444.777-35", "data_nascimento": "1990-01-01"},
+    {**PJ, "cnpj": None, "endereco_cep": "30.130-000"},
+]
+
+
+def _avulso(registro):
+    validator = ClienteValidator()
+    try:
+        return validator.validar_dados(registro), []
+    except ValueError:
+        return None, validator.erros
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 4, 1000])
+def test_lote_igual_ao_registro_avulso(tamanho_bloco):
+    resultado = ClienteValidator().validar_lote(REGISTROS, tamanho_bloco=tamanho_bloco)
+
+    for indice, registro in enumerate(REGISTROS):
+        cliente, mensagens = _avulso(registro)
+        if cliente is not None:
+            assert (indice, cliente) in resultado.validos
+            assert indice not in resultado.erros
+        else:
+            assert [e.mensagem for e in resultado.erros[indice]] == mensagens
+    assert [i for i, _ in resultado.validos] == [0, 1, 7, 8]
+
+
+def test_erros_estruturados_por_campo():
+    erros = validar_lote_clientes(REGISTROS).erros
+
+    assert erros[2] == [
+        ErroCampo("sobrenome", "Sobrenome é obrigatório"),
+        ErroCampo("cpf", "CPF inválido"),
+        ErroCampo("endereco_cep", "CEP deve ter 8 dígitos"),
+    ]
+    assert erros[3] == [
+        ErroCampo("cnpj", "CNPJ inválido"),
+        ErroCampo("email", "Email inválido"),
+    ]
+    assert erros[4][0] == ErroCampo("cpf", "CPF deve ter 11 dígitos")
+
+
+def test_validos_sanitizados_e_normalizados():
+    resultado = validar_lote_clientes(iter([PF, PJ]))
+
+    ana, empresa = resultado.clientes
+    assert ana.primeiro_nome == "Ana" and ana.endereco_estado == "MG"
+    assert empresa.tipo_pessoa == "pj" and empresa.cpf is None
+
+
+def test_lote_vazio():
+    resultado = validar_lote_clientes([])
+
+    assert resultado.validos == [] and resultado.erros == {}
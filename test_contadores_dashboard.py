@@ -0,0 +1,122 @@
+"""Testes dos contadores incrementais do dashboard."""
+
+import datetime
+
+import pytest
+
+
+@pytest.fixture
+def contadores(app):
+    from app.peticionador import contadores_dashboard
+
+    return contadores_dashboard
+
+
+def _cliente(n):
+    from app.peticionador.models import Cliente, TipoPessoaEnum
+
+    return Cliente(tipo_pessoa=TipoPessoaEnum.FISICA, email=f"c{n}@exemplo.com")
+
+
+def _gravados():
+    """Contadores já gravados, lidos por outra conexão"""
+    from app.peticionador.models import ContadorDashboard
+    from extensions import db
+
+    tabela = ContadorDashboard.__table__
+    with db.engine.connect() as conexao:
+        return dict(conexao.execute(tabela.select()).all())
+
+
+def test_deltas_aplicados_so_depois_do_commit(contadores):
+    from extensions import db
+
+    db.session.add_all([_cliente(1), _cliente(2)])
+    db.session.flush()
+    assert _gravados() == {}
+
+    db.session.commit()
+    assert _gravados() == {"clientes": 2}
+    assert contadores.ler().clientes == 2
+
+
+def test_rollback_descarta_deltas(contadores):
+    from extensions import db
+
+    db.session.add(_cliente(1))
+    db.session.flush()
+    db.session.rollback()
+    db.session.add(_cliente(2))
+    db.session.commit()
+
+    assert _gravados() == {"clientes": 1}
+
+
+def test_savepoints(contadores):
+    from extensions import db
+
+    db.session.add(_cliente(1))
+    with db.session.begin_nested():
+        db.session.add(_cliente(2))
+    savepoint = db.session.begin_nested()
+    db.session.add(_cliente(3))
+    db.session.flush()
+    savepoint.rollback()
+    # Liberar o savepoint não aplica nada antes do commit de fora
+    assert _gravados() == {}
+
+    db.session.commit()
+    assert _gravados() == {"clientes": 2}
+
+
+def test_flush_que_falha_nao_deixa_deltas(contadores):
+    from sqlalchemy.exc import IntegrityError
+
+    from extensions import db
+
+    db.session.add_all([_cliente(1), _cliente(1)])  # email repetido
+    with pytest.raises(IntegrityError):
+        db.session.flush()
+    db.session.rollback()
+    db.session.add(_cliente(2))
+    db.session.commit()
+
+    assert _gravados() == {"clientes": 1}
+
+
+def test_status_usuarios_e_peticoes_por_dia(contadores):
+    from app.peticionador.models import PeticaoGerada, User
+    from extensions import db
+    from models import RespostaForm
+
+    hoje = datetime.date(2026, 10, 18)
+    resposta = RespostaForm(submission_id="1", status_processamento="Recebido")
+    usuario = User(email="u@exemplo.com")
+    db.session.add_all([resposta, usuario, User(email="v@exemplo.com")])
+    db.session.add_all(
+        PeticaoGerada(
+            modelo="M",
+            google_id=str(n),
+            criado_em=datetime.datetime(2026, 10, 18 - n % 2, 10),
+        )
+        for n in range(3)
+    )
+    db.session.commit()
+
+    resposta.status_processamento = "Processado"
+    usuario.is_active = False
+    db.session.commit()
+
+    painel = contadores.ler(hoje)
+    assert painel.usuarios_ativos == 1 and painel.peticoes == 3
+    assert painel.status == {"Processado": 1}
+    assert painel.peticoes_por_dia[-2:] == [("2026-10-17", 1), ("2026-10-18", 2)]
+    assert len(painel.peticoes_por_dia) == contadores.JANELA_DIAS
+
+    # O recálculo completo chega aos mesmos números
+    gravados = {chave: valor for chave, valor in _gravados().items() if valor}
+    with db.engine.begin() as conexao:
+        recalculados = contadores.recalcular(conexao)
+    assert {chave: valor for chave, valor in recalculados.items() if valor} == (
+        gravados
+    )
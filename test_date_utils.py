@@ -0,0 +1,53 @@
+"""Testes da normalização de datas (date_utils)."""
+
+from datetime import date, datetime
+
+import pytest
+
+from date_utils import format_date_br, parse_date, parse_datetime
+
+
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        ("1985-12-01", date(1985, 12, 1)),
+        ("01/12/1985", date(1985, 12, 1)),
+        ("1/2/1985", date(1985, 2, 1)),
+        ("01/12/85", date(1985, 12, 1)),
+        ("01/12/05", date(2005, 12, 1)),
+        (" 01/12/1985 ", date(1985, 12, 1)),
+        ("1985-12-01T10:30:00Z", date(1985, 12, 1)),
+        ("01-12-1985", date(1985, 12, 1)),  # fallback, dia antes do mês
+        (date(2020, 5, 4), date(2020, 5, 4)),
+        (datetime(2020, 5, 4, 13), date(2020, 5, 4)),
+    ],
+)
+def test_parse_date_formatos(valor, esperado):
+    assert parse_date(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", [None, "", "   ", "31/02/2020", "abc", "12/2020"])
+def test_parse_date_invalidas(valor):
+    assert parse_date(valor) is None
+
+
+def test_carimbo_do_google_sheets_mantem_hora():
+    assert parse_datetime("05/03/2024 14:07:09") == datetime(2024, 3, 5, 14, 7, 9)
+
+
+def test_sem_fallback_so_formatos_rapidos():
+    assert parse_date("01-12-1985", fallback=False) is None
+    assert parse_date("01/12/1985", fallback=False) == date(1985, 12, 1)
+
+
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        ("1985-12-01", "01/12/1985"),
+        (date(2001, 2, 3), "03/02/2001"),
+        ("texto", None),
+        (None, None),
+    ],
+)
+def test_format_date_br(valor, esperado):
+    assert format_date_br(valor) == esperado
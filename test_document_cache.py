@@ -0,0 +1,175 @@
+"""Testes do reaproveitamento de documentos gerados (document_cache)."""
+
+import pytest
+from googleapiclient.errors import HttpError
+
+import document_cache
+from app.peticionador import google_services
+from document_cache import HASH_CHAVE, hash_conteudo
+
+
+class _Requisicao:
+    def __init__(self, funcao):
+        self.funcao = funcao
+
+    def execute(self):
+        return self.funcao()
+
+
+class _Resposta(dict):
+    status = 500
+    reason = "erro simulado"
+
+
+class Google:
+    """Drive e Docs em memória (um objeto só), com o que a geração usa"""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.revisoes = {}
+        self.falhar_preenchimento = False
+        self.props_no_preenchimento = []
+
+    # Drive
+    def files(self):
+        return self
+
+    def get(self, fileId=None, documentId=None, fields=None, **kwargs):
+        if documentId:  # documents().get
+            return _Requisicao(lambda: {"revisionId": str(self.revisoes[documentId])})
+        return _Requisicao(lambda: {"version": "7"})
+
+    def list(self, q, fields, **kwargs):
+        def listar():
+            if "appProperties has" not in q:
+                return {"files": []}
+            valor = q.split("value='")[1].split("'")[0]
+            return {
+                "files": [
+                    {"id": id_, "name": a["name"], "appProperties": a["props"]}
+                    for id_, a in self.arquivos.items()
+                    if a["props"].get(HASH_CHAVE) == valor
+                ][: kwargs.get("pageSize")]
+            }
+
+        return _Requisicao(listar)
+
+    def copy(self, fileId, body, fields, supportsAllDrives=True):
+        def copiar():
+            id_ = f"d{len(self.arquivos) + 1}"
+            self.arquivos[id_] = {
+                "name": body["name"],
+                "props": dict(body.get("appProperties", {})),
+            }
+            self.revisoes[id_] = 1
+            return {"id": id_, "webViewLink": f"link/{id_}"}
+
+        return _Requisicao(copiar)
+
+    def update(self, fileId, body, supportsAllDrives=True, **kwargs):
+        return _Requisicao(
+            lambda: self.arquivos[fileId]["props"].update(body["appProperties"])
+        )
+
+    def delete(self, fileId, supportsAllDrives=True):
+        return _Requisicao(lambda: self.arquivos.pop(fileId))
+
+    # Docs
+    def documents(self):
+        return self
+
+    def batchUpdate(self, documentId, body):
+        def preencher():
+            self.props_no_preenchimento.append(dict(self.arquivos[documentId]["props"]))
+            if self.falhar_preenchimento:
+                raise HttpError(_Resposta(), b"")
+            self.revisoes[documentId] += 1
+            return {
+                "writeControl": {"requiredRevisionId": str(self.revisoes[documentId])}
+            }
+
+        return _Requisicao(preencher)
+
+    def editar(self, id_):
+        self.revisoes[id_] += 1
+
+
+@pytest.fixture
+def google():
+    document_cache.esquecer_revisoes()
+    return Google()
+
+
+def _gerar(google, substituicoes, **kwargs):
+    return google_services.copy_template_and_fill(
+        google, google, "T", "Petição", "P", substituicoes, **kwargs
+    )[0]
+
+
+HOJE = {"cliente.nome": "Ana", "data.atual_extenso": "18 de outubro de 2026"}
+
+
+def test_hash_normaliza_substituicoes():
+    base = hash_conteudo("T", "7", {"a": "x", "b": 1, "c": None})
+    assert hash_conteudo("T", "7", {"b": "1", "a": " x "}) == base
+    assert hash_conteudo("T", "8", {"a": "x", "b": 1}) != base
+    assert hash_conteudo("U", "7", {"a": "x", "b": 1}) != base
+
+
+def test_data_de_preenchimento_entra_no_hash():
+    assert hash_conteudo("T", "7", {"a": "x", "Data_Preenchimento": "18/10/2026"}) != (
+        hash_conteudo("T", "7", {"a": "x", "Data_Preenchimento": "19/10/2026"})
+    )
+
+
+def test_reaproveita_no_mesmo_dia_e_nao_no_seguinte(google):
+    primeiro = _gerar(google, HOJE)
+
+    assert _gerar(google, dict(HOJE)) == primeiro
+    amanha = {**HOJE, "data.atual_extenso": "19 de outubro de 2026"}
+    assert _gerar(google, amanha) != primeiro
+    assert _gerar(google, HOJE, forcar_regeneracao=True) not in (primeiro, None)
+
+
+def test_hash_gravado_so_depois_do_preenchimento(google):
+    id_ = _gerar(google, HOJE)
+
+    assert google.props_no_preenchimento == [{}]
+    assert google.arquivos[id_]["props"] == {
+        HASH_CHAVE: hash_conteudo("T", "7", HOJE),
+        document_cache.REVISAO_CHAVE: "2",
+    }
+
+
+def test_falha_no_preenchimento_nao_deixa_documento(google):
+    google.falhar_preenchimento = True
+
+    assert _gerar(google, HOJE) is None
+    assert google.arquivos == {}
+
+
+def test_documento_editado_nao_e_reaproveitado(google):
+    editado = _gerar(google, HOJE)
+    google.editar(editado)
+
+    novo = _gerar(google, HOJE)
+    assert novo != editado
+    assert _gerar(google, HOJE) == novo
+
+
+def test_kit_reaproveita_documento_gerado_hoje(google, monkeypatch):
+    import document_generator
+    from config import CONFIG
+
+    monkeypatch.setitem(CONFIG, "TEMPLATES", {"pf": {"Ficha": "TF"}})
+    dados = {"Primeiro Nome": "Ana", "Sobrenome": "Silva"}
+
+    def gerar():
+        return document_generator.gerar_documento_cliente(
+            google, google, "TF", "Ficha", {}, "P", "pf", dados_template=dados
+        )
+
+    primeiro, segundo = gerar(), gerar()
+    assert not primeiro["reutilizado"] and segundo["reutilizado"]
+    assert segundo["id_documento"] == primeiro["id_documento"]
+    assert "Data_Preenchimento" in primeiro["valores"]
@@ -0,0 +1,151 @@
+"""Testes da atualização no lugar de documentos já gerados (document_update)."""
+
+from document_update import planejar, texto_documento
+
+TEMPLATE = "Eu, {{Nome}}, residente na {{Rua}}, nº {{Numero}}.\nAssina: {{Nome}}"
+
+
+def _documento(valores):
+    texto = TEMPLATE
+    for chave, valor in valores.items():
+        texto = texto.replace("{{" + chave + "}}", valor)
+    return texto
+
+
+def _trocas(plano):
+    return [
+        (
+            r["replaceAllText"]["containsText"]["text"],
+            r["replaceAllText"]["replaceText"],
+        )
+        for r in plano.requisicoes
+    ]
+
+
+ANTIGOS = {"Nome": "Ana Silva", "Rua": "Rua das Flores", "Numero": "100"}
+
+
+def test_troca_so_os_campos_alterados():
+    novos = {**ANTIGOS, "Rua": "Av. Boa Viagem", "Numero": "2000"}
+
+    plano = planejar(ANTIGOS, novos, _documento(ANTIGOS), TEMPLATE)
+
+    assert plano.motivo is None
+    assert plano.campos == ["Numero", "Rua"]
+    assert _trocas(plano) == [("100", "2000"), ("Rua das Flores", "Av. Boa Viagem")]
+
+
+def test_campo_repetido_no_template():
+    novos = {**ANTIGOS, "Nome": "Ana Souza"}
+
+    plano = planejar(ANTIGOS, novos, _documento(ANTIGOS), TEMPLATE)
+
+    assert _trocas(plano) == [("Ana Silva", "Ana Souza")]
+
+
+def test_sem_alteracao_e_campo_fora_do_template():
+    plano = planejar(
+        ANTIGOS, {**ANTIGOS, "Cidade": "Recife"}, _documento(ANTIGOS), TEMPLATE
+    )
+
+    assert plano.motivo is None and plano.requisicoes == []
+
+
+def test_placeholder_vazio_na_geracao_e_o_texto_antigo():
+    antigos = {"Nome": "Ana Silva", "Rua": "Rua das Flores"}
+
+    plano = planejar(
+        antigos, {**antigos, "Numero": "100"}, _documento(antigos), TEMPLATE
+    )
+
+    assert _trocas(plano) == [("{{Numero}}", "100")]
+
+
+def test_valor_que_aparece_no_texto_fixo_nao_e_trocado():
+    antigos = {**ANTIGOS, "Numero": "Assina"}
+
+    plano = planejar(antigos, {**antigos, "Numero": "7"}, _documento(antigos), TEMPLATE)
+
+    assert plano.motivo and "Numero" in plano.motivo and not plano.requisicoes
+
+
+def test_documento_editado_a_mao():
+    texto = _documento(ANTIGOS).replace("Rua das Flores", "R. das Flores")
+
+    plano = planejar(ANTIGOS, {**ANTIGOS, "Rua": "Av. Boa Viagem"}, texto, TEMPLATE)
+
+    assert plano.motivo and "Rua" in plano.motivo
+
+
+def test_valor_preenchido_vazio():
+    antigos = {**ANTIGOS, "Numero": ""}
+
+    plano = planejar(antigos, {**antigos, "Numero": "7"}, _documento(antigos), TEMPLATE)
+
+    assert plano.motivo == "'Numero' foi preenchido vazio"
+
+
+def test_quebra_de_linha():
+    novos = {**ANTIGOS, "Rua": "Rua A\nBloco B"}
+
+    plano = planejar(ANTIGOS, novos, _documento(ANTIGOS), TEMPLATE)
+
+    assert plano.motivo == "'Rua' tem quebra de linha"
+
+
+def test_valor_novo_com_texto_antigo_de_outro_campo():
+    novos = {**ANTIGOS, "Rua": "Rua 100", "Numero": "5"}
+
+    plano = planejar(ANTIGOS, novos, _documento(ANTIGOS), TEMPLATE)
+
+    assert plano.motivo == "novo valor de 'Rua' contém o antigo de 'Numero'"
+
+
+def test_texto_documento_percorre_tabelas_e_cabecalhos():
+    def paragrafo(texto):
+        return {"paragraph": {"elements": [{"textRun": {"content": texto}}]}}
+
+    documento = {
+        "body": {
+            "content": [
+                paragrafo("Corpo"),
+                {
+                    "table": {
+                        "tableRows": [
+                            {"tableCells": [{"content": [paragrafo("Célula")]}]}
+                        ]
+                    }
+                },
+            ]
+        },
+        "headers": {"h1": {"content": [paragrafo("Cabeçalho")]}},
+    }
+
+    assert texto_documento(documento).split("\n") == ["Corpo", "Célula", "Cabeçalho"]
+
+
+def test_resposta_indicada_so_se_for_do_mesmo_documento(app):
+    from app.tasks.document_generation import _resposta_para_atualizar
+    from models import DocumentoGerado, RespostaForm, db
+
+    ana = RespostaForm(submission_id="a", cpf="123.456.789-09")
+    bia = RespostaForm(submission_id="b", cpf="987.654.321-00")
+    db.session.add_all([ana, bia])
+    db.session.flush()
+    db.session.add(
+        DocumentoGerado(
+            resposta_id=ana.id,
+            tipo_doc="Ficha",
+            google_id="d1",
+            template_id="TF",
+            valores={},
+        )
+    )
+    db.session.commit()
+
+    assert _resposta_para_atualizar(ana.id, "12345678909", None) is ana
+    # respostaId de outro cliente é ignorado: vale a última resposta com kit
+    # do CPF do payload (Bia não tem nenhuma)
+    assert _resposta_para_atualizar(ana.id, "98765432100", None) is None
+    assert _resposta_para_atualizar(bia.id, "123.456.789-09", None) is ana
+    assert _resposta_para_atualizar(ana.id, None, None) is None
@@ -0,0 +1,83 @@
+"""Testes da validação de CPF/CNPJ, escalar e em lote."""
+
+import random
+
+import pytest
+
+import document_validation
+from document_validation import (
+    PESOS_CNPJ,
+    PESOS_CPF,
+    _digito,
+    is_cnpj_valid,
+    is_cpf_valid,
+    is_document_valid,
+    validate_cnpj_batch,
+    validate_cpf_batch,
+)
+
+
+def _gerar(base: str, pesos) -> str:
+    digitos = [int(c) for c in base]
+    digitos.append(_digito(digitos, pesos[0]))
+    digitos.append(_digito(digitos, pesos[1]))
+    return "".join(map(str, digitos))
+
+
+def _amostra(tamanho, pesos, escalar_mascara):
+    aleatorio = random.Random(42)
+    docs = []
+    for _ in range(300):
+        doc = _gerar(
+            "".join(str(aleatorio.randrange(10)) for _ in range(tamanho - 2)), pesos
+        )
+        if aleatorio.random() < 0.3:  # dígito verificador errado
+            doc = doc[:-1] + str((int(doc[-1]) + 1) % 10)
+        if aleatorio.random() < 0.3:
+            doc = escalar_mascara(doc)
+        docs.append(doc)
+    docs += [None, "", "0" * tamanho, "1" * tamanho, docs[0] + "0", docs[0][:-1]]
+    docs += ["²" * tamanho, " " + docs[1] + " ", 12345]
+    return docs
+
+
+def _mascara_cpf(doc):
+    return f"{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}"
+
+
+def _mascara_cnpj(doc):
+    return f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}"
+
+
+def test_escalar():
+    cpf = _gerar("123456789", PESOS_CPF)
+    cnpj = _gerar("112223330001", PESOS_CNPJ)
+    assert cpf == "12345678909" and cnpj == "11222333000181"
+    assert is_cpf_valid(cpf) and is_cpf_valid(_mascara_cpf(cpf))
+    assert is_cnpj_valid(_mascara_cnpj(cnpj))
+    assert is_document_valid(cpf) and is_document_valid(cnpj)
+    assert not is_cpf_valid("11111111111") and not is_cpf_valid("12345678900")
+    assert not is_document_valid("123")
+
+
+@pytest.mark.parametrize("sem_numpy", [False, True])
+def test_lote_igual_ao_escalar_e_na_mesma_ordem(monkeypatch, sem_numpy):
+    if sem_numpy:
+        monkeypatch.setattr(document_validation, "np", None)
+    elif document_validation.np is None:
+        pytest.skip("NumPy não instalado")
+    monkeypatch.setattr(document_validation, "TAMANHO_BLOCO_LOTE", 64)
+
+    cpfs = _amostra(11, PESOS_CPF, _mascara_cpf)
+    cnpjs = _amostra(14, PESOS_CNPJ, _mascara_cnpj)
+
+    assert [bool(v) for v in validate_cpf_batch(cpfs)] == [
+        is_cpf_valid(c) for c in cpfs
+    ]
+    assert [bool(v) for v in validate_cnpj_batch(cnpjs)] == [
+        is_cnpj_valid(c) for c in cnpjs
+    ]
+
+
+def test_lote_vazio():
+    assert len(validate_cpf_batch([])) == 0
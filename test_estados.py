@@ -0,0 +1,56 @@
+"""Testes da resolução de estados (UF)."""
+
+import pytest
+
+from app.validators import estados
+from app.validators.estados import ResolvedorUF, _construir_tabela
+
+
+@pytest.mark.parametrize(
+    "valor, sigla",
+    [
+        ("SP", "SP"),
+        ("sp", "SP"),
+        ("São Paulo", "SP"),
+        ("SP - São Paulo", "SP"),
+        ("Minas Gerais/MG", "MG"),
+        ("S. Paulo", "SP"),
+        ("  espirito  santo ", "ES"),
+        ("Brasília", "DF"),
+        ("MG - Belo Horizonte", "MG"),
+    ],
+)
+def test_resolve_nomes_siglas_e_variacoes(valor, sigla):
+    assert ResolvedorUF(_construir_tabela()).resolver(valor) == sigla
+
+
+@pytest.mark.parametrize("valor", [None, "", 35, "Atlântida"])
+def test_valores_nao_reconhecidos(valor):
+    assert ResolvedorUF(_construir_tabela()).resolver(valor) is None
+
+
+def test_falhas_contabilizadas_e_reportadas():
+    resolvedor = ResolvedorUF(_construir_tabela())
+    for valor in ["Atlântida", "Atlântida", " Narnia ", "  "]:
+        resolvedor.resolver(valor)
+
+    assert resolvedor.total_falhas == 3
+    assert resolvedor.falhas() == [("Atlântida", 2), ("Narnia", 1)]
+    assert resolvedor.relatorio_falhas().startswith(
+        "3 valores de estado não reconhecidos (2 distintos)"
+    )
+    resolvedor.limpar_falhas()
+    assert resolvedor.relatorio_falhas() is None and resolvedor.total_falhas == 0
+
+
+def test_falhas_distintas_limitadas(monkeypatch):
+    monkeypatch.setattr(estados, "LIMITE_FALHAS_DISTINTAS", 3)
+    resolvedor = ResolvedorUF(_construir_tabela())
+    for n in range(10):
+        resolvedor.resolver(f"lugar {n}")
+    resolvedor.resolver("lugar 0")
+
+    assert resolvedor.total_falhas == 11
+    assert len(resolvedor.falhas()) == 3
+    assert resolvedor.falhas(1) == [("lugar 0", 2)]
+    assert "(3+ distintos)" in resolvedor.relatorio_falhas()
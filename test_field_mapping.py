@@ -0,0 +1,120 @@
+"""Testes do mapeamento dos dados do cliente para os placeholders."""
+
+import datetime
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from field_mapping import PLANOS, mapear_para_template
+
+
+@pytest.mark.parametrize(
+    "tipo_pessoa, dados, placeholder, esperado",
+    [
+        # Payload camelCase do formulário
+        ("pf", {"primeiroNome": "Ana"}, "Primeiro Nome", "Ana"),
+        ("pf", {"estadoCivil": "Casada"}, "Estado Civil", "Casada"),
+        ("pf", {"estadoEmissorRG": "MG"}, "Estado emissor do RG", "MG"),
+        ("pj", {"razaoSocial": "ACME"}, "Razão Social", "ACME"),
+        ("pj", {"emailContato": "a@acme.com"}, "E-mail Contato PJ", "a@acme.com"),
+        # Atributos snake_case de ClienteData/modelos
+        ("pf", {"telefone_celular": "3199"}, "Telefone Celular", "3199"),
+        ("pf", {"endereco_estado": "MG"}, "Endereço_Estado", "MG"),
+        ("pj", {"nome_fantasia": "Acme"}, "Nome Fantasia", "Acme"),
+        ("pj", {"uf_endereco": "SP"}, "Estado", "SP"),
+        # O próprio nome do placeholder
+        ("pf", {"CPF": "123"}, "CPF", "123"),
+        ("pj", {"CNPJ": "456"}, "CNPJ", "456"),
+        ("pj", {"Cargo Contato PJ": "Sócio"}, "Cargo Contato PJ", "Sócio"),
+        # Ordem de preferência: a primeira origem preenchida vence
+        ("pf", {"primeiroNome": "", "primeiro_nome": "Bia"}, "Primeiro Nome", "Bia"),
+        ("pf", {"cep": "30130-000", "CEP": "x"}, "Endereço_CEP", "30130-000"),
+        # Valores não-texto viram texto
+        ("pf", {"numero": 100}, "Número", "100"),
+    ],
+)
+def test_aliases(tipo_pessoa, dados, placeholder, esperado):
+    assert mapear_para_template(dados, tipo_pessoa)[placeholder] == esperado
+
+
+@pytest.mark.parametrize(
+    "tipo_pessoa, origem, placeholder",
+    [
+        ("pf", "dataNascimento", "Nascimento"),
+        ("pf", "data_nascimento", "Nascimento"),
+        ("pj", "dataFundacao", "Data de Fundação"),
+    ],
+)
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        ("1990-03-25", "25/03/1990"),
+        ("25/03/1990", "25/03/1990"),
+        (datetime.date(1990, 3, 25), "25/03/1990"),
+        (datetime.datetime(1990, 3, 25, 14, 30), "25/03/1990"),
+    ],
+)
+def test_datas_em_formato_brasileiro(tipo_pessoa, origem, placeholder, valor, esperado):
+    assert mapear_para_template({origem: valor}, tipo_pessoa)[placeholder] == esperado
+
+
+def test_data_invalida_mantem_o_valor(caplog):
+    with caplog.at_level(logging.WARNING, logger="field_mapping"):
+        mapeado = mapear_para_template({"dataNascimento": "ontem"}, "pf")
+
+    assert mapeado["Nascimento"] == "ontem"
+    assert caplog.records[0].args == ("ontem",)
+
+
+@pytest.mark.parametrize("tipo_pessoa", ["pf", "pj"])
+def test_todo_placeholder_preenchido_mesmo_sem_dados(tipo_pessoa):
+    mapeado = mapear_para_template({}, tipo_pessoa)
+
+    assert list(mapeado) == list(PLANOS[tipo_pessoa].placeholders)
+    assert set(mapeado.values()) == {""}
+
+
+def test_placeholders_de_cada_tipo():
+    pf, pj = (set(mapear_para_template({}, t)) for t in ("pf", "pj"))
+
+    assert {"CPF", "RG", "Nascimento", "Estado Civil"} <= pf - pj
+    assert {"CNPJ", "Razão Social", "Data de Fundação"} <= pj - pf
+    assert {"Primeiro Nome", "E-mail", "Endereço", "CEP"} <= pf & pj
+
+
+@pytest.mark.parametrize(
+    "dados, esperado",
+    [
+        (
+            {"logradouro": "Rua A", "numero": "10", "bairro": "Centro"},
+            "Rua A, 10, Centro",
+        ),
+        ({"endereco": "Rua B, 20"}, "Rua B, 20"),
+        ({"endereco": "Rua B, 20", "logradouro": "Rua C"}, "Rua C"),
+        ({}, ""),
+    ],
+)
+def test_endereco_completo(dados, esperado):
+    assert mapear_para_template(dados, "pf")["Endereço"] == esperado
+
+
+def test_padroes_so_para_campos_vazios():
+    mapeado = mapear_para_template(
+        {"cidade": "Recife"}, "pf", padroes={"Cidade": "BH", "Estado": "MG"}
+    )
+
+    assert (mapeado["Cidade"], mapeado["Estado"]) == ("Recife", "MG")
+
+
+def test_objeto_com_atributos():
+    cliente = SimpleNamespace(primeiro_nome="Ana", endereco_cidade="BH", cpf=None)
+
+    mapeado = mapear_para_template(cliente, "pf")
+
+    assert mapeado["Primeiro Nome"] == "Ana" and mapeado["Cidade"] == "BH"
+    assert mapeado["CPF"] == ""
+
+
+def test_tipo_desconhecido():
+    assert mapear_para_template({"primeiroNome": "Ana"}, "px") == {}
@@ -0,0 +1,174 @@
+"""Testes do cache das classes de formulário geradas pelos placeholders."""
+
+import pytest
+from sqlalchemy import event
+
+from app.peticionador import form_cache, placeholder_sync
+
+
+@pytest.fixture
+def modelo(app, monkeypatch):
+    from app.peticionador.models import PeticaoModelo, PeticaoPlaceholder
+    from extensions import db
+
+    # Cada teste tem um banco novo: ids repetem entre testes
+    monkeypatch.setattr(form_cache, "_cache", form_cache.OrderedDict())
+    modelo = PeticaoModelo(nome="Recurso", doc_template_id="T", pasta_destino_id="P")
+    db.session.add(modelo)
+    db.session.commit()
+    db.session.add_all(
+        [
+            PeticaoPlaceholder(modelo_id=modelo.id, chave="nome", ordem=1),
+            PeticaoPlaceholder(
+                modelo_id=modelo.id,
+                chave="orgao",
+                ordem=2,
+                tipo_campo="select",
+                opcoes_json='["DETRAN", "PRF"]',
+            ),
+        ]
+    )
+    db.session.commit()
+    return modelo
+
+
+@pytest.fixture
+def consultas_placeholders(app):
+    """SELECTs em peticao_placeholders executados durante o teste"""
+    from extensions import db
+
+    consultas = []
+
+    def registrar(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and (
+            "peticao_placeholders" in statement
+        ):
+            consultas.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    yield consultas
+    event.remove(db.engine, "before_cursor_execute", registrar)
+
+
+def _recarregar(modelo):
+    from app.peticionador.models import PeticaoModelo
+    from extensions import db
+
+    db.session.expire_all()
+    return db.session.get(PeticaoModelo, modelo.id)
+
+
+def test_segundo_get_reusa_a_classe_sem_consultar_placeholders(
+    app, modelo, cliente_logado, consultas_placeholders
+):
+    # O create_app não liga o Talisman, que fornece o nonce aos templates
+    app.jinja_env.globals.setdefault("csp_nonce", lambda: "nonce")
+    url = f"/peticionador/modelos/{modelo.id}/gerar"
+
+    primeira = cliente_logado.get(url)
+    classe = form_cache.formulario_do_modelo(_recarregar(modelo)).classe
+    assert len(consultas_placeholders) == 1
+
+    segunda = cliente_logado.get(url)
+
+    assert primeira.status_code == segunda.status_code == 200
+    assert b'name="orgao"' in segunda.data
+    assert len(consultas_placeholders) == 1
+    assert form_cache.formulario_do_modelo(_recarregar(modelo)).classe is classe
+
+
+def test_campos_do_formulario(modelo):
+    formulario = form_cache.formulario_do_modelo(modelo)
+
+    assert formulario.chaves == ["nome", "orgao"]
+    nome, orgao = formulario.campos
+    assert nome.label == "Nome" and orgao.opcoes == (
+        ("DETRAN", "DETRAN"),
+        ("PRF", "PRF"),
+    )
+
+
+def test_editar_placeholder_remonta_o_formulario(modelo):
+    from app.peticionador.models import PeticaoPlaceholder
+    from extensions import db
+
+    antes = form_cache.formulario_do_modelo(_recarregar(modelo))
+
+    ph = PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id, chave="nome").one()
+    ph.label_form = "Nome completo"
+    db.session.commit()
+    modelo = _recarregar(modelo)
+
+    depois = form_cache.formulario_do_modelo(modelo)
+    assert modelo.placeholders_versao == antes.versao + 1
+    assert depois.classe is not antes.classe
+    assert depois.campos[0].label == "Nome completo"
+
+
+def test_sincronizar_remonta_o_formulario(modelo):
+    antes = form_cache.formulario_do_modelo(_recarregar(modelo))
+
+    placeholder_sync.sincronizar(modelo.id, ["orgao", "nome", "placa"])
+    modelo = _recarregar(modelo)
+
+    depois = form_cache.formulario_do_modelo(modelo)
+    assert modelo.placeholders_versao == antes.versao + 1
+    assert depois.chaves == ["orgao", "nome", "placa"]
+
+
+def test_reordenar_pela_rota_remonta_o_formulario(modelo, cliente_logado):
+    from app.peticionador.models import PeticaoPlaceholder
+
+    antes = form_cache.formulario_do_modelo(_recarregar(modelo))
+    ids = {
+        ph.chave: ph.id
+        for ph in PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id)
+    }
+
+    resposta = cliente_logado.post(
+        f"/peticionador/modelos/{modelo.id}/placeholders/reordenar",
+        json={"ordem": [ids["orgao"], ids["nome"]]},
+    )
+    modelo = _recarregar(modelo)
+
+    assert resposta.get_json() == {"success": True}
+    assert modelo.placeholders_versao == antes.versao + 1
+    assert form_cache.formulario_do_modelo(modelo).chaves == ["orgao", "nome"]
+
+
+def test_mover_pela_rota_remonta_o_formulario(modelo, cliente_logado):
+    from app.peticionador.models import PeticaoPlaceholder
+
+    form_cache.formulario_do_modelo(_recarregar(modelo))
+    ph = PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id, chave="orgao").one()
+
+    cliente_logado.post(
+        f"/peticionador/modelos/{modelo.id}/placeholders/{ph.id}/mover/cima"
+    )
+
+    assert form_cache.formulario_do_modelo(_recarregar(modelo)).chaves == [
+        "orgao",
+        "nome",
+    ]
+
+
+def test_invalidar_descarta_so_neste_processo(modelo):
+    antes = form_cache.formulario_do_modelo(modelo)
+
+    form_cache.invalidar(modelo.id)
+
+    depois = form_cache.formulario_do_modelo(modelo)
+    assert depois.classe is not antes.classe and depois.versao == antes.versao
+
+
+def test_cache_limitado(modelo, monkeypatch):
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(form_cache, "MAXIMO_MODELOS", 2)
+
+    for modelo_id in (1000, 1001, modelo.id):
+        form_cache.formulario_do_modelo(
+            SimpleNamespace(id=modelo_id, placeholders_versao=0)
+        )
+
+    assert list(form_cache._cache) == [1001, modelo.id]
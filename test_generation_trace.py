@@ -0,0 +1,215 @@
+"""Testes do trace da geração: máscara, amostragem e gravação em lote."""
+
+import json
+import logging
+import re
+
+import pytest
+
+import generation_trace
+from field_mapping import PLANOS
+from generation_trace import (
+    MASCARA,
+    TRACE_DESLIGADO,
+    Rastreador,
+    Redigido,
+    SinkArquivo,
+    redigir,
+)
+
+
+@pytest.mark.parametrize(
+    "chave",
+    [
+        # Placeholders dos templates
+        "CPF",
+        "CNPJ",
+        "RG",
+        "CNH",
+        "E-mail",
+        "E-mail Contato PJ",
+        "Telefone Celular",
+        "Telefone Contato PJ",
+        "Outro telefone",
+        "Nascimento",
+        # Chaves do payload do formulário e dos modelos
+        "cpf",
+        "emailContato",
+        "telefoneCelular",
+        "dataNascimento",
+        "data_nascimento",
+        "senha",
+    ],
+)
+def test_chaves_sensiveis_mascaradas(chave):
+    assert redigir({chave: "dado pessoal"}) == {chave: MASCARA}
+
+
+@pytest.mark.parametrize(
+    "chave", ["Primeiro Nome", "Estado emissor do RG", "Razão Social", "cidade"]
+)
+def test_demais_chaves_mantidas(chave):
+    assert redigir({chave: "valor"}) == {chave: "valor"}
+
+
+def test_todo_placeholder_com_dado_pessoal_e_mascarado():
+    pessoais = re.compile(r"^(CPF|CNPJ|RG|CNH|Nascimento)$|mail|elefone")
+    placeholders = {p for plano in PLANOS.values() for p in plano.placeholders}
+
+    mascarados = {p for p in placeholders if generation_trace._sensivel(p)}
+
+    assert mascarados == {p for p in placeholders if pessoais.search(p)}
+
+
+def test_mascara_em_dicts_e_listas_aninhados():
+    payload = {
+        "cliente": {"nome": "Ana", "CPF": "529.982.247-25"},
+        "contatos": [
+            {"E-mail Contato PJ": "a@acme.com", "cargo": "Sócio"},
+            ({"Telefone Celular": "31999990000"},),
+        ],
+        "cpf": "",
+        "rg": None,
+    }
+
+    assert redigir(payload) == {
+        "cliente": {"nome": "Ana", "CPF": MASCARA},
+        "contatos": [
+            {"E-mail Contato PJ": MASCARA, "cargo": "Sócio"},
+            [{"Telefone Celular": MASCARA}],
+        ],
+        # Vazios continuam visíveis (ajuda a depurar campo não preenchido)
+        "cpf": "",
+        "rg": None,
+    }
+
+
+def test_textos_longos_e_profundidade_limitados():
+    texto = redigir("x" * 1000)
+    assert len(texto) == generation_trace.TRACE_TAMANHO_MAXIMO_TEXTO + 3
+
+    fundo = {"a": {"b": {"c": {"d": {"e": {"f": {"g": 1}}}}}}}
+    assert redigir(fundo)["a"]["b"]["c"]["d"]["e"]["f"] == "..."
+
+
+@pytest.fixture
+def chamadas_redigir(monkeypatch):
+    chamadas = []
+    original = generation_trace.redigir
+
+    def contar(valor, *args, **kwargs):
+        chamadas.append(valor)
+        return original(valor, *args, **kwargs)
+
+    monkeypatch.setattr(generation_trace, "redigir", contar)
+    return chamadas
+
+
+def test_redigido_so_formata_se_o_registro_sair(chamadas_redigir, caplog):
+    logger = logging.getLogger("teste.trace")
+
+    with caplog.at_level(logging.INFO, logger="teste.trace"):
+        logger.debug("payload %s", Redigido({"CPF": "1"}))
+        assert chamadas_redigir == []
+
+        logger.info("payload %s", Redigido({"CPF": "1", "nome": "Ana"}))
+
+    assert caplog.messages == ['payload {"CPF": "***", "nome": "Ana"}']
+    assert chamadas_redigir
+
+
+def test_trace_desligado_nao_formata_nada(chamadas_redigir):
+    rastreador = Rastreador(None)
+
+    with rastreador.rastrear("gerar", "r1") as trace:
+        trace.evento("dados", dados={"CPF": "1"})
+        generation_trace.evento("outro", x=1)
+
+    assert trace is TRACE_DESLIGADO and not rastreador.ligado
+    assert chamadas_redigir == []
+
+
+def _traces(caminho):
+    return [json.loads(linha) for linha in caminho.read_text().splitlines()]
+
+
+def test_trace_gravado_em_uma_linha_mascarado(tmp_path):
+    caminho = tmp_path / "trace.jsonl"
+    sink = SinkArquivo(str(caminho), linhas_buffer=1)
+    rastreador = Rastreador(sink)
+
+    with rastreador.rastrear("gerar", "r1"):
+        generation_trace.evento("dados", dados={"CPF": "1", "nome": "Ana"})
+        # Chamada aninhada: entra como evento do mesmo trace
+        with rastreador.rastrear("servico", "outra chave") as interno:
+            interno.evento("pasta", pasta_id="p1")
+
+    (trace,) = _traces(caminho)
+    assert (trace["trace"], trace["chave"]) == ("gerar", "r1")
+    assert [e["evento"] for e in trace["eventos"]] == ["dados", "servico", "pasta"]
+    assert trace["eventos"][0]["dados"] == {"CPF": MASCARA, "nome": "Ana"}
+
+
+def test_erro_registrado_no_trace(tmp_path):
+    caminho = tmp_path / "trace.jsonl"
+    rastreador = Rastreador(SinkArquivo(str(caminho), linhas_buffer=1))
+
+    with pytest.raises(RuntimeError):
+        with rastreador.rastrear("gerar", "r1"):
+            raise RuntimeError("Drive fora")
+
+    assert _traces(caminho)[0]["erro"] == "RuntimeError: Drive fora"
+
+
+def test_amostragem_estavel_por_chave(tmp_path):
+    sink = SinkArquivo(str(tmp_path / "trace.jsonl"))
+    metade = Rastreador(sink, taxa_amostragem=0.5)
+    chaves = [f"resposta-{n}" for n in range(2000)]
+
+    sorteadas = [c for c in chaves if metade.amostrar(c)]
+
+    assert 800 < len(sorteadas) < 1200
+    # A mesma chave tem sempre o mesmo destino (também em outros processos)
+    assert sorteadas == [c for c in chaves if Rastreador(sink, 0.5).amostrar(c)]
+    assert all(Rastreador(sink, 1.0).amostrar(c) for c in chaves[:50])
+    assert not any(Rastreador(sink, 0.0).amostrar(c) for c in chaves[:50])
+
+    fora = next(c for c in chaves if not metade.amostrar(c))
+    with metade.rastrear("gerar", fora) as trace:
+        assert trace is TRACE_DESLIGADO
+
+
+def test_sink_grava_em_lote(tmp_path):
+    caminho = tmp_path / "trace.jsonl"
+    sink = SinkArquivo(str(caminho), linhas_buffer=3, intervalo_flush=3600)
+
+    sink.gravar({"n": 1})
+    sink.gravar({"n": 2})
+    assert not caminho.exists()
+
+    sink.gravar({"n": 3})
+    sink.gravar({"n": 4})
+    assert _traces(caminho) == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+    sink.flush()
+    assert _traces(caminho)[-1] == {"n": 4}
+
+
+def test_sink_grava_apos_o_intervalo(tmp_path):
+    caminho = tmp_path / "trace.jsonl"
+    sink = SinkArquivo(str(caminho), linhas_buffer=100, intervalo_flush=0)
+
+    sink.gravar({"n": 1})
+
+    assert _traces(caminho) == [{"n": 1}]
+
+
+def test_filho_descarta_as_linhas_do_pai(tmp_path):
+    caminho = tmp_path / "trace.jsonl"
+    sink = SinkArquivo(str(caminho), linhas_buffer=100, intervalo_flush=3600)
+    sink.gravar({"n": 1})
+
+    generation_trace._descartar_buffers_no_filho()
+    sink.flush()
+
+    assert not caminho.exists()
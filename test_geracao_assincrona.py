@@ -0,0 +1,170 @@
+"""Testes das rotas que enfileiram a geração de petições (resposta 202)."""
+
+import pytest
+
+from app.celery_app import celery_da_app
+from app.peticionador import form_cache, google_services
+
+
+@pytest.fixture
+def modelo(app, monkeypatch):
+    from app.peticionador.models import PeticaoModelo, PeticaoPlaceholder
+    from extensions import db
+
+    monkeypatch.setattr(form_cache, "_cache", form_cache.OrderedDict())
+    modelo = PeticaoModelo(nome="Recurso", doc_template_id="T", pasta_destino_id="P")
+    db.session.add(modelo)
+    db.session.commit()
+    db.session.add_all(
+        PeticaoPlaceholder(modelo_id=modelo.id, chave=chave, ordem=ordem)
+        for ordem, chave in enumerate(["primeiro_nome", "sobrenome"], start=1)
+    )
+    db.session.commit()
+    return modelo
+
+
+@pytest.fixture
+def geracoes(monkeypatch):
+    """Google falso: guarda as chamadas a copy_template_and_fill"""
+    chamadas = []
+
+    def copiar_e_preencher(drive, docs, template_id, nome, pasta, dados, **kwargs):
+        chamadas.append((template_id, nome, pasta, dados, kwargs))
+        return f"DOC{len(chamadas)}", f"https://docs/DOC{len(chamadas)}"
+
+    monkeypatch.setattr(google_services, "get_drive_service", lambda: object())
+    monkeypatch.setattr(google_services, "get_docs_service", lambda: object())
+    monkeypatch.setattr(google_services, "copy_template_and_fill", copiar_e_preencher)
+    return chamadas
+
+
+@pytest.fixture
+def celery_eager(app):
+    """Tasks executadas na própria requisição, com o resultado guardado"""
+    celery = celery_da_app(app)
+    # Nomes antigos, como os CELERY_* que o make_celery copia da config
+    celery.conf.update(CELERY_ALWAYS_EAGER=True, CELERY_STORE_EAGER_RESULT=True)
+    return celery
+
+
+@pytest.fixture
+def formulario_gerado(modelo):
+    from extensions import db
+    from models import FormularioGerado
+
+    formulario = FormularioGerado(
+        modelo_id=modelo.id, nome="Recurso DETRAN", slug="recurso-detran"
+    )
+    db.session.add(formulario)
+    db.session.commit()
+    return formulario
+
+
+DADOS = {"primeiro_nome": "Ana", "sobrenome": "Silva"}
+
+
+def _peticoes():
+    from app.peticionador.models import PeticaoGerada
+    from extensions import db
+
+    db.session.expire_all()
+    return PeticaoGerada.query.all()
+
+
+def _conferir_202(resposta):
+    assert resposta.status_code == 202
+    corpo = resposta.get_json()
+    assert corpo["success"] is True and corpo["task_id"]
+    assert corpo["status_url"] == f"/api/task-status/{corpo['task_id']}"
+    return corpo
+
+
+def test_gerar_peticao_responde_202_e_registra_a_peticao(
+    modelo, cliente_logado, geracoes, celery_eager
+):
+    resposta = cliente_logado.post(
+        f"/peticionador/modelos/{modelo.id}/gerar",
+        data={**DADOS, "forcar_regeneracao": "on"},
+    )
+
+    corpo = _conferir_202(resposta)
+    ((template_id, nome, pasta, dados, kwargs),) = geracoes
+    assert (template_id, pasta, dados) == ("T", "P", DADOS)
+    assert nome.startswith("Recurso - ")
+    assert kwargs == {"forcar_regeneracao": True}
+
+    (peticao,) = _peticoes()
+    assert (peticao.modelo, peticao.google_id) == ("Recurso", "DOC1")
+    assert peticao.link == "https://docs/DOC1" and peticao.cliente_id is None
+
+    status = cliente_logado.get(corpo["status_url"]).get_json()
+    assert status["status"] == "SUCCESS"
+    assert status["result"]["peticao_id"] == peticao.id
+    assert status["result"]["link"] == "https://docs/DOC1"
+
+
+def test_preencher_formulario_responde_202_e_registra_a_peticao(
+    formulario_gerado, cliente_logado, geracoes, celery_eager
+):
+    resposta = cliente_logado.post(
+        f"/peticionador/formularios/{formulario_gerado.slug}", data=DADOS
+    )
+
+    _conferir_202(resposta)
+    ((_, nome, _, dados, kwargs),) = geracoes
+    assert dados == DADOS and kwargs == {"forcar_regeneracao": False}
+    assert nome.endswith(" - Ana Silva - Recurso DETRAN")
+    assert [p.google_id for p in _peticoes()] == ["DOC1"]
+
+
+def test_geracao_vai_para_a_fila(app, modelo, cliente_logado, geracoes):
+    celery = celery_da_app(app)
+    with celery.connection_for_read() as conexao:
+        fila = conexao.SimpleQueue("celery")
+        fila.clear()
+
+        resposta = cliente_logado.post(
+            f"/peticionador/modelos/{modelo.id}/gerar", data=DADOS
+        )
+        mensagem = fila.get(timeout=1)
+        mensagem.ack()
+
+    corpo = _conferir_202(resposta)
+    assert mensagem.headers["id"] == corpo["task_id"]
+    assert mensagem.headers["task"] == "tasks.generate_peticao"
+    args, kwargs, _ = mensagem.decode()
+    assert args[0] == modelo.id and args[2] == DADOS
+    assert kwargs == {"forcar_regeneracao": False}
+    # Nada é gerado na requisição: fica para o worker
+    assert geracoes == [] and _peticoes() == []
+
+
+def test_formulario_invalido_nao_enfileira(
+    modelo, cliente_logado, geracoes, celery_eager
+):
+    resposta = cliente_logado.post(
+        f"/peticionador/modelos/{modelo.id}/gerar",
+        data={"primeiro_nome": "Ana"},
+        headers={"X-Requested-With": "XMLHttpRequest"},
+    )
+
+    assert resposta.status_code == 400
+    assert "sobrenome" in resposta.get_json()["errors"]
+    assert geracoes == [] and _peticoes() == []
+
+
+def test_falha_na_geracao_aparece_no_status(
+    modelo, cliente_logado, geracoes, celery_eager, monkeypatch
+):
+    monkeypatch.setattr(
+        google_services, "copy_template_and_fill", lambda *a, **k: (None, None)
+    )
+
+    corpo = _conferir_202(
+        cliente_logado.post(f"/peticionador/modelos/{modelo.id}/gerar", data=DADOS)
+    )
+
+    status = cliente_logado.get(corpo["status_url"])
+    assert status.status_code == 500
+    assert "não retornou um ID" in status.get_json()["error_message"]
+    assert _peticoes() == []
@@ -0,0 +1,139 @@
+"""Testes da importação de clientes em blocos (flask import-clients)."""
+
+import re
+
+from app import commands
+from app.importacao.staging import compilar_plano, montar_bloco, ranges_paginados
+
+CABECALHOS = ["Carimbo de data/hora", "Primeiro Nome", "Sobrenome", "CPF"]
+CABECALHOS += ["Data de nascimento", "E-mail"]
+
+
+def _linha(nome, cpf, nascimento="01/01/1990"):
+    return ["", nome, "Silva", cpf, nascimento, f"{nome.lower()}@exemplo.com"]
+
+
+def _importar(app, monkeypatch, linhas, chunk_size=10, paginado=False):
+    """Roda o comando contra uma aba "Respostas" falsa.
+
+    Com ``paginado``, a planilha informa o total de linhas e a leitura vai
+    bloco a bloco por range A1; devolve os ranges lidos.
+    """
+    abas = {"Respostas": [CABECALHOS] + linhas}
+    lidos = []
+
+    def total_linhas(service, aba):
+        return len(abas[aba]) if paginado and aba in abas else None
+
+    def ler(service, intervalo):
+        lidos.append(intervalo)
+        aba, _, celulas = intervalo.partition("!")
+        if aba not in abas:
+            return None
+        janela = re.fullmatch(r"A(\d+):XFD(\d+)", celulas)
+        if not janela:
+            return abas[aba]
+        inicio, fim = (int(n) for n in janela.groups())
+        return abas[aba][inicio - 1 : fim]
+
+    monkeypatch.setattr(commands, "get_google_sheets_service", lambda: object())
+    monkeypatch.setattr(commands, "get_google_sheets_row_count", total_linhas)
+    monkeypatch.setattr(commands, "get_google_sheets_data", ler)
+    resultado = app.test_cli_runner().invoke(
+        commands.import_clients_cli, ["--chunk-size", str(chunk_size)]
+    )
+    assert resultado.exit_code == 0, resultado.output
+    return resultado.output, lidos
+
+
+def test_ranges_paginados_em_blocos():
+    assert list(ranges_paginados("Aba!A:C", 6, 2)) == [
+        (2, "Aba!A2:C3"),
+        (4, "Aba!A4:C5"),
+        (6, "Aba!A6:C6"),
+    ]
+
+
+def test_montar_bloco_descarta_vazias_e_mantem_numero_da_linha():
+    plano = compilar_plano(CABECALHOS, commands.MAP_RESPOSTAS)
+    linhas = [_linha("Ana", "111"), ["", " ", ""], _linha("Bia", "222")]
+
+    bloco = montar_bloco("Respostas", 2, linhas, plano)
+
+    assert len(bloco) == 2 and bloco.vazias == 1
+    assert list(bloco.linhas_origem) == [2, 4]
+    assert bloco.coluna("cpf_raw") == ["111", "222"]
+    assert [linha.get("_source_row_num") for linha in bloco.linhas()] == [2, 4]
+
+
+def test_importa_em_blocos_com_commit_por_bloco(app, monkeypatch):
+    from app.peticionador.models import Cliente
+
+    linhas = [_linha(nome, str(100 + n)) for n, nome in enumerate("ABCDE")]
+    saida, _ = _importar(app, monkeypatch, linhas, chunk_size=2)
+
+    assert Cliente.query.count() == 5
+    assert "Clientes novos importados com sucesso: 5" in saida
+
+
+def test_leitura_paginada_por_range(app, monkeypatch):
+    from app.peticionador.models import Cliente
+
+    linhas = [_linha(f"Cliente{n}", str(100 + n)) for n in range(5)]
+    saida, lidos = _importar(app, monkeypatch, linhas, chunk_size=2, paginado=True)
+
+    assert [r for r in lidos if r.startswith("Respostas!")] == [
+        "Respostas!A1:XFD1",
+        "Respostas!A2:XFD3",
+        "Respostas!A4:XFD5",
+        "Respostas!A6:XFD6",
+    ]
+    assert sorted(c.cpf for c in Cliente.query.all()) == [
+        str(100 + n) for n in range(5)
+    ]
+    assert "Clientes novos importados com sucesso: 5" in saida
+
+
+def test_erro_numa_linha_desfaz_so_ela(app, monkeypatch):
+    from app.peticionador.models import Cliente
+
+    parse_original = commands.parse_data
+
+    def parse_data(valor, *args):
+        if valor == "explode":
+            raise RuntimeError("falha simulada")
+        return parse_original(valor, *args)
+
+    monkeypatch.setattr(commands, "parse_data", parse_data)
+    linhas = [
+        _linha("Ana", "111"),
+        _linha("Bia", "222"),
+        _linha("Caio", "333", nascimento="explode"),
+        _linha("Davi", "444"),
+    ]
+    saida, _ = _importar(app, monkeypatch, linhas)
+
+    # Ana e Bia, ainda não comitadas, sobrevivem ao erro da linha de Caio
+    assert [c.cpf for c in Cliente.query.all()] == ["111", "222", "444"]
+    assert "Clientes novos importados com sucesso: 3" in saida
+    assert "Linhas com erro de processamento (ignoradas): 1" in saida
+
+
+def test_erro_no_flush_desfaz_so_a_linha(app, monkeypatch):
+    from app.peticionador.models import Cliente
+
+    # Sem tipo_pessoa (NOT NULL) a linha de Bia só falha no INSERT
+    colunas = frozenset(c.name for c in Cliente.__table__.columns)
+    original = commands._importar_registro
+
+    def importar(dados, colunas_validas):
+        if dados.get("primeiro_nome") == "Bia":
+            colunas_validas = colunas - {"tipo_pessoa"}
+        return original(dados, colunas_validas)
+
+    monkeypatch.setattr(commands, "_importar_registro", importar)
+    linhas = [_linha("Ana", "111"), _linha("Bia", "222"), _linha("Caio", "333")]
+    saida, _ = _importar(app, monkeypatch, linhas)
+
+    assert [c.cpf for c in Cliente.query.all()] == ["111", "333"]
+    assert "Linhas com erro de processamento (ignoradas): 1" in saida
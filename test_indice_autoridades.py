@@ -0,0 +1,108 @@
+"""Testes do índice em memória das autoridades de trânsito."""
+
+import pytest
+
+from app.peticionador import indice_autoridades
+from app.peticionador.indice_autoridades import AutoridadeResumo, IndiceAutoridades
+
+NOMES = [
+    "DETRAN-MG",
+    "BHTRANS",
+    "Transcon Contagem",
+    "Departamento de Trânsito de São Paulo",
+    "DER-MG",
+    "Polícia Rodoviária Federal",
+]
+
+
+def _indice(nomes=NOMES):
+    return IndiceAutoridades(
+        [
+            AutoridadeResumo(n, nome, None, None, None, None, None)
+            for n, nome in enumerate(nomes, start=1)
+        ]
+    )
+
+
+def _nomes(resultado):
+    return [a.nome for a in resultado]
+
+
+def test_inicio_de_palavra_antes_de_trecho_do_meio():
+    assert _nomes(_indice().buscar("tran")) == [
+        "Transcon Contagem",
+        "Departamento de Trânsito de São Paulo",
+        "BHTRANS",
+        "DETRAN-MG",
+    ]
+
+
+def test_trechos_do_meio_respeitam_o_limite():
+    assert _nomes(_indice().buscar("tran", limite=3)) == [
+        "Transcon Contagem",
+        "Departamento de Trânsito de São Paulo",
+        "BHTRANS",
+    ]
+
+
+@pytest.mark.parametrize(
+    "termo, esperado",
+    [
+        ("der-mg", ["DER-MG"]),
+        ("mg", ["DER-MG", "DETRAN-MG"]),
+        ("dep sao", ["Departamento de Trânsito de São Paulo"]),
+        ("POLICIA", ["Polícia Rodoviária Federal"]),
+        ("doviaria", ["Polícia Rodoviária Federal"]),
+        ("", []),
+        ("xyz", []),
+    ],
+)
+def test_buscar(termo, esperado):
+    assert _nomes(_indice().buscar(termo)) == esperado
+
+
+def test_alteracao_visivel_apos_commit(app, monkeypatch):
+    from app.peticionador.models import AutoridadeTransito
+    from extensions import db
+
+    monkeypatch.setattr(indice_autoridades, "INTERVALO_VERIFICACAO", 1e9)
+    indice_autoridades.invalidar()
+    assert indice_autoridades.buscar("detran") == []
+
+    db.session.add(AutoridadeTransito(nome="DETRAN-MG"))
+    db.session.flush()
+    # Consulta no meio da transação não pode fixar o retrato antigo
+    indice_autoridades.indice()
+    db.session.commit()
+    assert _nomes(indice_autoridades.buscar("detran")) == ["DETRAN-MG"]
+
+    autoridade = AutoridadeTransito.query.one()
+    autoridade.nome = "DETRAN-SP"
+    db.session.commit()
+    assert _nomes(indice_autoridades.buscar("detran")) == ["DETRAN-SP"]
+
+    db.session.delete(autoridade)
+    db.session.commit()
+    assert indice_autoridades.autoridades() == ()
+
+
+def test_savepoint_nao_antecipa_nem_descarta_a_invalidacao(app, monkeypatch):
+    from app.peticionador.models import AutoridadeTransito
+    from extensions import db
+
+    invalidacoes = []
+    monkeypatch.setattr(
+        indice_autoridades, "invalidar", lambda: invalidacoes.append(True)
+    )
+
+    db.session.add(AutoridadeTransito(nome="DETRAN-MG"))
+    with db.session.begin_nested():
+        db.session.add(AutoridadeTransito(nome="BHTRANS"))
+    savepoint = db.session.begin_nested()
+    db.session.add(AutoridadeTransito(nome="PRF"))
+    db.session.flush()
+    savepoint.rollback()
+    assert invalidacoes == []
+
+    db.session.commit()
+    assert invalidacoes == [True]
@@ -0,0 +1,139 @@
+"""Testes da paginação por keyset das listagens."""
+
+import base64
+import datetime
+import json
+
+import pytest
+
+from app.peticionador import listagens
+from app.peticionador.listagens import (
+    TAMANHO_MAXIMO_PAGINA,
+    TAMANHO_PAGINA,
+    CursorInvalido,
+    tamanho_pagina,
+)
+
+
+def _cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+@pytest.fixture
+def clientes(app):
+    from app.peticionador.models import Cliente, TipoPessoaEnum
+    from extensions import db
+
+    base = datetime.datetime(2024, 1, 1, 12)
+    # Quatro clientes com o mesmo data_criacao: o id desempata a ordem
+    datas = [base, base, base, base - datetime.timedelta(days=1), base]
+    datas += [base + datetime.timedelta(hours=n) for n in range(1, 3)]
+    db.session.add_all(
+        Cliente(
+            tipo_pessoa=TipoPessoaEnum.FISICA,
+            email=f"c{n}@exemplo.com",
+            nome_completo=f"Cliente {n}",
+            data_criacao=data,
+        )
+        for n, data in enumerate(datas)
+    )
+    db.session.commit()
+    with app.test_request_context():
+        yield [
+            c.id
+            for c in sorted(
+                Cliente.query.all(), key=lambda c: (c.data_criacao, c.id), reverse=True
+            )
+        ]
+
+
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        (None, TAMANHO_PAGINA),
+        ("abc", TAMANHO_PAGINA),
+        ("0", 1),
+        ("-5", 1),
+        ("10", 10),
+        ("100000", TAMANHO_MAXIMO_PAGINA),
+    ],
+)
+def test_tamanho_pagina(valor, esperado):
+    assert tamanho_pagina(valor) == esperado
+
+
+def test_paginas_cobrem_tudo_sem_repetir(clientes):
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        pagina = listagens.pagina_clientes(cursor, limite=2)
+        vistos += [item["id"] for item in pagina.itens]
+        paginas += 1
+        cursor = pagina.proximo_cursor
+        if cursor is None:
+            break
+
+    assert vistos == clientes
+    assert paginas == 4
+    assert pagina.itens and len(pagina.itens) == 1
+
+
+def test_pagina_exata_nao_deixa_cursor_para_pagina_vazia(clientes):
+    pagina = listagens.pagina_clientes(None, limite=len(clientes))
+
+    assert len(pagina.itens) == len(clientes) and pagina.proximo_cursor is None
+
+
+def test_item_formatado_para_a_tela(clientes):
+    item = listagens.pagina_clientes(None, limite=1).itens[0]
+
+    assert item["tipo_pessoa"] == "FISICA"
+    assert item["primeiro_nome"] == item["nome_completo"]
+    assert item["data_criacao"] == "01/01/2024 14:00"
+    assert item["urls"]["editar"].endswith(f"/clientes/{item['id']}/editar")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "não-é-base64",
+        "@@@",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        _cursor({"data": "2024-01-01"}),
+        _cursor(["2024-01-01T12:00:00"]),
+        _cursor(["2024-01-01T12:00:00", 1, 2]),
+        _cursor(["ontem", 1]),
+        _cursor([20240101, 1]),
+        _cursor(["2024-01-01T12:00:00", "1"]),
+        _cursor(["2024-01-01T12:00:00", [1]]),
+        _cursor(["2024-01-01T12:00:00", True]),
+        _cursor([None, 1]),
+    ],
+)
+def test_cursor_invalido(clientes, cursor):
+    with pytest.raises(CursorInvalido):
+        listagens.pagina_clientes(cursor)
+
+
+def test_cursor_invalido_na_api_responde_400(app, clientes):
+    from app.peticionador import routes
+
+    with app.test_request_context("/api/clientes?cursor=@@@"):
+        resposta, status = routes._responder_pagina(listagens.pagina_clientes)
+
+    assert status == 400 and resposta.get_json()["success"] is False
+
+
+def test_autoridades_ordenadas_por_nome(app):
+    from app.peticionador.models import AutoridadeTransito
+    from extensions import db
+
+    nomes = ["DETRAN-MG", "BHTRANS", "DER-MG", "PRF"]
+    db.session.add_all(AutoridadeTransito(nome=nome) for nome in nomes)
+    db.session.commit()
+
+    with app.test_request_context():
+        primeira = listagens.pagina_autoridades(None, limite=3)
+        segunda = listagens.pagina_autoridades(primeira.proximo_cursor, limite=3)
+
+    assert [a["nome"] for a in primeira.itens + segunda.itens] == sorted(nomes)
+    assert segunda.proximo_cursor is None
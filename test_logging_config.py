@@ -0,0 +1,205 @@
+"""Testes do logging estruturado: fila, listener e arquivos por logger."""
+
+import json
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app import logging_config
+from app.logging_config import (
+    EnfileirarHandler,
+    FiltroLoggers,
+    parar_logging,
+    setup_logging,
+)
+
+ESPECIFICOS = [
+    "app.services.document_service",
+    "app.validators.cliente_validator",
+    "app.api.document_api",
+    "document_generator",
+]
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    """Roda setup_logging em tmp_path e restaura o logging ao final"""
+    monkeypatch.chdir(tmp_path)
+    raiz = logging.getLogger()
+    estado = (raiz.level, raiz.handlers[:])
+    especificos = {
+        nome: (logger.level, logger.propagate, logger.handlers[:])
+        for nome in ESPECIFICOS
+        for logger in [logging.getLogger(nome)]
+    }
+
+    setup_logging(SimpleNamespace(debug=False, logger=logging.getLogger("app")))
+    yield tmp_path / "logs"
+
+    parar_logging()
+    raiz.setLevel(estado[0])
+    raiz.handlers[:] = estado[1]
+    for nome, (nivel, propaga, handlers) in especificos.items():
+        logger = logging.getLogger(nome)
+        logger.setLevel(nivel)
+        logger.propagate = propaga
+        logger.handlers[:] = handlers
+
+
+def _linhas(pasta, arquivo):
+    caminho = pasta / arquivo
+    if not caminho.exists():
+        return []
+    return [json.loads(linha) for linha in caminho.read_text().splitlines()]
+
+
+def _mensagens(pasta, arquivo):
+    return [linha.get("message") for linha in _linhas(pasta, arquivo)]
+
+
+def test_cada_registro_no_seu_arquivo(logs):
+    logging.getLogger("app.rotas").info("geral %s", 1)
+    logging.getLogger("app.rotas").error("falhou")
+    logging.getLogger("document_generator").info("gerado")
+    logging.getLogger("app.api.document_api.v2").warning("filho")
+    logging.getLogger("app.requests").info(
+        "Requisição processada",
+        extra={"extra_fields": {"method": "GET", "path": "/x", "status_code": 200}},
+    )
+    logging.getLogger("app.rotas").debug("abaixo do nível")
+
+    parar_logging()
+
+    assert _mensagens(logs, "app_structured.log") == [
+        "Sistema de logging estruturado configurado",
+        "geral 1",
+        "falhou",
+        "Requisição processada",
+    ]
+    assert _mensagens(logs, "app_error.log") == ["falhou"]
+    assert _mensagens(logs, "document_generator.log") == ["gerado"]
+    assert _mensagens(logs, "app_api_document_api.log") == ["filho"]
+    assert _mensagens(logs, "app_services_document_service.log") == []
+    (requisicao,) = _linhas(logs, "app_requests.log")
+    assert requisicao["type"] == "request"
+    assert (requisicao["method"], requisicao["path"]) == ("GET", "/x")
+    assert requisicao["status_code"] == 200
+
+
+def test_json_estruturado(logs):
+    try:
+        raise ValueError("quebrou")
+    except ValueError:
+        logging.getLogger("app.rotas").exception(
+            "erro %s", "x", extra={"extra_fields": {"cliente": 7}}
+        )
+
+    parar_logging()
+
+    (estruturado,) = _linhas(logs, "app_structured.log")[1:]
+    assert estruturado["message"] == "erro x" and estruturado["cliente"] == 7
+    assert estruturado["logger"] == "app.rotas" and estruturado["level"] == "ERROR"
+    assert "ValueError: quebrou" in estruturado["exception"]
+    # O mesmo JSON (formatado uma vez) vai para o arquivo de erros
+    assert _linhas(logs, "app_error.log") == [estruturado]
+
+
+def test_nova_configuracao_substitui_a_anterior(logs):
+    setup_logging(SimpleNamespace(debug=False, logger=logging.getLogger("app")))
+    logging.getLogger("document_generator").info("uma vez")
+
+    parar_logging()
+
+    enfileirar = [
+        h for h in logging.getLogger().handlers if isinstance(h, EnfileirarHandler)
+    ]
+    assert len(enfileirar) == 1
+    assert _mensagens(logs, "document_generator.log") == ["uma vez"]
+
+
+def test_enfileirar_nao_altera_o_registro_original():
+    fila = []
+    handler = EnfileirarHandler(SimpleNamespace(put_nowait=fila.append))
+    try:
+        raise KeyError("k")
+    except KeyError:
+        registro = logging.LogRecord(
+            "app", logging.ERROR, __file__, 1, "id %s", (3,), sys.exc_info()
+        )
+
+    handler.emit(registro)
+
+    (enfileirado,) = fila
+    assert (enfileirado.msg, enfileirado.args) == ("id 3", None)
+    assert enfileirado.exc_info is None and "KeyError" in enfileirado.exc_text
+    assert (registro.msg, registro.args) == ("id %s", (3,))
+    assert registro.exc_info is not None
+
+
+@pytest.mark.parametrize(
+    "nome, aceito",
+    [
+        ("document_generator", True),
+        ("document_generator.lote", True),
+        ("document_generator_v2", False),
+        ("app.requests", False),
+    ],
+)
+def test_filtro_loggers(nome, aceito):
+    registro = logging.LogRecord(nome, logging.INFO, __file__, 1, "", None, None)
+
+    assert FiltroLoggers(["document_generator"]).filter(registro) is aceito
+    assert FiltroLoggers(["document_generator"], excluir=True).filter(registro) is (
+        not aceito
+    )
+
+
+def test_ganchos_de_fork_religam_o_listener(logs):
+    logger = logging.getLogger("document_generator")
+    logger.info("antes")
+
+    logging_config._parar_antes_fork()
+    logging_config._religar_no_pai()
+    logger.info("no pai")
+
+    anterior = logging_config._listener
+    logging_config._religar_no_filho()
+    assert logging_config._listener is not anterior
+    assert logging_config._handlers_enfileirar[0].queue is (
+        logging_config._listener.queue
+    )
+    logger.info("no filho")
+
+    parar_logging()
+
+    assert _mensagens(logs, "document_generator.log") == [
+        "antes",
+        "no pai",
+        "no filho",
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="sem os.fork")
+def test_processo_filho_grava_pela_propria_fila(logs):
+    logger = logging.getLogger("document_generator")
+    logger.info("pai antes")
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - roda no processo filho
+        logger.info("filho")
+        parar_logging()
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    logger.info("pai depois")
+
+    parar_logging()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert sorted(_mensagens(logs, "document_generator.log")) == [
+        "filho",
+        "pai antes",
+        "pai depois",
+    ]
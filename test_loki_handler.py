@@ -0,0 +1,215 @@
+"""Testes do envio em lote para o Loki (LokiHandler), sem rede."""
+
+import gzip
+import json
+import logging
+import os
+
+import pytest
+import requests
+
+from loki_logger import SUFIXO_REIVINDICADO, LokiHandler
+
+# PID acima de qualquer pid_max do Linux: nunca pertence a um processo vivo
+PID_MORTO = 99_999_999
+
+
+class _Resposta:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+class Sessao:
+    """``requests.Session`` falsa: guarda os lotes e responde ``status``"""
+
+    def __init__(self, status=204, ao_enviar=None):
+        self.status = status
+        self.ao_enviar = ao_enviar
+        self.lotes = []
+
+    def post(self, url, data, headers, timeout):
+        if self.ao_enviar:
+            self.ao_enviar()
+        if self.status is None:
+            raise requests.ConnectionError("Loki fora")
+        self.lotes.append(json.loads(gzip.decompress(data)))
+        return _Resposta(self.status, "rejeitado")
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = LokiHandler(
+        "http://loki:3100", spool_dir=str(tmp_path / "spool"), lote_registros=2
+    )
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    # Sem thread de envio: os testes drenam o buffer explicitamente
+    handler._pid = os.getpid()
+    yield handler
+    handler._pid = None
+
+
+def _registro(mensagem="cliente %s", *args, nome="app", nivel=logging.INFO):
+    return logging.LogRecord(nome, nivel, __file__, 1, mensagem, args, None)
+
+
+def _linhas(lotes):
+    return [
+        valor[1]
+        for lote in lotes
+        for stream in lote["streams"]
+        for valor in stream["values"]
+    ]
+
+
+def _spool(handler):
+    return sorted(os.listdir(handler.spool_dir))
+
+
+def test_emit_nao_altera_o_registro_dos_outros_handlers(handler):
+    registro = _registro("cliente %s", 42)
+
+    handler.emit(registro)
+
+    assert (registro.msg, registro.args) == ("cliente %s", (42,))
+    assert handler._buffer[0][1].msg == "cliente 42"
+
+
+def test_fila_cheia_descarta_e_conta(handler):
+    handler.tamanho_fila = 3
+
+    for n in range(5):
+        handler.emit(_registro("linha %d", n))
+
+    assert handler.estatisticas()["na_fila"] == 3
+    assert handler.descartados_fila == 2
+
+
+def test_lotes_agrupados_por_labels(handler):
+    sessao = Sessao()
+    for n in range(3):
+        handler.emit(_registro("linha %d", n))
+    handler.emit(_registro("erro", nome="outro", nivel=logging.ERROR))
+
+    handler._drenar(sessao)
+
+    assert len(sessao.lotes) == 2  # lote_registros=2
+    assert _linhas(sessao.lotes) == ["INFO linha 0", "INFO linha 1"] + [
+        "INFO linha 2",
+        "ERROR erro",
+    ]
+    streams = [s["stream"] for s in sessao.lotes[1]["streams"]]
+    assert [(s["logger"], s["level"]) for s in streams] == [
+        ("app", "info"),
+        ("outro", "error"),
+    ]
+    assert handler.enviados == 4 and handler.lotes_enviados == 2
+
+
+def test_falha_no_post_grava_spool(handler):
+    handler.emit(_registro("linha %d", 1))
+
+    handler._drenar(Sessao(status=None))
+
+    (arquivo,) = _spool(handler)
+    assert arquivo.endswith("-1.json.gz")
+    with gzip.open(os.path.join(handler.spool_dir, arquivo)) as f:
+        assert _linhas([json.load(f)]) == ["INFO linha 1"]
+    assert handler.falhas_envio == 1 and handler._proxima_tentativa > 0
+
+    # Ainda em backoff: o próximo lote vai direto para o spool, sem POST
+    sessao = Sessao()
+    handler.emit(_registro("linha %d", 2))
+    handler._drenar(sessao)
+    assert sessao.lotes == [] and len(_spool(handler)) == 2
+
+
+def test_erro_5xx_vai_para_o_spool_e_4xx_e_descartado(handler):
+    handler.emit(_registro("a"))
+    handler._drenar(Sessao(status=503))
+    assert len(_spool(handler)) == 1
+
+    handler._proxima_tentativa = 0.0
+    handler.emit(_registro("b"))
+    handler._drenar(Sessao(status=400))
+    # Lote rejeitado não volta para o spool; o spool também é reenviado
+    # (e rejeitado) depois do POST que "deu certo"
+    assert handler.descartados_rejeitados == 2
+    assert _spool(handler) == []
+
+
+def test_spool_limitado(handler):
+    handler.spool_max_bytes = 1
+
+    handler.emit(_registro("a"))
+    handler._drenar(Sessao(status=None))
+
+    assert not os.path.exists(handler.spool_dir) or _spool(handler) == []
+    assert handler.descartados_spool == 1
+
+
+def test_reenvio_do_spool_em_ordem_com_reivindicacao(handler):
+    for n in range(3):
+        handler.emit(_registro("linha %d", n))
+        handler._drenar(Sessao(status=None))
+        handler._proxima_tentativa = 0.0
+    arquivos = _spool(handler)
+    assert len(arquivos) == 3
+
+    vistos = []
+
+    def durante_o_envio():
+        # O arquivo em envio está renomeado com o PID deste processo
+        vistos.append(_spool(handler))
+
+    sessao = Sessao(ao_enviar=durante_o_envio)
+    handler._reenviar_spool(sessao)
+
+    assert _linhas(sessao.lotes) == ["INFO linha 0", "INFO linha 1", "INFO linha 2"]
+    reivindicado = f".{arquivos[0]}.{os.getpid()}{SUFIXO_REIVINDICADO}"
+    assert vistos[0] == sorted([reivindicado] + arquivos[1:])
+    assert _spool(handler) == []
+    assert handler.enviados == 3
+
+
+def test_reenvio_interrompido_devolve_o_arquivo(handler):
+    handler.emit(_registro("linha"))
+    handler._drenar(Sessao(status=None))
+    arquivos = _spool(handler)
+
+    handler._reenviar_spool(Sessao(status=503))
+
+    assert _spool(handler) == arquivos
+
+
+def test_arquivo_reivindicado_por_outro_processo_nao_e_reenviado(handler):
+    handler.emit(_registro("linha"))
+    handler._drenar(Sessao(status=None))
+    (arquivo,) = _spool(handler)
+    # Outro worker (vivo) já pegou o arquivo
+    outro = f".{arquivo}.{os.getppid()}{SUFIXO_REIVINDICADO}"
+    os.replace(
+        os.path.join(handler.spool_dir, arquivo),
+        os.path.join(handler.spool_dir, outro),
+    )
+
+    sessao = Sessao()
+    handler._reenviar_spool(sessao)
+
+    assert sessao.lotes == [] and _spool(handler) == [outro]
+
+
+def test_recuperar_reivindicados_de_processos_mortos(handler):
+    os.makedirs(handler.spool_dir)
+    nomes = {
+        "1-1-1.json.gz": f".1-1-1.json.gz.{PID_MORTO}{SUFIXO_REIVINDICADO}",
+        "2-1-1.json.gz": f".2-1-1.json.gz.{os.getpid()}{SUFIXO_REIVINDICADO}",
+    }
+    for reivindicado in nomes.values():
+        with open(os.path.join(handler.spool_dir, reivindicado), "wb") as f:
+            f.write(b"x")
+
+    handler._recuperar_reivindicados()
+
+    # O do processo morto volta ao spool; o do processo vivo fica como está
+    assert _spool(handler) == sorted(["1-1-1.json.gz", nomes["2-1-1.json.gz"]])
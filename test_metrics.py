@@ -0,0 +1,113 @@
+"""Testes do endpoint /metrics e dos rótulos das chamadas ao Google."""
+
+import pytest
+from googleapiclient.errors import HttpError
+
+import metrics
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+TOKEN = "segredo-do-prometheus"
+
+
+@pytest.fixture
+def ambiente(monkeypatch):
+    # O token e os IPs são lidos no create_app: o ambiente vem antes do app
+    monkeypatch.setenv("METRICS_TOKEN", TOKEN)
+    monkeypatch.delenv("METRICS_ALLOWED_IPS", raising=False)
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+
+
+@pytest.fixture
+def cliente(ambiente, app):
+    return app.test_client()
+
+
+def _get(cliente, ip="127.0.0.1", **headers):
+    return cliente.get("/metrics", headers=headers, environ_base={"REMOTE_ADDR": ip})
+
+
+def test_sem_token_de_fora_e_recusado(cliente):
+    resposta = _get(cliente, ip="203.0.113.7")
+
+    assert resposta.status_code == 403
+
+
+def test_atras_do_proxy_o_ip_nao_vale(cliente):
+    # O nginx repassa do 127.0.0.1, mas a requisição veio de fora
+    resposta = _get(cliente, **{"X-Forwarded-For": "203.0.113.7"})
+
+    assert resposta.status_code == 403
+    assert _get(cliente, **{"X-Real-IP": "203.0.113.7"}).status_code == 403
+
+
+def test_token_errado_e_recusado(cliente):
+    resposta = _get(cliente, ip="203.0.113.7", Authorization="Bearer outro")
+
+    assert resposta.status_code == 403
+
+
+def test_com_o_token_responde_as_metricas(cliente):
+    resposta = _get(
+        cliente,
+        ip="203.0.113.7",
+        Authorization=f"Bearer {TOKEN}",
+        **{"X-Forwarded-For": "203.0.113.7"},
+    )
+
+    assert resposta.status_code == 200
+    assert resposta.content_type == prometheus_client.CONTENT_TYPE_LATEST
+    assert b"form_google_google_api_requests_total" in resposta.data
+
+
+def test_direto_do_localhost_sem_token(cliente):
+    assert _get(cliente).status_code == 200
+
+
+class _Requisicao:
+    def __init__(self, erro=None):
+        self.erro = erro
+
+    def execute(self):
+        if self.erro:
+            raise self.erro
+        return {"id": "1"}
+
+
+class _Resposta(dict):
+    reason = "erro simulado"
+
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+
+def _chamadas(status):
+    valor = prometheus_client.REGISTRY.get_sample_value(
+        "form_google_google_api_requests_total",
+        {"api": "drive", "metodo": "files.teste", "status": status},
+    )
+    return valor or 0.0
+
+
+@pytest.mark.parametrize(
+    "erro, status",
+    [
+        (None, "200"),
+        (HttpError(_Resposta(404), b""), "404"),
+        (HttpError(_Resposta(429), b""), "429"),
+        (TimeoutError("lento"), "TimeoutError"),
+    ],
+)
+def test_executar_google_rotula_pelo_status(erro, status):
+    antes = _chamadas(status)
+
+    if erro is None:
+        assert metrics.executar_google("drive", "files.teste", _Requisicao()) == {
+            "id": "1"
+        }
+    else:
+        with pytest.raises(type(erro)):
+            metrics.executar_google("drive", "files.teste", _Requisicao(erro))
+
+    assert _chamadas(status) == antes + 1
@@ -0,0 +1,87 @@
+"""Testes da busca flexível de chaves em payloads (PayloadView)."""
+
+import random
+
+import pytest
+
+from app.peticionador.utils import (
+    PayloadView,
+    buscar_valor_flexivel,
+    normalizar_para_camel_case,
+)
+
+PAYLOAD = {
+    "Nome Completo": "Ana Silva",
+    "e-mail": "ana@exemplo.com",
+    "estado_civil": "Casada",
+    "Endereço": "Rua A",
+    "numero": "10",
+    "Número": "20",
+}
+
+
+@pytest.mark.parametrize(
+    "variantes, esperado",
+    [
+        (("nome completo",), "Ana Silva"),
+        (("nome_completo", "nome"), "Ana Silva"),
+        (("e_mail",), "ana@exemplo.com"),
+        (("Estado Civil",), "Casada"),
+        (("endereco",), "Rua A"),
+        # Chave exata tem prioridade sobre a forma normalizada
+        (("Número",), "20"),
+        # Entre variantes normalizadas vale a chave que vem primeiro no payload
+        (("estado civil", "nome-completo"), "Ana Silva"),
+        (("cpf", "documento"), None),
+        ((), None),
+    ],
+)
+def test_buscar(variantes, esperado):
+    assert buscar_valor_flexivel(PAYLOAD, *variantes) == esperado
+    assert buscar_valor_flexivel(PayloadView(PAYLOAD), *variantes) == esperado
+
+
+def test_mesmo_resultado_do_dict_em_buscas_aleatorias():
+    sorteio = random.Random(33)
+    palavras = ["nome", "Email", "estado", "civil", "número", "cpf", "rg", "Cep"]
+    separadores = [" ", "_", "-", ""]
+
+    def chave():
+        partes = sorteio.sample(palavras, sorteio.randint(1, 3))
+        return sorteio.choice(separadores).join(partes)
+
+    for _ in range(300):
+        payload = {chave(): n for n in range(sorteio.randint(0, 12))}
+        visao = PayloadView(payload)
+        for _ in range(10):
+            variantes = [chave() for _ in range(sorteio.randint(1, 3))]
+            assert visao.buscar(*variantes) == buscar_valor_flexivel(
+                payload, *variantes
+            )
+
+
+def test_indice_montado_uma_vez():
+    visao = PayloadView(PAYLOAD)
+    assert visao._indice is None
+
+    visao.buscar("nome")
+    indice = visao._indice
+    visao.buscar("estado civil")
+
+    assert visao._indice is indice
+    assert indice["nomeCompleto"] == (0, "Ana Silva")
+
+
+def test_e_um_mapping_somente_leitura():
+    visao = PayloadView(PAYLOAD)
+
+    assert dict(visao) == PAYLOAD and len(visao) == len(PAYLOAD)
+    assert visao["numero"] == "10" and visao.get("x") is None
+    with pytest.raises(TypeError):
+        visao["numero"] = "30"
+
+
+def test_normalizar_para_camel_case():
+    assert normalizar_para_camel_case("Estado Civil") == "estadoCivil"
+    assert normalizar_para_camel_case("e-mail_contato") == "eMailContato"
+    assert normalizar_para_camel_case("Número") == "numero"
@@ -0,0 +1,98 @@
+"""Testes da sincronização de placeholders dos modelos de petição."""
+
+from app.peticionador.placeholder_sync import PlaceholderAtual, diff_placeholders
+
+
+def _atuais(*chaves):
+    return [
+        PlaceholderAtual(id=n, chave=chave, label_form=None, ordem=n)
+        for n, chave in enumerate(chaves, start=1)
+    ]
+
+
+def test_sem_mudancas():
+    assert diff_placeholders(_atuais("a", "b"), ["a", "b"]).vazio
+
+
+def test_adicionados_removidos_e_reordenados():
+    plano = diff_placeholders(_atuais("a", "b", "c"), ["c", "a", "d"])
+
+    assert plano.adicionados == [("d", 3)]
+    assert [ph.chave for ph in plano.removidos] == ["b"]
+    assert plano.renomeados == []
+    assert plano.reordenados == {3: 1, 1: 2}
+
+
+def test_renomeacao_so_pela_forma_normalizada():
+    plano = diff_placeholders(
+        _atuais("processo_numero", "vara"), ["Processo Numero", "vara"]
+    )
+
+    assert [(ph.chave, nova) for ph, nova in plano.renomeados] == [
+        ("processo_numero", "Processo Numero")
+    ]
+    assert not plano.adicionados and not plano.removidos
+
+
+def test_chaves_diferentes_na_mesma_posicao_nao_sao_renomeacao():
+    # b -> x e d -> e ocupam os mesmos lugares, mas são campos diferentes:
+    # x não pode herdar tipo e opções de b
+    plano = diff_placeholders(_atuais("a", "b", "c", "d"), ["a", "x", "c", "e"])
+
+    assert plano.renomeados == []
+    assert sorted(ph.chave for ph in plano.removidos) == ["b", "d"]
+    assert plano.adicionados == [("x", 2), ("e", 4)]
+
+
+def test_chave_duplicada_salva_e_removida():
+    plano = diff_placeholders(_atuais("a", "a"), ["a"])
+
+    assert [ph.id for ph in plano.removidos] == [2]
+    assert not plano.adicionados
+
+
+def test_versao_incrementada_uma_vez_por_flush(app):
+    from app.peticionador import placeholder_sync
+    from app.peticionador.models import PeticaoModelo, PeticaoPlaceholder
+    from extensions import db
+
+    modelo = PeticaoModelo(nome="M", doc_template_id="T", pasta_destino_id="P")
+    db.session.add(modelo)
+    db.session.commit()
+
+    db.session.add_all(
+        PeticaoPlaceholder(modelo_id=modelo.id, chave=f"campo_{n}") for n in range(4)
+    )
+    db.session.commit()
+    assert db.session.get(PeticaoModelo, modelo.id).placeholders_versao == 1
+
+    for ph in PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id):
+        ph.ordem = 10 - ph.ordem
+    db.session.commit()
+    assert db.session.get(PeticaoModelo, modelo.id).placeholders_versao == 2
+
+    # Sincronização em lote: uma escrita, um incremento
+    placeholder_sync.sincronizar(modelo.id, ["campo_3", "campo_0", "novo"])
+    db.session.expire_all()
+    assert db.session.get(PeticaoModelo, modelo.id).placeholders_versao == 3
+    assert [
+        ph.chave
+        for ph in PeticaoPlaceholder.query.filter_by(modelo_id=modelo.id).order_by(
+            PeticaoPlaceholder.ordem
+        )
+    ] == ["campo_3", "campo_0", "novo"]
+
+
+def test_rollback_descarta_incremento_pendente(app):
+    from app.peticionador.models import PeticaoModelo, PeticaoPlaceholder
+    from extensions import db
+
+    modelo = PeticaoModelo(nome="M", doc_template_id="T", pasta_destino_id="P")
+    db.session.add(modelo)
+    db.session.commit()
+
+    db.session.add(PeticaoPlaceholder(modelo_id=modelo.id, chave="x"))
+    db.session.flush()
+    db.session.rollback()
+
+    assert db.session.get(PeticaoModelo, modelo.id).placeholders_versao == 0
@@ -0,0 +1,151 @@
+"""Testes da contabilidade de queries e do detector de N+1."""
+
+import logging
+
+import pytest
+
+import query_accounting
+from query_accounting import (
+    QUERY_ALERTA_REPETICOES,
+    contabilidade_atual,
+    contabilizar,
+    forma_statement,
+    resumo_atual,
+)
+
+
+@pytest.mark.parametrize(
+    "statement, forma",
+    [
+        (
+            "SELECT * FROM clientes WHERE id = 42",
+            "SELECT * FROM clientes WHERE id = ?",
+        ),
+        (
+            "SELECT * FROM clientes WHERE email = 'ana@x.com' AND nome = 'D''Ávila'",
+            "SELECT * FROM clientes WHERE email = ? AND nome = ?",
+        ),
+        (
+            "SELECT *\n  FROM clientes\n WHERE cpf = %(cpf_1)s  LIMIT %s",
+            "SELECT * FROM clientes WHERE cpf = ? LIMIT ?",
+        ),
+        (
+            "SELECT * FROM clientes WHERE id = :id AND valor > -1.5 OR x = $2",
+            "SELECT * FROM clientes WHERE id = ? AND valor > ? OR x = ?",
+        ),
+        (
+            "SELECT * FROM clientes WHERE id IN (1, 2, 3) AND uf in ('MG','SP')",
+            "SELECT * FROM clientes WHERE id IN (?) AND uf IN (?)",
+        ),
+        # Números que fazem parte de nomes não são literais
+        ("SELECT campo1, t2.x FROM tabela_3", "SELECT campo1, t2.x FROM tabela_3"),
+    ],
+)
+def test_forma_statement(statement, forma):
+    assert forma_statement(statement) == forma
+
+
+def test_listas_in_de_tamanhos_diferentes_tem_a_mesma_forma():
+    formas = {
+        forma_statement(f"SELECT 1 FROM t WHERE id IN ({', '.join(['?'] * n)})")
+        for n in (1, 2, 7)
+    }
+
+    assert formas == {"SELECT ? FROM t WHERE id IN (?)"}
+
+
+@pytest.fixture
+def usuarios(app):
+    from app.peticionador.models import User
+    from extensions import db
+
+    db.session.add_all(User(email=f"u{n}@exemplo.com") for n in range(12))
+    db.session.commit()
+    db.session.expire_all()
+    return User
+
+
+def test_loop_de_filter_by_e_suspeito_de_n_mais_1(usuarios, caplog):
+    with caplog.at_level(logging.WARNING, logger="query_accounting"):
+        with contabilizar("task", "tasks.teste") as conta:
+            for n in range(QUERY_ALERTA_REPETICOES):
+                usuarios.query.filter_by(email=f"u{n}@exemplo.com").first()
+
+    assert conta.queries >= QUERY_ALERTA_REPETICOES
+    ((forma, vezes),) = conta.suspeitas_n_mais_1()
+    assert vezes == QUERY_ALERTA_REPETICOES
+    assert "FROM users_peticionador WHERE users_peticionador.email = ?" in forma
+    assert conta.resumo()["db_n_mais_1"] == 1
+
+    (aviso,) = caplog.records
+    suspeitas = aviso.extra_fields["suspeitas_n_mais_1"]
+    assert suspeitas[0]["vezes"] == QUERY_ALERTA_REPETICOES
+
+
+def test_abaixo_do_limite_nao_e_suspeito(usuarios, caplog):
+    with caplog.at_level(logging.WARNING, logger="query_accounting"):
+        with contabilizar("task", "tasks.teste") as conta:
+            for n in range(QUERY_ALERTA_REPETICOES - 1):
+                usuarios.query.filter_by(email=f"u{n}@exemplo.com").first()
+            # Uma única query com IN no lugar do loop
+            usuarios.query.filter(usuarios.email.in_(["u1@exemplo.com"])).all()
+
+    assert conta.suspeitas_n_mais_1() == []
+    assert caplog.records == []
+
+
+def test_contabilidade_aninhada_usa_a_externa(usuarios):
+    with contabilizar("request", "rota") as externa:
+        usuarios.query.first()
+        with contabilizar("task", "tasks.sincrona") as interna:
+            usuarios.query.first()
+            assert resumo_atual()["db_queries"] == externa.queries
+
+        assert interna is externa and contabilidade_atual() is externa
+
+    assert externa.queries == 2
+    assert contabilidade_atual() is None and resumo_atual() == {}
+
+
+def test_fora_de_uma_contabilidade_nada_e_contado(usuarios, monkeypatch):
+    registradas = []
+    monkeypatch.setattr(
+        query_accounting.Contabilidade,
+        "registrar",
+        lambda self, *args: registradas.append(args),
+    )
+
+    usuarios.query.first()
+
+    assert registradas == []
+
+
+def test_totais_vao_para_as_metricas(usuarios, monkeypatch):
+    registradas = []
+    monkeypatch.setattr(
+        query_accounting,
+        "registrar_queries",
+        lambda *args: registradas.append(args),
+    )
+
+    with contabilizar("task", "tasks.teste"):
+        usuarios.query.first()
+
+    ((tipo, nome, queries, segundos, suspeitas),) = registradas
+    assert (tipo, nome, queries, suspeitas) == ("task", "tasks.teste", 1, 0)
+    assert segundos > 0
+
+
+def test_requisicao_contabilizada(app, usuarios, monkeypatch):
+    registradas = []
+    monkeypatch.setattr(
+        query_accounting,
+        "registrar_queries",
+        lambda *args: registradas.append(args),
+    )
+
+    app.test_client().get("/peticionador/login")
+
+    assert [(tipo, nome) for tipo, nome, *_ in registradas] == [
+        ("request", "peticionador.login")
+    ]
@@ -0,0 +1,200 @@
+"""Testes do profiler sob demanda: token assinado, anel em disco e rotas."""
+
+import cProfile
+import os
+import time
+
+import pytest
+
+import request_profiler
+from request_profiler import (
+    CONFIG_PROFILER,
+    VALIDADE_TOKEN,
+    AnelPerfis,
+    ConfigProfiler,
+    gerar_token,
+)
+
+SEGREDO = "segredo-do-profiler"
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILER_SECRET", SEGREDO)
+    monkeypatch.setenv("PROFILER_DIR", str(tmp_path / "perfis"))
+    monkeypatch.setenv("PROFILER_MAX_ARQUIVOS", "3")
+    monkeypatch.setenv("PROFILER_ADMINS", " Admin@Exemplo.com ,ops@exemplo.com")
+    return ConfigProfiler()
+
+
+def test_token_valido(config):
+    assert config.token_valido(gerar_token(SEGREDO))
+    # Relógios um pouco adiantados ou atrasados ainda valem
+    assert config.token_valido(gerar_token(SEGREDO, time.time() + 60))
+    assert config.token_valido(gerar_token(SEGREDO, time.time() - 60))
+
+
+def test_token_expirado(config):
+    vencido = gerar_token(SEGREDO, time.time() - VALIDADE_TOKEN - 5)
+    futuro = gerar_token(SEGREDO, time.time() + VALIDADE_TOKEN + 5)
+
+    assert not config.token_valido(vencido)
+    assert not config.token_valido(futuro)
+
+
+def test_token_adulterado(config):
+    token = gerar_token(SEGREDO)
+    carimbo, assinatura = token.split(".")
+    trocado = "0" if assinatura[-1] != "0" else "1"
+
+    assert not config.token_valido(f"{carimbo}.{assinatura[:-1]}{trocado}")
+    # Carimbo trocado invalida a assinatura
+    assert not config.token_valido(f"{int(carimbo) + 1}.{assinatura}")
+    assert not config.token_valido(gerar_token("outro segredo"))
+    for invalido in (None, "", "abc", f"x{carimbo}.{assinatura}", carimbo):
+        assert not config.token_valido(invalido)
+
+
+def test_sem_segredo_nenhum_token_vale(config, monkeypatch):
+    token = gerar_token(SEGREDO)
+    monkeypatch.delenv("PROFILER_SECRET")
+
+    assert not ConfigProfiler().token_valido(token)
+    monkeypatch.setattr(CONFIG_PROFILER, "segredo", None)
+    with pytest.raises(ValueError):
+        gerar_token()
+
+
+@pytest.mark.parametrize(
+    "email, pode",
+    [
+        ("admin@exemplo.com", True),
+        ("ADMIN@exemplo.com ", True),
+        ("ops@exemplo.com", True),
+        ("outro@exemplo.com", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_pode_ver_perfis(config, email, pode):
+    assert config.pode_ver_perfis(email) is pode
+
+
+def _perfil():
+    perfil = cProfile.Profile()
+    perfil.enable()
+    sum(range(100))
+    perfil.disable()
+    return perfil
+
+
+def test_anel_guarda_so_os_mais_recentes(config):
+    anel = config.anel
+    assert anel.maximo == 3
+
+    salvos = [anel.salvar(_perfil(), "request", f"GET_/p{n}", 0.01) for n in range(5)]
+
+    assert [p["arquivo"] for p in anel.listar()] == salvos[:1:-1]
+    assert sorted(os.listdir(anel.diretorio)) == sorted(salvos[2:])
+
+
+def test_nome_do_perfil_saneado(tmp_path):
+    anel = AnelPerfis(str(tmp_path))
+
+    arquivo = anel.salvar(_perfil(), "task", "GET_/../etc/passwd?x=1", 1.234)
+
+    (perfil,) = anel.listar()
+    assert perfil["nome"] == "GET__.._etc_passwd_x_1" and perfil["duracao_ms"] == 1234
+    assert anel.caminho(arquivo) == os.path.join(str(tmp_path), arquivo)
+
+
+def test_caminho_nao_sai_do_anel(tmp_path):
+    anel = AnelPerfis(str(tmp_path / "anel"))
+    os.makedirs(anel.diretorio)
+    # Perfil válido, mas fora do diretório do anel
+    (tmp_path / "1-request-5-fora.prof").write_bytes(b"x")
+
+    for nome in (
+        "../1-request-5-fora.prof",
+        os.path.join(str(tmp_path), "1-request-5-fora.prof"),
+        "sub/1-request-5-fora.prof",
+        "..",
+        "1-request-5-fora.prof.txt",
+        "1-request-5-ausente.prof",
+    ):
+        assert anel.caminho(nome) is None, nome
+        assert anel.resumo_texto(nome) is None
+
+
+@pytest.fixture
+def cliente_admin(app, monkeypatch, tmp_path):
+    """Cliente HTTP logado; o email define se é admin dos perfis"""
+    from app.peticionador.models import User
+    from extensions import db
+
+    anel = AnelPerfis(str(tmp_path / "perfis"))
+    monkeypatch.setattr(CONFIG_PROFILER, "anel", anel)
+    monkeypatch.setattr(CONFIG_PROFILER, "admins", frozenset({"admin@exemplo.com"}))
+
+    def logar(email):
+        usuario = User(email=email)
+        db.session.add(usuario)
+        db.session.commit()
+        cliente = app.test_client()
+        with cliente.session_transaction() as sessao:
+            sessao["_user_id"] = str(usuario.id)
+            sessao["_fresh"] = True
+        return cliente
+
+    return logar, anel
+
+
+def test_rotas_de_perfis_para_o_admin(cliente_admin):
+    logar, anel = cliente_admin
+    arquivo = anel.salvar(_perfil(), "request", "GET_/x", 0.01)
+    cliente = logar("admin@exemplo.com")
+
+    lista = cliente.get("/peticionador/admin/perfis").get_json()
+    assert [p["arquivo"] for p in lista["perfis"]] == [arquivo]
+
+    baixado = cliente.get(f"/peticionador/admin/perfis/{arquivo}")
+    assert baixado.status_code == 200
+    with open(os.path.join(anel.diretorio, arquivo), "rb") as original:
+        assert baixado.data == original.read()
+
+    texto = cliente.get(f"/peticionador/admin/perfis/{arquivo}?formato=texto")
+    assert texto.status_code == 200 and b"function calls" in texto.data
+
+    assert cliente.get("/peticionador/admin/perfis/..%2Fx.prof").status_code == 404
+    assert cliente.get("/peticionador/admin/perfis/1-task-1-x.prof").status_code == 404
+
+
+def test_rotas_de_perfis_404_para_quem_nao_e_admin(cliente_admin):
+    logar, anel = cliente_admin
+    arquivo = anel.salvar(_perfil(), "request", "GET_/x", 0.01)
+    cliente = logar("usuario@exemplo.com")
+
+    assert cliente.get("/peticionador/admin/perfis").status_code == 404
+    assert cliente.get(f"/peticionador/admin/perfis/{arquivo}").status_code == 404
+    resposta = cliente.get(f"/peticionador/admin/perfis/{arquivo}?formato=texto")
+    assert resposta.status_code == 404
+
+
+def test_rotas_de_perfis_exigem_login(app):
+    resposta = app.test_client().get("/peticionador/admin/perfis")
+
+    assert resposta.status_code == 302 and "login" in resposta.location
+
+
+def test_perfilar_task_so_quando_sorteada(monkeypatch, tmp_path):
+    anel = AnelPerfis(str(tmp_path))
+    monkeypatch.setattr(CONFIG_PROFILER, "anel", anel)
+    monkeypatch.setattr(CONFIG_PROFILER, "taxa", 1.0)
+    task = type("Task", (), {"name": "tasks.gerar"})()
+
+    assert request_profiler.perfilar_task(task, lambda: 42) == 42
+    assert [p["nome"] for p in anel.listar()] == ["tasks.gerar"]
+
+    monkeypatch.setattr(CONFIG_PROFILER, "taxa", 0.0)
+    request_profiler.perfilar_task(task, lambda: 42)
+    assert len(anel.listar()) == 1
@@ -0,0 +1,236 @@
+"""Testes do pool de cópias pré-feitas dos templates (template_pool)."""
+
+import threading
+
+import pytest
+from googleapiclient.errors import HttpError
+
+import document_cache
+import template_pool
+from models import CopiaTemplate
+
+
+class _Requisicao:
+    def __init__(self, funcao):
+        self.funcao = funcao
+
+    def execute(self):
+        return self.funcao()
+
+
+class _Lote:
+    def __init__(self, callback):
+        self.callback = callback
+        self.itens = []
+
+    def add(self, requisicao, request_id):
+        self.itens.append((request_id, requisicao))
+
+    def execute(self):
+        for id_requisicao, requisicao in self.itens:
+            try:
+                self.callback(id_requisicao, requisicao.execute(), None)
+            except HttpError as erro:
+                self.callback(id_requisicao, None, erro)
+
+
+class _Resposta(dict):
+    reason = "erro simulado"
+
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+
+class Drive:
+    """Drive em memória: arquivos com nome, pastas e appProperties"""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.versao = "1"
+        self.erro_na_movimentacao = None
+        self.copias = 0
+        self._lock = threading.Lock()
+
+    def files(self):
+        return self
+
+    def new_batch_http_request(self, callback):
+        return _Lote(callback)
+
+    def get(self, fileId, fields, supportsAllDrives=True):
+        return _Requisicao(lambda: {"version": self.versao})
+
+    def copy(self, fileId, body, fields, supportsAllDrives=True):
+        def copiar():
+            with self._lock:
+                self.copias += 1
+                id_ = f"c{self.copias}"
+            self.arquivos[id_] = {
+                "name": body["name"],
+                "parents": list(body["parents"]),
+                "appProperties": dict(body["appProperties"]),
+            }
+            return {"id": id_}
+
+        return _Requisicao(copiar)
+
+    def update(self, fileId, body, fields, addParents, removeParents, **kwargs):
+        def mover():
+            if self.erro_na_movimentacao:
+                raise HttpError(_Resposta(self.erro_na_movimentacao), b"")
+            if fileId not in self.arquivos:
+                raise HttpError(_Resposta(404), b"")
+            arquivo = self.arquivos[fileId]
+            arquivo["name"] = body["name"]
+            arquivo["parents"].remove(removeParents)
+            arquivo["parents"].append(addParents)
+            for chave, valor in body["appProperties"].items():
+                if valor is None:
+                    arquivo["appProperties"].pop(chave, None)
+                else:
+                    arquivo["appProperties"][chave] = valor
+            return {"id": fileId}
+
+        return _Requisicao(mover)
+
+    def delete(self, fileId, supportsAllDrives=True):
+        return _Requisicao(lambda: self.arquivos.pop(fileId))
+
+    def na_pasta(self, pasta):
+        return sorted(i for i, a in self.arquivos.items() if pasta in a["parents"])
+
+
+@pytest.fixture
+def drive(app, monkeypatch):
+    monkeypatch.setattr(template_pool, "PASTA_STAGING", "STAGING")
+    monkeypatch.setattr(template_pool, "_reabastecedor", None)
+    document_cache.esquecer_revisoes()
+    return Drive()
+
+
+def _livres():
+    return sorted(c.google_id for c in CopiaTemplate.query.all())
+
+
+def test_reabastecer_completa_o_pool(drive):
+    assert template_pool.reabastecer(drive, ["T"], tamanho=3) == {"T": 3}
+    assert drive.na_pasta("STAGING") == _livres() == ["c1", "c2", "c3"]
+
+    assert template_pool.reabastecer(drive, ["T"], tamanho=3) == {"T": 0}
+    assert drive.copias == 3
+
+
+def test_retirar_move_a_copia_mais_antiga(drive):
+    template_pool.reabastecer(drive, ["T"], tamanho=2)
+
+    arquivo = template_pool.retirar(drive, "T", "Procuração", "CLIENTE")
+
+    assert arquivo == {"id": "c1"}
+    assert drive.arquivos["c1"]["parents"] == ["CLIENTE"]
+    assert drive.arquivos["c1"]["name"] == "Procuração"
+    assert drive.arquivos["c1"]["appProperties"] == {}
+    assert _livres() == ["c2"]
+
+
+def test_retirada_pede_reposicao(drive, monkeypatch):
+    pedidos = []
+    monkeypatch.setattr(template_pool, "_pedidos", {})
+    template_pool.registrar_reabastecedor(pedidos.append)
+    template_pool.reabastecer(drive, ["T"], tamanho=2)
+
+    template_pool.retirar(drive, "T", "a", "CLIENTE")
+    template_pool.retirar(drive, "T", "b", "CLIENTE")
+
+    assert pedidos == ["T"]  # o segundo pedido cai no INTERVALO_REPOSICAO
+
+
+def test_copia_apagada_no_drive_e_pulada(drive):
+    template_pool.reabastecer(drive, ["T"], tamanho=3)
+    drive.arquivos.pop("c1")
+
+    assert template_pool.retirar(drive, "T", "doc", "CLIENTE") == {"id": "c2"}
+    assert _livres() == ["c3"]
+
+
+def test_erro_ao_mover_devolve_a_copia(drive):
+    template_pool.reabastecer(drive, ["T"], tamanho=1)
+    drive.erro_na_movimentacao = 500
+
+    assert template_pool.retirar(drive, "T", "doc", "CLIENTE") is None
+    assert _livres() == ["c1"]
+    assert drive.na_pasta("STAGING") == ["c1"]
+
+
+def test_pool_vazio_ou_desligado(drive, monkeypatch):
+    assert template_pool.retirar(drive, "T", "doc", "CLIENTE") is None
+
+    monkeypatch.setattr(template_pool, "PASTA_STAGING", None)
+    assert template_pool.reabastecer(drive, ["T"], tamanho=3) == {}
+    assert template_pool.retirar(drive, "T", "doc", "CLIENTE") is None
+
+
+def test_revisao_nova_invalida_as_copias(drive):
+    template_pool.reabastecer(drive, ["T"], tamanho=2)
+    drive.versao = "2"
+    document_cache.esquecer_revisoes()
+
+    assert template_pool.retirar(drive, "T", "doc", "CLIENTE") is None
+    assert template_pool.reabastecer(drive, ["T"], tamanho=2) == {"T": 2}
+    assert drive.na_pasta("STAGING") == _livres() == ["c3", "c4"]
+
+
+def test_reabastecimentos_simultaneos_nao_duplicam(app, drive, monkeypatch):
+    from document_update import executar_em_lote
+
+    entraram = threading.Barrier(2, timeout=5)
+
+    def executar_devagar(*args, **kwargs):
+        # Sem a trava, as duas contariam as livres antes de qualquer cópia
+        try:
+            entraram.wait(timeout=0.5)
+        except threading.BrokenBarrierError:
+            pass
+        return executar_em_lote(*args, **kwargs)
+
+    monkeypatch.setattr("document_update.executar_em_lote", executar_devagar)
+
+    def reabastecer():
+        with app.app_context():
+            template_pool.reabastecer(drive, ["T"], tamanho=3)
+
+    threads = [threading.Thread(target=reabastecer) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert drive.copias == 3 and len(_livres()) == 3
+
+
+@pytest.fixture
+def enviadas_pela_default(monkeypatch):
+    """Instância Celery "default" corrente, como no import ou numa thread web"""
+    from celery import Celery, current_app
+
+    anterior = current_app._get_current_object()
+    default = Celery("default", set_as_current=True)
+    enviadas = []
+    monkeypatch.setattr(
+        default, "send_task", lambda nome, *args, **kwargs: enviadas.append(nome)
+    )
+    yield enviadas
+    anterior.set_current()
+
+
+def test_reposicao_vai_para_o_broker_configurado(enviadas_pela_default, app):
+    from app.celery_app import celery_da_app
+
+    template_pool._reabastecedor("T")
+
+    assert enviadas_pela_default == []
+    with celery_da_app(app).connection_for_read() as conexao:
+        mensagem = conexao.SimpleQueue("celery").get(timeout=1)
+    mensagem.ack()
+    assert mensagem.headers["task"] == "tasks.refill_template_pool"
+    assert mensagem.headers["argsrepr"] == "['T']"